@@ -10,15 +10,21 @@ import json
 import io
 import re
 import os
+import time
+from contextlib import nullcontext
 from datetime import datetime
 from mistralai import Mistral
 from dotenv import load_dotenv
 
 # Import modules custom
-from src.tag_extractor import extract_all_tags
+from src.tag_extractor import extract_all_tags, iter_extract_all_tags, ADVANCED_TAXONOMY_AVAILABLE
 from src.ai_analyzer import analyze_batch
 from src.auth import authenticate
-from src.database import init_database, save_scan_results, save_ai_results, get_all_clients, get_client_history, get_all_transcriptions, get_database_stats, search_transcriptions, get_all_clients_with_data
+from src.database import init_database, get_all_clients, get_client_history, get_all_transcriptions, get_database_stats, search_transcriptions, get_all_clients_with_data, get_known_content_hashes
+from src.document import content_hash
+from src.perf_profiler import collect_stage_profile, profile_stage
+from src.retag_job import RetagJob
+from src.write_queue import get_write_queue
 
 # Import activation engine
 try:
@@ -27,20 +33,10 @@ try:
 except ImportError:
     ACTIVATIONS_AVAILABLE = False
 
-# Import advanced extractor (taxonomie complète LVMH)
+# Taxonomie complète LVMH (vue avancée calculée sur le scan fusionné de tag_extractor)
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
-try:
-    from src.mappings.identity import GENRE_MAPPING, LANGUE_MAPPING, STATUT_MAPPING, PROFESSIONS_ADVANCED
-    from src.mappings.location import CITIES_ADVANCED
-    from src.mappings.lifestyle import SPORT_MAPPING, MUSIQUE_MAPPING, ANIMAUX_MAPPING, VOYAGE_MAPPING, ART_CULTURE_MAPPING, GASTRONOMIE_MAPPING
-    from src.mappings.style import PIECES_MAPPING, COULEURS_ADVANCED, MATIERES_ADVANCED, SENSIBILITE_MODE, TAILLES_MAPPING
-    from src.mappings.purchase import MOTIF_ADVANCED, TIMING_MAPPING, MARQUES_LVMH, FREQUENCE_ACHAT
-    from src.mappings.preferences import REGIME_MAPPING, ALLERGIES_MAPPING, VALEURS_MAPPING
-    from src.mappings.tracking import ACTIONS_MAPPING, ECHEANCES_MAPPING, CANAUX_MAPPING
-    ADVANCED_MODE = True
-except ImportError:
-    ADVANCED_MODE = False
+ADVANCED_MODE = ADVANCED_TAXONOMY_AVAILABLE
 
 # Charger variables d'environnement
 load_dotenv()
@@ -98,124 +94,6 @@ def sanitize_display_text(text: str) -> str:
     return text
 
 
-def scan_text_advanced(text: str, mapping: dict) -> list:
-    """Scanner avancé pour les mappings de la taxonomie complète."""
-    if not text:
-        return []
-    text_lower = text.lower()
-    found = []
-    for category, keywords in mapping.items():
-        for kw in keywords:
-            if kw.lower() in text_lower:
-                found.append(category)
-                break
-    return list(set(found))
-
-
-def scan_nested_cities(text: str, cities_mapping: dict) -> dict:
-    """Scanner pour les villes avec structure imbriquée."""
-    if not text:
-        return {}
-    text_lower = text.lower()
-    results = {}
-    for region, cities in cities_mapping.items():
-        found = []
-        for city, keywords in cities.items():
-            for kw in keywords:
-                if kw.lower() in text_lower:
-                    found.append(city)
-                    break
-        if found:
-            results[region] = found
-    return results
-
-
-def extract_advanced_tags(text: str, base_tags: dict) -> dict:
-    """Enrichit les tags de base avec la taxonomie avancée."""
-    if not ADVANCED_MODE:
-        return base_tags
-    
-    cleaned = base_tags.get("cleaned_text", text)
-    
-    # Identité
-    genre = scan_text_advanced(cleaned, GENRE_MAPPING)
-    langue = scan_text_advanced(cleaned, LANGUE_MAPPING)
-    statut = scan_text_advanced(cleaned, STATUT_MAPPING)
-    profession_adv = scan_text_advanced(cleaned, PROFESSIONS_ADVANCED)
-    
-    # Localisation enrichie
-    localisation = scan_nested_cities(cleaned, CITIES_ADVANCED)
-    
-    # Lifestyle
-    sport = scan_text_advanced(cleaned, SPORT_MAPPING)
-    musique = scan_text_advanced(cleaned, MUSIQUE_MAPPING)
-    animaux = scan_text_advanced(cleaned, ANIMAUX_MAPPING)
-    voyage = scan_text_advanced(cleaned, VOYAGE_MAPPING)
-    art_culture = scan_text_advanced(cleaned, ART_CULTURE_MAPPING)
-    gastronomie = scan_text_advanced(cleaned, GASTRONOMIE_MAPPING)
-    
-    # Style avancé
-    pieces = scan_text_advanced(cleaned, PIECES_MAPPING)
-    couleurs_adv = scan_text_advanced(cleaned, COULEURS_ADVANCED)
-    matieres_adv = scan_text_advanced(cleaned, MATIERES_ADVANCED)
-    sensibilite = scan_text_advanced(cleaned, SENSIBILITE_MODE)
-    tailles = scan_text_advanced(cleaned, TAILLES_MAPPING)
-    
-    # Achat avancé
-    motif_adv = scan_text_advanced(cleaned, MOTIF_ADVANCED)
-    timing = scan_text_advanced(cleaned, TIMING_MAPPING)
-    marques = scan_text_advanced(cleaned, MARQUES_LVMH)
-    frequence = scan_text_advanced(cleaned, FREQUENCE_ACHAT)
-    
-    # Préférences
-    regime = scan_text_advanced(cleaned, REGIME_MAPPING)
-    allergies = scan_text_advanced(cleaned, ALLERGIES_MAPPING)
-    valeurs = scan_text_advanced(cleaned, VALEURS_MAPPING)
-    
-    # Suivi CRM
-    actions = scan_text_advanced(cleaned, ACTIONS_MAPPING)
-    echeances = scan_text_advanced(cleaned, ECHEANCES_MAPPING)
-    canaux = scan_text_advanced(cleaned, CANAUX_MAPPING)
-    
-    # Enrichir les tags de base
-    base_tags["genre"] = genre[0] if genre else None
-    base_tags["langue"] = langue
-    base_tags["statut_client"] = statut[0] if statut else None
-    base_tags["profession"] = profession_adv if profession_adv else base_tags.get("profession", [])
-    base_tags["localisation_detail"] = localisation
-    base_tags["sport"] = sport
-    base_tags["musique"] = musique
-    base_tags["animaux"] = animaux[0] if animaux else None
-    base_tags["voyage"] = voyage
-    base_tags["art_culture"] = art_culture
-    base_tags["gastronomie"] = gastronomie
-    base_tags["pieces_favorites"] = pieces
-    base_tags["couleurs"] = couleurs_adv if couleurs_adv else base_tags.get("couleurs", [])
-    base_tags["matieres"] = matieres_adv if matieres_adv else base_tags.get("matieres", [])
-    base_tags["sensibilite_mode"] = sensibilite[0] if sensibilite else None
-    base_tags["tailles"] = tailles
-    base_tags["motif_achat"] = motif_adv if motif_adv else base_tags.get("motif_achat", [])
-    base_tags["timing"] = timing[0] if timing else None
-    base_tags["marques_preferees"] = marques
-    base_tags["frequence_achat"] = frequence[0] if frequence else None
-    base_tags["regime"] = regime
-    base_tags["allergies"] = allergies
-    base_tags["valeurs"] = valeurs
-    base_tags["actions_crm"] = actions
-    base_tags["echeances"] = echeances
-    base_tags["canaux_contact"] = canaux
-    
-    # Fusionner centres_interet avec les nouveaux
-    centres = base_tags.get("centres_interet", [])
-    centres.extend(sport)
-    centres.extend(musique)
-    centres.extend(art_culture)
-    centres.extend(gastronomie)
-    base_tags["centres_interet"] = list(set(centres))
-    
-    return base_tags
-
-
 def detect_date_column(df: pd.DataFrame):
     """Détecte une colonne de date exploitable dans le CSV."""
     candidates = [
@@ -1109,6 +987,32 @@ def main():
         📊 Visualisations live
         """)
         
+        st.markdown("---")
+        st.markdown("**⏱️ Profilage:**")
+        st.checkbox("Profiler le Scan Turbo", key="profile_scan",
+                    help="Temps par étape, rapport dans output/reports/perf/")
+        st.selectbox("Capture détaillée", ["Aucune", "cProfile", "tracemalloc"], key="profile_capture",
+                     disabled=not st.session_state.get("profile_scan"))
+        if st.session_state.get("last_perf_report"):
+            st.caption(f"Dernier rapport : {st.session_state['last_perf_report']}")
+        
+        st.markdown("---")
+        st.markdown("**💾 Écriture en base:**")
+        queue_status = get_write_queue().status()
+        if queue_status["pending_jobs"]:
+            st.caption(f"⏳ {queue_status['pending_results']} résultats en attente d'écriture")
+            if st.button("Écrire maintenant", key="write_queue_flush"):
+                with st.spinner("Écriture en base..."):
+                    get_write_queue().flush(timeout=60)
+                st.rerun()
+        else:
+            st.caption("✅ Tout est écrit en base")
+        if queue_status["failed_jobs"]:
+            st.warning(f"⚠️ {queue_status['failed_jobs']} lots non écrits : {queue_status['last_error']}")
+            if st.button("Réessayer", key="write_queue_retry"):
+                get_write_queue().retry_failed()
+                st.rerun()
+        
         st.markdown("---")
         st.markdown("**💰 Économie:**")
         st.metric("Coût/client", "0.002$", "-50%")
@@ -1146,12 +1050,14 @@ def main():
             
             try:
                 # Lecture intelligente du CSV (détection séparateur)
+                read_started = time.perf_counter()
                 try:
                     df = pd.read_csv(uploaded_file, sep=None, engine='python')
                 except:
                     # Fallback classique
                     uploaded_file.seek(0)
                     df = pd.read_csv(uploaded_file)
+                source_read_s = time.perf_counter() - read_started
                 
                 st.info(f"Base de données chargée : {len(df)} clients")
                 
@@ -1176,62 +1082,104 @@ def main():
                     # BOUTON 1 : SCAN PYTHON RAPIDE (Batch Processing)
                     if st.button("⚡ SCAN TURBO (Nettoyage + Tags)", type="primary", use_container_width=True, help="Instantané - Moteur Python"):
                         
-                        # Traitement par lot instantané
-                        scan_results = []
-                        progress_bar = st.progress(0)
+                        # Profilage optionnel (barre latérale): rapport par étape dans output/reports/perf/
+                        scan_profile = collect_stage_profile(
+                            "scan_turbo",
+                            cprofile=st.session_state.get("profile_capture") == "cProfile",
+                            tracemalloc_enabled=st.session_state.get("profile_capture") == "tracemalloc",
+                        ) if st.session_state.get("profile_scan") else nullcontext()
+                        with scan_profile as profiler:
+                            # Traitement par lot instantané
+                            if profiler is not None:
+                                profiler.add("file_read", source_read_s)
+                            scan_results = []
+                            progress_bar = st.progress(0)
                         
-                        total_rows = len(df)
-                        # On traite TOUT le dataset ou la limite choisie par l'user ? 
-                        # Pour "Turbo", on peut tout faire, c'est rapide. Limitons à max_clients pour cohérence.
-                        rows_to_process = df.head(max_clients)
+                            total_rows = len(df)
+                            # On traite TOUT le dataset ou la limite choisie par l'user ? 
+                            # Pour "Turbo", on peut tout faire, c'est rapide. Limitons à max_clients pour cohérence.
+                            rows_to_process = df.head(max_clients)
+
+                            # Ingestion incrémentale: conversations déjà en base pour ce client ignorées (ni extraction ni écriture)
+                            row_keys = [
+                                (row.get("ID", f"CLIENT_{idx}"), content_hash(row.get("Transcription", "")))
+                                for idx, row in rows_to_process.iterrows()
+                            ]
+                            try:
+                                with profile_stage("db_read"):
+                                    known_keys = get_known_content_hashes(row_keys)
+                            except Exception:
+                                known_keys = set()
+                            is_new = [(str(client_id), digest) not in known_keys for client_id, digest in row_keys]
+                            already_stored = len(is_new) - sum(is_new)
+                            rows_to_process = rows_to_process[is_new]
+                            row_hashes = [digest for (_, digest), new in zip(row_keys, is_new) if new]
+                            if already_stored:
+                                st.info(f"⏭️ {already_stored} conversations déjà en base (inchangées) ignorées")
                         
-                        for idx, row in rows_to_process.iterrows():
-                            client_id = row.get("ID", f"CLIENT_{idx}")
-                            raw_text = row.get("Transcription", "")
-                            date_col = st.session_state.get("date_col")
-                            source_date = parse_date_value(row.get(date_col)) if date_col else pd.NaT
-                            safe_text = sanitize_display_text(raw_text)
-                            
-                            # Extraction 100% Python (base)
-                            tags = extract_all_tags(raw_text)
-                            
-                            # Enrichissement avec taxonomie avancée (30 catégories)
-                            if ADVANCED_MODE:
-                                tags = extract_advanced_tags(raw_text, tags)
+                            # Extraction 100% Python en lot, répartie sur tous les coeurs.
+                            # En mode avancé (30 catégories), l'enrichissement est lu sur le même scan.
+                            # Chaque note n'est scannée que par les mots-clés de sa langue (détectée si absente).
+                            if "Language" in rows_to_process.columns:
+                                languages = [lang if isinstance(lang, str) else "auto" for lang in rows_to_process["Language"]]
+                            else:
+                                languages = ["auto"] * len(rows_to_process)
+                            # Le contexte d'analyse des activations est produit sur le même passage.
+                            batch_tags = iter_extract_all_tags(
+                                rows_to_process["Transcription"].tolist(), advanced=ADVANCED_MODE, languages=languages,
+                                with_context=True,
+                            )
+                        
+                            # Nettoyage + extraction (dans les workers de iter_extract_all_tags)
+                            with profile_stage("extraction"):
+                                for (idx, row), (tags, analysis_context), row_hash, language in zip(
+                                        rows_to_process.iterrows(), batch_tags, row_hashes, languages):
+                                    client_id = row.get("ID", f"CLIENT_{idx}")
+                                    raw_text = row.get("Transcription", "")
+                                    date_col = st.session_state.get("date_col")
+                                    source_date = parse_date_value(row.get(date_col)) if date_col else pd.NaT
+                                    safe_text = sanitize_display_text(raw_text)
                             
-                            # Structure de résultat préliminaire (sans IA)
-                            scan_results.append({
-                                "client_id": client_id,
-                                "transcription_originale": (safe_text[:200] + "...") if len(safe_text) > 200 else safe_text,
-                                "tags_extracted": tags,
-                                "cleaned_text": tags["cleaned_text"],
-                                "source_date": source_date,
-                                # Champs IA vides pour l'instant
-                                "resume_complet": "Analyse IA en attente...",
-                                "segment_client": "À définir (IA)",
-                                "urgency_score_final": tags["urgence_score"], # On prend le score Python par défaut
-                                "insights_marketing": {},
-                                "analyse_intelligente": {},
-                                "objections_freins": []
-                            })
-                            progress_bar.progress((idx + 1) / max_clients)
+                                    # Structure de résultat préliminaire (sans IA)
+                                    scan_results.append({
+                                        "client_id": client_id,
+                                        "transcription_originale": (safe_text[:200] + "...") if len(safe_text) > 200 else safe_text,
+                                        "tags_extracted": tags,
+                                        "cleaned_text": tags["cleaned_text"],
+                                        "analysis_context": analysis_context,
+                                        "content_hash": row_hash,
+                                        "language": language,
+                                        "source_date": source_date,
+                                        # Champs IA vides pour l'instant
+                                        "resume_complet": "Analyse IA en attente...",
+                                        "segment_client": "À définir (IA)",
+                                        "urgency_score_final": tags["urgence_score"], # On prend le score Python par défaut
+                                        "insights_marketing": {},
+                                        "analyse_intelligente": {},
+                                        "objections_freins": []
+                                    })
+                                    progress_bar.progress((idx + 1) / max_clients)
                         
-                        progress_bar.empty()
-                        mode_label = "Taxonomie Complète (30 catégories)" if ADVANCED_MODE else "Tags de Base"
-                        st.success(f"✅ {max_clients} clients scannés ! Mode: {mode_label}")
+                            progress_bar.empty()
+                            mode_label = "Taxonomie Complète (30 catégories)" if ADVANCED_MODE else "Tags de Base"
+                            st.success(f"✅ {len(scan_results)} clients scannés ! Mode: {mode_label}")
                         
-                        # Sauvegarde Session
-                        st.session_state["results"] = scan_results
-                        st.session_state["scan_done"] = True
-                        st.session_state["ai_done"] = False # Reset AI status
+                            # Sauvegarde Session
+                            st.session_state["results"] = scan_results
+                            st.session_state["scan_done"] = True
+                            st.session_state["ai_done"] = False # Reset AI status
                         
-                        # Sauvegarde automatique en BDD
-                        try:
-                            db_stats = save_scan_results(scan_results, source_file=uploaded_file_name)
-                            st.toast(f"💾 {db_stats['inserted']} clients sauvegardés en BDD", icon="💾")
-                        except Exception as e:
-                            st.warning(f"⚠️ Erreur sauvegarde BDD: {e}")
+                            # Sauvegarde automatique en BDD (file d'écriture durable, écrite en arrière-plan)
+                            try:
+                                with profile_stage("db_write"):
+                                    get_write_queue().enqueue_scan_results(scan_results, source_file=uploaded_file_name)
+                                st.toast(f"💾 {len(scan_results)} clients en cours de sauvegarde en BDD", icon="💾")
+                            except Exception as e:
+                                st.warning(f"⚠️ Erreur sauvegarde BDD: {e}")
                         
+                        if profiler is not None:
+                            st.session_state["last_perf_report"] = profiler.path
+
                         st.rerun()
 
                 with col_act2:
@@ -1306,8 +1254,8 @@ def main():
                         
                         # Sauvegarde résultats IA en BDD
                         try:
-                            save_ai_results(enriched_results)
-                            st.toast("💾 Analyses IA sauvegardées en BDD", icon="🧠")
+                            get_write_queue().enqueue_ai_results(enriched_results)
+                            st.toast("💾 Analyses IA en cours de sauvegarde en BDD", icon="🧠")
                         except Exception as e:
                             st.warning(f"⚠️ Erreur sauvegarde IA: {e}")
                         
@@ -1851,6 +1799,26 @@ def main():
         except Exception as e:
             st.warning(f"BDD vide ou erreur : {e}")
         
+        # Re-tagging sélectif après modification de la taxonomie (job en arrière-plan)
+        with st.expander("🔄 Re-tagging après modification de la taxonomie"):
+            st.caption("Seules les catégories dont le mapping a changé sont recalculées.")
+            retag_job = st.session_state.get("retag_job")
+            if retag_job is None or retag_job.status["state"] in ("done", "failed"):
+                if st.button("Lancer le re-tagging", key="retag_start"):
+                    st.session_state["retag_job"] = RetagJob().start()
+                    st.rerun()
+            if retag_job is not None:
+                status = retag_job.status
+                if status["total"]:
+                    st.progress(min(status["scanned"] / status["total"], 1.0))
+                st.write(f"État : {status['state']} — {status['scanned']}/{status['total']} lignes lues, {status['updated']} re-taggées")
+                if status["fields"]:
+                    st.caption("Champs recalculés : " + ", ".join(f"{k} ({v})" for k, v in status["fields"].items()))
+                if status["error"]:
+                    st.error(status["error"])
+                if status["state"] == "running" and st.button("Actualiser", key="retag_refresh"):
+                    st.rerun()
+        
         st.markdown("---")
         
         # Sous-tabs
@@ -1880,15 +1848,24 @@ def main():
         
         with db_tab2:
             st.subheader("🔍 Recherche dans les Transcriptions")
-            search_query = st.text_input("Rechercher un mot-clé", placeholder="Ex: Louis Vuitton, voyage, mariage...")
+            search_query = st.text_input("Rechercher un mot-clé", placeholder="Ex: Louis Vuitton, voyage, \"sac noir\"...")
+            tag_query = st.text_input("Filtrer par tags (optionnel)", placeholder="Ex: ville=Paris, couleurs=Noir")
+            # "champ=valeur" séparés par des virgules ; un même champ répété = l'une des valeurs
+            tag_filters = {}
+            for item in tag_query.split(","):
+                field, sep, value = item.partition("=")
+                if sep and field.strip() and value.strip():
+                    tag_filters.setdefault(field.strip(), []).append(value.strip())
             
-            if search_query:
+            if search_query or tag_filters:
                 try:
-                    results_search = search_transcriptions(search_query)
+                    results_search = search_transcriptions(search_query, tags=tag_filters)
                     if results_search:
                         st.success(f"{len(results_search)} résultat(s) trouvé(s)")
                         for r in results_search:
                             with st.expander(f"🔹 {r['client_id']} — {r.get('source_date', 'N/A')}"):
+                                if r.get("snippet"):
+                                    st.markdown(r["snippet"])
                                 st.markdown(f"**Segment:** {r.get('segment', 'N/A')} | **Ville:** {r.get('ville', 'N/A')} | **Genre:** {r.get('genre', 'N/A')}")
                                 st.text_area("Transcription", r.get("texte_original", ""), height=100, disabled=True, key=f"search_{r['id']}")
                     else:
@@ -11,11 +11,13 @@ import pandas as pd
 import os
 import time
 import asyncio
+import argparse
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from tqdm import tqdm
 from mistralai import Mistral
 from dotenv import load_dotenv
+from src.run_manifest import RunManifest
 
 # ============================================================================
 # CONFIGURATION
@@ -28,6 +30,7 @@ load_dotenv()
 INPUT_FILE = 'LVMH_Notes_CA101-400.csv'  # Fichier source
 OUTPUT_FILE = 'LVMH_Notes_CA101-400_cleaned.csv'  # Fichier de sortie
 COLUMN_NAME = 'Transcription'  # Nom de la colonne à nettoyer
+MANIFEST_DB = 'data/profiles.db'  # Base du manifeste de reprise (--resume)
 
 # Configuration Mistral AI
 MISTRAL_API_KEY = os.getenv('MISTRAL_API_KEY')
@@ -90,7 +93,8 @@ class TranscriptionCleaner:
             'total': 0,
             'success': 0,
             'errors': 0,
-            'skipped': 0
+            'skipped': 0,
+            'resumed': 0
         }
     
     
@@ -189,13 +193,16 @@ class TranscriptionCleaner:
         tasks = [self.clean_text_async(text) for text in texts]
         return await asyncio.gather(*tasks)
     
-    def process_dataframe(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
+    def process_dataframe(self, df: pd.DataFrame, column: str,
+                          manifest: Optional[RunManifest] = None) -> pd.DataFrame:
         """
         Traite un DataFrame complet avec traitement parallèle par batch
         
         Args:
             df: DataFrame contenant les transcriptions
             column: Nom de la colonne à nettoyer
+            manifest: Manifeste de reprise (lignes déjà nettoyées restaurées
+                sans appel API, chaque batch réussi y est enregistré)
             
         Returns:
             DataFrame avec colonne nettoyée (écrase l'originale)
@@ -206,22 +213,43 @@ class TranscriptionCleaner:
         # Création d'une copie pour ne pas modifier l'original (au début)
         df_clean = df.copy()
         
-        # Traitement avec barre de progression
-        print(f"\n🧹 Nettoyage de {len(df)} transcriptions...")
-        print(f"⚡ Traitement par batch de {BATCH_SIZE} requêtes en parallèle")
-        self.stats['total'] = len(df)
-        
         # Récupérer tous les textes
         all_texts = df[column].tolist()
-        all_cleaned = []
+        all_cleaned = [None] * len(all_texts)
+        self.stats['total'] = len(df)
+
+        # Lignes restant à nettoyer (toutes sans manifeste)
+        if manifest is None:
+            todo = [((idx, None), text) for idx, text in enumerate(all_texts)]
+        else:
+            todo = list(manifest.pending(all_texts))
+            todo_offsets = {offset for (offset, _), _ in todo}
+            for offset, cleaned_text in manifest.results().items():
+                if offset < len(all_texts) and offset not in todo_offsets:
+                    all_cleaned[offset] = cleaned_text
+            self.stats['resumed'] = len(all_texts) - len(todo)
+        
+        # Traitement avec barre de progression
+        print(f"\n🧹 Nettoyage de {len(todo)} transcriptions...")
+        if self.stats['resumed']:
+            print(f"⏩ {self.stats['resumed']} transcriptions déjà nettoyées (reprise)")
+        print(f"⚡ Traitement par batch de {BATCH_SIZE} requêtes en parallèle")
         
         # Traiter par batch
-        for i in tqdm(range(0, len(all_texts), BATCH_SIZE), desc="Progression"):
-            batch = all_texts[i:i + BATCH_SIZE]
+        for i in tqdm(range(0, len(todo), BATCH_SIZE), desc="Progression"):
+            batch = todo[i:i + BATCH_SIZE]
             
             # Traiter le batch en parallèle
-            cleaned_batch = asyncio.run(self.process_batch_async(batch))
-            all_cleaned.extend(cleaned_batch)
+            cleaned_batch = asyncio.run(self.process_batch_async([text for _, text in batch]))
+            for ((offset, _), _), cleaned_text in zip(batch, cleaned_batch):
+                all_cleaned[offset] = cleaned_text
+
+            # Checkpoint: seules les lignes réussies sont acquises (les échecs seront retentés)
+            if manifest is not None:
+                succeeded = [(checkpoint, cleaned_text)
+                             for (checkpoint, _), cleaned_text in zip(batch, cleaned_batch)
+                             if cleaned_text is not None]
+                manifest.record([c for c, _ in succeeded], [t for _, t in succeeded])
         
         # Remplir la colonne ORIGINALE avec les résultats (écrasement)
         for idx, cleaned_text in enumerate(all_cleaned):
@@ -239,6 +267,8 @@ class TranscriptionCleaner:
         print(f"Total de transcriptions : {self.stats['total']}")
         print(f"✅ Nettoyées avec succès : {self.stats['success']}")
         print(f"⏭️  Ignorées (vides)      : {self.stats['skipped']}")
+        if self.stats['resumed']:
+            print(f"⏩ Reprises (manifeste)  : {self.stats['resumed']}")
         print(f"❌ Erreurs              : {self.stats['errors']}")
         
         if self.stats['total'] > 0:
@@ -307,6 +337,10 @@ def save_data(df: pd.DataFrame, file_path: str):
 
 def main():
     """Point d'entrée principal du script"""
+    parser = argparse.ArgumentParser(description="Nettoyage de transcriptions avec Mistral AI")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprendre un nettoyage interrompu (lignes déjà nettoyées restaurées)")
+    args = parser.parse_args()
     
     print("="*60)
     print("🚀 NETTOYEUR DE TRANSCRIPTIONS AVEC MISTRAL AI")
@@ -332,9 +366,12 @@ def main():
         # 4. Initialisation du nettoyeur
         print(f"\n🤖 Initialisation de Mistral AI ({MISTRAL_MODEL})...")
         cleaner = TranscriptionCleaner(MISTRAL_API_KEY, MISTRAL_MODEL)
+        Path(MANIFEST_DB).parent.mkdir(parents=True, exist_ok=True)
+        manifest = RunManifest.start(MANIFEST_DB, "mistral_cleaning", INPUT_FILE, resume=args.resume)
         
         # 5. Traitement
-        df_cleaned = cleaner.process_dataframe(df, COLUMN_NAME)
+        df_cleaned = cleaner.process_dataframe(df, COLUMN_NAME, manifest)
+        manifest.finish(len(df))
         
         # 6. Sauvegarde
         print(f"\n💾 Sauvegarde dans {OUTPUT_FILE}...")
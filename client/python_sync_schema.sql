@@ -0,0 +1,57 @@
+-- ═══════════════════════════════════════════════════════════
+-- Tables écrites par le backend Python (src/database.py, mode Supabase)
+-- Run this in: Supabase Dashboard → SQL Editor → New Query → Run
+-- Les ids des transcriptions / tags / analyses sont des UUID générés côté
+-- client (src/supabase_sync.py): les tags référencent leur transcription
+-- sans relire l'id inséré, et une requête rejouée ne crée pas de doublon.
+-- ═══════════════════════════════════════════════════════════
+
+CREATE TABLE IF NOT EXISTS clients (
+  id TEXT PRIMARY KEY,
+  nom TEXT,
+  genre TEXT,
+  segment TEXT DEFAULT 'Inconnu',
+  canal_prefere TEXT,
+  ville TEXT,
+  age_range TEXT,
+  statut TEXT DEFAULT 'Nouveau',
+  created_at TIMESTAMPTZ DEFAULT now(),
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS transcriptions (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  client_id TEXT NOT NULL REFERENCES clients(id),
+  texte_original TEXT NOT NULL,
+  texte_nettoye TEXT,
+  source_date DATE,
+  uploaded_at TIMESTAMPTZ DEFAULT now(),
+  source_file TEXT,
+  content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transcriptions_client ON transcriptions(client_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transcriptions_client_content
+  ON transcriptions(client_id, content_hash) WHERE content_hash IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS tags_extraits (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  transcription_id UUID NOT NULL REFERENCES transcriptions(id) ON DELETE CASCADE,
+  client_id TEXT NOT NULL REFERENCES clients(id),
+  tags_json TEXT NOT NULL,
+  completeness REAL DEFAULT 0,
+  extraction_mode TEXT DEFAULT 'base',
+  extracted_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS ai_analyses (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  client_id TEXT NOT NULL REFERENCES clients(id),
+  resume_complet TEXT,
+  segment_client TEXT,
+  ice_breaker TEXT,
+  urgency_score_final INTEGER,
+  insights_json TEXT,
+  analyse_json TEXT,
+  objections_json TEXT,
+  analyzed_at TIMESTAMPTZ DEFAULT now()
+);
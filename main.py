@@ -5,6 +5,9 @@ from src.csv_processor import CSVProcessor
 from src.text_analyzer import TextAnalyzer
 from src.tag_engine import TagEngine
 from src.profile_generator import ProfileGenerator
+from src.profile_pipeline import run_parallel, run_serial
+from src.run_manifest import RunManifest
+from src.perf_profiler import collect_stage_profile, profile_stage
 from tqdm import tqdm
 
 
@@ -19,8 +22,25 @@ def main():
     parser = argparse.ArgumentParser(description="Systeme d'automatisation - Profils Clients LVMH")
     parser.add_argument("input_path", nargs="?", default=None, help="Chemin du fichier d'entree (positionnel)")
     parser.add_argument("--input", dest="input_flag", default=None, help="Chemin du fichier d'entree (--input)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus d'analyse (>1: pool + ecrivain unique par lots)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprendre un traitement interrompu (saute les lignes deja traitees)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Temps par etape, rapport dans output/reports/perf/")
+    parser.add_argument("--cprofile", action="store_true", help="--profile + profil cProfile (.prof)")
+    parser.add_argument("--tracemalloc", action="store_true", help="--profile + memoire par etape (tracemalloc)")
     args = parser.parse_args()
 
+    if not (args.profile or args.cprofile or args.tracemalloc):
+        run(args)
+        return
+    with collect_stage_profile("main", cprofile=args.cprofile, tracemalloc_enabled=args.tracemalloc) as profiler:
+        run(args)
+    print(f"OK - Rapport de profilage : {profiler.path}")
+
+
+def run(args):
     # 1. Initialisation des modules
     print("Initialisation des modules...")
     # Utilisation du fichier passé en argument ou par défaut
@@ -33,36 +53,40 @@ def main():
     profile_generator = ProfileGenerator()
     print()
 
-    # 2. Chargement des conversations
-    print("Chargement des conversations...")
-    conversations = csv_processor.get_conversations()
-    print(f"OK - {len(conversations)} conversations chargees")
+    # 2. Lecture des conversations en flux (mémoire constante, quelle que soit la taille du fichier)
+    print("Lecture des conversations en flux...")
+    conversations = csv_processor.iter_conversations()
     print()
 
     # 3. Traitement de chaque conversation
     print("Analyse et generation des profils...")
-    for conversation in tqdm(conversations, desc="Traitement"):
-        # Nettoyage de sécurité (XSS / HTML) avant tout traitement
-        if "transcription" in conversation:
-            conversation["transcription"] = text_analyzer.clean_text(conversation["transcription"])
-
-        # Analyser le texte
-        analysis = text_analyzer.analyze_full_text(conversation["transcription"])
-
-        # Creer le profil
-        profile = tag_engine.create_profile(conversation, analysis)
-
-        # Sauvegarder le profil
-        profile_generator.save_profile(profile)
+    # Manifeste de reprise (tables run_manifests / run_rows de la base des profils)
+    manifest = RunManifest.start(profile_generator.db_path, "profiles", input_file, resume=args.resume)
+    if manifest.is_complete:
+        print("OK - Fichier inchange et deja entierement traite : rien a faire")
+        processed = 0
+    else:
+        with tqdm(desc="Traitement", unit="conv") as progress:
+            if args.workers > 1:
+                processed = run_parallel(conversations, profile_generator, args.workers,
+                                         progress=progress, manifest=manifest)
+            else:
+                processed = run_serial(conversations, profile_generator, text_analyzer, tag_engine,
+                                       progress=progress, manifest=manifest)
+        manifest.finish()
+        if manifest.skipped:
+            print(f"OK - {manifest.skipped} conversations deja traitees (reprise)")
 
     print()
+    print(f"OK - {processed} conversations nouvelles ou modifiees traitees")
     print("OK - Tous les profils ont ete generes et sauvegardes !")
     print()
 
     # 4. Generation des statistiques
     print("Generation des statistiques...")
-    stats = profile_generator.get_statistics()
-    profile_generator.save_statistics_report(stats)
+    with profile_stage("statistics"):
+        stats = profile_generator.get_statistics()
+        profile_generator.save_statistics_report(stats)
     print()
 
     # 5. Affichage du resume
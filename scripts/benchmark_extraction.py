@@ -0,0 +1,338 @@
+"""
+Benchmark de l'extraction de tags (débit, latence, mémoire)
+- Cibles: extract_all_tags, extract_all_tags_advanced, TextAnalyzer.analyze_full_text,
+  extract_all_actionable
+- Corpus: CSV fournis (multilang, notes) + corpus synthétiques 10k / 100k / 1M
+  (phrases réelles recombinées, génération déterministe)
+- Mesures: docs/s, latence p50 / p99 par document, pic de RSS
+- Chaque couple (cible, corpus) tourne dans un processus neuf: le pic de RSS
+  et les caches (automate, mémo du dernier scan) ne fuient pas d'une mesure à l'autre.
+  Le cache d'extraction (EXTRACTION_CACHE) est désactivé: on mesure l'extracteur.
+
+Usage:
+  python scripts/benchmark_extraction.py                        # CSV + synthetic-10k, comparé à la baseline
+  python scripts/benchmark_extraction.py --corpora all          # + 100k et 1M (long)
+  python scripts/benchmark_extraction.py --targets extract_all_tags --limit 2000
+  python scripts/benchmark_extraction.py --update-baseline      # enregistre les résultats comme baseline
+  python scripts/benchmark_extraction.py --fail-on-regression   # code de sortie 1 si régression
+
+Les baselines dépendent de la machine: les régénérer (--update-baseline) avant
+de comparer deux versions sur un nouveau poste.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "scripts", "benchmark_baseline.json")
+REPORTS_DIR = os.path.join(ROOT, "output", "reports", "benchmarks")
+
+CSV_CORPORA = {
+    "multilang": "LVMH_sample_multilang_FULL.csv",
+    "notes": "LVMH_Notes_CA101-400.csv",
+}
+SYNTHETIC_CORPORA = {
+    "synthetic-10k": 10_000,
+    "synthetic-100k": 100_000,
+    "synthetic-1m": 1_000_000,
+}
+DEFAULT_CORPORA = ["multilang", "notes", "synthetic-10k"]
+TARGETS = ["extract_all_tags", "extract_all_tags_advanced", "analyze_full_text", "extract_all_actionable"]
+
+# Seuils de régression (relatifs à la baseline)
+THROUGHPUT_TOLERANCE = 0.10   # docs/s en baisse de plus de 10%
+LATENCY_TOLERANCE = 0.20      # p99 en hausse de plus de 20%
+RSS_TOLERANCE = 0.20          # pic de RSS en hausse de plus de 20%
+
+# ============================================================================
+# 1. CORPUS
+# ============================================================================
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def _read_csv(path: str) -> List[Tuple[str, Optional[str]]]:
+    import pandas as pd
+    df = pd.read_csv(os.path.join(ROOT, path))
+    languages = df["Language"] if "Language" in df.columns else [None] * len(df)
+    return [(text if isinstance(text, str) else "", lang if isinstance(lang, str) else None)
+            for text, lang in zip(df["Transcription"], languages)]
+
+
+def synthetic_corpus(size: int, seed: int = 42) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    `size` notes synthétiques: phrases des CSV fournis recombinées au sein d'une
+    même langue, nombres perturbés (âges, budgets) pour que les documents soient
+    distincts. Même graine -> même corpus.
+    """
+    rng = random.Random(seed)
+    sentences: Dict[Optional[str], List[str]] = {}
+    lengths: List[int] = []
+    for path in CSV_CORPORA.values():
+        for text, language in _read_csv(path):
+            parts = [s for s in _SENTENCE_RE.split(text.strip()) if s]
+            if parts:
+                sentences.setdefault(language, []).extend(parts)
+                lengths.append(len(parts))
+    languages = [lang for lang, parts in sentences.items() for _ in range(len(parts))]
+
+    def _perturb(match: "re.Match") -> str:
+        value = int(match.group())
+        return str(max(1, int(value * rng.uniform(0.8, 1.2)))) if value > 9 else match.group()
+
+    for _ in range(size):
+        language = rng.choice(languages)
+        parts = rng.sample(sentences[language], min(rng.choice(lengths), len(sentences[language])))
+        yield _NUMBER_RE.sub(_perturb, " ".join(parts)), language
+
+
+def load_corpus(name: str, limit: Optional[int] = None) -> Iterator[Tuple[str, Optional[str]]]:
+    if name in CSV_CORPORA:
+        rows = _read_csv(CSV_CORPORA[name])
+        return iter(rows[:limit] if limit else rows)
+    if name in SYNTHETIC_CORPORA:
+        size = SYNTHETIC_CORPORA[name]
+        return synthetic_corpus(min(size, limit) if limit else size)
+    raise ValueError(f"Corpus inconnu: {name} (choix: {', '.join(list(CSV_CORPORA) + list(SYNTHETIC_CORPORA))})")
+
+# ============================================================================
+# 2. MESURE (PROCESSUS ISOLÉ)
+# ============================================================================
+
+def _load_target(name: str) -> Callable[[str, Optional[str]], Any]:
+    """Fonction (texte, langue) -> résultat pour une cible du benchmark."""
+    sys.path.insert(0, ROOT)
+    if name == "extract_all_tags":
+        from src.tag_extractor import extract_all_tags
+        return lambda text, language: extract_all_tags(text, language=language)
+    if name == "extract_all_tags_advanced":
+        # advanced_extractor importe `mappings` / `tag_extractor` sans préfixe
+        sys.path.insert(0, os.path.join(ROOT, "src"))
+        from advanced_extractor import extract_all_tags_advanced
+        return lambda text, language: extract_all_tags_advanced(text)
+    if name == "analyze_full_text":
+        from src.text_analyzer import TextAnalyzer
+        analyzer = TextAnalyzer()
+        return lambda text, language: analyzer.analyze_full_text(text)
+    if name == "extract_all_actionable":
+        from src.activations.extractors import extract_all_actionable
+        return lambda text, language: extract_all_actionable(text)
+    raise ValueError(f"Cible inconnue: {name} (choix: {', '.join(TARGETS)})")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du processus (Mo), None si non mesurable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: Ko ; macOS: octets
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def run_one(target: str, corpus: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Mesure une cible sur un corpus dans le processus courant."""
+    fn = _load_target(target)
+    # Échauffement: automate compilé / artefact chargé, corpus ouvert avant la mesure
+    fn("Cliente fidèle, budget 3000€, cherche un sac en cuir noir.", None)
+    docs = load_corpus(corpus, limit)
+    first = next(docs, None)
+    docs = itertools.chain([first] if first is not None else [], docs)
+    rss_before = peak_rss_mb()
+
+    # Corpus parcouru en flux (1M de notes ne tiennent pas dans le pic de RSS mesuré);
+    # seul l'appel de la cible est chronométré, pas la génération du document
+    latencies: List[float] = []
+    chars = 0
+    clock = time.perf_counter
+    for text, language in docs:
+        t0 = clock()
+        fn(text, language)
+        latencies.append(clock() - t0)
+        chars += len(text)
+    elapsed = sum(latencies)
+
+    latencies.sort()
+    rss_after = peak_rss_mb()
+    return {
+        "target": target,
+        "corpus": corpus,
+        "documents": len(latencies),
+        "chars": chars,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "peak_rss_mb": rss_after,
+        "rss_growth_mb": round(rss_after - rss_before, 1) if rss_after is not None and rss_before is not None else None,
+    }
+
+
+def run_isolated(target: str, corpus: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Lance `run_one` dans un sous-processus (pic de RSS propre à la mesure)."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-one", target, corpus]
+    if limit:
+        cmd += ["--limit", str(limit)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{target} / {corpus} a échoué:\n{proc.stderr.strip()}")
+    # Dernière ligne: le JSON du résultat (les imports peuvent écrire avant)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# ============================================================================
+# 3. BASELINE ET RAPPORT
+# ============================================================================
+
+def _key(result: Dict[str, Any]) -> str:
+    return f"{result['target']}/{result['corpus']}"
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(results: List[Dict[str, Any]], path: str = BASELINE_PATH):
+    """Fusionne les résultats dans la baseline (les autres mesures sont conservées)."""
+    merged = load_baseline(path)
+    merged.update({_key(r): r for r in results})
+    payload = {
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "results": dict(sorted(merged.items())),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> List[str]:
+    """Régressions d'un résultat par rapport à sa baseline (liste vide: OK)."""
+    if not baseline or baseline.get("documents") != result["documents"]:
+        return []
+    regressions = []
+    if result["docs_per_sec"] < baseline["docs_per_sec"] * (1 - THROUGHPUT_TOLERANCE):
+        regressions.append(f"docs/s {baseline['docs_per_sec']} -> {result['docs_per_sec']}")
+    if result["p99_ms"] > baseline["p99_ms"] * (1 + LATENCY_TOLERANCE):
+        regressions.append(f"p99 {baseline['p99_ms']} ms -> {result['p99_ms']} ms")
+    if result.get("peak_rss_mb") and baseline.get("peak_rss_mb") \
+            and result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + RSS_TOLERANCE):
+        regressions.append(f"RSS {baseline['peak_rss_mb']} Mo -> {result['peak_rss_mb']} Mo")
+    return regressions
+
+
+def _delta(value: float, reference: Optional[float]) -> str:
+    if not reference:
+        return "      "
+    return f"{(value - reference) / reference * 100:+5.1f}%"
+
+
+def format_results(results: List[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> str:
+    lines = [
+        "=" * 100,
+        "BENCHMARK EXTRACTION DE TAGS",
+        "=" * 100,
+        f"{'cible / corpus':<44}{'docs':>9}{'docs/s':>10}{'':>7}{'p50 ms':>9}{'p99 ms':>9}{'':>7}{'RSS Mo':>8}",
+    ]
+    for r in results:
+        ref = baseline.get(_key(r)) or {}
+        same = ref.get("documents") == r["documents"]
+        lines.append(
+            f"{_key(r):<44}{r['documents']:>9}{r['docs_per_sec']:>10}{_delta(r['docs_per_sec'], ref.get('docs_per_sec') if same else None):>7}"
+            f"{r['p50_ms']:>9}{r['p99_ms']:>9}{_delta(r['p99_ms'], ref.get('p99_ms') if same else None):>7}"
+            f"{r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>8}"
+        )
+    return "\n".join(lines)
+
+
+def write_report(results: List[Dict[str, Any]], regressions: Dict[str, List[str]]) -> str:
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    path = os.path.join(REPORTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"machine": machine_info(), "results": results, "regressions": regressions},
+                  f, ensure_ascii=False, indent=2)
+    return path
+
+# ============================================================================
+# 4. CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction de tags")
+    parser.add_argument("--targets", nargs="+", default=TARGETS, help="Cibles (défaut: toutes)")
+    parser.add_argument("--corpora", nargs="+", default=DEFAULT_CORPORA,
+                        help="Corpus (défaut: multilang notes synthetic-10k ; 'all' pour tous)")
+    parser.add_argument("--limit", type=int, default=None, help="Nombre maximal de documents par corpus")
+    parser.add_argument("--update-baseline", action="store_true", help="Enregistre les résultats comme baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Code de sortie 1 en cas de régression")
+    parser.add_argument("--run-one", nargs=2, metavar=("CIBLE", "CORPUS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        # Le cache d'extraction servirait les doublons sans appeler l'extracteur
+        os.environ["EXTRACTION_CACHE"] = "0"
+        print(json.dumps(run_one(*args.run_one, limit=args.limit)))
+        return 0
+
+    corpora = list(CSV_CORPORA) + list(SYNTHETIC_CORPORA) if args.corpora == ["all"] else args.corpora
+    baseline = load_baseline()
+    results, regressions = [], {}
+    for corpus in corpora:
+        for target in args.targets:
+            print(f"⏱️  {target} / {corpus}...", flush=True)
+            result = run_isolated(target, corpus, args.limit)
+            results.append(result)
+            found = compare(result, baseline.get(_key(result)))
+            if found:
+                regressions[_key(result)] = found
+
+    print(format_results(results, baseline))
+    print(f"Rapport : {write_report(results, regressions)}")
+    if regressions:
+        print("\n⚠️  Régressions par rapport à la baseline :")
+        for key, found in regressions.items():
+            print(f"   - {key}: {'; '.join(found)}")
+    if args.update_baseline:
+        save_baseline(results)
+        print(f"Baseline mise à jour : {BASELINE_PATH}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Serveur PostgREST de substitution (hors ligne) pour tester la synchro Supabase
+- Tables en mémoire: clients, transcriptions, tags_extraits, ai_analyses
+- POST /rest/v1/<table>[?on_conflict=id] avec Prefer: resolution=merge-duplicates
+  (upsert) ou ignore-duplicates ; clés étrangères vérifiées (409, code 23503)
+- GET /rest/v1/<table>?select=a,b&col=in.(x,y) (et col=eq.x)
+- Latence simulée par requête et pannes injectées (503 toutes les N requêtes)
+  pour exercer les reprises de src/supabase_sync.py
+
+Usage:
+  python scripts/postgrest_standin.py                                  # benchmark 1000 clients
+  python scripts/postgrest_standin.py --clients 5000 --latency-ms 20 --fail-every 7
+  python scripts/postgrest_standin.py --serve --port 54321             # serveur seul
+
+Le benchmark compare l'ancien mode (4 requêtes séquentielles par client) à
+l'écriture groupée et concurrente de SupabaseSync.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.supabase_sync import SupabaseSync, transcription_key  # noqa: E402
+
+# table -> {colonne: table référencée}
+FOREIGN_KEYS = {
+    "clients": {},
+    "transcriptions": {"client_id": "clients"},
+    "tags_extraits": {"transcription_id": "transcriptions", "client_id": "clients"},
+    "ai_analyses": {"client_id": "clients"},
+    "activations": {"client_id": "clients"},
+}
+
+# ============================================================================
+# 1. SERVEUR
+# ============================================================================
+
+class PostgrestStandIn:
+    """
+    Sous-ensemble de PostgREST suffisant pour SupabaseSync.
+
+    Usage:
+        with PostgrestStandIn(latency_s=0.01, fail_every=5) as server:
+            sync = SupabaseSync(server.url, "test-key")
+            ...
+            server.tables["transcriptions"]
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_s: float = 0.0, fail_every: int = 0):
+        self.latency_s = latency_s
+        self.fail_every = fail_every
+        self.tables: Dict[str, Dict[str, dict]] = {name: {} for name in FOREIGN_KEYS}
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PostgrestStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "PostgrestStandIn":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Traitement des requêtes
+    # ------------------------------------------------------------------
+
+    def _tick(self) -> bool:
+        """Compte la requête ; True si une panne doit être simulée."""
+        with self._lock:
+            self.requests += 1
+            fail = bool(self.fail_every) and self.requests % self.fail_every == 0
+            self.failures += fail
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return fail
+
+    def insert(self, table: str, rows: List[dict], resolution: Optional[str]) -> Optional[dict]:
+        """Applique un POST (tout ou rien, comme une instruction SQL) ; renvoie l'erreur éventuelle."""
+        with self._lock:
+            store = self.tables[table]
+            staged: Dict[str, dict] = {}
+            for row in rows:
+                for column, parent in FOREIGN_KEYS[table].items():
+                    value = row.get(column)
+                    if value is not None and value not in self.tables[parent]:
+                        return {"code": "23503", "message": f"{table}.{column} -> {parent}: {value} absent"}
+                key = row.get("id")
+                if key is None:
+                    key = f"_{len(store) + len(staged) + 1}"
+                    row = dict(row, id=key)
+                current = staged.get(key, store.get(key))
+                if current is not None:
+                    if resolution == "merge-duplicates":
+                        staged[key] = dict(current, **row)
+                    elif resolution != "ignore-duplicates":
+                        return {"code": "23505", "message": f"{table}.id {key} existe déjà"}
+                    continue
+                staged[key] = dict(row)
+            store.update(staged)
+        return None
+
+    def select(self, table: str, query: Dict[str, List[str]]) -> List[dict]:
+        columns = None
+        filters = []
+        for name, values in query.items():
+            if name == "select":
+                columns = None if values[0] == "*" else values[0].split(",")
+                continue
+            op, _, operand = values[0].partition(".")
+            if op == "in":
+                filters.append((name, set(operand.strip("()").split(","))))
+            elif op == "eq":
+                filters.append((name, {operand}))
+        with self._lock:
+            rows = [row for row in self.tables[table].values()
+                    if all(str(row.get(name)) in allowed for name, allowed in filters)]
+        return [{c: row.get(c) for c in columns} if columns else dict(row) for row in rows]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload=None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 503:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self):
+                parsed = urllib.parse.urlsplit(self.path)
+                table = parsed.path.rsplit("/", 1)[-1]
+                if not self.headers.get("apikey"):
+                    self._reply(401, {"message": "apikey manquante"})
+                    return None, None
+                if not parsed.path.startswith("/rest/v1/") or table not in server.tables:
+                    self._reply(404, {"message": f"table {table} inconnue"})
+                    return None, None
+                if server._tick():
+                    self._reply(503, {"message": "panne simulée"})
+                    return None, None
+                return table, urllib.parse.parse_qs(parsed.query)
+
+            def do_GET(self):
+                table, query = self._route()
+                if table:
+                    self._reply(200, server.select(table, query))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"[]")
+                table, _ = self._route()
+                if not table:
+                    return
+                rows = body if isinstance(body, list) else [body]
+                if len({tuple(sorted(row)) for row in rows}) > 1:
+                    self._reply(400, {"code": "PGRST102", "message": "All object keys must match"})
+                    return
+                prefer = self.headers.get("Prefer", "")
+                resolution = next((p.split("=", 1)[1] for p in prefer.split(",") if p.startswith("resolution=")), None)
+                error = server.insert(table, rows, resolution)
+                if error:
+                    self._reply(409, error)
+                else:
+                    self._reply(201)
+
+        return Handler
+
+# ============================================================================
+# 2. BENCHMARK
+# ============================================================================
+
+def synthetic_results(n_clients: int) -> List[dict]:
+    return [{
+        "client_id": f"CA{i:05d}",
+        "transcription_originale": f"Cliente {i}, cherche un sac noir pour un anniversaire, budget {i % 20}k",
+        "cleaned_text": f"cliente {i} cherche un sac noir pour un anniversaire budget {i % 20}k",
+        "tags_extracted": {"genre": "Femme", "ville": "Paris", "age": "30-40", "canaux_contact": ["Email"]},
+        "segment_client": "VIP" if i % 3 == 0 else "Occasionnel",
+        "resume_complet": f"Résumé {i}" if i % 2 else "Analyse IA en attente...",
+    } for i in range(n_clients)]
+
+
+def per_row_sync(sync: SupabaseSync, results: List[dict]):
+    """Ancien mode: une requête par ligne et par table, en séquence."""
+    from src.document import content_hash
+    for r in results:
+        digest = content_hash(r["transcription_originale"])
+        transcription_id = transcription_key(r["client_id"], digest)
+        tags = r["tags_extracted"]
+        sync._request("POST", "clients", {"on_conflict": "id"}, [{
+            "id": r["client_id"], "genre": tags.get("genre"), "segment": r["segment_client"],
+            "canal_prefere": tags["canaux_contact"][0], "ville": tags.get("ville"), "age_range": tags.get("age")}],
+            prefer="return=minimal,resolution=merge-duplicates")
+        sync._request("POST", "transcriptions", None, [{
+            "id": transcription_id, "client_id": r["client_id"], "texte_original": r["transcription_originale"],
+            "content_hash": digest}], prefer="return=minimal")
+        sync._request("POST", "tags_extraits", None, [{
+            "transcription_id": transcription_id, "client_id": r["client_id"],
+            "tags_json": json.dumps(tags)}], prefer="return=minimal")
+        if "attente" not in r["resume_complet"]:
+            sync._request("POST", "ai_analyses", None, [{
+                "client_id": r["client_id"], "resume_complet": r["resume_complet"]}], prefer="return=minimal")
+
+
+def benchmark(n_clients: int, latency_s: float, fail_every: int, batch_size: int, concurrency: int) -> Dict[str, dict]:
+    results = synthetic_results(n_clients)
+    report = {}
+    for mode in ("per_row", "batched"):
+        with PostgrestStandIn(latency_s=latency_s, fail_every=fail_every) as server:
+            sync = SupabaseSync(server.url, "standin-key", batch_size=batch_size, concurrency=concurrency,
+                                backoff_s=0.01)
+            start = time.perf_counter()
+            if mode == "per_row":
+                per_row_sync(sync, results)
+            else:
+                stats = sync.sync_scan_results(results, source_file="benchmark.csv")
+                assert stats["inserted"] == n_clients, stats
+            elapsed = time.perf_counter() - start
+            report[mode] = {
+                "seconds": round(elapsed, 3),
+                "clients_per_sec": round(n_clients / elapsed, 1),
+                "requests": server.requests,
+                "retries": sync.counters["retries"],
+                "transcriptions": len(server.tables["transcriptions"]),
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PostgREST de substitution + benchmark de la synchro Supabase")
+    parser.add_argument("--serve", action="store_true", help="Lancer uniquement le serveur")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Latence simulée par requête")
+    parser.add_argument("--fail-every", type=int, default=0, help="Répond 503 une requête sur N")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.serve:
+        server = PostgrestStandIn(port=args.port, latency_s=args.latency_ms / 1000, fail_every=args.fail_every)
+        print(f"PostgREST de substitution sur {server.url} (Ctrl+C pour arrêter)")
+        server.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    report = benchmark(args.clients, args.latency_ms / 1000, args.fail_every, args.batch_size, args.concurrency)
+    for mode, row in report.items():
+        print(f"{mode:<8} {row['seconds']:>8.2f} s  {row['clients_per_sec']:>9.1f} clients/s  "
+              f"{row['requests']:>6} requêtes  {row['retries']:>4} reprises")
+    speedup = report["per_row"]["seconds"] / max(report["batched"]["seconds"], 1e-9)
+    print(f"Gain: x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
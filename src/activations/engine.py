@@ -72,8 +72,10 @@ class ActivationEngine:
         tags = client_data.get("tags_extracted", {})
         text = client_data.get("transcription_originale", "") or client_data.get("cleaned_text", "")
         
-        # Phase 1 : Extraction contextuelle
-        extracted = extract_all_actionable(text, tags, self.reference_date)
+        # Phase 1 : Extraction contextuelle (sur le contexte d'analyse du scan s'il est stocké)
+        extracted = extract_all_actionable(text, tags, self.reference_date,
+                                           context=client_data.get("analysis_context"),
+                                           cleaned_text=client_data.get("cleaned_text"))
         
         client_acts = []
         # Phase 2 : Générer les activations
@@ -3,8 +3,16 @@ Extracteurs Contextuels — Extraction d'éléments actionnables depuis les tran
 Détecte dates clés, produits possédés, projets de vie, demandes en attente, et affinités cross-maison.
 """
 import re
+from bisect import bisect_left
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from src.document import as_document
+    from src.taxonomy_matcher import KeywordAutomaton
+except ImportError:
+    from document import as_document
+    from taxonomy_matcher import KeywordAutomaton
 
 
 # ============================================================================
@@ -65,6 +73,25 @@ DATE_PATTERNS = {
     ],
 }
 
+# Ancres des déclencheurs: littéraux dont au moins un figure dans tout match des
+# motifs du type (à tenir à jour avec DATE_PATTERNS). Cherchées par l'automate du
+# contexte d'analyse: un type sans ancre présente n'est pas vérifié par regex.
+# None: type toujours vérifié.
+DATE_TRIGGER_ANCHORS: Dict[str, Optional[set]] = {
+    "anniversaire_epouse": {"anniversaire", "birthday"},
+    "anniversaire_mari": {"anniversaire", "birthday"},
+    "anniversaire_enfant": {"anniversaire", "birthday"},
+    "anniversaire_mariage": {"anniversaire", "anniversary"},
+    "anniversaire_general": {"anniversaire", "birthday"},
+    "naissance": {"naissance", "attend", "enceinte", "bébé", "nouveau", "shower", "birth"},
+    "mariage": {"mariage", "marier", "fiancer", "wedding", "engagement", "getting"},
+    "noel": {"noël", "christmas"},
+    "saint_valentin": {"valentin", "valentine"},
+    "fete_meres": {"mères", "mother"},
+    "fete_peres": {"pères", "father"},
+    "diplome": {"diplôme", "graduation", "examen", "réussite", "d'études", "diploma", "degree"},
+}
+
 # Patterns pour extraire des dates concrètes (jj/mm, mois + jour, etc.)
 DATE_EXTRACT_PATTERNS = [
     # "le 12 mai", "le 3 décembre"
@@ -96,79 +123,178 @@ def extract_dates_cles(text: str, reference_date: datetime = None) -> list:
         return []
     
     ref = reference_date or datetime.now()
-    text_lower = text.lower()
+    ctx = analysis_context(text)
     results = []
 
-    for date_type, patterns in DATE_PATTERNS.items():
+    # Déclencheurs (un seul match par type) et expressions de date repérés pendant le scan
+    for date_type, (start, end) in ctx.date_triggers.items():
+        # Trouver la date associée
+        date_str, date_estimee = _date_near_trigger(ctx.text, ctx.date_expressions, start, end, ref)
+        results.append({
+            "type": date_type,
+            "label": date_type.replace("_", " ").title(),
+            "date_str": date_str,
+            "date_estimee": date_estimee,
+            "confidence": 0.9 if date_str else 0.5
+        })
+
+    return results
+
+
+# ----------------------------------------------------------------------------
+# Moteur précompilé. Les ancres des déclencheurs (DATE_TRIGGER_ANCHORS) sont
+# cherchées par l'automate du contexte d'analyse en même temps que les
+# vocabulaires: seuls les types dont une ancre est présente sont vérifiés par
+# regex. Les expressions de date sont trouvées en un passage (une alternative à
+# groupes nommés) et reliées aux déclencheurs par leurs positions.
+# ----------------------------------------------------------------------------
+
+def _compile_alternation(named_patterns: List[Tuple[str, str]]) -> "re.Pattern":
+    """
+    Une alternative de largeur nulle (`(?=(?P<nom>motif)|...)`): chaque position
+    où un motif commence est trouvée, y compris les matchs qui se chevauchent.
+    """
+    alternation = "|".join("(?P<%s>%s)" % (name, pattern) for name, pattern in named_patterns)
+    return re.compile("(?=%s)" % alternation)
+
+
+# Motifs déclencheurs précompilés, par type (ordre de priorité conservé)
+_DATE_TRIGGER_PATTERNS = {
+    date_type: [re.compile(pattern) for pattern in patterns] for date_type, patterns in DATE_PATTERNS.items()
+}
+
+# Toutes les expressions de date, avec leurs sous-groupes (jour, mois, nombre, unité)
+_DATE_EXPRESSION_RE = _compile_alternation([(fmt, pattern) for pattern, fmt in DATE_EXTRACT_PATTERNS])
+_DATE_EXPRESSION_GROUPS = {
+    fmt: range(_DATE_EXPRESSION_RE.groupindex[fmt] + 1,
+               _DATE_EXPRESSION_RE.groupindex[fmt] + 1 + re.compile(pattern).groups)
+    for pattern, fmt in DATE_EXTRACT_PATTERNS
+}
+
+# Fenêtre (en caractères, de part et d'autre du déclencheur) où chercher sa date
+DATE_WINDOW = 100
+
+
+def _find_date_triggers(text_lower: str, candidates: Optional[set] = None) -> Dict[str, Tuple[int, int]]:
+    """
+    Type de date -> span du déclencheur retenu: le premier motif du type (ordre
+    de DATE_PATTERNS) présent dans le texte, à sa première occurrence.
+    `candidates`: types dont une ancre a été vue (les autres ne peuvent pas matcher).
+    """
+    triggers = {}
+    for date_type, patterns in _DATE_TRIGGER_PATTERNS.items():
+        if candidates is not None and date_type not in candidates and DATE_TRIGGER_ANCHORS[date_type] is not None:
+            continue
         for pattern in patterns:
-            if re.search(pattern, text_lower):
-                # Trouver la date associée
-                date_str, date_estimee = _extract_nearby_date(text_lower, pattern, ref)
-                results.append({
-                    "type": date_type,
-                    "label": date_type.replace("_", " ").title(),
-                    "date_str": date_str,
-                    "date_estimee": date_estimee,
-                    "confidence": 0.9 if date_str else 0.5
-                })
+            match = pattern.search(text_lower)
+            if match:
+                triggers[date_type] = match.span()
                 break  # Un seul match par type
+    return triggers
+
+
+DateExpression = Tuple[int, int, str, Tuple[str, ...]]  # (début, fin, format, sous-groupes)
 
-    return results
 
+def _date_expression(match) -> DateExpression:
+    fmt = match.lastgroup
+    return match.start(), match.end(fmt), fmt, tuple(match.group(g) for g in _DATE_EXPRESSION_GROUPS[fmt])
 
-def _extract_nearby_date(text: str, trigger_pattern: str, ref: datetime) -> tuple:
-    """Cherche une date concrète près du trigger."""
-    match = re.search(trigger_pattern, text)
-    if not match:
+
+def _find_date_expressions(text_lower: str, triggers: Dict[str, Tuple[int, int]]) -> List[DateExpression]:
+    """
+    Expressions de date autour des déclencheurs, en un passage par zone
+    (fenêtres fusionnées), triées par début.
+    """
+    windows = sorted((max(0, start - DATE_WINDOW), min(len(text_lower), end + DATE_WINDOW))
+                     for start, end in triggers.values())
+    merged: List[List[int]] = []
+    for start, end in windows:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    expressions = []
+    for start, end in merged:
+        expressions.extend(_date_expression(m) for m in _DATE_EXPRESSION_RE.finditer(text_lower, start, end))
+    return expressions
+
+
+def _date_near_trigger(text_lower: str, expressions: List[DateExpression],
+                       trigger_start: int, trigger_end: int, ref: datetime) -> tuple:
+    """
+    Date concrète d'un déclencheur: dans la fenêtre de ±DATE_WINDOW caractères,
+    la première expression valide du format le plus prioritaire
+    (ordre de DATE_EXTRACT_PATTERNS), trouvée par bisection sur les positions.
+    """
+    if not expressions:
         return None, None
-    
-    # Chercher dans le contexte autour du match (±100 chars)
-    start = max(0, match.start() - 100)
-    end = min(len(text), match.end() + 100)
-    context = text[start:end]
-    
-    for pattern, fmt in DATE_EXTRACT_PATTERNS:
-        date_match = re.search(pattern, context)
-        if date_match:
-            if fmt == "fr":
-                jour = int(date_match.group(1))
-                mois = MOIS_FR.get(date_match.group(2), 1)
-                annee = ref.year if mois >= ref.month else ref.year + 1
-                try:
-                    dt = datetime(annee, mois, jour)
-                    return f"{jour:02d}/{mois:02d}", dt.strftime("%Y-%m-%d")
-                except ValueError:
-                    pass
-            elif fmt == "numeric":
-                jour = int(date_match.group(1))
-                mois = int(date_match.group(2))
-                if 1 <= mois <= 12 and 1 <= jour <= 31:
-                    annee = ref.year if mois >= ref.month else ref.year + 1
-                    try:
-                        dt = datetime(annee, mois, jour)
-                        return f"{jour:02d}/{mois:02d}", dt.strftime("%Y-%m-%d")
-                    except ValueError:
-                        pass
-            elif fmt == "relative":
-                nombre = int(date_match.group(1))
-                unite = date_match.group(2)
-                if "mois" in unite:
-                    dt = ref + timedelta(days=nombre * 30)
-                elif "semaine" in unite:
-                    dt = ref + timedelta(weeks=nombre)
-                else:
-                    dt = ref + timedelta(days=nombre)
-                return f"+{nombre} {unite}", dt.strftime("%Y-%m-%d")
-            elif fmt == "next_month":
-                dt = ref + timedelta(days=30)
-                return "mois prochain", dt.strftime("%Y-%m-%d")
-            elif fmt == "next_week":
-                dt = ref + timedelta(weeks=1)
-                return "semaine prochaine", dt.strftime("%Y-%m-%d")
-    
+    start = max(0, trigger_start - DATE_WINDOW)
+    end = min(len(text_lower), trigger_end + DATE_WINDOW)
+    in_window = []
+    for expression in expressions[bisect_left(expressions, (start,)):]:
+        if expression[0] >= end:
+            break
+        if expression[1] > end:
+            # Expression coupée par la fin de la fenêtre: relue telle que la fenêtre la voit
+            match = _DATE_EXPRESSION_RE.match(text_lower, expression[0], end)
+            if match is None:
+                continue
+            expression = _date_expression(match)
+        in_window.append(expression)
+
+    for _, fmt in DATE_EXTRACT_PATTERNS:
+        expression = next((e for e in in_window if e[2] == fmt), None)
+        if expression is None:
+            continue
+        date = _resolve_date_expression(fmt, expression[3], ref)
+        if date is not None:
+            return date
     return None, None
 
 
+def _resolve_date_expression(fmt: str, groups: Tuple[str, ...], ref: datetime) -> Optional[tuple]:
+    """(date_str, date_estimee) d'une expression, ou None si la date est invalide."""
+    if fmt == "fr":
+        jour = int(groups[0])
+        mois = MOIS_FR.get(groups[1], 1)
+        annee = ref.year if mois >= ref.month else ref.year + 1
+        try:
+            dt = datetime(annee, mois, jour)
+            return f"{jour:02d}/{mois:02d}", dt.strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+    elif fmt == "numeric":
+        jour = int(groups[0])
+        mois = int(groups[1])
+        if 1 <= mois <= 12 and 1 <= jour <= 31:
+            annee = ref.year if mois >= ref.month else ref.year + 1
+            try:
+                dt = datetime(annee, mois, jour)
+                return f"{jour:02d}/{mois:02d}", dt.strftime("%Y-%m-%d")
+            except ValueError:
+                pass
+        return None
+    elif fmt == "relative":
+        nombre = int(groups[0])
+        unite = groups[1]
+        if "mois" in unite:
+            dt = ref + timedelta(days=nombre * 30)
+        elif "semaine" in unite:
+            dt = ref + timedelta(weeks=nombre)
+        else:
+            dt = ref + timedelta(days=nombre)
+        return f"+{nombre} {unite}", dt.strftime("%Y-%m-%d")
+    elif fmt == "next_month":
+        dt = ref + timedelta(days=30)
+        return "mois prochain", dt.strftime("%Y-%m-%d")
+    elif fmt == "next_week":
+        dt = ref + timedelta(weeks=1)
+        return "semaine prochaine", dt.strftime("%Y-%m-%d")
+    return None
+
+
 # ============================================================================
 # EXTRACTION DE PRODUITS POSSÉDÉS / MENTIONNÉS
 # ============================================================================
@@ -256,40 +382,14 @@ def extract_produits_possedes(text: str) -> list:
     if not text:
         return []
     
-    text_lower = text.lower()
+    ctx = analysis_context(text)
     results = []
     
-    # Détecter produits
-    produits_trouves = []
-    for produit, keywords in PRODUITS_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text_lower:
-                produits_trouves.append(produit)
-                break
-    
-    # Détecter marques
-    marques_trouvees = []
-    for marque, keywords in MARQUES_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text_lower:
-                marques_trouvees.append(marque)
-                break
-    
-    # Détecter couleurs
-    couleurs_trouvees = []
-    for couleur, keywords in COULEURS_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text_lower:
-                couleurs_trouvees.append(couleur)
-                break
-    
-    # Détecter matières
-    matieres_trouvees = []
-    for matiere, keywords in MATIERES_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text_lower:
-                matieres_trouvees.append(matiere)
-                break
+    # Produits, marques, couleurs et matières détectés pendant le scan
+    produits_trouves = ctx.categories("produits")
+    marques_trouvees = ctx.categories("marques")
+    couleurs_trouvees = ctx.categories("couleurs")
+    matieres_trouvees = ctx.categories("matieres")
     
     # Combiner les infos
     if produits_trouves:
@@ -358,36 +458,28 @@ def extract_projets_vie(text: str, reference_date: datetime = None) -> list:
         return []
     
     ref = reference_date or datetime.now()
-    text_lower = text.lower()
+    ctx = analysis_context(text)
     results = []
+    timing = ctx.timing
+    date_est = _estimate_date(timing, ref)
     
-    # Chercher voyages
-    for dest, keywords in DESTINATIONS.items():
-        for kw in keywords:
-            if kw in text_lower:
-                timing = _extract_timing(text_lower)
-                date_est = _estimate_date(timing, ref)
-                results.append({
-                    "type": "voyage",
-                    "destination": dest,
-                    "timing": timing,
-                    "date_estimee": date_est,
-                })
-                break
+    # Voyages
+    for dest in ctx.categories("destinations"):
+        results.append({
+            "type": "voyage",
+            "destination": dest,
+            "timing": timing,
+            "date_estimee": date_est,
+        })
     
-    # Chercher événements
-    for evt, keywords in EVENEMENTS.items():
-        for kw in keywords:
-            if kw in text_lower:
-                timing = _extract_timing(text_lower)
-                date_est = _estimate_date(timing, ref)
-                results.append({
-                    "type": "evenement",
-                    "evenement": evt.replace("_", " ").title(),
-                    "timing": timing,
-                    "date_estimee": date_est,
-                })
-                break
+    # Événements
+    for evt in ctx.categories("evenements"):
+        results.append({
+            "type": "evenement",
+            "evenement": evt.replace("_", " ").title(),
+            "timing": timing,
+            "date_estimee": date_est,
+        })
     
     return results
 
@@ -473,28 +565,17 @@ def extract_demandes_attente(text: str) -> list:
     if not text:
         return []
     
-    text_lower = text.lower()
+    ctx = analysis_context(text)
     results = []
     
-    is_rupture = False
-    for pattern in RUPTURE_PATTERNS:
-        if re.search(pattern, text_lower):
-            is_rupture = True
-            break
-    
-    if not is_rupture:
+    if not ctx.rupture:
         return []
     
     # Quoi est en rupture ?
     produits = extract_produits_possedes(text)
     
     # Taille demandée ?
-    taille = None
-    for pattern in TAILLE_PATTERNS:
-        m = re.search(pattern, text_lower)
-        if m:
-            taille = m.group(1)
-            break
+    taille = ctx.taille
     
     if produits:
         for p in produits:
@@ -561,6 +642,9 @@ AFFINITES_MAPPING = {
     },
 }
 
+# Longueur du plus long mot-clé d'affinité (fenêtre de fin de texte re-parcourue avec les tags)
+_AFFINITY_KEYWORD_MAX = max(len(kw) for data in AFFINITES_MAPPING.values() for kw in data["keywords"])
+
 
 def extract_preferences_croisees(text: str, tags: dict = None) -> list:
     """
@@ -572,7 +656,7 @@ def extract_preferences_croisees(text: str, tags: dict = None) -> list:
     if not text:
         return []
     
-    text_lower = text.lower()
+    ctx = analysis_context(text)
     
     # Ajouter les tags lifestyle si disponibles
     extra_keywords = []
@@ -584,11 +668,13 @@ def extract_preferences_croisees(text: str, tags: dict = None) -> list:
             elif isinstance(val, str) and val:
                 extra_keywords.append(val.lower())
     
-    combined = text_lower + " " + " ".join(extra_keywords)
+    # Seule la fin du texte (frontière avec les tags) est re-parcourue ; le reste vient du scan
+    extra = ctx.text[-_AFFINITY_KEYWORD_MAX:] + " " + " ".join(extra_keywords) if extra_keywords else ""
     results = []
     
     for affinite, data in AFFINITES_MAPPING.items():
-        matched_kw = [kw for kw in data["keywords"] if kw in combined]
+        found = ctx.keywords("affinites", affinite)
+        matched_kw = [kw for kw in data["keywords"] if kw in found or (extra and kw in extra)]
         if matched_kw:
             results.append({
                 "affinite": affinite.replace("_", " ").title(),
@@ -600,21 +686,195 @@ def extract_preferences_croisees(text: str, tags: dict = None) -> list:
     return results
 
 
+# ============================================================================
+# CONTEXTE D'ANALYSE PARTAGÉ (SCAN -> ACTIVATIONS)
+# ============================================================================
+
+# Vocabulaires cherchés en sous-chaîne (même sémantique que `kw in text_lower`)
+VOCABULARIES = {
+    "produits": PRODUITS_KEYWORDS,
+    "marques": MARQUES_KEYWORDS,
+    "couleurs": COULEURS_KEYWORDS,
+    "matieres": MATIERES_KEYWORDS,
+    "destinations": DESTINATIONS,
+    "evenements": EVENEMENTS,
+    "affinites": {name: data["keywords"] for name, data in AFFINITES_MAPPING.items()},
+}
+
+# Version du format sérialisé (à incrémenter si la structure ou les vocabulaires changent de sens)
+CONTEXT_FORMAT_VERSION = 3
+
+_DATE_ANCHOR_GROUP = "date_anchors"
+
+
+def _build_vocabulary_automaton() -> KeywordAutomaton:
+    """Un seul automate pour tous les vocabulaires: un passage par document."""
+    automaton = KeywordAutomaton()
+    for group, mapping in VOCABULARIES.items():
+        for category, keywords in mapping.items():
+            for kw in keywords:
+                automaton.add(kw, (group, category, kw))
+    # Ancres des déclencheurs de dates (dans le même passage)
+    for date_type, anchors in DATE_TRIGGER_ANCHORS.items():
+        for anchor in anchors or ():
+            automaton.add(anchor, (_DATE_ANCHOR_GROUP, date_type, anchor))
+    automaton.build()
+    return automaton
+
+
+_VOCABULARY_AUTOMATON = _build_vocabulary_automaton()
+
+
+class AnalysisContext:
+    """
+    Analyse d'un document produite une fois pendant le scan et stockée avec
+    son résultat: occurrences des vocabulaires d'activation et indices regex
+    (déclencheurs et expressions de dates, timing, rupture, taille). Les
+    extracteurs de ce module la lisent au lieu de re-parcourir la transcription.
+    Seul le calcul des dates (relatif à la date de référence) reste fait à la
+    demande, autour des déclencheurs, sur le texte normalisé (minuscules) qui
+    n'est pas stocké: il est reconstruit à partir du texte nettoyé.
+    """
+
+    __slots__ = ("text", "hits", "date_triggers", "date_expressions", "timing", "rupture", "taille")
+
+    def __init__(self, text: str, hits: Dict[str, Dict[str, Dict[str, int]]],
+                 date_triggers: Dict[str, Tuple[int, int]], date_expressions: List[DateExpression],
+                 timing: Optional[str], rupture: bool, taille: Optional[str]):
+        self.text = text
+        # groupe -> catégorie -> mot-clé -> position de la première occurrence
+        self.hits = hits
+        self.date_triggers = date_triggers
+        # (début, fin, format, sous-groupes) triés par début ; vide sans déclencheur
+        self.date_expressions = date_expressions
+        self.timing = timing
+        self.rupture = rupture
+        self.taille = taille
+
+    def categories(self, group: str) -> List[str]:
+        """Catégories du groupe présentes dans le texte, dans l'ordre du vocabulaire."""
+        found = self.hits.get(group)
+        if not found:
+            return []
+        return [category for category in VOCABULARIES[group] if category in found]
+
+    def keywords(self, group: str, category: str) -> Dict[str, int]:
+        """Mots-clés trouvés pour une catégorie (-> position de première occurrence)."""
+        return self.hits.get(group, {}).get(category, {})
+
+    def to_dict(self) -> dict:
+        """
+        Forme JSON stockée dans le résultat du scan (clé "analysis_context").
+        Le texte n'y figure pas (il double texte_nettoye): seule sa longueur,
+        pour vérifier à la relecture que les positions s'appliquent au même texte.
+        """
+        return {
+            "version": CONTEXT_FORMAT_VERSION,
+            "length": len(self.text),
+            "hits": self.hits,
+            "date_triggers": {k: list(v) for k, v in self.date_triggers.items()},
+            "date_expressions": [[start, end, fmt, list(groups)] for start, end, fmt, groups in self.date_expressions],
+            "timing": self.timing,
+            "rupture": self.rupture,
+            "taille": self.taille,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, cleaned_text: Optional[str]) -> Optional["AnalysisContext"]:
+        """
+        Relit `to_dict` avec le texte nettoyé du scan ; None (à recalculer) si le
+        format est d'une autre version ou si le texte n'est pas celui analysé.
+        """
+        if not data or data.get("version") != CONTEXT_FORMAT_VERSION or cleaned_text is None:
+            return None
+        text = as_document(cleaned_text).lowered
+        if len(text) != data["length"]:
+            return None
+        return cls(
+            text,
+            data["hits"],
+            {k: tuple(v) for k, v in data["date_triggers"].items()},
+            [(start, end, fmt, tuple(groups)) for start, end, fmt, groups in data["date_expressions"]],
+            data["timing"],
+            data["rupture"],
+            data["taille"],
+        )
+
+
+def build_analysis_context(text: str) -> AnalysisContext:
+    """Analyse complète d'un texte (un passage d'automate + les indices regex)."""
+    text_lower = as_document(text).lowered
+    hits: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for start, _, (group, category, kw) in _VOCABULARY_AUTOMATON.iter_matches(text_lower):
+        hits.setdefault(group, {}).setdefault(category, {}).setdefault(kw, start)
+    date_candidates = set(hits.pop(_DATE_ANCHOR_GROUP, ()))
+
+    rupture = any(re.search(pattern, text_lower) for pattern in RUPTURE_PATTERNS)
+    taille = None
+    if rupture:
+        for pattern in TAILLE_PATTERNS:
+            m = re.search(pattern, text_lower)
+            if m:
+                taille = m.group(1)
+                break
+
+    date_triggers = _find_date_triggers(text_lower, date_candidates)
+    return AnalysisContext(
+        text_lower,
+        hits,
+        date_triggers,
+        _find_date_expressions(text_lower, date_triggers),
+        _extract_timing(text_lower),
+        rupture,
+        taille,
+    )
+
+
+def analysis_context(text: str) -> AnalysisContext:
+    """
+    Contexte d'un texte, calculé une fois par Document (les cinq extracteurs
+    d'un même document le partagent).
+    """
+    doc = as_document(text)
+    cached = doc.__dict__.get("analysis_context")
+    if cached is None:
+        cached = doc.__dict__["analysis_context"] = build_analysis_context(doc)
+    return cached
+
+
 # ============================================================================
 # FONCTION PRINCIPALE D'EXTRACTION
 # ============================================================================
 
-def extract_all_actionable(text: str, tags: dict = None, reference_date: datetime = None) -> dict:
+def extract_all_actionable(text: str, tags: dict = None, reference_date: datetime = None,
+                           context=None, cleaned_text: Optional[str] = None) -> dict:
     """
     Exécute toutes les extractions contextuelles sur une transcription.
+
+    Args:
+        context: Contexte produit pendant le scan (`AnalysisContext` ou sa forme
+            `to_dict`, clé "analysis_context" des résultats). Fourni, la
+            transcription n'est pas re-parcourue: les extracteurs lisent son texte.
+        cleaned_text: Texte nettoyé du scan, sur lequel la forme `to_dict` a été
+            calculée (défaut: tags["cleaned_text"]).
     
     Returns:
         dict: {dates_cles, produits, projets_vie, demandes_attente, affinites_cross}
     """
+    if isinstance(context, dict):
+        if cleaned_text is None and tags:
+            cleaned_text = tags.get("cleaned_text")
+        context = AnalysisContext.from_dict(context, cleaned_text)
+    if context is not None:
+        doc = as_document(context.text)
+        doc.__dict__["analysis_context"] = context
+    else:
+        # Un seul Document: le contexte est calculé une fois pour les cinq extracteurs
+        doc = as_document(text)
     return {
-        "dates_cles": extract_dates_cles(text, reference_date),
-        "produits": extract_produits_possedes(text),
-        "projets_vie": extract_projets_vie(text, reference_date),
-        "demandes_attente": extract_demandes_attente(text),
-        "affinites_cross": extract_preferences_croisees(text, tags),
+        "dates_cles": extract_dates_cles(doc, reference_date),
+        "produits": extract_produits_possedes(doc),
+        "projets_vie": extract_projets_vie(doc, reference_date),
+        "demandes_attente": extract_demandes_attente(doc),
+        "affinites_cross": extract_preferences_croisees(doc, tags),
     }
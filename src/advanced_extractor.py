@@ -19,47 +19,23 @@ from mappings.tracking import ACTIONS_MAPPING, ECHEANCES_MAPPING, CANAUX_MAPPING
 
 # Import fonction de nettoyage de l'ancien module
 from tag_extractor import clean_text_turbo, extract_age_turbo, extract_budget_turbo, extract_urgency_turbo
+from tag_extractor import scan_text_substring, scan_nested_substring
 
 # ============================================================================
 # FONCTIONS UTILITAIRES
 # ============================================================================
 
 def scan_text_for_keywords(text: str, mapping: Dict[str, List[str]]) -> List[str]:
-    """Scanne le texte pour trouver les clés correspondantes aux mots-clés"""
-    if not text:
-        return []
-    
-    text_lower = text.lower()
-    found = []
-    
-    for category, keywords in mapping.items():
-        for kw in keywords:
-            if kw.lower() in text_lower:
-                found.append(category)
-                break
-                
-    return list(set(found))
+    """
+    Scanne le texte pour trouver les clés correspondantes aux mots-clés (sous-chaîne).
+    Lu sur le scan fusionné de tag_extractor: un seul passage par document.
+    """
+    return scan_text_substring(text, mapping)
 
 
 def scan_nested_mapping(text: str, nested_mapping: Dict[str, Dict[str, List[str]]]) -> Dict[str, List[str]]:
     """Scanne un mapping imbriqué (ex: CITIES_ADVANCED)"""
-    if not text:
-        return {}
-    
-    text_lower = text.lower()
-    results = {}
-    
-    for region, cities in nested_mapping.items():
-        found_cities = []
-        for city, keywords in cities.items():
-            for kw in keywords:
-                if kw.lower() in text_lower:
-                    found_cities.append(city)
-                    break
-        if found_cities:
-            results[region] = found_cities
-    
-    return results
+    return scan_nested_substring(text, nested_mapping)
 
 
 # ============================================================================
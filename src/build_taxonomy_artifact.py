@@ -0,0 +1,21 @@
+"""
+Script pour compiler la taxonomie (mots-clés + tables de l'automate) dans un
+artefact versionné, rechargé au démarrage au lieu d'être recompilé.
+
+Usage:
+  python src/build_taxonomy_artifact.py
+  python src/build_taxonomy_artifact.py data/taxonomy_compiled.pkl
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tag_extractor import TAXONOMY_FINGERPRINT, build_taxonomy_artifact
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    path = build_taxonomy_artifact(sys.argv[1] if len(sys.argv) > 1 else None)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"✅ Artefact taxonomie écrit: {path} ({os.path.getsize(path) // 1024} Ko, empreinte {TAXONOMY_FINGERPRINT}, {elapsed:.0f} ms)")
@@ -1,10 +1,34 @@
 """
 Module de lecture et traitement du fichier CSV
+Deux modes de lecture:
+- `load_data` / `get_conversations`: fichier entier en mémoire (DataFrame `data`)
+- `iter_conversations`: lecture en flux par paquets (mémoire constante), pour
+  les exports volumineux (CSV lu par le moteur C après détection du séparateur,
+  XLSX en lecture seule, JSON lines ligne par ligne)
 """
+import csv
+import json
 import pandas as pd
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
 from pathlib import Path
 
+try:
+    from src.language_detector import detect_language
+    from src.perf_profiler import profile_stage
+except ImportError:
+    from language_detector import detect_language
+    from perf_profiler import profile_stage
+
+
+STANDARD_COLUMNS = ["ID", "Date", "Duration", "Language", "Length", "Transcription"]
+
+# Lignes par paquet en lecture en flux
+DEFAULT_CHUNKSIZE = 10_000
+
+# Échantillon lu pour détecter le séparateur CSV
+SNIFF_SAMPLE_BYTES = 64 * 1024
+SNIFF_DELIMITERS = ",;\t|"
+
 
 class CSVProcessor:
     """Classe pour lire et traiter le fichier CSV des conversations clients"""
@@ -51,60 +75,88 @@ class CSVProcessor:
                 return col
         return None
 
-    def _standardize_schema(self, raw_df: pd.DataFrame) -> pd.DataFrame:
-        """Mappe des colonnes variées vers le schéma attendu."""
-        if raw_df is None or raw_df.empty:
-            return pd.DataFrame(columns=["ID", "Date", "Duration", "Language", "Length", "Transcription"])
+    def _resolve_columns(self, raw_df: pd.DataFrame) -> Dict[str, Optional[str]]:
+        """Colonne source de chaque champ du schéma (None: absente)."""
+        normalized_to_original = {self._normalize_colname(col): col for col in raw_df.columns}
 
-        df = raw_df.copy()
-        normalized_to_original = {self._normalize_colname(col): col for col in df.columns}
-
-        id_col = self._find_first_existing_column(normalized_to_original, [
-            "id", "client_id", "customer_id", "user_id", "uid", "uuid"
-        ])
-        date_col = self._find_first_existing_column(normalized_to_original, [
-            "date", "created_at", "timestamp", "datetime", "date_rdv"
-        ])
-        duration_col = self._find_first_existing_column(normalized_to_original, [
-            "duration", "duree", "duration_seconds", "time_spent"
-        ])
-        language_col = self._find_first_existing_column(normalized_to_original, [
-            "language", "langue", "lang"
-        ])
-        length_col = self._find_first_existing_column(normalized_to_original, [
-            "length", "taille", "size", "conversation_length"
-        ])
-        transcription_col = self._find_first_existing_column(normalized_to_original, [
-            "transcription", "transcript", "texte", "text", "message", "conversation", "notes", "contenu"
-        ])
+        columns = {
+            "ID": self._find_first_existing_column(normalized_to_original, [
+                "id", "client_id", "customer_id", "user_id", "uid", "uuid"
+            ]),
+            "Date": self._find_first_existing_column(normalized_to_original, [
+                "date", "created_at", "timestamp", "datetime", "date_rdv"
+            ]),
+            "Duration": self._find_first_existing_column(normalized_to_original, [
+                "duration", "duree", "duration_seconds", "time_spent"
+            ]),
+            "Language": self._find_first_existing_column(normalized_to_original, [
+                "language", "langue", "lang"
+            ]),
+            "Length": self._find_first_existing_column(normalized_to_original, [
+                "length", "taille", "size", "conversation_length"
+            ]),
+            "Transcription": self._find_first_existing_column(normalized_to_original, [
+                "transcription", "transcript", "texte", "text", "message", "conversation", "notes", "contenu"
+            ]),
+        }
 
         # Fallback transcription: première colonne textuelle exploitable.
-        if transcription_col is None:
+        if columns["Transcription"] is None:
             text_candidates = []
-            for col in df.columns:
-                series = df[col]
+            for col in raw_df.columns:
+                series = raw_df[col]
                 if series.dtype == "object" and not series.dropna().empty:
                     text_candidates.append(col)
             if text_candidates:
-                transcription_col = text_candidates[0]
+                columns["Transcription"] = text_candidates[0]
 
-        if transcription_col is None:
+        if columns["Transcription"] is None:
             raise ValueError("Aucune colonne texte exploitable pour la transcription n'a ete trouvee.")
+        return columns
+
+    def _standardize_schema(self, raw_df: pd.DataFrame, columns: Optional[Dict[str, Optional[str]]] = None,
+                            start: int = 0) -> pd.DataFrame:
+        """
+        Mappe des colonnes variées vers le schéma attendu.
+        En lecture en flux, `columns` (résolues sur le premier paquet) et
+        `start` (rang de la première ligne du paquet) gardent un schéma et des
+        ID par défaut ("ROW-n") identiques à ceux d'une lecture complète.
+        """
+        if raw_df is None or raw_df.empty:
+            return pd.DataFrame(columns=STANDARD_COLUMNS)
+
+        df = raw_df.copy()
+        if columns is None:
+            columns = self._resolve_columns(df)
 
-        out = pd.DataFrame()
-        out["ID"] = df[id_col] if id_col else [f"ROW-{idx + 1}" for idx in range(len(df))]
-        out["Date"] = df[date_col] if date_col else ""
-        out["Duration"] = df[duration_col] if duration_col else ""
-        out["Language"] = df[language_col] if language_col else "FR"
-        out["Length"] = df[length_col] if length_col else "medium"
-        out["Transcription"] = df[transcription_col].fillna("").astype(str)
-        return out
+        def source(field):
+            col = columns[field]
+            return df[col] if col is not None and col in df.columns else None
+
+        out = pd.DataFrame(index=df.index)
+        ids = source("ID")
+        out["ID"] = ids if ids is not None else [f"ROW-{start + idx + 1}" for idx in range(len(df))]
+        for field, default in (("Date", ""), ("Duration", ""), ("Length", "medium")):
+            values = source(field)
+            out[field] = values if values is not None else default
+        out["Transcription"] = source("Transcription").fillna("").astype(str)
+        # Langue absente (colonne ou cellule vide): détectée sur la transcription
+        declared = source("Language")
+        if declared is None:
+            declared = pd.Series([None] * len(df), index=df.index)
+        out["Language"] = [
+            lang if isinstance(lang, str) and lang.strip() else detect_language(text)
+            for lang, text in zip(declared, out["Transcription"])
+        ]
+        return out[STANDARD_COLUMNS]
 
     def load_data(self) -> pd.DataFrame:
         """Charge le fichier CSV"""
         try:
-            raw_data = self._read_source_file()
-            self.data = self._standardize_schema(raw_data)
+            with profile_stage("file_read"):
+                raw_data = self._read_source_file()
+            with profile_stage("schema"):
+                self.data = self._standardize_schema(raw_data)
             print(f"OK - CSV charge : {len(self.data)} conversations")
             return self.data
         except Exception as e:
@@ -112,6 +164,32 @@ class CSVProcessor:
             self.data = pd.DataFrame(columns=["ID", "Date", "Duration", "Language", "Length", "Transcription"])
             return None
 
+    @staticmethod
+    def _conversations_from_frame(data: pd.DataFrame) -> List[Dict]:
+        """Conversations (dictionnaires) d'un DataFrame au schéma standard, colonne par colonne."""
+        def column(name, default):
+            values = data[name]
+            return values.where(values.notna(), default).tolist()
+
+        return [
+            {
+                "client_id": client_id,
+                "date": date,
+                "duration": duration,
+                "language": language,
+                "length": length,
+                "transcription": transcription,
+            }
+            for client_id, date, duration, language, length, transcription in zip(
+                data["ID"].tolist(),
+                column("Date", ""),
+                column("Duration", ""),
+                column("Language", "FR"),
+                column("Length", "medium"),
+                column("Transcription", ""),
+            )
+        ]
+
     def get_conversations(self) -> List[Dict]:
         """Retourne la liste des conversations sous forme de dictionnaires"""
         if self.data is None:
@@ -119,20 +197,159 @@ class CSVProcessor:
         if self.data is None or self.data.empty:
             return []
 
-        conversations = []
-        transcription_col = "Transcription"
+        return self._conversations_from_frame(self.data)
 
-        for _, row in self.data.iterrows():
-            conversations.append({
-                "client_id": row["ID"],
-                "date": row["Date"] if pd.notna(row["Date"]) else "",
-                "duration": row["Duration"] if pd.notna(row["Duration"]) else "",
-                "language": row["Language"] if pd.notna(row["Language"]) else "FR",
-                "length": row["Length"] if pd.notna(row["Length"]) else "medium",
-                "transcription": row[transcription_col] if pd.notna(row[transcription_col]) else "",
-            })
-
-        return conversations
+    # ------------------------------------------------------------------
+    # Lecture en flux (fichiers volumineux)
+    # ------------------------------------------------------------------
+
+    def _sniff_delimiter(self) -> Optional[str]:
+        """Séparateur CSV détecté sur un échantillon du début du fichier (None si indécidable)."""
+        with open(self.csv_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+            sample = f.read(SNIFF_SAMPLE_BYTES)
+        if len(sample) == SNIFF_SAMPLE_BYTES and "\n" in sample:
+            # Ne pas couper la dernière ligne de l'échantillon
+            sample = sample[:sample.rindex("\n")]
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+        except csv.Error:
+            return None
+
+    @staticmethod
+    def _slices(df: pd.DataFrame, chunksize: int) -> Iterator[pd.DataFrame]:
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    @staticmethod
+    def _frames(records: Iterator, chunksize: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Regroupe des enregistrements (dicts ou tuples) en DataFrames de `chunksize` lignes."""
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+
+    def _iter_csv_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        delimiter = self._sniff_delimiter() or ","
+        yielded = False
+        try:
+            for chunk in pd.read_csv(self.csv_path, encoding="utf-8", sep=delimiter, engine="c", chunksize=chunksize):
+                yielded = True
+                yield chunk
+        except (pd.errors.ParserError, UnicodeDecodeError):
+            if yielded:
+                raise
+            # Fichier atypique: moteur python (plus lent) avec détection automatique
+            yield from pd.read_csv(self.csv_path, encoding="utf-8", sep=None, engine="python", chunksize=chunksize)
+
+    def _iter_excel_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        if Path(self.csv_path).suffix.lower() != ".xlsx":
+            # .xls (format binaire): pas de lecture en flux possible
+            yield from self._slices(pd.read_excel(self.csv_path), chunksize)
+            return
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            yield from self._slices(pd.read_excel(self.csv_path), chunksize)
+            return
+
+        workbook = load_workbook(self.csv_path, read_only=True, data_only=True)
+        try:
+            # Première feuille, comme pd.read_excel
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+            width = len(columns)
+            records = (
+                tuple(row[:width]) + (None,) * (width - len(row))
+                for row in rows
+                if any(value is not None for value in row)
+            )
+            yield from self._frames(records, chunksize, columns)
+        finally:
+            workbook.close()
+
+    def _is_json_lines(self) -> bool:
+        """JSON lines: la première ligne non vide est à elle seule un objet JSON complet."""
+        if Path(self.csv_path).suffix.lower() == ".jsonl":
+            return True
+        with open(self.csv_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        return isinstance(json.loads(line), dict)
+                    except ValueError:
+                        return False
+        return False
+
+    def _iter_json_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        if not self._is_json_lines():
+            # Document JSON unique (tableau / objet): à parser en entier avant découpage
+            yield from self._slices(self._read_source_file(), chunksize)
+            return
+
+        def records():
+            with open(self.csv_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+
+        yield from self._frames(records(), chunksize)
+
+    def _iter_text_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        def records():
+            with open(self.csv_path, "r", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield {"Transcription": line}
+
+        yield from self._frames(records(), chunksize, ["Transcription"])
+
+    def _iter_source_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        """Paquets bruts du fichier source, sans jamais le charger en entier (sauf JSON/XLS monoblocs)."""
+        ext = Path(self.csv_path).suffix.lower()
+        if ext == ".csv":
+            return self._iter_csv_chunks(chunksize)
+        if ext in {".xlsx", ".xls"}:
+            return self._iter_excel_chunks(chunksize)
+        if ext in {".json", ".jsonl"}:
+            return self._iter_json_chunks(chunksize)
+        if ext == ".txt":
+            return self._iter_text_chunks(chunksize)
+        raise ValueError(f"Format non supporte: {ext}")
+
+    def iter_conversations(self, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[Dict]:
+        """
+        Conversations produites au fil de la lecture, paquet par paquet
+        (mémoire bornée par `chunksize`, quel que soit la taille du fichier).
+        Mêmes dictionnaires que `get_conversations` ; le schéma est résolu sur
+        le premier paquet. Ne remplit pas `data`.
+        """
+        columns = None
+        start = 0
+        chunks = self._iter_source_chunks(chunksize)
+        while True:
+            with profile_stage("file_read"):
+                raw_chunk = next(chunks, None)
+            if raw_chunk is None:
+                return
+            if raw_chunk.empty:
+                continue
+            with profile_stage("schema"):
+                if columns is None:
+                    columns = self._resolve_columns(raw_chunk)
+                chunk = self._standardize_schema(raw_chunk, columns, start)
+                conversations = self._conversations_from_frame(chunk)
+            start += len(raw_chunk)
+            yield from conversations
 
     def get_conversation_by_id(self, client_id: str) -> Dict:
         """Recupere une conversation specifique par ID"""
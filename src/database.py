@@ -6,15 +6,25 @@ Sinon, utilise SQLite local.
 import sqlite3
 import json
 import os
+import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
 from dotenv import load_dotenv
 
+try:
+    from src.document import content_hash
+    from src.supabase_sync import PostgrestError, SupabaseSync
+except ImportError:
+    from document import content_hash
+    from supabase_sync import PostgrestError, SupabaseSync
+
 # Charger les variables d'environnement
 load_dotenv()
 
 # Configuration
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "clients.db")
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "clients.db")
 USE_SUPABASE = bool(os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY"))
 
 # Import conditionnel
@@ -33,16 +43,153 @@ def get_supabase() -> Optional["Client"]:
     key = os.getenv("SUPABASE_KEY")
     return create_client(url, key)
 
-def get_sqlite_connection(db_path: str = None) -> sqlite3.Connection:
-    """Retourne une connexion SQLite."""
-    path = db_path or DB_PATH
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    conn = sqlite3.connect(path)
+# PRAGMAs appliqués une seule fois, à l'ouverture de chaque connexion
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "foreign_keys": "ON",
+    "synchronous": "NORMAL",     # sûr en WAL, évite un fsync par transaction
+    "cache_size": -32000,        # en Kio (négatif): ~32 Mo de cache de pages
+    "mmap_size": 268435456,      # 256 Mo lus via mmap
+    "busy_timeout": 30000,       # ms d'attente si un autre processus écrit
+}
+# Requêtes préparées gardées par connexion (cache de sqlite3, clé = texte SQL)
+STATEMENT_CACHE_SIZE = 256
+
+def _open_sqlite_connection(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
+    for name, value in SQLITE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
     return conn
 
+def get_sqlite_connection(db_path: str = None) -> sqlite3.Connection:
+    """Retourne une connexion SQLite dédiée (à fermer par l'appelant, ex: jobs longs)."""
+    return _open_sqlite_connection(db_path or DB_PATH)
+
+# --- Pool par thread ---------------------------------------------------------
+# Les reruns Streamlit appellent les fonctions de lecture à chaque affichage:
+# chaque thread garde une connexion ouverte par base (PRAGMAs déjà appliqués,
+# requêtes préparées en cache) au lieu d'en ouvrir une à chaque appel.
+
+_POOL = threading.local()
+_POOL_GENERATION = 0
+
+def _thread_connections() -> dict:
+    connections = getattr(_POOL, "connections", None)
+    if connections is None or getattr(_POOL, "pid", None) != os.getpid():
+        # Connexions héritées d'un fork: inutilisables dans ce processus, abandonnées
+        connections = _POOL.connections = {}
+        _POOL.pid = os.getpid()
+    return connections
+
+def _pooled_connection(path: str) -> list:
+    connections = _thread_connections()
+    entry = connections.get(path)
+    if entry is not None and entry[1] != _POOL_GENERATION and entry[2] == 0:
+        entry[0].close()  # PRAGMAs modifiés depuis l'ouverture
+        entry = None
+    if entry is None:
+        entry = connections[path] = [_open_sqlite_connection(path), _POOL_GENERATION, 0]
+    return entry
+
+@contextmanager
+def sqlite_connection(db_path: str = None) -> Iterator[sqlite3.Connection]:
+    """
+    Connexion SQLite du pool (une par thread et par base), à utiliser en bloc:
+        with sqlite_connection(db_path) as conn:
+            conn.execute(...)
+    Le bloc le plus externe valide la transaction (annulée en cas d'exception).
+    La connexion reste ouverte pour les appels suivants du même thread.
+    """
+    path = os.path.abspath(db_path or DB_PATH)
+    entry = _pooled_connection(path)
+    conn = entry[0]
+    entry[2] += 1
+    try:
+        yield conn
+    except BaseException:
+        if entry[2] == 1:
+            _abort_transaction(path, entry)
+        raise
+    else:
+        if entry[2] == 1:
+            try:
+                conn.commit()
+            except BaseException:
+                # Ex: clé étrangère différée violée. Sans rollback, la connexion du pool
+                # resterait dans la transaction (verrou gardé, commits suivants en échec).
+                _abort_transaction(path, entry)
+                raise
+    finally:
+        entry[2] -= 1
+
+def _abort_transaction(path: str, entry: list):
+    """Annule la transaction en cours ; connexion retirée du pool si l'annulation échoue."""
+    try:
+        entry[0].rollback()
+    except sqlite3.Error:
+        _thread_connections().pop(path, None)
+        entry[0].close()
+
+def configure_sqlite(**pragmas):
+    """
+    Modifie les PRAGMAs des connexions (ex: configure_sqlite(cache_size=-64000)).
+    Les connexions déjà ouvertes du pool sont rouvertes à leur prochain usage.
+    """
+    global _POOL_GENERATION
+    SQLITE_PRAGMAS.update(pragmas)
+    _POOL_GENERATION += 1
+
+def close_sqlite_connections():
+    """Ferme les connexions du pool ouvertes par le thread courant."""
+    connections = _thread_connections()
+    for conn, _, _ in connections.values():
+        conn.close()
+    connections.clear()
+
+# Requêtes fréquentes: texte SQL constant, donc préparées une fois par connexion
+_SQL_TRANSCRIPTION_EXISTS = "SELECT 1 FROM transcriptions WHERE client_id = ? AND content_hash = ?"
+_SQL_UPSERT_CLIENT = """
+    INSERT INTO clients (id, genre, segment, canal_prefere, ville, age_range, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(id) DO UPDATE SET
+        genre = COALESCE(excluded.genre, clients.genre),
+        segment = COALESCE(excluded.segment, clients.segment),
+        canal_prefere = COALESCE(excluded.canal_prefere, clients.canal_prefere),
+        ville = COALESCE(excluded.ville, clients.ville),
+        age_range = COALESCE(excluded.age_range, clients.age_range),
+        updated_at = CURRENT_TIMESTAMP
+"""
+_SQL_INSERT_TRANSCRIPTION = (
+    "INSERT INTO transcriptions (client_id, texte_original, texte_nettoye, source_date, source_file, content_hash) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_TRANSCRIPTION_WITH_ID = (
+    "INSERT INTO transcriptions (id, client_id, texte_original, texte_nettoye, source_date, source_file, content_hash) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_TAGS = (
+    "INSERT INTO tags_extraits (transcription_id, client_id, tags_json, extraction_mode, field_fingerprints, "
+    "analysis_context_json, language) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_AI_ANALYSIS = """
+    INSERT INTO ai_analyses (client_id, resume_complet, segment_client, ice_breaker, urgency_score_final, insights_json, analyse_json, objections_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_UPDATE_SEGMENT = "UPDATE clients SET segment = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+_SQL_ALL_CLIENTS = (
+    "SELECT c.*, COUNT(t.id) as nb_transcriptions, MAX(t.source_date) as derniere_date FROM clients c "
+    "LEFT JOIN transcriptions t ON c.id = t.client_id GROUP BY c.id ORDER BY derniere_date DESC"
+)
+_SQL_CLIENT = "SELECT * FROM clients WHERE id = ?"
+_SQL_CLIENT_TRANSCRIPTIONS = "SELECT * FROM transcriptions WHERE client_id = ? ORDER BY source_date DESC"
+_SQL_CLIENT_TAGS = "SELECT * FROM tags_extraits WHERE client_id = ? ORDER BY extracted_at DESC"
+_SQL_CLIENT_ANALYSES = "SELECT * FROM ai_analyses WHERE client_id = ? ORDER BY analyzed_at DESC"
+_SQL_CLIENT_ACTIVATIONS = "SELECT * FROM activations WHERE client_id = ? ORDER BY trigger_date ASC"
+
 # ============================================================================
 # INITIALISATION
 # ============================================================================
@@ -58,9 +205,10 @@ def init_database(db_path: str = None):
         return # La structure Supabase est gérée à part ou via migration
         
     print("📂 Mode Local activé : SQLite")
-    conn = get_sqlite_connection(db_path)
-    cursor = conn.cursor()
-    
+    with sqlite_connection(db_path) as conn:
+        _create_tables(conn.cursor())
+
+def _create_tables(cursor):
     # Tables SQLite (Schema identique au précédent)
     cursor.executescript("""
         CREATE TABLE IF NOT EXISTS clients (
@@ -83,6 +231,7 @@ def init_database(db_path: str = None):
             source_date DATE,
             uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             source_file TEXT,
+            content_hash TEXT,
             FOREIGN KEY (client_id) REFERENCES clients(id)
         );
         CREATE TABLE IF NOT EXISTS tags_extraits (
@@ -92,6 +241,9 @@ def init_database(db_path: str = None):
             tags_json TEXT NOT NULL,
             completeness REAL DEFAULT 0,
             extraction_mode TEXT DEFAULT 'base',
+            field_fingerprints TEXT,
+            analysis_context_json TEXT,
+            language TEXT,
             extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (transcription_id) REFERENCES transcriptions(id),
             FOREIGN KEY (client_id) REFERENCES clients(id)
@@ -125,162 +277,319 @@ def init_database(db_path: str = None):
         );
         CREATE INDEX IF NOT EXISTS idx_transcriptions_client ON transcriptions(client_id);
     """)
-    conn.commit()
-    conn.close()
+    # Migration des bases existantes
+    _ensure_column(cursor, "tags_extraits", "field_fingerprints", "TEXT")
+    _ensure_column(cursor, "tags_extraits", "analysis_context_json", "TEXT")
+    # Langue passée à l'extraction (colonne Language ou "auto"): le re-tagging scanne le même shard
+    _ensure_column(cursor, "tags_extraits", "language", "TEXT")
+    _ensure_column(cursor, "transcriptions", "content_hash", "TEXT")
+    # Une même conversation n'est stockée qu'une fois par client (NULL: lignes antérieures)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transcriptions_client_content
+        ON transcriptions(client_id, content_hash) WHERE content_hash IS NOT NULL
+    """)
+    _ensure_fts(cursor)
+
+def _ensure_fts(cursor):
+    """
+    Index plein texte (FTS5) des transcriptions, tenu à jour par triggers.
+    unicode61 + remove_diacritics: "réunion" et "reunion", "Müller" et "muller"
+    se retrouvent (FR / EN / IT / ES / DE). Sans FTS5 dans SQLite: recherche LIKE.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transcriptions_fts'")
+    existed = cursor.fetchone() is not None
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS transcriptions_fts USING fts5(
+                texte_original, texte_nettoye,
+                content='transcriptions', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"[SQLite] FTS5 indisponible ({e}), recherche par LIKE")
+        return
+    cursor.executescript("""
+        CREATE TRIGGER IF NOT EXISTS transcriptions_fts_ai AFTER INSERT ON transcriptions BEGIN
+            INSERT INTO transcriptions_fts (rowid, texte_original, texte_nettoye)
+            VALUES (new.id, new.texte_original, new.texte_nettoye);
+        END;
+        CREATE TRIGGER IF NOT EXISTS transcriptions_fts_ad AFTER DELETE ON transcriptions BEGIN
+            INSERT INTO transcriptions_fts (transcriptions_fts, rowid, texte_original, texte_nettoye)
+            VALUES ('delete', old.id, old.texte_original, old.texte_nettoye);
+        END;
+        CREATE TRIGGER IF NOT EXISTS transcriptions_fts_au AFTER UPDATE OF texte_original, texte_nettoye ON transcriptions BEGIN
+            INSERT INTO transcriptions_fts (transcriptions_fts, rowid, texte_original, texte_nettoye)
+            VALUES ('delete', old.id, old.texte_original, old.texte_nettoye);
+            INSERT INTO transcriptions_fts (rowid, texte_original, texte_nettoye)
+            VALUES (new.id, new.texte_original, new.texte_nettoye);
+        END;
+    """)
+    if not existed:
+        # Base existante: indexer les transcriptions déjà stockées
+        cursor.execute("INSERT INTO transcriptions_fts (transcriptions_fts) VALUES ('rebuild')")
+
+def _ensure_column(cursor, table_name: str, column_name: str, column_type: str):
+    """Ajoute une colonne si elle n'existe pas encore (bases créées avant son introduction)."""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    if column_name not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+
+def _current_field_fingerprints() -> Optional[dict]:
+    """
+    Empreintes courantes des champs de la taxonomie, vue avancée comprise: les
+    tags sont enregistrés avec extraction_mode='advanced' (voir `_tags_row`).
+    None si l'extracteur est indisponible.
+    """
+    try:
+        from src.tag_extractor import get_advanced_field_fingerprints
+    except Exception:
+        try:
+            from tag_extractor import get_advanced_field_fingerprints
+        except Exception:
+            return None
+    return get_advanced_field_fingerprints()
+
+def _field_fingerprints_json(tags: dict, fingerprints: Optional[dict] = None) -> Optional[str]:
+    """
+    Empreintes (par champ) de la taxonomie ayant produit ces tags, pour le
+    re-tagging sélectif (voir src/retag_job.py). None si l'extracteur est indisponible.
+    """
+    fingerprints = fingerprints if fingerprints is not None else _current_field_fingerprints()
+    if fingerprints is None:
+        return None
+    return json.dumps({k: v for k, v in fingerprints.items() if k in tags}, sort_keys=True)
+
+# ============================================================================
+# INGESTION INCRÉMENTALE
+# ============================================================================
+
+def _result_content_hash(r: dict) -> str:
+    """Empreinte de la transcription complète d'un résultat de scan (calculée avant troncature)."""
+    return r.get("content_hash") or content_hash(r.get("transcription_originale", ""))
+
+def get_known_content_hashes(items: Iterable[Tuple[str, str]], db_path: str = None) -> Set[Tuple[str, str]]:
+    """
+    Couples (client_id, empreinte de transcription) déjà stockés parmi `items`:
+    ces conversations n'ont besoin ni d'extraction ni d'écriture.
+    """
+    wanted = {(str(client_id), digest) for client_id, digest in items}
+    digests = sorted({digest for _, digest in wanted})
+    known = set()
+    if not digests:
+        return known
+
+    if USE_SUPABASE:
+        try:
+            known = SupabaseSync.from_env().known_contents(digests)
+        except PostgrestError as e:
+            print(f"[Supabase] Erreur get_known_content_hashes: {e}")
+            return set()
+    else:
+        with sqlite_connection(db_path) as conn:
+            known = _sqlite_known_contents(conn, digests)
+    return known & wanted
+
+def _sqlite_known_contents(conn: sqlite3.Connection, digests: list) -> Set[Tuple[str, str]]:
+    """(client_id, empreinte) stockés pour ces empreintes, par paquets de 500."""
+    known = set()
+    for i in range(0, len(digests), 500):
+        chunk = digests[i:i + 500]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"SELECT client_id, content_hash FROM transcriptions WHERE content_hash IN ({placeholders})",
+            chunk,
+        )
+        known.update((str(client_id), digest) for client_id, digest in rows)
+    return known
 
 # ============================================================================
 # ÉCRITURE
 # ============================================================================
 
 def save_scan_results(results: list, source_file: str = None, db_path: str = None):
-    """Sauvegarde les résultats (Hybride SQLite/Supabase)."""
-    stats = {"inserted": 0, "updated": 0, "errors": 0}
+    """
+    Sauvegarde les résultats (Hybride SQLite/Supabase).
+    Une transcription déjà stockée pour le client (même empreinte de contenu)
+    n'est pas réécrite: comptée dans stats["skipped"]. stats["failed"] liste les
+    indices (dans `results`) des résultats non écrits, à rejouer.
+    """
+    stats = {"inserted": 0, "updated": 0, "skipped": 0, "errors": 0, "failed": []}
     
     if USE_SUPABASE:
-        sb = get_supabase()
-        for r in results:
-            try:
-                client_id = r.get("client_id", "")
-                tags = r.get("tags_extracted", {})
-                
-                # 1. Upsert Client
-                client_data = {
-                    "id": client_id,
-                    "genre": tags.get("genre"),
-                    "segment": r.get("segment_client", "Inconnu"),
-                    "canal_prefere": _get_first(tags.get("canaux_contact", [])),
-                    "ville": tags.get("ville"),
-                    "age_range": tags.get("age"),
-                    "updated_at": datetime.now().isoformat()
-                }
-                sb.table("clients").upsert(client_data).execute()
-                
-                # 2. Insert Transcription
-                trans_data = {
-                    "client_id": client_id,
-                    "texte_original": r.get("transcription_originale", ""),
-                    "texte_nettoye": r.get("cleaned_text", ""),
-                    "source_date": r.get("source_date"),
-                    "source_file": source_file
-                }
-                res_t = sb.table("transcriptions").insert(trans_data).execute()
-                trans_id = res_t.data[0]['id']
-                
-                # 3. Insert Tags
-                tags_data = {
-                    "transcription_id": trans_id,
-                    "client_id": client_id,
-                    "tags_json": json.dumps(tags, ensure_ascii=False, default=str),
-                    "completeness": 0, # To implement
-                    "extraction_mode": "advanced"
-                }
-                sb.table("tags_extraits").insert(tags_data).execute()
-                
-                # 4. Insert AI Analysis
-                if r.get("resume_complet") and r.get("resume_complet") != "Analyse IA en attente...":
-                    ai_data = {
-                        "client_id": client_id,
-                        "resume_complet": r.get("resume_complet"),
-                        "segment_client": r.get("segment_client"),
-                        "ice_breaker": r.get("ice_breaker"),
-                        "urgency_score_final": r.get("urgency_score_final"),
-                        "insights_json": json.dumps(r.get("insights_marketing", {}), ensure_ascii=False),
-                        "analyse_json": json.dumps(r.get("analyse_intelligente", {}), ensure_ascii=False),
-                        "objections_json": json.dumps(r.get("objections_freins", []), ensure_ascii=False)
-                    }
-                    sb.table("ai_analyses").insert(ai_data).execute()
-                
-                stats["inserted"] += 1
-            except Exception as e:
-                print(f"[Supabase] Erreur client {client_id}: {e}")
-                stats["errors"] += 1
-        return stats
+        # Écriture groupée: quelques requêtes par table au lieu de 4 par client
+        return SupabaseSync.from_env().sync_scan_results(results, source_file=source_file)
         
     else:
-        # MODE SQLITE (Code original)
-        conn = get_sqlite_connection(db_path)
-        cursor = conn.cursor()
-        for r in results:
+        # MODE SQLITE: écriture en lot (une transaction), ligne à ligne en cas d'échec
+        fingerprints = _current_field_fingerprints()
+        with sqlite_connection(db_path) as conn:
+            _begin_immediate(conn)
+            conn.execute("SAVEPOINT bulk_scan")
             try:
-                client_id = r.get("client_id", "")
-                tags = r.get("tags_extracted", {})
-                
-                cursor.execute("""
-                    INSERT INTO clients (id, genre, segment, canal_prefere, ville, age_range, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    ON CONFLICT(id) DO UPDATE SET
-                        genre = COALESCE(excluded.genre, clients.genre),
-                        segment = COALESCE(excluded.segment, clients.segment),
-                        canal_prefere = COALESCE(excluded.canal_prefere, clients.canal_prefere),
-                        ville = COALESCE(excluded.ville, clients.ville),
-                        age_range = COALESCE(excluded.age_range, clients.age_range),
-                        updated_at = CURRENT_TIMESTAMP
-                """, (client_id, tags.get("genre"), r.get("segment_client"), _get_first(tags.get("canaux_contact", [])), tags.get("ville"), tags.get("age")))
-                
-                cursor.execute("INSERT INTO transcriptions (client_id, texte_original, texte_nettoye, source_date, source_file) VALUES (?, ?, ?, ?, ?)", 
-                             (client_id, r.get("transcription_originale", ""), r.get("cleaned_text", ""), r.get("source_date"), source_file))
-                transcription_id = cursor.lastrowid
-                
-                cursor.execute("INSERT INTO tags_extraits (transcription_id, client_id, tags_json, extraction_mode) VALUES (?, ?, ?, ?)",
-                             (transcription_id, client_id, json.dumps(tags, ensure_ascii=False, default=str), "advanced"))
-                
-                if r.get("resume_complet") and "attente" not in r.get("resume_complet"):
-                    cursor.execute("""
-                        INSERT INTO ai_analyses (client_id, resume_complet, segment_client, ice_breaker, urgency_score_final, insights_json, analyse_json, objections_json)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (client_id, r.get("resume_complet"), r.get("segment_client"), r.get("ice_breaker"), r.get("urgency_score_final"), 
-                          json.dumps(r.get("insights_marketing", {}), ensure_ascii=False), 
-                          json.dumps(r.get("analyse_intelligente", {}), ensure_ascii=False),
-                          json.dumps(r.get("objections_freins", []), ensure_ascii=False)))
-                stats["inserted"] += 1
+                inserted, skipped = _bulk_insert_scan_results(conn, results, source_file, fingerprints)
+                conn.execute("RELEASE bulk_scan")
+                stats["inserted"] += inserted
+                stats["skipped"] += skipped
             except Exception as e:
-                print(f"[SQLite] Erreur: {e}")
-                stats["errors"] += 1
-        conn.commit()
-        conn.close()
+                conn.execute("ROLLBACK TO bulk_scan")
+                conn.execute("RELEASE bulk_scan")
+                print(f"[SQLite] Écriture en lot impossible ({e}), reprise ligne à ligne")
+                cursor = conn.cursor()
+                for i, r in enumerate(results):
+                    # Un point de sauvegarde par ligne: une ligne en échec ne laisse
+                    # pas de transcription sans tags (qu'un rejeu prendrait pour stockée)
+                    conn.execute("SAVEPOINT row")
+                    try:
+                        if _insert_scan_result(cursor, r, source_file, fingerprints):
+                            stats["inserted"] += 1
+                        else:
+                            stats["skipped"] += 1
+                        conn.execute("RELEASE row")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO row")
+                        conn.execute("RELEASE row")
+                        print(f"[SQLite] Erreur: {e}")
+                        stats["errors"] += 1
+                        stats["failed"].append(i)
         return stats
 
 def save_ai_results(results: list, db_path: str = None):
-    """Sauvegarde Résultats AI (Hybride)."""
+    """
+    Sauvegarde Résultats AI (Hybride). Renvoie {"inserted", "errors", "failed"}:
+    "failed" liste les indices (dans `results`) des résultats non écrits.
+    """
     if USE_SUPABASE:
-        sb = get_supabase()
-        for r in results:
-            try:
-                client_id = r.get("client_id", "")
-                sb.table("clients").update({
-                    "segment": r.get("segment_client"), 
-                    "updated_at": datetime.now().isoformat()
-                }).eq("id", client_id).execute()
-                
-                sb.table("ai_analyses").insert({
-                    "client_id": client_id,
-                    "resume_complet": r.get("resume_complet"),
-                    "segment_client": r.get("segment_client"),
-                    "ice_breaker": r.get("ice_breaker"),
-                    "urgency_score_final": r.get("urgency_score_final"),
-                    "insights_json": json.dumps(r.get("insights_marketing", {})),
-                    "analyse_json": json.dumps(r.get("analyse_intelligente", {})),
-                    "objections_json": json.dumps(r.get("objections_freins", []))
-                }).execute()
-            except Exception as e:
-                print(f"[Supabase] AI error: {e}")
+        return SupabaseSync.from_env().sync_ai_results(results)
     else:
-        # SQLite
-        conn = get_sqlite_connection(db_path)
-        cursor = conn.cursor()
-        for r in results:
+        stats = {"inserted": len(results), "errors": 0, "failed": []}
+        # SQLite: deux executemany dans une transaction, ligne à ligne en cas d'échec
+        with sqlite_connection(db_path) as conn:
+            conn.execute("SAVEPOINT bulk_ai")
             try:
-                client_id = r.get("client_id", "")
-                cursor.execute("UPDATE clients SET segment = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (r.get("segment_client"), client_id))
-                cursor.execute("""
-                    INSERT INTO ai_analyses (client_id, resume_complet, segment_client, ice_breaker, urgency_score_final, insights_json, analyse_json, objections_json)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (client_id, r.get("resume_complet"), r.get("segment_client"), r.get("ice_breaker"), r.get("urgency_score_final"), 
-                      json.dumps(r.get("insights_marketing", {})), json.dumps(r.get("analyse_intelligente", {})), json.dumps(r.get("objections_freins", []))))
+                segments, analyses = _stage_ai_rows(results)
+                conn.executemany(_SQL_UPDATE_SEGMENT, segments)
+                conn.executemany(_SQL_INSERT_AI_ANALYSIS, analyses)
+                conn.execute("RELEASE bulk_ai")
             except Exception as e:
-                print(f"[SQLite] AI error: {e}")
-        conn.commit()
-        conn.close()
+                conn.execute("ROLLBACK TO bulk_ai")
+                conn.execute("RELEASE bulk_ai")
+                print(f"[SQLite] Écriture en lot impossible ({e}), reprise ligne à ligne")
+                cursor = conn.cursor()
+                for i, r in enumerate(results):
+                    conn.execute("SAVEPOINT row")
+                    try:
+                        segments, analyses = _stage_ai_rows([r])
+                        cursor.execute(_SQL_UPDATE_SEGMENT, segments[0])
+                        cursor.execute(_SQL_INSERT_AI_ANALYSIS, analyses[0])
+                        conn.execute("RELEASE row")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO row")
+                        conn.execute("RELEASE row")
+                        print(f"[SQLite] AI error: {e}")
+                        stats["errors"] += 1
+                        stats["failed"].append(i)
+        stats["inserted"] -= stats["errors"]
+        return stats
+
+# ============================================================================
+# ÉCRITURE EN LOT (SQLITE)
+# ============================================================================
+# Les lignes sont préparées par table puis écrites par executemany dans une
+# seule transaction. Les ids des transcriptions sont réservés en plage
+# (verrou d'écriture pris par BEGIN IMMEDIATE), ce qui permet de préparer les
+# tags qui les référencent sans relire chaque lastrowid ; les clés étrangères
+# sont vérifiées au commit (defer_foreign_keys).
+
+def _begin_immediate(conn: sqlite3.Connection):
+    """Prend le verrou d'écriture dès le début de la transaction (plage d'ids stable)."""
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    conn.execute("PRAGMA defer_foreign_keys=ON")
+
+def _next_transcription_id(conn: sqlite3.Connection) -> int:
+    """Premier id libre de transcriptions (AUTOINCREMENT: jamais un id déjà attribué)."""
+    row = conn.execute("""
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'transcriptions'), 0),
+                   COALESCE((SELECT MAX(id) FROM transcriptions), 0))
+    """).fetchone()
+    return row[0] + 1
+
+def _client_row(r: dict, tags: dict) -> tuple:
+    return (r.get("client_id", ""), tags.get("genre"), r.get("segment_client"),
+            _get_first(tags.get("canaux_contact", [])), tags.get("ville"), tags.get("age"))
+
+def _ai_analysis_row(r: dict) -> tuple:
+    return (r.get("client_id", ""), r.get("resume_complet"), r.get("segment_client"), r.get("ice_breaker"),
+            r.get("urgency_score_final"),
+            json.dumps(r.get("insights_marketing", {}), ensure_ascii=False),
+            json.dumps(r.get("analyse_intelligente", {}), ensure_ascii=False),
+            json.dumps(r.get("objections_freins", []), ensure_ascii=False))
+
+def _has_ai_analysis(r: dict) -> bool:
+    return bool(r.get("resume_complet")) and "attente" not in r.get("resume_complet")
+
+def _tags_row(transcription_id: int, r: dict, tags: dict, fingerprints: Optional[dict]) -> tuple:
+    context = r.get("analysis_context")
+    return (transcription_id, r.get("client_id", ""), json.dumps(tags, ensure_ascii=False, default=str), "advanced",
+            _field_fingerprints_json(tags, fingerprints),
+            json.dumps(context, ensure_ascii=False) if context else None, r.get("language"))
+
+def _bulk_insert_scan_results(conn: sqlite3.Connection, results: list, source_file: Optional[str],
+                              fingerprints: Optional[dict]) -> Tuple[int, int]:
+    """Écrit les résultats nouveaux en 4 executemany ; renvoie (insérés, ignorés)."""
+    digests = [_result_content_hash(r) for r in results]
+    seen = _sqlite_known_contents(conn, sorted(set(digests)))
+    clients, transcriptions, tags_rows, analyses = [], [], [], []
+    transcription_id = _next_transcription_id(conn)
+    skipped = 0
+    for r, digest in zip(results, digests):
+        key = (str(r.get("client_id", "")), digest)
+        if key in seen:
+            skipped += 1
+            continue
+        seen.add(key)
+        tags = r.get("tags_extracted", {})
+        clients.append(_client_row(r, tags))
+        transcriptions.append((transcription_id, r.get("client_id", ""), r.get("transcription_originale", ""),
+                               r.get("cleaned_text", ""), r.get("source_date"), source_file, digest))
+        tags_rows.append(_tags_row(transcription_id, r, tags, fingerprints))
+        if _has_ai_analysis(r):
+            analyses.append(_ai_analysis_row(r))
+        transcription_id += 1
+
+    conn.executemany(_SQL_UPSERT_CLIENT, clients)
+    conn.executemany(_SQL_INSERT_TRANSCRIPTION_WITH_ID, transcriptions)
+    conn.executemany(_SQL_INSERT_TAGS, tags_rows)
+    conn.executemany(_SQL_INSERT_AI_ANALYSIS, analyses)
+    return len(transcriptions), skipped
+
+def _insert_scan_result(cursor: sqlite3.Cursor, r: dict, source_file: Optional[str],
+                        fingerprints: Optional[dict]) -> bool:
+    """Écriture d'un seul résultat (repli ligne à ligne) ; False si déjà stocké."""
+    tags = r.get("tags_extracted", {})
+    digest = _result_content_hash(r)
+    # Conversation déjà stockée pour ce client (index unique): rien à écrire
+    cursor.execute(_SQL_TRANSCRIPTION_EXISTS, (r.get("client_id", ""), digest))
+    if cursor.fetchone():
+        return False
+    cursor.execute(_SQL_UPSERT_CLIENT, _client_row(r, tags))
+    cursor.execute(_SQL_INSERT_TRANSCRIPTION,
+                   (r.get("client_id", ""), r.get("transcription_originale", ""), r.get("cleaned_text", ""),
+                    r.get("source_date"), source_file, digest))
+    cursor.execute(_SQL_INSERT_TAGS, _tags_row(cursor.lastrowid, r, tags, fingerprints))
+    if _has_ai_analysis(r):
+        cursor.execute(_SQL_INSERT_AI_ANALYSIS, _ai_analysis_row(r))
+    return True
+
+def _stage_ai_rows(results: list) -> Tuple[list, list]:
+    """(mises à jour de segment, analyses IA) pour save_ai_results."""
+    segments = [(r.get("segment_client"), r.get("client_id", "")) for r in results]
+    analyses = [(r.get("client_id", ""), r.get("resume_complet"), r.get("segment_client"), r.get("ice_breaker"),
+                 r.get("urgency_score_final"), json.dumps(r.get("insights_marketing", {})),
+                 json.dumps(r.get("analyse_intelligente", {})), json.dumps(r.get("objections_freins", [])))
+                for r in results]
+    return segments, analyses
 
 # ============================================================================
 # LECTURE (HYBRIDE)
@@ -293,11 +602,8 @@ def get_all_clients(db_path: str = None) -> list:
         res = get_supabase().table("clients").select("*").execute()
         return res.data
     else:
-        conn = get_sqlite_connection(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT c.*, COUNT(t.id) as nb_transcriptions, MAX(t.source_date) as derniere_date FROM clients c LEFT JOIN transcriptions t ON c.id = t.client_id GROUP BY c.id ORDER BY derniere_date DESC")
-        rows = cursor.fetchall()
-        conn.close()
+        with sqlite_connection(db_path) as conn:
+            rows = conn.execute(_SQL_ALL_CLIENTS).fetchall()
         return [dict(row) for row in rows]
 
 def get_client_history(client_id: str, db_path: str = None) -> dict:
@@ -324,35 +630,26 @@ def get_client_history(client_id: str, db_path: str = None) -> dict:
             "tags": tags, "analyses": analyses, "activations": activations
         }
     else:
-        conn = get_sqlite_connection(db_path)
-        cursor = conn.cursor()
-        # ... (Code existant pour SQLite) ...
-        cursor.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
-        client = cursor.fetchone()
-        if not client: 
-            conn.close()
-            return None
-        
-        # Récupérer le reste... (Simplifié pour la brièveté, le code original était correct)
-        # On réutilise la logique SQLite existante mais encapsulée
-        # Pour éviter de tout dupliquer ici, je suppose le code original.
-        # Dans une implémentation réelle, je ferais une classe abstraite.
-        
-        # FULL RE-IMPLÉMENTATION SQLITE (copiée pour sûreté)
-        cursor.execute("SELECT * FROM transcriptions WHERE client_id = ? ORDER BY source_date DESC", (client_id,))
-        transcriptions = [dict(r) for r in cursor.fetchall()]
-        cursor.execute("SELECT * FROM tags_extraits WHERE client_id = ? ORDER BY extracted_at DESC", (client_id,))
-        tags = [dict(r) for r in cursor.fetchall()]
+        with sqlite_connection(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_CLIENT, (client_id,))
+            client = cursor.fetchone()
+            if not client: 
+                return None
+            
+            cursor.execute(_SQL_CLIENT_TRANSCRIPTIONS, (client_id,))
+            transcriptions = [dict(r) for r in cursor.fetchall()]
+            cursor.execute(_SQL_CLIENT_TAGS, (client_id,))
+            tags = [dict(r) for r in cursor.fetchall()]
+            cursor.execute(_SQL_CLIENT_ANALYSES, (client_id,))
+            analyses = [dict(r) for r in cursor.fetchall()]
+            cursor.execute(_SQL_CLIENT_ACTIVATIONS, (client_id,))
+            activations = [dict(r) for r in cursor.fetchall()]
         for t in tags: t["tags"] = json.loads(t.get("tags_json", "{}"))
-        cursor.execute("SELECT * FROM ai_analyses WHERE client_id = ? ORDER BY analyzed_at DESC", (client_id,))
-        analyses = [dict(r) for r in cursor.fetchall()]
         for a in analyses:
             a["insights"] = json.loads(a.get("insights_json", "{}"))
             a["analyse"] = json.loads(a.get("analyse_json", "{}"))
             a["objections"] = json.loads(a.get("objections_json", "[]"))
-        cursor.execute("SELECT * FROM activations WHERE client_id = ? ORDER BY trigger_date ASC", (client_id,))
-        activations = [dict(r) for r in cursor.fetchall()]
-        conn.close()
         return {"client": dict(client), "transcriptions": transcriptions, "tags": tags, "analyses": analyses, "activations": activations}
 
 def get_database_stats(db_path: str = None) -> dict:
@@ -365,27 +662,95 @@ def get_database_stats(db_path: str = None) -> dict:
             stats[t] = res.count
         return stats
     else:
-        conn = get_sqlite_connection(db_path)
-        cursor = conn.cursor()
         stats = {}
-        for table in ["clients", "transcriptions", "tags_extraits", "activations", "ai_analyses"]:
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            stats[table] = cursor.fetchone()[0]
-        conn.close()
+        with sqlite_connection(db_path) as conn:
+            for table in ["clients", "transcriptions", "tags_extraits", "activations", "ai_analyses"]:
+                stats[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
         return stats
 
-def search_transcriptions(query: str, db_path: str = None) -> list:
+def _fts_query(query: str) -> str:
+    """
+    Requête MATCH sûre à partir d'une saisie libre: chaque mot devient un
+    préfixe ("voyag" trouve "voyage"), les passages entre guillemets des
+    expressions exactes ; tous les termes sont requis.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\w+)', query):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        else:
+            terms.append(f'"{word}"*')
+    return " AND ".join(terms)
+
+def _tag_filters_sql(tags: Optional[Dict[str, Any]]) -> Tuple[str, list]:
+    """
+    Conditions sur les tags extraits (une par champ, valeurs alternatives en
+    liste): {"ville": "Paris", "couleurs": ["Noir", "Rouge"]}. Champs simples
+    et listes sont traités de la même façon par json_each.
+    """
+    clauses, params = [], []
+    for field, values in (tags or {}).items():
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        if not values:
+            continue
+        placeholders = ",".join("?" for _ in values)
+        clauses.append(
+            "EXISTS (SELECT 1 FROM tags_extraits tg, json_each(tg.tags_json, ?) j "
+            f"WHERE tg.transcription_id = t.id AND j.value IN ({placeholders}))"
+        )
+        params.append(f'$."{field}"')
+        params.extend(values)
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+def search_transcriptions(query: str, db_path: str = None, tags: Optional[Dict[str, Any]] = None,
+                          limit: int = 100) -> list:
+    """
+    Recherche plein texte, résultats classés (bm25) avec extrait surligné
+    (`snippet`, termes entre **). `tags` ajoute des filtres sur les tags
+    extraits dans la même requête SQL ; requête vide + tags: filtre seul.
+    """
     if USE_SUPABASE:
         sb = get_supabase()
         # Recherche basique textSearch
         res = sb.table("transcriptions").select("*").textSearch("texte_original", query).execute()
         return res.data
     else:
-        conn = get_sqlite_connection(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM transcriptions WHERE texte_original LIKE ?", (f"%{query}%",))
-        rows = cursor.fetchall()
-        conn.close()
+        tag_sql, tag_params = _tag_filters_sql(tags)
+        match = _fts_query(query or "")
+        with sqlite_connection(db_path) as conn:
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transcriptions_fts'").fetchone()
+            if match and has_fts:
+                rows = conn.execute(f"""
+                    SELECT t.*, c.segment, c.ville, c.genre,
+                           snippet(transcriptions_fts, 0, '**', '**', '…', 16) AS snippet,
+                           bm25(transcriptions_fts, 1.0, 0.5) AS rank
+                    FROM transcriptions_fts
+                    JOIN transcriptions t ON t.id = transcriptions_fts.rowid
+                    LEFT JOIN clients c ON c.id = t.client_id
+                    WHERE transcriptions_fts MATCH ?{tag_sql}
+                    ORDER BY rank
+                    LIMIT ?
+                """, [match] + tag_params + [limit]).fetchall()
+            elif query and query.strip():
+                # SQLite sans FTS5 (ou saisie sans mot): recherche par sous-chaîne
+                rows = conn.execute(f"""
+                    SELECT t.*, c.segment, c.ville, c.genre, NULL AS snippet, NULL AS rank
+                    FROM transcriptions t LEFT JOIN clients c ON c.id = t.client_id
+                    WHERE t.texte_original LIKE ?{tag_sql}
+                    ORDER BY t.source_date DESC
+                    LIMIT ?
+                """, [f"%{query.strip()}%"] + tag_params + [limit]).fetchall()
+            else:
+                rows = conn.execute(f"""
+                    SELECT t.*, c.segment, c.ville, c.genre, NULL AS snippet, NULL AS rank
+                    FROM transcriptions t LEFT JOIN clients c ON c.id = t.client_id
+                    WHERE 1 = 1{tag_sql}
+                    ORDER BY t.source_date DESC
+                    LIMIT ?
+                """, tag_params + [limit]).fetchall()
         return [dict(row) for row in rows]
 
 def get_all_transcriptions(db_path: str = None):
@@ -449,22 +814,19 @@ def get_all_clients_with_data(db_path: str = None) -> list:
             
     else:
         try:
-            conn = get_sqlite_connection(db_path)
-            cursor = conn.cursor()
-            
             query = """
             SELECT 
                 t.client_id, t.texte_original, t.texte_nettoye, t.source_date,
                 c.segment as segment_client,
-                tg.tags_json
+                tg.tags_json, tg.analysis_context_json
             FROM transcriptions t
             JOIN clients c ON t.client_id = c.id
             LEFT JOIN tags_extraits tg ON t.id = tg.transcription_id
             GROUP BY t.client_id
             ORDER BY t.source_date DESC
             """
-            cursor.execute(query)
-            rows = cursor.fetchall()
+            with sqlite_connection(db_path) as conn:
+                rows = conn.execute(query).fetchall()
             
             for r in rows:
                 results.append({
@@ -473,11 +835,11 @@ def get_all_clients_with_data(db_path: str = None) -> list:
                     "cleaned_text": r["texte_nettoye"],
                     "source_date": datetime.strptime(r["source_date"], "%Y-%m-%d") if r["source_date"] else None,
                     "tags_extracted": json.loads(r["tags_json"]) if r["tags_json"] else {},
+                    "analysis_context": json.loads(r["analysis_context_json"]) if r["analysis_context_json"] else None,
                     "segment_client": r["segment_client"],
                     "resume_complet": "",
                     "urgency_score_final": 1
                 })
-            conn.close()
         except Exception as e:
             print(f"[SQLite] Erreur get_all_clients_with_data: {e}")
         
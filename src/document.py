@@ -0,0 +1,154 @@
+"""
+Module Document - Texte nettoyé + vues normalisées calculées une seule fois
+- `lowered`: minuscules (identique à `text.lower()`)
+- `folded`: minuscules sans accents ni ligatures (une seule table `str.translate`)
+- `offsets`: correspondance index de `folded` -> index du texte d'origine
+- `language`: langue déclarée ou détectée (route le scan vers un shard de la taxonomie)
+Les extracteurs lisent ces vues au lieu de re-normaliser le texte à chaque appel.
+`content_hash` identifie un texte à la casse et aux espaces près (ingestion incrémentale).
+"""
+import hashlib
+import re
+import unicodedata
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+# ============================================================================
+# 1. TABLE DE REPLIEMENT (ACCENTS / LIGATURES)
+# ============================================================================
+
+# Ligatures et lettres sans décomposition Unicode
+_SPECIAL_FOLDS = {
+    "œ": "oe", "æ": "ae", "ß": "ss", "ø": "o", "đ": "d", "ł": "l", "ı": "i", "ς": "σ",
+}
+
+
+def _build_fold_table() -> Dict[int, str]:
+    """Table appliquée à un texte déjà en minuscules: lettre accentuée -> lettre de base."""
+    table = {}
+    for code in range(0x00C0, 0x0250):
+        ch = chr(code)
+        if ch != ch.lower():
+            continue
+        base = "".join(c for c in unicodedata.normalize("NFD", ch) if not unicodedata.combining(c))
+        if base and base != ch:
+            table[code] = base
+    for ch, repl in _SPECIAL_FOLDS.items():
+        table[ord(ch)] = repl
+    return table
+
+
+FOLD_TABLE = _build_fold_table()
+
+# Caractères dont la forme minuscule repliée fait plus d'un caractère (œ, æ, ß, İ...)
+_EXPANDING_RE = re.compile("[%s]" % "".join(
+    re.escape(chr(code)) for code in list(range(0x00C0, 0x0250)) + [0x1E9E]
+    if len(chr(code).lower().translate(FOLD_TABLE)) != 1
+))
+
+
+def fold_text(text: str) -> str:
+    """Minuscules + suppression des accents (même repliement que `Document.folded`)."""
+    return text.lower().translate(FOLD_TABLE)
+
+# ============================================================================
+# 2. DOCUMENT
+# ============================================================================
+
+class Document(str):
+    """
+    Chaîne (le texte nettoyé lui-même) portant ses vues normalisées, calculées
+    à la première lecture puis mémorisées. Reste un `str` pour tous les appelants
+    existants (JSON, SQLite, regex...).
+    """
+
+    # Code langue ("FR", "EN"...) ou None: taxonomie complète
+    language: Optional[str] = None
+
+    def __new__(cls, text: str = "", language: Optional[str] = None):
+        doc = super().__new__(cls, text)
+        if language:
+            doc.language = language
+        return doc
+
+    @cached_property
+    def lowered(self) -> str:
+        return str.lower(self)
+
+    @cached_property
+    def folded(self) -> str:
+        return self.lowered.translate(FOLD_TABLE)
+
+    @cached_property
+    def offsets(self) -> Optional[List[int]]:
+        """
+        Index d'origine de chaque caractère de `folded`, ou None quand la
+        correspondance est l'identité (cas courant: aucune ligature ni
+        minuscule multi-caractères, les longueurs sont égales).
+        """
+        if len(self.folded) == len(self) and len(self.lowered) == len(self):
+            return None
+        # Seuls les caractères qui s'étendent ("œ" -> "oe") décalent les index
+        offsets: List[int] = []
+        last = 0
+        for match in _EXPANDING_RE.finditer(self):
+            i = match.start()
+            offsets.extend(range(last, i))
+            offsets.extend([i] * len(str.lower(self[i]).translate(FOLD_TABLE)))
+            last = i + 1
+        offsets.extend(range(last, len(self)))
+        if len(offsets) != len(self.folded):
+            # Caractère hors table dont la minuscule s'étend: correspondance caractère par caractère
+            offsets = []
+            for i, ch in enumerate(self):
+                offsets.extend([i] * len(ch.lower().translate(FOLD_TABLE)))
+        return offsets
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Convertit un intervalle de `folded` en intervalle du texte d'origine."""
+        offsets = self.offsets
+        if offsets is None or end <= start:
+            return start, end
+        start = offsets[min(start, len(offsets) - 1)]
+        end = offsets[min(end, len(offsets)) - 1] + 1
+        return start, end
+
+    def lowered_slice(self, start: int, end: int) -> str:
+        """Texte d'origine en minuscules correspondant à un intervalle de `folded`."""
+        if self.offsets is None:
+            return self.lowered[start:end]
+        o_start, o_end = self.original_span(start, end)
+        return str.lower(self[o_start:o_end])
+
+    def __reduce__(self):
+        # Les vues mémorisées ne sont pas envoyées aux workers: elles se recalculent
+        return (Document, (str(self), self.language))
+
+
+def as_document(text: str, language: Optional[str] = None) -> Document:
+    """
+    Renvoie `text` s'il est déjà un Document (de la même langue), sinon
+    l'enveloppe (None/non-str -> ""). Sans `language`, un Document garde la sienne.
+    """
+    if isinstance(text, Document) and (language is None or language == text.language):
+        return text
+    if language is None:
+        # Document du même fichier importé sous l'autre nom (`src.document` / `document`)
+        language = getattr(text, "language", None)
+    return Document(text if isinstance(text, str) else "", language)
+
+
+# ============================================================================
+# 3. EMPREINTE DE CONTENU
+# ============================================================================
+
+def normalize_for_hash(text: str) -> str:
+    """Forme canonique d'une transcription: NFC, minuscules, espaces réduits."""
+    if not isinstance(text, str):
+        return ""
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+def content_hash(text: str) -> str:
+    """Empreinte SHA-256 du texte normalisé (même conversation ré-importée = même empreinte)."""
+    return hashlib.sha256(normalize_for_hash(text).encode("utf-8")).hexdigest()
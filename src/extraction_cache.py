@@ -0,0 +1,256 @@
+"""
+Module Extraction Cache - Cache adressé par contenu pour extract_all_tags
+- Tier 1: LRU en mémoire (par processus)
+- Tier 2: SQLite persistant à côté de data/clients.db, écrit par lots et
+  plafonné (entrées les moins récemment utilisées et trop anciennes purgées)
+Clé = hash du texte nettoyé + empreinte de la taxonomie chargée.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from multiprocessing.util import Finalize
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "extraction_cache.db")
+DEFAULT_LRU_SIZE = 4096
+# Écritures SQLite groupées: une transaction toutes les N entrées ou toutes les N secondes
+COMMIT_EVERY = 256
+COMMIT_INTERVAL_S = 2.0
+# Plafond du tier persistant (surchargeable: EXTRACTION_CACHE_MAX_ENTRIES / _MAX_AGE_DAYS)
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_MAX_AGE_DAYS = 90
+
+
+def fingerprint_mappings(mappings: Dict[str, Any], extra: str = "") -> str:
+    """Empreinte stable d'un ensemble de mappings (toute modification change l'empreinte)."""
+    h = hashlib.sha256()
+    for name, mapping in mappings.items():
+        h.update(name.encode("utf-8"))
+        h.update(json.dumps(mapping, ensure_ascii=False, sort_keys=False).encode("utf-8"))
+    h.update(extra.encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class ExtractionCache:
+    """
+    Cache deux niveaux des résultats d'extraction.
+
+    Les résultats sont stockés en JSON: chaque lecture renvoie une copie
+    indépendante (les appelants enrichissent souvent le dict retourné).
+    """
+
+    def __init__(self, fingerprint: str, db_path: Optional[str] = None, lru_size: int = DEFAULT_LRU_SIZE, persistent: bool = True,
+                 max_entries: Optional[int] = None, max_age_days: Optional[float] = None,
+                 commit_every: int = COMMIT_EVERY):
+        self.fingerprint = fingerprint
+        self.db_path = db_path or os.getenv("EXTRACTION_CACHE_PATH") or DEFAULT_CACHE_PATH
+        self.lru_size = lru_size
+        self.persistent = persistent
+        self.max_entries = max_entries or int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.max_age_days = max_age_days or float(os.getenv("EXTRACTION_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS))
+        self.commit_every = commit_every
+        self.enabled = os.getenv("EXTRACTION_CACHE", "1") != "0"
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        # Entrées en attente d'écriture SQLite, et entrées persistantes relues (date d'usage à rafraîchir)
+        self._pending: "OrderedDict[str, str]" = OrderedDict()
+        self._touched: set = set()
+        self._last_commit = time.monotonic()
+        self._written_since_prune = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Clés
+    # ------------------------------------------------------------------
+
+    def make_key(self, cleaned_text: str, language: Optional[str] = None) -> str:
+        """
+        Hash du texte nettoyé + empreinte taxonomie + mois courant
+        (l'âge par année de naissance et les échéances dépendent de la date)
+        + langue de routage (le shard scanné dépend de la langue).
+        """
+        period = datetime.now().strftime("%Y-%m")
+        payload = f"{self.fingerprint}|{period}|{language or ''}|{cleaned_text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    # ------------------------------------------------------------------
+    # SQLite (tier persistant)
+    # ------------------------------------------------------------------
+
+    def _get_conn(self) -> Optional[sqlite3.Connection]:
+        if not self.persistent:
+            return None
+        # Une connexion par processus (les workers du pool héritent de l'objet)
+        if self._conn is not None and self._conn_pid == os.getpid():
+            return self._conn
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    taxonomy_fingerprint TEXT NOT NULL,
+                    tags_json TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_used REAL NOT NULL DEFAULT 0
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(extraction_cache)")}
+            if "last_used" not in columns:
+                # Cache créé par une version antérieure: les entrées existantes sont les plus anciennes
+                conn.execute("ALTER TABLE extraction_cache ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used ON extraction_cache(last_used)")
+            # Invalidation automatique: les entrées d'une ancienne taxonomie sont purgées
+            conn.execute("DELETE FROM extraction_cache WHERE taxonomy_fingerprint != ?", (self.fingerprint,))
+            self._prune(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[ExtractionCache] SQLite indisponible ({e}), cache mémoire uniquement")
+            self.persistent = False
+            return None
+        self._conn = conn
+        self._conn_pid = os.getpid()
+        # Entrées héritées par fork: écrites par le processus parent, pas par celui-ci
+        self._pending.clear()
+        self._touched.clear()
+        # Écrit le reliquat à la sortie du processus (y compris les workers d'un pool,
+        # qui ne déclenchent pas atexit)
+        Finalize(None, ExtractionCache._flush_at_exit, args=(self,), exitpriority=10)
+        return conn
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Applique le plafond: âge maximal, puis nombre d'entrées (les moins récemment utilisées partent)."""
+        conn.execute("DELETE FROM extraction_cache WHERE last_used < ?",
+                     (time.time() - self.max_age_days * 86400,))
+        conn.execute(
+            "DELETE FROM extraction_cache WHERE cache_key IN ("
+            "SELECT cache_key FROM extraction_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._written_since_prune = 0
+
+    def _flush_locked(self):
+        """Écrit les entrées en attente en une transaction (verrou déjà pris)."""
+        if not self._pending and not self._touched:
+            return
+        conn = self._get_conn()
+        self._last_commit = time.monotonic()
+        if conn is None:
+            self._pending.clear()
+            self._touched.clear()
+            return
+        now = time.time()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO extraction_cache (cache_key, taxonomy_fingerprint, tags_json, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(key, self.fingerprint, raw, now) for key, raw in self._pending.items()],
+                )
+                conn.executemany("UPDATE extraction_cache SET last_used = ? WHERE cache_key = ?",
+                                 [(now, key) for key in self._touched])
+                self._written_since_prune += len(self._pending)
+                if self._written_since_prune >= max(1, self.max_entries // 10):
+                    self._prune(conn)
+        except sqlite3.Error as e:
+            print(f"[ExtractionCache] Erreur écriture: {e}")
+        self._pending.clear()
+        self._touched.clear()
+
+    @staticmethod
+    def _flush_at_exit(cache: "ExtractionCache"):
+        if cache._conn_pid == os.getpid():
+            cache.flush()
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def get(self, cleaned_text: str, language: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Renvoie une copie du résultat mis en cache, ou None."""
+        if not self.enabled:
+            return None
+        key = self.make_key(cleaned_text, language)
+        with self._lock:
+            raw = self._lru.get(key) or self._pending.get(key)
+            if raw is not None:
+                self._remember(key, raw)
+            else:
+                conn = self._get_conn()
+                if conn is not None:
+                    try:
+                        row = conn.execute(
+                            "SELECT tags_json FROM extraction_cache WHERE cache_key = ?", (key,)
+                        ).fetchone()
+                    except sqlite3.Error:
+                        row = None
+                    if row:
+                        raw = row[0]
+                        self._remember(key, raw)
+                        self._touched.add(key)
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def put(self, cleaned_text: str, result: Dict[str, Any], language: Optional[str] = None):
+        """
+        Enregistre un résultat dans les deux niveaux. L'écriture SQLite est
+        groupée (voir `flush`): les workers d'un pool ne se disputent le verrou
+        du fichier qu'une fois par paquet.
+        """
+        if not self.enabled:
+            return
+        key = self.make_key(cleaned_text, language)
+        raw = json.dumps(result, ensure_ascii=False, default=str)
+        with self._lock:
+            self._remember(key, raw)
+            if not self.persistent or self._get_conn() is None:
+                return
+            self._pending[key] = raw
+            if (len(self._pending) >= self.commit_every
+                    or time.monotonic() - self._last_commit >= COMMIT_INTERVAL_S):
+                self._flush_locked()
+
+    def flush(self):
+        """Écrit immédiatement les entrées en attente dans SQLite."""
+        with self._lock:
+            self._flush_locked()
+
+    def _remember(self, key: str, raw: str):
+        self._lru[key] = raw
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def clear(self):
+        """Vide les deux niveaux."""
+        with self._lock:
+            self._lru.clear()
+            self._pending.clear()
+            self._touched.clear()
+            conn = self._get_conn()
+            if conn is not None:
+                conn.execute("DELETE FROM extraction_cache")
+                conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "hits": self.hits,
+            "misses": self.misses,
+            "lru_entries": len(self._lru),
+            "pending_writes": len(self._pending),
+            "persistent": self.persistent,
+        }
@@ -0,0 +1,287 @@
+"""
+Module Extraction Stats - Instrumentation opt-in de extract_all_tags
+- Temps, appels et taux de succès par extracteur (champs de TAG_FIELDS)
+- Scans, taux de succès et catégories trouvées par mapping
+- Mots-clés jamais trouvés (candidats à l'élagage)
+Activation:
+  EXTRACTION_STATS=1 python main.py            # rapport écrit à la sortie du processus
+  with collect_extraction_stats() as stats:    # rapport écrit à la sortie du bloc
+      extract_all_tags_batch(textes)
+Les rapports (JSON + texte) vont dans output/reports/.
+"""
+import atexit
+import json
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "reports")
+
+# ============================================================================
+# 1. COLLECTEUR
+# ============================================================================
+
+def _is_hit(value: Any) -> bool:
+    """Un champ "trouve" quelque chose s'il n'est ni None ni vide."""
+    return value is not None and value != [] and value != {} and value != ""
+
+
+class ExtractionStats:
+    """
+    Compteurs agrégés sur un lot de documents. Sérialisable (`to_dict`) et
+    fusionnable (`merge`): les workers d'un pool renvoient leurs compteurs
+    au processus parent.
+    """
+
+    def __init__(self):
+        self.documents = 0
+        self.cache_hits = 0
+        self.fields: Dict[str, Dict[str, float]] = {}
+        self.mappings: Dict[str, Dict[str, int]] = {}
+        self.categories: Dict[str, Counter] = {}
+        self.keywords: Dict[str, Counter] = {}
+        self.started_at = datetime.now().isoformat()
+        self.path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Enregistrement (appelé par tag_extractor / taxonomy_matcher)
+    # ------------------------------------------------------------------
+
+    def record_document(self, cache_hit: bool = False):
+        with self._lock:
+            self.documents += 1
+            if cache_hit:
+                self.cache_hits += 1
+
+    def record_field(self, name: str, elapsed: float, value: Any):
+        with self._lock:
+            entry = self.fields.get(name)
+            if entry is None:
+                entry = self.fields[name] = {"calls": 0, "hits": 0, "total_s": 0.0, "max_s": 0.0}
+            entry["calls"] += 1
+            entry["hits"] += 1 if _is_hit(value) else 0
+            entry["total_s"] += elapsed
+            if elapsed > entry["max_s"]:
+                entry["max_s"] = elapsed
+
+    def record_mapping(self, name: str, categories: List[str]):
+        with self._lock:
+            entry = self.mappings.get(name)
+            if entry is None:
+                entry = self.mappings[name] = {"scans": 0, "hits": 0}
+            entry["scans"] += 1
+            if categories:
+                entry["hits"] += 1
+                self.categories.setdefault(name, Counter()).update(categories)
+
+    def record_keywords(self, matched: List[Tuple[str, str]]):
+        """(mapping, mot-clé) acceptés lors d'un scan de l'automate."""
+        with self._lock:
+            for name, keyword in matched:
+                self.keywords.setdefault(name, Counter())[keyword] += 1
+
+    # ------------------------------------------------------------------
+    # Agrégation / export
+    # ------------------------------------------------------------------
+
+    def merge(self, other: Dict[str, Any]):
+        """Ajoute les compteurs d'un autre collecteur (forme `to_dict`)."""
+        with self._lock:
+            self.documents += other.get("documents", 0)
+            self.cache_hits += other.get("cache_hits", 0)
+            for name, src in other.get("fields", {}).items():
+                entry = self.fields.setdefault(name, {"calls": 0, "hits": 0, "total_s": 0.0, "max_s": 0.0})
+                entry["calls"] += src["calls"]
+                entry["hits"] += src["hits"]
+                entry["total_s"] += src["total_s"]
+                entry["max_s"] = max(entry["max_s"], src["max_s"])
+            for name, src in other.get("mappings", {}).items():
+                entry = self.mappings.setdefault(name, {"scans": 0, "hits": 0})
+                entry["scans"] += src["scans"]
+                entry["hits"] += src["hits"]
+            for name, counts in other.get("categories", {}).items():
+                self.categories.setdefault(name, Counter()).update(counts)
+            for name, counts in other.get("keywords", {}).items():
+                self.keywords.setdefault(name, Counter()).update(counts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "cache_hits": self.cache_hits,
+                "fields": {name: dict(entry) for name, entry in self.fields.items()},
+                "mappings": {name: dict(entry) for name, entry in self.mappings.items()},
+                "categories": {name: dict(counts) for name, counts in self.categories.items()},
+                "keywords": {name: dict(counts) for name, counts in self.keywords.items()},
+            }
+
+    def report(self, mappings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Rapport trié: extracteurs par temps total décroissant, mappings par taux
+        de succès, et (si `mappings` est fourni) mots-clés jamais trouvés.
+        """
+        raw = self.to_dict()
+        total_time = sum(entry["total_s"] for entry in raw["fields"].values()) or 1.0
+        fields = []
+        for name, entry in sorted(raw["fields"].items(), key=lambda x: -x[1]["total_s"]):
+            calls = entry["calls"] or 1
+            fields.append({
+                "field": name,
+                "calls": entry["calls"],
+                "hit_rate": round(entry["hits"] / calls, 4),
+                "total_ms": round(entry["total_s"] * 1000, 3),
+                "mean_ms": round(entry["total_s"] * 1000 / calls, 4),
+                "max_ms": round(entry["max_s"] * 1000, 3),
+                "share": round(entry["total_s"] / total_time, 4),
+            })
+        mapping_rows = []
+        for name, entry in sorted(raw["mappings"].items(), key=lambda x: x[1]["hits"] / (x[1]["scans"] or 1)):
+            mapping_rows.append({
+                "mapping": name,
+                "scans": entry["scans"],
+                "hit_rate": round(entry["hits"] / (entry["scans"] or 1), 4),
+                "top_categories": Counter(raw["categories"].get(name, {})).most_common(10),
+            })
+        report = {
+            "started_at": self.started_at,
+            "finished_at": datetime.now().isoformat(),
+            "documents": raw["documents"],
+            "cache_hits": raw["cache_hits"],
+            "fields": fields,
+            "mappings": mapping_rows,
+        }
+        if mappings is not None:
+            # Seuls les mappings effectivement scannés pendant la collecte sont jugés
+            scanned = {name.split("[")[0] for name in raw["mappings"]}
+            report["unmatched_keywords"] = unmatched_keywords(
+                {name: m for name, m in mappings.items() if name in scanned}, raw["keywords"])
+        return report
+
+    def dump(self, directory: Optional[str] = None, mappings: Optional[Dict[str, Any]] = None) -> str:
+        """Écrit le rapport JSON + texte dans output/reports/ et renvoie le chemin du JSON."""
+        directory = directory or os.getenv("EXTRACTION_STATS_DIR") or DEFAULT_REPORTS_DIR
+        os.makedirs(directory, exist_ok=True)
+        report = self.report(mappings)
+        stem = os.path.join(directory, f"extraction_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        with open(f"{stem}.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(f"{stem}.txt", "w", encoding="utf-8") as f:
+            f.write(format_report(report))
+        return f"{stem}.json"
+
+
+def unmatched_keywords(mappings: Dict[str, Any], matched: Dict[str, Dict[str, int]]) -> Dict[str, List[str]]:
+    """Mots-clés de chaque mapping qui n'ont matché sur aucun document du lot."""
+    out: Dict[str, List[str]] = {}
+    for name, mapping in mappings.items():
+        seen = matched.get(name, {})
+        keywords: List[str] = []
+        for value in mapping.values():
+            groups = value.values() if isinstance(value, dict) else [value]
+            for group in groups:
+                if isinstance(group, list):
+                    keywords.extend(kw.strip().lower() for kw in group if isinstance(kw, str) and kw.strip())
+        never = [kw for kw in dict.fromkeys(keywords) if kw not in seen]
+        if never:
+            out[name] = never
+    return out
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Version lisible du rapport (même contenu que le JSON, tronqué)."""
+    lines = [
+        "=" * 60,
+        "INSTRUMENTATION EXTRACTION - TEMPS ET TAUX DE SUCCÈS",
+        "=" * 60,
+        "",
+        f"Documents : {report['documents']} (cache : {report['cache_hits']})",
+        "",
+        "Extracteurs (temps total décroissant) :",
+    ]
+    for row in report["fields"]:
+        lines.append(
+            f"  - {row['field']:<24} {row['total_ms']:>10.1f} ms  {row['share'] * 100:5.1f}%  "
+            f"moy {row['mean_ms']:.3f} ms  max {row['max_ms']:.1f} ms  succès {row['hit_rate'] * 100:5.1f}%"
+        )
+    lines += ["", "Mappings (taux de succès croissant) :"]
+    for row in report["mappings"]:
+        lines.append(f"  - {row['mapping']:<24} {row['scans']:>7} scans  succès {row['hit_rate'] * 100:5.1f}%")
+    unmatched = report.get("unmatched_keywords")
+    if unmatched:
+        total = sum(len(kws) for kws in unmatched.values())
+        lines += ["", f"Mots-clés jamais trouvés : {total}"]
+        for name, kws in sorted(unmatched.items(), key=lambda x: -len(x[1])):
+            preview = ", ".join(kws[:8]) + (", ..." if len(kws) > 8 else "")
+            lines.append(f"  - {name} ({len(kws)}) : {preview}")
+    return "\n".join(lines) + "\n"
+
+# ============================================================================
+# 2. ACTIVATION (VARIABLE D'ENVIRONNEMENT / CONTEXT MANAGER)
+# ============================================================================
+
+_ACTIVE: Optional[ExtractionStats] = None
+
+
+def active_stats() -> Optional[ExtractionStats]:
+    """Collecteur en cours, ou None (instrumentation désactivée: coût nul)."""
+    return _ACTIVE
+
+
+@contextmanager
+def using_stats(stats: Optional[ExtractionStats]) -> Iterator[Optional[ExtractionStats]]:
+    """Installe `stats` comme collecteur courant le temps du bloc (None: désactive)."""
+    global _ACTIVE
+    previous = _ACTIVE
+    _ACTIVE = stats
+    try:
+        yield stats
+    finally:
+        _ACTIVE = previous
+
+
+@contextmanager
+def collect_extraction_stats(dump: bool = True, directory: Optional[str] = None,
+                             mappings: Optional[Dict[str, Any]] = None) -> Iterator[ExtractionStats]:
+    """
+    Active l'instrumentation le temps du bloc. Le rapport est écrit à la
+    sortie (`dump=False` pour seulement lire `stats.report()`), son chemin
+    est alors disponible dans `stats.path`.
+    """
+    stats = ExtractionStats()
+    with using_stats(stats):
+        yield stats
+    if dump:
+        stats.path = stats.dump(directory, mappings if mappings is not None else _taxonomy_mappings())
+
+
+def _taxonomy_mappings() -> Optional[Dict[str, Any]]:
+    """Mappings compilés (pour la liste des mots-clés jamais trouvés)."""
+    try:
+        from src.tag_extractor import TAXONOMY_MATCHER
+    except Exception:
+        try:
+            from tag_extractor import TAXONOMY_MATCHER
+        except Exception:
+            return None
+    return TAXONOMY_MATCHER.mappings
+
+
+def _enable_from_env():
+    """EXTRACTION_STATS=1: collecte pour tout le processus, rapport à la sortie."""
+    global _ACTIVE
+    if os.getenv("EXTRACTION_STATS", "0") in ("", "0") or _ACTIVE is not None:
+        return
+    _ACTIVE = ExtractionStats()
+
+    def _dump_at_exit(stats=_ACTIVE):
+        if stats.documents:
+            print(f"[ExtractionStats] Rapport: {stats.dump(mappings=_taxonomy_mappings())}")
+
+    atexit.register(_dump_at_exit)
+
+
+_enable_from_env()
@@ -6,9 +6,9 @@ from pathlib import Path
 import pandas as pd
 
 try:
-    from src.tag_extractor import extract_all_tags
+    from src.tag_extractor import extract_tags_frame
 except Exception:
-    from tag_extractor import extract_all_tags
+    from tag_extractor import extract_tags_frame
 
 
 def read_source_file(file_path: str) -> pd.DataFrame:
@@ -94,30 +94,32 @@ def main():
     client_col = pick_column(df, ["client", "client_name", "nom", "name", "fullname"])
     id_col = pick_column(df, ["id", "client_id", "customer_id", "uid", "uuid"])
 
-    rows = []
-    for idx, row in df.iterrows():
-        text = row.get(transcription_col, "")
-        text = "" if pd.isna(text) else str(text)
-        if not text.strip():
-            continue
+    texts = df[transcription_col]
+    texts = texts.where(texts.notna(), "").astype(str)
+    texts = texts[texts.str.strip() != ""]
 
-        tags = clean_tags(extract_all_tags(text))
+    # Extraction colonnaire sur tous les coeurs (doublons extraits une fois, index conservé)
+    tags_frame = extract_tags_frame(texts)
+    clients = df.loc[texts.index, client_col] if client_col is not None else [None] * len(texts)
+    ids = df.loc[texts.index, id_col] if id_col is not None else [None] * len(texts)
+
+    rows = []
+    for idx, text, raw_tags, raw_client, raw_id in zip(
+        texts.index, texts, tags_frame.to_dict("records"), clients, ids
+    ):
+        tags = clean_tags(raw_tags)
         if not tags:
             continue
 
         client_name = None
-        if client_col is not None:
-            raw_client = row.get(client_col, "")
-            if not pd.isna(raw_client):
-                client_name = str(raw_client).strip() or None
+        if raw_client is not None and not pd.isna(raw_client):
+            client_name = str(raw_client).strip() or None
         if not client_name:
             client_name = f"Client {idx + 1}"
 
         client_id = None
-        if id_col is not None:
-            raw_id = row.get(id_col, "")
-            if not pd.isna(raw_id):
-                client_id = str(raw_id).strip() or None
+        if raw_id is not None and not pd.isna(raw_id):
+            client_id = str(raw_id).strip() or None
 
         rows.append(
             {
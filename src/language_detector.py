@@ -0,0 +1,220 @@
+"""
+Module Language Detector - Détection de langue par n-grammes de caractères
+Détecteur léger (sans dépendance) pour les langues des transcriptions:
+FR, EN, IT, ES, DE. Sert à router l'extraction vers le bon shard de la
+taxonomie quand la colonne Language est absente ou vide.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, Optional, Set, Tuple
+
+SUPPORTED_LANGUAGES = ("FR", "EN", "IT", "ES", "DE")
+
+# Valeur spéciale: détecter la langue à partir du texte
+AUTO_LANGUAGE = "auto"
+
+# Alias acceptés dans la colonne Language (normalisés en minuscules)
+LANGUAGE_ALIASES = {
+    "fr": "FR", "fra": "FR", "fre": "FR", "french": "FR", "français": "FR", "francais": "FR",
+    "en": "EN", "eng": "EN", "english": "EN", "anglais": "EN",
+    "it": "IT", "ita": "IT", "italian": "IT", "italien": "IT", "italiano": "IT",
+    "es": "ES", "spa": "ES", "spanish": "ES", "espagnol": "ES", "español": "ES", "espanol": "ES",
+    "de": "DE", "deu": "DE", "ger": "DE", "german": "DE", "allemand": "DE", "deutsch": "DE",
+}
+
+# ============================================================================
+# 1. PROFILS DE RÉFÉRENCE
+# ============================================================================
+
+# Mots très fréquents (outils + vocabulaire client / boutique) par langue.
+# Les profils de trigrammes sont calculés à l'import à partir de ces listes.
+_SEED_WORDS = {
+    "FR": """
+        le la les des une un du de et est pour avec dans sur pas que qui elle il
+        nous vous mais sont cette ce ces son sa ses leur plus très aussi comme
+        être avoir fait veut cherche souhaite aime adore préfère cliente client
+        madame monsieur ans budget environ cadeau femme mari fille fils enfants
+        voyage semaine prochaine mois anniversaire rendez-vous boutique sac cuir
+        noir beige couleur taille chaussures montre bijoux parfum collection
+        toujours souvent plutôt peut-être déjà encore beaucoup vraiment alors
+        donc parce quand où chez entre après avant depuis jamais rien tout
+        habite travaille avocat médecin architecte fidèle nouvelle achat
+    """,
+    "EN": """
+        the and is for with that this she he they we you but are was have has
+        his her their from about would like looking wants loves prefers client
+        customer mrs mister years old budget around gift wife husband daughter
+        son kids travel week next month birthday appointment store bag leather
+        black beige color size shoes watch jewelry perfume collection always
+        often rather maybe already still very really also then because when
+        where between after before since never nothing everything lives works
+        lawyer doctor architect loyal new purchase should could will just
+    """,
+    "IT": """
+        il lo la gli le di del della dei delle un una che per con non sono
+        è anche come più molto lei lui loro suo sua suoi nostro questo questa
+        vuole cerca desidera ama adora preferisce cliente signora signor anni
+        budget circa regalo moglie marito figlia figlio bambini viaggio
+        settimana prossima mese compleanno appuntamento negozio borsa pelle
+        nero colore taglia scarpe orologio gioielli profumo collezione sempre
+        spesso forse già ancora davvero allora quindi perché quando dove dopo
+        prima mai niente tutto abita lavora avvocato medico architetto fedele
+    """,
+    "ES": """
+        el la los las de del un una que por para con no es son está muy más
+        también como ella él ellos su sus nuestro este esta quiere busca desea
+        ama adora prefiere cliente señora señor años presupuesto unos regalo
+        esposa marido hija hijo niños viaje semana próxima mes cumpleaños cita
+        tienda bolso cuero negro color talla zapatos reloj joyas perfume
+        colección siempre menudo quizás ya todavía realmente entonces porque
+        cuando donde después antes desde nunca nada todo vive trabaja abogado
+        médico arquitecta fiel nueva compra pero hay
+    """,
+    "DE": """
+        der die das und ist für mit ein eine einen nicht sie er wir ihr sind
+        auch wie sehr mehr aber ihre seine ihren diese dieser dem den des zu
+        möchte sucht wünscht liebt bevorzugt kundin kunde frau herr jahre
+        budget etwa geschenk ehefrau mann tochter sohn kinder reise woche
+        nächste monat geburtstag termin geschäft tasche leder schwarz farbe
+        größe schuhe uhr schmuck parfüm kollektion immer oft vielleicht schon
+        noch wirklich dann weil wenn wo zwischen nach vor seit nie nichts alles
+        wohnt arbeitet anwalt arzt architektin treue neue kauf ich auf
+    """,
+}
+
+# Mots-outils servant à rattacher un mot-clé à une langue. Un mot présent dans deux
+# langues ("de", "la", "con") est écarté: il ne départage rien. Les mots fréquents
+# dans les noms propres et emprunts ("los" Angeles, "lo"-fi, "plus" size, "made in",
+# "fashion week") sont absents.
+_FUNCTION_WORDS = {
+    "FR": """le la les des une un du de et est pour avec dans sur pas que qui elle il nous vous
+             mais sont cette ces son sa ses leur très aussi comme mon ma mes ton ta au aux lui
+             par en ne ni ou où chez après depuis jamais rien tout fois prochain prochaine
+             mois semaine ans an aucun aucune sans""",
+    "EN": """the is for with that this she he they we you but are was have has his her their
+             from about would like my your our on at to no not any never next month months
+             year years than more less without""",
+    "IT": """il la gli le di del della dei delle un una che per con sono anche come più
+             molto lei suo sua suoi mio mia nel nella al alla dal dalla mai prossimo
+             prossima mese settimana anni senza""",
+    "ES": """el la las de del un una que por para con no es son está muy más también como
+             ella él ellos su sus mi mis en al nunca próximo próxima mes semana años sin""",
+    "DE": """der die das und ist für mit ein eine einen nicht sie er wir ihr sind auch wie sehr
+             mehr aber ihre seine ihren diese dieser dem den des zu im am vom zum zur nie nächste
+             nächsten monat woche jahre ohne kein keine mein meine""",
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def _trigrams(text: str) -> Counter:
+    """Trigrammes de caractères des mots (bordés d'espaces) d'un texte."""
+    grams: Counter = Counter()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            grams[padded[i:i + 3]] += 1
+    return grams
+
+
+def _build_profiles() -> Tuple[Dict[str, Dict[str, float]], Dict[str, float]]:
+    """Log-probabilités lissées (Laplace) des trigrammes de chaque langue."""
+    counts = {lang: _trigrams(words) for lang, words in _SEED_WORDS.items()}
+    vocabulary = len(set().union(*counts.values())) + 1
+    profiles, unseen = {}, {}
+    for lang, grams in counts.items():
+        total = sum(grams.values()) + vocabulary
+        profiles[lang] = {g: math.log((c + 1) / total) for g, c in grams.items()}
+        unseen[lang] = math.log(1 / total)
+    return profiles, unseen
+
+
+_PROFILES, _UNSEEN = _build_profiles()
+
+
+def _build_function_words() -> Dict[str, Set[str]]:
+    words = {lang: set(text.split()) for lang, text in _FUNCTION_WORDS.items()}
+    return {lang: {w for w in own if not any(w in words[o] for o in words if o != lang)}
+            for lang, own in words.items()}
+
+
+_DISTINCTIVE_WORDS = _build_function_words()
+
+# ============================================================================
+# 2. API
+# ============================================================================
+
+# Les premiers caractères suffisent: la langue ne change pas en cours de note
+MAX_DETECTION_CHARS = 2000
+
+
+def normalize_language(value) -> Optional[str]:
+    """Code langue déclaré ("fr", "French", "fr-FR"...) -> "FR", ou None si inconnu."""
+    if not isinstance(value, str):
+        return None
+    key = value.strip().lower()
+    if not key:
+        return None
+    if key in LANGUAGE_ALIASES:
+        return LANGUAGE_ALIASES[key]
+    return LANGUAGE_ALIASES.get(re.split(r"[-_]", key)[0])
+
+
+def language_scores(text: str) -> Dict[str, float]:
+    """Log-vraisemblance moyenne (par trigramme) du texte pour chaque langue."""
+    grams = _trigrams(text[:MAX_DETECTION_CHARS] if text else "")
+    n = sum(grams.values())
+    if not n:
+        return {}
+    scores = {}
+    for lang, profile in _PROFILES.items():
+        unseen = _UNSEEN[lang]
+        scores[lang] = sum(profile.get(g, unseen) * c for g, c in grams.items()) / n
+    return scores
+
+
+def detect_language(text: str, default: Optional[str] = "FR") -> Optional[str]:
+    """Langue la plus probable du texte (ou `default` si le texte est vide)."""
+    scores = language_scores(text)
+    if not scores:
+        return default
+    return max(scores, key=scores.get)
+
+
+def keyword_language(keyword: str) -> Optional[str]:
+    """
+    Langue d'un mot-clé de la taxonomie, ou None s'il est partagé.
+    Volontairement prudent: un mot-clé n'est rattaché à une langue que s'il
+    contient un mot-outil propre à cette seule langue ("dans un mois",
+    "next month", "nächste woche"). Les noms communs, noms propres et
+    emprunts ("sneakers", "moët", "vicuña") restent dans le shard partagé.
+    """
+    if not isinstance(keyword, str):
+        return None
+    kw = keyword.strip().lower()
+    candidates: Optional[Set[str]] = None
+    for word in _WORD_RE.findall(kw):
+        for lang, words in _DISTINCTIVE_WORDS.items():
+            if word in words:
+                candidates = {lang} if candidates is None else candidates & {lang}
+    if candidates and len(candidates) == 1:
+        return next(iter(candidates))
+    return None
+
+
+def resolve_language(value, text: str = "") -> Optional[str]:
+    """
+    Langue à utiliser pour un document:
+    - code déclaré reconnu -> ce code
+    - AUTO_LANGUAGE, vide ou non renseigné (NaN) -> détection sur le texte
+    - None -> None (pas de routage, taxonomie complète)
+    """
+    if value is None:
+        return None
+    language = normalize_language(value)
+    if language:
+        return language
+    if value == AUTO_LANGUAGE or not isinstance(value, str) or not value.strip():
+        return detect_language(text, default=None)
+    return None
@@ -0,0 +1,221 @@
+"""
+Module Numeric Entities - Entités numériques typées en un seul passage
+Un seul parcours du texte (minuscules) produit, avec leurs positions:
+- montants (devise, suffixe k / m) et nombres nus de 4 à 6 chiffres
+- âges ("45 ans", "j'ai 45", "age: 45") et années de naissance ("née en 1980")
+- durées relatives ("dans 3 jours", "d'ici 2 semaines", "within 48h")
+- indices lexicaux d'urgence et de budget ouvert ("asap", "flexible"...)
+extract_age_turbo, extract_budget_turbo et extract_urgency_turbo lisent
+cette liste partagée au lieu de re-parcourir le texte chacun de leur côté.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from src.document import as_document
+except Exception:
+    from document import as_document
+
+# ============================================================================
+# 1. ENTITÉS
+# ============================================================================
+
+AMOUNT = "amount"            # valeur en unités monétaires (suffixe appliqué)
+NUMBER = "number"            # nombre nu de 4 à 6 chiffres (repli du budget)
+AGE = "age"                  # âge en années ; `rank` = priorité du motif
+BIRTH_YEAR = "birth_year"    # année de naissance
+DURATION = "duration"        # durée relative, en jours
+URGENCY = "urgency"          # indice d'urgence ; value = niveau (0: non urgent explicite)
+OPEN_BUDGET = "open_budget"  # "illimité", "flexible", "pas de budget"...
+
+
+class NumericEntity(NamedTuple):
+    kind: str
+    value: float
+    start: int
+    end: int
+    unit: str = ""
+    rank: int = 0
+
+# ============================================================================
+# 2. TOKENIZER
+# ============================================================================
+
+# Indices lexicaux -> (type, niveau)
+CUES: Dict[str, Tuple[str, int]] = {
+    # Non-urgence explicite
+    "pas urgent": (URGENCY, 0), "aucune urgence": (URGENCY, 0), "sans urgence": (URGENCY, 0),
+    "quand vous voulez": (URGENCY, 0), "plus tard": (URGENCY, 0),
+    # Niveau 5 (très urgent explicite)
+    "urgent": (URGENCY, 5), "urgence": (URGENCY, 5), "tout de suite": (URGENCY, 5),
+    "immédiat": (URGENCY, 5), "immediat": (URGENCY, 5), "asap": (URGENCY, 5), "au plus vite": (URGENCY, 5),
+    # Niveau 4 (contrainte temporelle explicite)
+    "demain": (URGENCY, 4), "aujourd'hui": (URGENCY, 4), "ce soir": (URGENCY, 4),
+    "cette semaine": (URGENCY, 4), "avant le": (URGENCY, 4), "d'ici": (URGENCY, 4),
+    "pour ce week-end": (URGENCY, 4), "pour weekend": (URGENCY, 4),
+    # Niveau 3 (urgence modérée explicitée)
+    "rapidement": (URGENCY, 3), "vite": (URGENCY, 3), "dans les prochains jours": (URGENCY, 3),
+    "mois prochain": (URGENCY, 3),
+    # Budget ouvert
+    "illimité": (OPEN_BUDGET, 1), "no limit": (OPEN_BUDGET, 1), "flexible": (OPEN_BUDGET, 1),
+    "pas de budget": (OPEN_BUDGET, 1), "gros budget": (OPEN_BUDGET, 1),
+}
+
+# Nombres: "5000", "3.500", "1,2" ; les milliers groupés ("40 000") sont recollés
+# au nombre qui les précède (un nombre de 1 à 3 chiffres suivi de groupes de 3)
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+_THOUSANDS_RE = re.compile(r"(?:[ \u00a0\u202f]\d{3})+(?![\d.,]\d)")
+
+# Contexte à droite d'un nombre (ancré à la fin du nombre)
+# "m" / "millions" seulement suivi d'une devise: "2M abonnés" n'est pas un montant
+_CURRENCY = r"€|\$|euros?\b|dollars?\b|francs?\b"
+_AMOUNT_UNIT_RE = re.compile(
+    r"\s*(?:(k)(?![^\W\d_])|(m|millions?)\s*(?:d'|de\s+)?(?:%s)|(%s))" % (_CURRENCY, _CURRENCY))
+_AGE_ANS_RE = re.compile(r"\s*ans\b")
+_AGE_UNIT_RE = re.compile(r"\s*(?:ans|an|year|yo|jahre)\b")
+_YEARS_OLD_RE = re.compile(r"\s*years?\s*old\b")
+_DURATION_UNIT_RE = re.compile(
+    r"\s*(jours?|j|days?|semaines?|weeks?|mois|months?|ans?|years?|h|heures?|hours?)\b")
+
+# Contexte à gauche d'un nombre (recherché dans une fenêtre se terminant au nombre)
+_LEFT_WINDOW = 30
+_JAI_RE = re.compile(r"\bj[' ]?ai\s*\Z")
+_AGE_PREFIX_RE = re.compile(r"\bage\s*(?:de)?\s*\Z")
+_AGE_COLON_RE = re.compile(r"\bage\s*:?\s*\Z")
+_BORN_RE = re.compile(r"\bnée?\s*(?:en)?\s*\Z")
+_DURATION_PREFIX_RE = re.compile(r"\b(?:dans|d'ici|sous|en|in|within)\s*\Z")
+
+_DURATION_DAYS = {
+    "j": 1, "jour": 1, "jours": 1, "day": 1, "days": 1,
+    "semaine": 7, "semaines": 7, "week": 7, "weeks": 7,
+    "mois": 30, "month": 30, "months": 30,
+    "an": 365, "ans": 365, "year": 365, "years": 365,
+    "h": 1 / 24, "heure": 1 / 24, "heures": 1 / 24, "hour": 1 / 24, "hours": 1 / 24,
+}
+
+# Rangs des motifs d'âge (ordre historique de priorité de extract_age_turbo)
+AGE_RANK_JAI_ANS = 0     # "j'ai 45 ans"
+AGE_RANK_JAI = 1         # "j'ai 45"
+AGE_RANK_UNIT = 2        # "45 ans", "45 year", "45 yo", "45 jahre"
+AGE_RANK_YEARS_OLD = 3   # "45 years old"
+AGE_RANK_PREFIX = 4      # "age 45", "age de 45"
+AGE_RANK_BIRTH = 5       # "née en 1980"
+AGE_RANK_COLON = 6       # "age: 45"
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+# Séparateurs de milliers (espace, espace insécable, espace fine insécable)
+_GROUP_SEPARATORS = {ord(" "): None, 0x00A0: None, 0x202F: None}
+
+
+def _parse_number(raw: str) -> Optional[float]:
+    digits = raw.translate(_GROUP_SEPARATORS).replace(",", ".")
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def _number_entities(text: str, start: int, end: int, raw: str) -> List[NumericEntity]:
+    """Toutes les lectures typées d'un nombre, d'après son contexte immédiat."""
+    value = _parse_number(raw)
+    if value is None:
+        return []
+    entities: List[NumericEntity] = []
+    n = len(text)
+    bounded_left = start == 0 or not _is_word_char(text[start - 1])
+    bounded_right = end == n or not _is_word_char(text[end])
+    left = max(0, start - _LEFT_WINDOW)
+
+    # Montant: nombre suivi de sa devise / de son suffixe (celui de CE nombre)
+    unit = _AMOUNT_UNIT_RE.match(text, end)
+    if unit:
+        suffix, million, currency = unit.groups()
+        if suffix == "k":
+            amount = value * 1000
+        elif million:
+            amount = value * 1_000_000
+        elif value < 100:
+            # "5€", "35 euros": abréviation de milliers dans les notes vendeurs
+            amount = value * 1000
+        else:
+            amount = value
+        entities.append(NumericEntity(AMOUNT, amount, start, unit.end(), (suffix or million or currency).strip()))
+
+    is_integer = raw.isdigit()
+    if is_integer and 4 <= len(raw) <= 6 and bounded_left and bounded_right:
+        entities.append(NumericEntity(NUMBER, value, start, end))
+    elif bounded_right and value < 1_000_000 and len(raw.translate(_GROUP_SEPARATORS)) != len(raw):
+        # Milliers groupés ("40 000"): même repli que les nombres nus
+        entities.append(NumericEntity(NUMBER, value, start, end))
+
+    if is_integer and len(raw) <= 2:
+        after_jai = _JAI_RE.search(text, left, start) is not None
+        if after_jai and _AGE_ANS_RE.match(text, end):
+            entities.append(NumericEntity(AGE, value, start, end, "ans", AGE_RANK_JAI_ANS))
+        if after_jai and bounded_right:
+            entities.append(NumericEntity(AGE, value, start, end, "", AGE_RANK_JAI))
+        if bounded_left:
+            age_unit = _AGE_UNIT_RE.match(text, end)
+            if age_unit:
+                entities.append(NumericEntity(AGE, value, start, age_unit.end(), age_unit.group().strip(), AGE_RANK_UNIT))
+            years_old = _YEARS_OLD_RE.match(text, end)
+            if years_old:
+                entities.append(NumericEntity(AGE, value, start, years_old.end(), "years old", AGE_RANK_YEARS_OLD))
+        if bounded_right:
+            if _AGE_PREFIX_RE.search(text, left, start):
+                entities.append(NumericEntity(AGE, value, start, end, "", AGE_RANK_PREFIX))
+            if _AGE_COLON_RE.search(text, left, start):
+                entities.append(NumericEntity(AGE, value, start, end, "", AGE_RANK_COLON))
+
+    if is_integer and len(raw) == 4 and raw[:2] in ("19", "20") and bounded_right \
+            and _BORN_RE.search(text, left, start):
+        entities.append(NumericEntity(BIRTH_YEAR, value, start, end, "", AGE_RANK_BIRTH))
+
+    if bounded_left and _DURATION_PREFIX_RE.search(text, left, start):
+        duration = _DURATION_UNIT_RE.match(text, end)
+        if duration:
+            unit_name = duration.group(1)
+            entities.append(NumericEntity(DURATION, value * _DURATION_DAYS[unit_name], start, duration.end(), unit_name))
+    return entities
+
+
+def parse_numeric_entities(text: str) -> List[NumericEntity]:
+    """Entités du texte (déjà en minuscules), dans l'ordre du texte."""
+    entities: List[NumericEntity] = []
+    search = _NUMBER_RE.search
+    match = search(text)
+    while match:
+        start, end = match.span()
+        raw = match.group()
+        if len(raw) <= 3 and raw.isdigit():
+            grouped = _THOUSANDS_RE.match(text, end)
+            if grouped:
+                end = grouped.end()
+                raw = text[start:end]
+        entities.extend(_number_entities(text, start, end, raw))
+        match = search(text, end)
+
+    # Indices lexicaux: recherche de sous-chaîne (même sémantique que `cue in text`)
+    for cue, (kind, level) in CUES.items():
+        i = text.find(cue)
+        while i >= 0:
+            entities.append(NumericEntity(kind, level, i, i + len(cue), cue))
+            i = text.find(cue, i + 1)
+    entities.sort(key=lambda e: e.start)
+    return entities
+
+
+def numeric_entities(text: str) -> List[NumericEntity]:
+    """
+    Entités d'un texte, calculées une fois par Document (les extracteurs
+    d'âge, de budget et d'urgence d'un même document partagent la liste).
+    """
+    doc = as_document(text)
+    cached = doc.__dict__.get("numeric_entities")
+    if cached is None:
+        cached = doc.__dict__["numeric_entities"] = parse_numeric_entities(doc.lowered)
+    return cached
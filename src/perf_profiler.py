@@ -0,0 +1,278 @@
+"""
+Module Perf Profiler - Temps par étape d'un traitement (main.py --profile, scan de app.py)
+- Étapes: lecture du fichier, standardisation du schéma, nettoyage, extraction,
+  construction des profils, lectures / écritures base, écritures JSON, statistiques
+- En option: profil cProfile (fichier .prof + fonctions les plus coûteuses) et
+  mémoire tracemalloc (pic par étape + lignes qui allouent le plus)
+Activation:
+  python main.py --profile [--cprofile] [--tracemalloc]
+  with collect_stage_profile("scan") as profiler:   # rapport écrit à la sortie du bloc
+      ...
+Les modules instrumentés appellent `profile_stage(nom)`: sans profilage actif,
+c'est un contexte vide (coût négligeable).
+Les rapports (JSON + texte) vont dans output/reports/perf/.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "reports", "perf")
+
+# Étapes connues (ordre d'affichage du rapport)
+STAGES = [
+    "file_read",
+    "schema",
+    "cleaning",
+    "extraction",
+    "profile_building",
+    "db_read",
+    "db_write",
+    "json_write",
+    "statistics",
+]
+
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+
+# ============================================================================
+# 1. COLLECTEUR
+# ============================================================================
+
+class StageProfiler:
+    """
+    Temps cumulés par étape. Sérialisable (`to_dict`) et fusionnable (`merge`):
+    les processus du pool et l'écrivain de main.py --workers renvoient leurs
+    temps au processus parent (temps additionnés sur tous les processus).
+    """
+
+    def __init__(self, label: str = "run", cprofile: bool = False, tracemalloc_enabled: bool = False):
+        self.label = label
+        self.cprofile = cprofile
+        self.tracemalloc = tracemalloc_enabled
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.started_at = datetime.now().isoformat()
+        self.path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._clock = None
+        self._wall_s = 0.0
+        self._profile: Optional[cProfile.Profile] = None
+        self._memory_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracemalloc = False
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+
+    def start(self):
+        self._clock = time.perf_counter()
+        if self.tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+        if self.tracemalloc and tracemalloc.is_tracing():
+            self._memory_snapshot = tracemalloc.take_snapshot()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+        if self._clock is not None:
+            self._wall_s = time.perf_counter() - self._clock
+
+    # ------------------------------------------------------------------
+    # Enregistrement
+    # ------------------------------------------------------------------
+
+    def add(self, name: str, elapsed: float, calls: int = 1, peak_bytes: int = 0):
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {"calls": 0, "total_s": 0.0, "max_s": 0.0, "peak_kb": 0.0}
+            entry["calls"] += calls
+            entry["total_s"] += elapsed
+            entry["max_s"] = max(entry["max_s"], elapsed)
+            entry["peak_kb"] = max(entry["peak_kb"], peak_bytes / 1024)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Chronomètre le bloc (et son pic mémoire si tracemalloc est actif)."""
+        tracing = self.tracemalloc and tracemalloc.is_tracing()
+        if tracing:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - base if tracing else 0
+            self.add(name, elapsed, peak_bytes=max(peak, 0))
+
+    def merge(self, other: Dict[str, Any]):
+        """Ajoute les temps d'un autre collecteur (forme `to_dict`)."""
+        with self._lock:
+            for name, src in other.get("stages", {}).items():
+                entry = self.stages.setdefault(name, {"calls": 0, "total_s": 0.0, "max_s": 0.0, "peak_kb": 0.0})
+                entry["calls"] += src["calls"]
+                entry["total_s"] += src["total_s"]
+                entry["max_s"] = max(entry["max_s"], src["max_s"])
+                entry["peak_kb"] = max(entry["peak_kb"], src.get("peak_kb", 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"stages": {name: dict(entry) for name, entry in self.stages.items()}}
+
+    # ------------------------------------------------------------------
+    # Rapport
+    # ------------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        raw = self.to_dict()["stages"]
+        total = sum(entry["total_s"] for entry in raw.values()) or 1.0
+        order = {name: i for i, name in enumerate(STAGES)}
+        stages = []
+        for name, entry in sorted(raw.items(), key=lambda x: (order.get(x[0], len(STAGES)), x[0])):
+            calls = entry["calls"] or 1
+            stages.append({
+                "stage": name,
+                "calls": entry["calls"],
+                "total_ms": round(entry["total_s"] * 1000, 3),
+                "mean_ms": round(entry["total_s"] * 1000 / calls, 4),
+                "max_ms": round(entry["max_s"] * 1000, 3),
+                "share": round(entry["total_s"] / total, 4),
+                "peak_kb": round(entry["peak_kb"], 1),
+            })
+        report = {
+            "label": self.label,
+            "started_at": self.started_at,
+            "finished_at": datetime.now().isoformat(),
+            "wall_ms": round(self._wall_s * 1000, 3),
+            "stages": stages,
+        }
+        if self._profile is not None:
+            report["cprofile_top"] = _top_functions(self._profile)
+        if self._memory_snapshot is not None:
+            report["tracemalloc_top"] = [
+                {"location": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                for stat in self._memory_snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            ]
+        return report
+
+    def dump(self, directory: Optional[str] = None) -> str:
+        """Écrit le rapport JSON + texte (+ .prof) dans output/reports/perf/ et renvoie le chemin du JSON."""
+        directory = directory or os.getenv("PERF_REPORTS_DIR") or DEFAULT_REPORTS_DIR
+        os.makedirs(directory, exist_ok=True)
+        report = self.report()
+        stem = os.path.join(directory, f"perf_{self.label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        if self._profile is not None:
+            self._profile.dump_stats(f"{stem}.prof")
+            report["cprofile_path"] = f"{stem}.prof"
+        with open(f"{stem}.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(f"{stem}.txt", "w", encoding="utf-8") as f:
+            f.write(format_report(report))
+        return f"{stem}.json"
+
+
+def _top_functions(profile: cProfile.Profile):
+    """Fonctions les plus coûteuses (temps cumulé)."""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": ncalls,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: -row["cumtime_ms"])
+    return rows[:TOP_FUNCTIONS]
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Version lisible du rapport (même contenu que le JSON, tronqué)."""
+    lines = [
+        "=" * 60,
+        f"PROFILAGE PAR ÉTAPE - {report['label']}",
+        "=" * 60,
+        "",
+        f"Durée totale : {report['wall_ms'] / 1000:.2f} s",
+        "",
+        "Étapes :",
+    ]
+    for row in report["stages"]:
+        memory = f"  pic {row['peak_kb']:.0f} Ko" if row["peak_kb"] else ""
+        lines.append(
+            f"  - {row['stage']:<18} {row['total_ms']:>10.1f} ms  {row['share'] * 100:5.1f}%  "
+            f"{row['calls']:>7} appels  moy {row['mean_ms']:.3f} ms{memory}"
+        )
+    if report.get("cprofile_top"):
+        lines += ["", "cProfile (temps cumulé) :"]
+        for row in report["cprofile_top"][:15]:
+            lines.append(f"  - {row['cumtime_ms']:>10.1f} ms  {row['calls']:>8}  {row['function']}")
+    if report.get("tracemalloc_top"):
+        lines += ["", "tracemalloc (mémoire allouée en fin de run) :"]
+        for row in report["tracemalloc_top"][:10]:
+            lines.append(f"  - {row['size_kb']:>10.1f} Ko  {row['location']}")
+    return "\n".join(lines) + "\n"
+
+# ============================================================================
+# 2. ACTIVATION
+# ============================================================================
+
+# Collecteur courant, propre à chaque thread (une session Streamlit = un thread):
+# deux runs simultanés ne s'écrivent pas l'un dans l'autre. Les processus du pool
+# et l'écrivain installent leur propre collecteur.
+_ACTIVE: ContextVar[Optional[StageProfiler]] = ContextVar("active_profiler", default=None)
+
+
+def active_profiler() -> Optional[StageProfiler]:
+    """Collecteur en cours, ou None (profilage désactivé)."""
+    return _ACTIVE.get()
+
+
+def profile_stage(name: str):
+    """Contexte chronométrant une étape, vide si aucun profilage n'est actif."""
+    profiler = _ACTIVE.get()
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+@contextmanager
+def using_profiler(profiler: Optional[StageProfiler]) -> Iterator[Optional[StageProfiler]]:
+    """Installe `profiler` comme collecteur courant le temps du bloc (None: désactive)."""
+    token = _ACTIVE.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _ACTIVE.reset(token)
+
+
+@contextmanager
+def collect_stage_profile(label: str = "run", cprofile: bool = False, tracemalloc_enabled: bool = False,
+                          dump: bool = True, directory: Optional[str] = None) -> Iterator[StageProfiler]:
+    """
+    Active le profilage le temps du bloc. Le rapport est écrit à la sortie
+    (`dump=False` pour seulement lire `profiler.report()`), son chemin est
+    alors disponible dans `profiler.path`.
+    """
+    profiler = StageProfiler(label, cprofile=cprofile, tracemalloc_enabled=tracemalloc_enabled)
+    profiler.start()
+    try:
+        with using_profiler(profiler):
+            yield profiler
+    finally:
+        profiler.stop()
+    if dump:
+        profiler.path = profiler.dump(directory)
@@ -5,9 +5,38 @@ import json
 import sqlite3
 import hashlib
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, Iterable, List, Set, Tuple
 from pathlib import Path
 
+try:
+    from src.document import content_hash
+    from src.perf_profiler import profile_stage
+except ImportError:
+    from document import content_hash
+    from perf_profiler import profile_stage
+
+def known_profile_contents(db_path: str, items: Iterable[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+    """
+    Couples (client_id, empreinte de transcription) déjà enregistrés parmi `items`.
+    Lecture seule (sans initialiser la base): utilisable depuis les processus du pool.
+    """
+    wanted = {(str(client_id), digest) for client_id, digest in items}
+    digests = sorted({digest for _, digest in wanted})
+    known = set()
+    conn = sqlite3.connect(db_path)
+    try:
+        for i in range(0, len(digests), 500):
+            chunk = digests[i:i + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT client_id, content_hash FROM client_profiles WHERE content_hash IN ({placeholders})",
+                chunk,
+            )
+            known.update((str(client_id), digest) for client_id, digest in rows)
+    finally:
+        conn.close()
+    return known & wanted
+
 class ProfileGenerator:
     """Classe pour générer et sauvegarder les profils clients"""
     
@@ -45,6 +74,7 @@ class ProfileGenerator:
                 profile_json TEXT NOT NULL,
                 generated_at TEXT NOT NULL,
                 source_batch_id TEXT,
+                content_hash TEXT,
                 FOREIGN KEY (client_id) REFERENCES clients(client_id),
                 UNIQUE (client_id, profile_version)
             )
@@ -138,6 +168,14 @@ class ProfileGenerator:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_taggings_client_id ON taggings(client_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_taggings_tag_id ON taggings(tag_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_taggings_rule_id ON taggings(rule_id)')
+
+        # Empreinte de la transcription (ingestion incrémentale) ; NULL pour les snapshots antérieurs
+        if not self._table_has_column(cursor, "client_profiles", "content_hash"):
+            cursor.execute('ALTER TABLE client_profiles ADD COLUMN content_hash TEXT')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_profiles_client_content
+            ON client_profiles(client_id, content_hash) WHERE content_hash IS NOT NULL
+        ''')
         
         conn.commit()
         conn.close()
@@ -192,21 +230,33 @@ class ProfileGenerator:
 
         return rule_id, source_id
     
-    def save_profile(self, profile: Dict):
-        """Sauvegarde un profil en base de données et JSON"""
-        # Sauvegarder en JSON
+    def _write_profile_json(self, profile: Dict):
         json_path = Path(self.json_dir) / f"{profile['client_id']}.json"
         with open(json_path, 'w', encoding='utf-8') as f:
             json.dump(profile, f, ensure_ascii=False, indent=2)
-        
-        # Sauvegarder en base de données
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
 
-        if self._table_has_column(cursor, "clients", "date_conversation"):
+    def _check_schema(self, conn):
+        if self._table_has_column(conn.cursor(), "clients", "date_conversation"):
             conn.close()
             raise RuntimeError("Legacy DB schema detected. Run: python src/migrate_db.py")
-        
+
+    def known_contents(self, items: Iterable[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Couples (client_id, empreinte de transcription) déjà enregistrés parmi `items`."""
+        return known_profile_contents(self.db_path, items)
+
+    def _store_profile(self, cursor, profile: Dict) -> bool:
+        """
+        Écrit un profil (client, snapshot, tags) dans la transaction courante.
+        Retourne False, sans rien écrire, si cette transcription est déjà enregistrée pour ce client.
+        """
+        digest = content_hash(profile.get('transcription', ''))
+        cursor.execute(
+            'SELECT 1 FROM client_profiles WHERE client_id = ? AND content_hash = ?',
+            (profile['client_id'], digest),
+        )
+        if cursor.fetchone():
+            return False
+
         now = self._now_iso()
         profile_json = json.dumps(profile, ensure_ascii=False)
         profile_version = profile.get('metadata', {}).get('profile_version') or f"v_{now}"
@@ -223,9 +273,9 @@ class ProfileGenerator:
         # Snapshot profil
         cursor.execute('''
             INSERT OR REPLACE INTO client_profiles
-            (client_id, profile_version, profile_json, generated_at, source_batch_id)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (profile['client_id'], profile_version, profile_json, now, None))
+            (client_id, profile_version, profile_json, generated_at, source_batch_id, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (profile['client_id'], profile_version, profile_json, now, None, digest))
 
         # Source + regle par defaut
         rule_id, source_id = self._ensure_default_rule_and_source(cursor, profile_json)
@@ -237,9 +287,54 @@ class ProfileGenerator:
 
         # Insertion des tags
         self._insert_tags(cursor, profile, rule_id, source_id, now)
-        
-        conn.commit()
-        conn.close()
+        return True
+
+    def save_profile(self, profile: Dict) -> bool:
+        """
+        Sauvegarde un profil en base de données et JSON.
+        Retourne False si la même transcription est déjà enregistrée pour ce client (rien n'est écrit).
+        """
+        # Sauvegarder en base de données
+        with profile_stage("db_write"):
+            conn = sqlite3.connect(self.db_path)
+            self._check_schema(conn)
+            stored = self._store_profile(conn.cursor(), profile)
+            conn.commit()
+            conn.close()
+
+        # Sauvegarder en JSON
+        if stored:
+            with profile_stage("json_write"):
+                self._write_profile_json(profile)
+        return stored
+
+    def save_profiles(self, profiles: List[Dict]) -> int:
+        """
+        Sauvegarde un lot de profils: une seule connexion et une seule
+        transaction pour tout le lot (mêmes lignes, dans le même ordre, que des
+        appels successifs à save_profile), puis les fichiers JSON d'un bloc.
+        Retourne le nombre de profils écrits (transcriptions déjà connues ignorées).
+        """
+        if not profiles:
+            return 0
+
+        with profile_stage("db_write"):
+            conn = sqlite3.connect(self.db_path)
+            self._check_schema(conn)
+            cursor = conn.cursor()
+            try:
+                stored = [profile for profile in profiles if self._store_profile(cursor, profile)]
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        with profile_stage("json_write"):
+            for profile in stored:
+                self._write_profile_json(profile)
+        return len(stored)
     
     def _insert_tags(self, cursor, profile: Dict, rule_id: int, source_id: int, now: str):
         """Insère tous les tags d'un profil dans les tables tags/taggings"""
@@ -0,0 +1,257 @@
+"""
+Pipeline parallèle de génération des profils (main.py --workers N)
+- un pool de processus exécute nettoyage -> analyze_full_text -> create_profile
+- les résultats sont lus dans l'ordre d'entrée (fenêtre bornée de lots en vol)
+- un unique processus écrivain reçoit les profils par une file et les
+  sauvegarde par gros lots (ProfileGenerator.save_profiles: une transaction
+  SQLite par lot, fichiers JSON écrits d'un bloc)
+Même ordre d'écriture que la boucle séquentielle (run_serial): base et JSON
+identiques. Avec un RunManifest, seules les lignes restantes sont traitées
+et chaque lot est marqué dans le manifeste une fois sauvegardé. Les
+conversations dont la transcription nettoyée est déjà enregistrée pour le
+client (même empreinte de contenu) ne sont ni analysées ni réécrites: le
+test est fait juste après le nettoyage, dans le processus qui nettoie.
+"""
+import multiprocessing
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from src.text_analyzer import TextAnalyzer
+    from src.tag_engine import TagEngine
+    from src.profile_generator import ProfileGenerator, known_profile_contents
+    from src.run_manifest import RunManifest
+    from src.document import content_hash
+    from src.perf_profiler import StageProfiler, active_profiler, profile_stage, using_profiler
+except ImportError:
+    from text_analyzer import TextAnalyzer
+    from tag_engine import TagEngine
+    from profile_generator import ProfileGenerator, known_profile_contents
+    from run_manifest import RunManifest
+    from document import content_hash
+    from perf_profiler import StageProfiler, active_profiler, profile_stage, using_profiler
+
+
+# Conversations par tâche envoyée au pool
+DEFAULT_TASK_SIZE = 32
+# Profils par transaction de l'écrivain
+DEFAULT_WRITE_BATCH = 500
+# Lignes marquées par écriture du manifeste en mode séquentiel
+CHECKPOINT_EVERY = 200
+# Conversations vérifiées par requête d'empreintes connues
+KNOWN_LOOKUP_BATCH = 500
+
+# ============================================================================
+# 1. TRAITEMENT (processus du pool)
+# ============================================================================
+
+_text_analyzer: Optional[TextAnalyzer] = None
+_tag_engine: Optional[TagEngine] = None
+_db_path: Optional[str] = None
+
+
+def _init_worker(db_path: str):
+    global _text_analyzer, _tag_engine, _db_path
+    _text_analyzer = TextAnalyzer()
+    _tag_engine = TagEngine()
+    _db_path = db_path
+
+
+def _clean(conversation: Dict, text_analyzer: TextAnalyzer):
+    """Nettoyage de sécurité (XSS / HTML) avant tout traitement, sur place."""
+    if "transcription" in conversation:
+        with profile_stage("cleaning"):
+            conversation["transcription"] = text_analyzer.clean_text(conversation["transcription"])
+
+
+def _analyze(conversation: Dict, text_analyzer: TextAnalyzer, tag_engine: TagEngine) -> Dict:
+    """Analyse et création du profil d'une conversation déjà nettoyée."""
+    with profile_stage("extraction"):
+        analysis = text_analyzer.analyze_full_text(conversation["transcription"])
+    with profile_stage("profile_building"):
+        return tag_engine.create_profile(conversation, analysis)
+
+
+def build_profile(conversation: Dict, text_analyzer: TextAnalyzer, tag_engine: TagEngine) -> Dict:
+    """Nettoyage, analyse et création du profil d'une conversation (étapes de main.py)."""
+    _clean(conversation, text_analyzer)
+    return _analyze(conversation, text_analyzer, tag_engine)
+
+
+def _clean_new(conversations: List[Dict], text_analyzer: TextAnalyzer, db_path: str) -> List[bool]:
+    """
+    Nettoie les conversations (sur place) et indique pour chacune si elle est
+    nouvelle: empreinte du texte nettoyé, tel que sauvegardé, absente de la base.
+    """
+    for conversation in conversations:
+        _clean(conversation, text_analyzer)
+    keys = [(str(c["client_id"]), content_hash(c["transcription"])) for c in conversations]
+    with profile_stage("db_read"):
+        known = known_profile_contents(db_path, keys)
+    return [key not in known for key in keys]
+
+
+def _new_profiles(conversations: List[Dict]) -> List[Dict]:
+    new = _clean_new(conversations, _text_analyzer, _db_path)
+    return [_analyze(c, _text_analyzer, _tag_engine) for c, is_new in zip(conversations, new) if is_new]
+
+
+def _build_profiles(conversations: List[Dict], profile: bool = False):
+    """Profils des conversations nouvelles d'un lot, et temps par étape du lot si le parent profile le run."""
+    if not profile:
+        return _new_profiles(conversations), None
+    profiler = StageProfiler()
+    with using_profiler(profiler):
+        profiles = _new_profiles(conversations)
+    return profiles, profiler.to_dict()
+
+# ============================================================================
+# 2. ÉCRIVAIN UNIQUE
+# ============================================================================
+
+def _writer_loop(queue, db_path: str, json_dir: str, write_batch: int, manifest: Optional[RunManifest],
+                 stats_queue=None):
+    """
+    Vide la file (None = fin) et sauvegarde les profils par lots.
+    Avec `stats_queue`, les temps d'écriture y sont renvoyés au parent en fin de run.
+    """
+    if stats_queue is None:
+        _write_all(queue, db_path, json_dir, write_batch, manifest)
+        return
+    profiler = StageProfiler()
+    with using_profiler(profiler):
+        _write_all(queue, db_path, json_dir, write_batch, manifest)
+    stats_queue.put(profiler.to_dict())
+
+
+def _write_all(queue, db_path: str, json_dir: str, write_batch: int, manifest: Optional[RunManifest]):
+    generator = ProfileGenerator(db_path, json_dir)
+
+    pending: List[Dict] = []
+    checkpoints = []
+
+    def flush():
+        generator.save_profiles(pending)
+        if manifest is not None:
+            manifest.record(checkpoints)
+
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        profiles, batch_checkpoints = item
+        pending.extend(profiles)
+        checkpoints.extend(batch_checkpoints)
+        if len(pending) >= write_batch:
+            flush()
+            pending, checkpoints = [], []
+    flush()
+
+# ============================================================================
+# 3. ORCHESTRATION
+# ============================================================================
+
+def _batches(items: Iterable, size: int):
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _pending(conversations: Iterable[Dict], manifest: Optional[RunManifest]):
+    """(checkpoint, conversation) à traiter: lignes restantes du manifeste (toutes sans manifeste)."""
+    if manifest is None:
+        return ((None, conversation) for conversation in conversations)
+    return manifest.pending(conversations)
+
+
+def run_serial(conversations: Iterable[Dict], profile_generator: ProfileGenerator,
+               text_analyzer: TextAnalyzer, tag_engine: TagEngine, progress=None,
+               manifest: Optional[RunManifest] = None) -> int:
+    """Boucle séquentielle (un profil sauvegardé à la fois). Retourne le nombre de conversations traitées."""
+    processed = 0
+    checkpoints = []
+    for batch in _batches(_pending(conversations, manifest), KNOWN_LOOKUP_BATCH):
+        new = _clean_new([conversation for _, conversation in batch], text_analyzer, profile_generator.db_path)
+        if manifest is not None and not all(new):
+            # Déjà sauvegardées: acquises pour une reprise
+            manifest.record([checkpoint for (checkpoint, _), is_new in zip(batch, new) if not is_new])
+        for (checkpoint, conversation), is_new in zip(batch, new):
+            if not is_new:
+                continue
+            profile_generator.save_profile(_analyze(conversation, text_analyzer, tag_engine))
+            processed += 1
+            if progress is not None:
+                progress.update(1)
+            if manifest is not None:
+                checkpoints.append(checkpoint)
+                if len(checkpoints) >= CHECKPOINT_EVERY:
+                    manifest.record(checkpoints)
+                    checkpoints = []
+    if manifest is not None:
+        manifest.record(checkpoints)
+    return processed
+
+
+def run_parallel(conversations: Iterable[Dict], profile_generator: ProfileGenerator, workers: int,
+                 progress=None, task_size: int = DEFAULT_TASK_SIZE,
+                 write_batch: int = DEFAULT_WRITE_BATCH, manifest: Optional[RunManifest] = None) -> int:
+    """
+    Génère et sauvegarde les profils de `conversations` avec `workers` processus.
+    Les conversations sont consommées au fil de l'eau (au plus 2 lots par
+    processus en vol). `progress` (ex: barre tqdm) reçoit `update(n)` à chaque
+    lot transmis à l'écrivain. Retourne le nombre de conversations traitées.
+    Le nettoyage et le test des conversations déjà enregistrées sont faits par
+    les processus du pool ; leurs lignes sont marquées avec le lot.
+    """
+    # Profilage actif: temps des processus du pool et de l'écrivain ajoutés au collecteur du parent
+    profiler = active_profiler()
+    ctx = multiprocessing.get_context()
+    queue = ctx.Queue(maxsize=4 * workers)
+    stats_queue = ctx.Queue() if profiler is not None else None
+    writer = ctx.Process(
+        target=_writer_loop,
+        args=(queue, profile_generator.db_path, profile_generator.json_dir, write_batch, manifest, stats_queue),
+        name="profile-writer",
+    )
+    writer.start()
+
+    processed = 0
+    max_in_flight = 2 * workers
+    try:
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(profile_generator.db_path,)) as pool:
+            in_flight = deque()
+
+            def drain_one():
+                nonlocal processed
+                checkpoints, result = in_flight.popleft()
+                profiles, stage_times = result.get()
+                if stage_times is not None:
+                    profiler.merge(stage_times)
+                if not writer.is_alive():
+                    raise RuntimeError("Processus d'écriture des profils arrêté")
+                queue.put((profiles, checkpoints))
+                processed += len(profiles)
+                if progress is not None:
+                    progress.update(len(profiles))
+
+            for batch in _batches(_pending(conversations, manifest), task_size):
+                checkpoints = [checkpoint for checkpoint, _ in batch]
+                in_flight.append((checkpoints, pool.apply_async(_build_profiles, ([c for _, c in batch], profiler is not None))))
+                if len(in_flight) >= max_in_flight:
+                    drain_one()
+            while in_flight:
+                drain_one()
+    finally:
+        if writer.is_alive():
+            queue.put(None)
+        writer.join()
+
+    if writer.exitcode != 0:
+        raise RuntimeError(f"Processus d'écriture des profils en échec (code {writer.exitcode})")
+    if stats_queue is not None:
+        profiler.merge(stats_queue.get(timeout=30))
+    return processed
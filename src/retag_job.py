@@ -0,0 +1,271 @@
+"""
+Module Retag Job - Re-tagging sélectif après modification de la taxonomie.
+Compare les empreintes par champ enregistrées dans tags_extraits avec celles
+de la taxonomie chargée et ne ré-extrait que les champs périmés, par paquets
+traités en parallèle, avec écriture groupée en base.
+
+Usage:
+  python src/retag_job.py
+  python src/retag_job.py data/clients.db --workers 4 --chunk-size 500
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from src.database import get_sqlite_connection, init_database
+    from src.language_detector import AUTO_LANGUAGE
+    from src.tag_extractor import (TAG_FIELDS, apply_advanced_view, clean_text_turbo, extract_tags_from_cleaned,
+                                   get_advanced_field_fingerprints, get_field_fingerprints)
+except Exception:
+    from database import get_sqlite_connection, init_database
+    from language_detector import AUTO_LANGUAGE
+    from tag_extractor import (TAG_FIELDS, apply_advanced_view, clean_text_turbo, extract_tags_from_cleaned,
+                               get_advanced_field_fingerprints, get_field_fingerprints)
+
+DEFAULT_CHUNK_SIZE = 500
+
+# (tags_extraits.id, texte nettoyé, tags_json, champs à recalculer, empreintes stockées, extraction_mode, langue)
+RetagItem = Tuple[int, str, str, List[str], Dict[str, str], str, str]
+
+# ============================================================================
+# 1. DÉTECTION DES CHAMPS PÉRIMÉS
+# ============================================================================
+
+def stale_fields(stored_fingerprints: Optional[str], current: Dict[str, str]) -> List[str]:
+    """Champs dont l'empreinte stockée diffère de la taxonomie chargée (tous si absente)."""
+    try:
+        stored = json.loads(stored_fingerprints) if stored_fingerprints else {}
+    except ValueError:
+        stored = {}
+    return [name for name, fp in current.items() if stored.get(name) != fp]
+
+
+def current_fingerprints(extraction_mode: Optional[str]) -> Dict[str, str]:
+    """Empreintes courantes de la vue qui a produit la ligne (base ou avancée)."""
+    if extraction_mode == "advanced":
+        return get_advanced_field_fingerprints()
+    return get_field_fingerprints()
+
+
+def _load_fingerprints(raw: Optional[str]) -> Dict[str, str]:
+    try:
+        return json.loads(raw) if raw else {}
+    except ValueError:
+        return {}
+
+
+def iter_stale_chunks(conn: sqlite3.Connection, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, List[RetagItem]]]:
+    """
+    Parcourt tags_extraits par pagination sur l'id (mémoire bornée).
+    Renvoie (nb_lignes_lues, paquet_de_lignes_périmées).
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute("""
+            SELECT tg.id, tg.tags_json, tg.field_fingerprints, tg.extraction_mode, tg.language,
+                   t.texte_nettoye, t.texte_original
+            FROM tags_extraits tg
+            JOIN transcriptions t ON t.id = tg.transcription_id
+            WHERE tg.id > ?
+            ORDER BY tg.id
+            LIMIT ?
+        """, (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+
+        chunk: List[RetagItem] = []
+        for row_id, tags_json, stored_fp, mode, language, texte_nettoye, texte_original in rows:
+            fields = stale_fields(stored_fp, current_fingerprints(mode))
+            if not fields:
+                continue
+            cleaned = texte_nettoye or clean_text_turbo(texte_original or "")
+            # Lignes antérieures à la colonne language: langue re-détectée, comme au scan par défaut
+            chunk.append((row_id, cleaned, tags_json, fields, _load_fingerprints(stored_fp), mode,
+                          language or AUTO_LANGUAGE))
+        yield len(rows), chunk
+
+# ============================================================================
+# 2. RE-TAGGING (WORKERS)
+# ============================================================================
+
+def retag_chunk(chunk: List[RetagItem]) -> List[Tuple[str, str, int]]:
+    """
+    Recalcule uniquement les champs périmés de chaque ligne, avec la langue et
+    la vue qui l'ont produite (`apply_advanced_view` pour extraction_mode='advanced'),
+    et les fusionne dans les tags existants (les autres clés sont conservées telles quelles).
+    Renvoie les paramètres de l'UPDATE: (tags_json, field_fingerprints, id).
+    """
+    updates = []
+    for row_id, cleaned, tags_json, fields, stored_fp, mode, language in chunk:
+        try:
+            tags = json.loads(tags_json) if tags_json else {}
+        except ValueError:
+            tags = {}
+        fresh = extract_tags_from_cleaned(cleaned, [name for name in fields if name in TAG_FIELDS], language=language)
+        if mode == "advanced":
+            fresh = apply_advanced_view(fresh, language=language)
+        tags.update({name: fresh[name] for name in fields if name in fresh})
+        current = current_fingerprints(mode)
+        stored_fp.update({name: current[name] for name in fields})
+        updates.append((
+            json.dumps(tags, ensure_ascii=False, default=str),
+            json.dumps(stored_fp, sort_keys=True),
+            row_id,
+        ))
+    return updates
+
+
+def _iter_retagged(chunks: Iterator[Tuple[int, List[RetagItem]]], workers: int) -> Iterator[Tuple[int, List[Tuple[str, str, int]]]]:
+    """Distribue les paquets sur un pool (au plus 2 paquets en vol par worker)."""
+    if workers <= 1:
+        for scanned, chunk in chunks:
+            yield scanned, retag_chunk(chunk) if chunk else []
+        return
+
+    in_flight: List[Tuple[int, List[RetagItem], Any]] = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for scanned, chunk in chunks:
+                in_flight.append((scanned, chunk, pool.submit(retag_chunk, chunk) if chunk else None))
+                if len(in_flight) >= workers * 2:
+                    scanned_done, _, future = in_flight[0]
+                    updates = future.result() if future else []
+                    in_flight.pop(0)
+                    yield scanned_done, updates
+            while in_flight:
+                scanned_done, _, future = in_flight[0]
+                updates = future.result() if future else []
+                in_flight.pop(0)
+                yield scanned_done, updates
+    except (OSError, RuntimeError) as e:
+        # Environnement sans multiprocessing: les paquets non écrits sont repris en séquentiel
+        print(f"[RetagJob] Pool indisponible ({e}), re-tagging séquentiel")
+        for scanned, chunk, _ in in_flight:
+            yield scanned, retag_chunk(chunk) if chunk else []
+        for scanned, chunk in chunks:
+            yield scanned, retag_chunk(chunk) if chunk else []
+
+# ============================================================================
+# 3. JOB (SYNCHRONE OU EN ARRIÈRE-PLAN)
+# ============================================================================
+
+class RetagJob:
+    """
+    Re-tagging sélectif de toute la base.
+
+    Usage:
+        job = RetagJob(workers=4).start()   # arrière-plan
+        job.status                          # {"state", "scanned", "total", "updated", ...}
+        job.wait()
+    """
+
+    def __init__(self, db_path: str = None, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.status: Dict[str, Any] = {
+            "state": "pending", "scanned": 0, "total": 0, "updated": 0,
+            "fields": {}, "started_at": None, "finished_at": None, "error": None,
+        }
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "RetagJob":
+        """Lance le job dans un thread (le calcul est fait par le pool de processus)."""
+        self._thread = threading.Thread(target=self._run_safe, name="retag-job", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.status
+
+    def _run_safe(self):
+        try:
+            self.run()
+        except Exception as e:
+            self.status.update(state="failed", error=str(e), finished_at=datetime.now().isoformat())
+
+    def run(self) -> Dict[str, Any]:
+        """Exécute le job (bloquant) et renvoie le statut final."""
+        init_database(self.db_path)
+        conn = get_sqlite_connection(self.db_path)
+        try:
+            self.status.update(
+                state="running",
+                started_at=datetime.now().isoformat(),
+                total=conn.execute("SELECT COUNT(*) FROM tags_extraits").fetchone()[0],
+            )
+            self._report()
+
+            # Pagination par id: chaque SELECT est lu entièrement avant les UPDATE du paquet
+            chunks = self._count_fields(iter_stale_chunks(conn, self.chunk_size))
+            for scanned, updates in _iter_retagged(chunks, self.workers):
+                if updates:
+                    with conn:
+                        conn.executemany(
+                            "UPDATE tags_extraits SET tags_json = ?, field_fingerprints = ?, "
+                            "extracted_at = CURRENT_TIMESTAMP WHERE id = ?",
+                            updates,
+                        )
+                self.status["scanned"] += scanned
+                self.status["updated"] += len(updates)
+                self._report()
+        finally:
+            conn.close()
+
+        self.status.update(state="done", finished_at=datetime.now().isoformat())
+        self._report()
+        return self.status
+
+    def _count_fields(self, chunks: Iterator[Tuple[int, List[RetagItem]]]) -> Iterator[Tuple[int, List[RetagItem]]]:
+        """Comptabilise les champs re-taggés (pour le rapport final)."""
+        fields = self.status["fields"]
+        for scanned, chunk in chunks:
+            for item in chunk:
+                for name in item[3]:
+                    fields[name] = fields.get(name, 0) + 1
+            yield scanned, chunk
+
+    def _report(self):
+        if self.on_progress:
+            self.on_progress(dict(self.status))
+
+
+def run_retag_job(db_path: str = None, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Raccourci synchrone: re-tag les champs périmés et renvoie le statut final."""
+    return RetagJob(db_path, workers=workers, chunk_size=chunk_size, on_progress=on_progress).run()
+
+
+if __name__ == "__main__":
+    from tqdm import tqdm
+
+    parser = argparse.ArgumentParser(description="Re-tagging sélectif après modification de la taxonomie")
+    parser.add_argument("db_path", nargs="?", default=None, help="Base SQLite (défaut: data/clients.db)")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut: nombre de coeurs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Lignes par paquet")
+    args = parser.parse_args()
+
+    bar = tqdm(desc="Re-tagging", unit="lignes")
+
+    def _progress(status):
+        bar.total = status["total"]
+        bar.n = status["scanned"]
+        bar.set_postfix(maj=status["updated"])
+        bar.refresh()
+
+    final = run_retag_job(args.db_path, workers=args.workers, chunk_size=args.chunk_size, on_progress=_progress)
+    bar.close()
+    print(f"✅ {final['updated']} lignes re-taggées sur {final['total']}")
+    for name, count in sorted(final["fields"].items(), key=lambda x: -x[1]):
+        print(f"   - {name}: {count}")
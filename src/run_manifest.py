@@ -0,0 +1,196 @@
+"""
+Module Run Manifest - Reprise des traitements de fichiers interrompus.
+Un manifeste par (pipeline, fichier d'entrée) est stocké dans des tables
+annexes de la base SQLite du pipeline:
+- run_manifests: empreinte du fichier, lignes totales, fin de traitement
+- run_rows: offset de chaque ligne traitée, empreinte de son contenu et
+  résultat éventuel (ex: texte nettoyé), enregistrés au fil de l'eau
+Avec `resume=True`, les lignes déjà traitées (même offset, même contenu) sont
+sautées ; un fichier inchangé et entièrement traité n'est même pas relu.
+Sans reprise, le manifeste du fichier est remis à zéro.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# (offset de la ligne dans le fichier, empreinte de son contenu)
+Checkpoint = Tuple[int, str]
+
+_HASH_BLOCK = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """Empreinte SHA-256 du fichier, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_row(row) -> str:
+    """Empreinte du contenu d'une ligne (texte ou dictionnaire)."""
+    if not isinstance(row, str):
+        row = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(row.encode("utf-8")).hexdigest()
+
+
+def init_manifest_tables(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS run_manifests (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pipeline TEXT NOT NULL,
+            source_ref TEXT NOT NULL,
+            source_hash TEXT NOT NULL,
+            total_rows INTEGER,
+            started_at TEXT NOT NULL,
+            completed_at TEXT,
+            UNIQUE (pipeline, source_ref)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS run_rows (
+            run_id INTEGER NOT NULL,
+            row_offset INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            result TEXT,
+            PRIMARY KEY (run_id, row_offset),
+            FOREIGN KEY (run_id) REFERENCES run_manifests(run_id)
+        )
+    ''')
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class RunManifest:
+    """
+    Manifeste d'un traitement de fichier (léger et sérialisable: le processus
+    d'écriture de main.py --workers en reçoit une copie).
+
+    Usage:
+        manifest = RunManifest.start("data/profiles.db", "profiles", input_file, resume=True)
+        if not manifest.is_complete:
+            for checkpoint, row in manifest.pending(rows):
+                ...
+                manifest.record([checkpoint])
+            manifest.finish()
+    """
+
+    def __init__(self, db_path: str, run_id: int, is_complete: bool = False):
+        self.db_path = db_path
+        self.run_id = run_id
+        self.is_complete = is_complete
+        self.skipped = 0
+        self.total_rows = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @classmethod
+    def start(cls, db_path: str, pipeline: str, input_path: str, resume: bool = False) -> "RunManifest":
+        """
+        Ouvre le manifeste de `input_path` pour `pipeline`.
+        Reprise: conserve les lignes déjà traitées ; le manifeste est déclaré
+        complet si le fichier est inchangé depuis un traitement terminé.
+        """
+        source_ref = os.path.abspath(input_path)
+        source_hash = hash_file(input_path)
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            with conn:
+                init_manifest_tables(conn)
+                row = conn.execute(
+                    "SELECT run_id, source_hash, completed_at FROM run_manifests WHERE pipeline = ? AND source_ref = ?",
+                    (pipeline, source_ref),
+                ).fetchone()
+                if row is None:
+                    run_id = conn.execute(
+                        "INSERT INTO run_manifests (pipeline, source_ref, source_hash, started_at) VALUES (?, ?, ?, ?)",
+                        (pipeline, source_ref, source_hash, _now_iso()),
+                    ).lastrowid
+                    return cls(db_path, run_id)
+
+                run_id, previous_hash, completed_at = row
+                if resume and previous_hash == source_hash and completed_at:
+                    return cls(db_path, run_id, is_complete=True)
+                if not resume:
+                    conn.execute("DELETE FROM run_rows WHERE run_id = ?", (run_id,))
+                # Fichier modifié: les lignes au contenu inchangé restent acquises
+                conn.execute(
+                    "UPDATE run_manifests SET source_hash = ?, total_rows = NULL, started_at = ?, "
+                    "completed_at = NULL WHERE run_id = ?",
+                    (source_hash, _now_iso(), run_id),
+                )
+                return cls(db_path, run_id)
+        finally:
+            conn.close()
+
+    def completed_rows(self) -> Dict[int, str]:
+        """Offset -> empreinte des lignes déjà traitées."""
+        conn = self._connect()
+        try:
+            return dict(conn.execute(
+                "SELECT row_offset, content_hash FROM run_rows WHERE run_id = ?", (self.run_id,)
+            ))
+        finally:
+            conn.close()
+
+    def results(self) -> Dict[int, Optional[str]]:
+        """Offset -> résultat enregistré des lignes déjà traitées."""
+        conn = self._connect()
+        try:
+            return dict(conn.execute(
+                "SELECT row_offset, result FROM run_rows WHERE run_id = ?", (self.run_id,)
+            ))
+        finally:
+            conn.close()
+
+    def pending(self, rows: Iterable) -> Iterator[Tuple[Checkpoint, object]]:
+        """(checkpoint, ligne) des lignes restant à traiter ; compte les lignes sautées."""
+        done = self.completed_rows()
+        self.skipped = 0
+        self.total_rows = 0
+        for offset, row in enumerate(rows):
+            self.total_rows += 1
+            content_hash = hash_row(row)
+            if done.get(offset) == content_hash:
+                self.skipped += 1
+                continue
+            yield (offset, content_hash), row
+
+    def record(self, checkpoints: List[Checkpoint], results: Optional[List[Optional[str]]] = None):
+        """Marque des lignes comme traitées (une transaction), après leur sauvegarde."""
+        if not checkpoints:
+            return
+        if results is None:
+            results = [None] * len(checkpoints)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO run_rows (run_id, row_offset, content_hash, result) VALUES (?, ?, ?, ?)",
+                    [(self.run_id, offset, content_hash, result)
+                     for (offset, content_hash), result in zip(checkpoints, results)],
+                )
+        finally:
+            conn.close()
+
+    def finish(self, total_rows: Optional[int] = None):
+        """Déclare le fichier entièrement traité (les lignes au-delà du fichier sont oubliées)."""
+        total_rows = self.total_rows if total_rows is None else total_rows
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM run_rows WHERE run_id = ? AND row_offset >= ?", (self.run_id, total_rows))
+                conn.execute(
+                    "UPDATE run_manifests SET total_rows = ?, completed_at = ? WHERE run_id = ?",
+                    (total_rows, _now_iso(), self.run_id),
+                )
+        finally:
+            conn.close()
+        self.is_complete = True
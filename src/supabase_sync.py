@@ -0,0 +1,374 @@
+"""
+Module Supabase Sync - Synchronisation en lot vers Supabase (API PostgREST)
+- Écritures groupées: des centaines de lignes par requête (upsert / insert)
+- Requêtes concurrentes en nombre borné, avec reprise et backoff exponentiel
+  (429, 5xx, erreurs réseau ; en-tête Retry-After respecté)
+- Clés générées côté client: l'id d'une transcription est dérivé de
+  (client_id, empreinte du contenu) ; tags et analyses IA la référencent
+  sans attendre la réponse de l'insertion. Une requête rejouée (reprise
+  après timeout) ne crée donc pas de doublon.
+Schéma attendu: ids UUID pour transcriptions / tags_extraits / ai_analyses
+(voir client/python_sync_schema.sql).
+Pas de dépendance: HTTP via urllib, testable hors ligne avec
+scripts/postgrest_standin.py.
+"""
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from src.document import content_hash
+except ImportError:
+    from document import content_hash
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CONCURRENCY = 4
+MAX_RETRIES = 5
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 8.0
+# Taille max des filtres `in.(...)` en lecture (longueur d'URL)
+LOOKUP_CHUNK = 200
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Espace de noms des clés générées côté client (uuid5)
+SYNC_NAMESPACE = uuid.UUID("6f1c2a52-3b8e-4d0a-9a57-5e0c1d2b7a41")
+
+
+class PostgrestError(RuntimeError):
+    """Requête refusée par PostgREST (après les reprises éventuelles)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+def transcription_key(client_id: str, digest: str) -> str:
+    """Id (UUID) d'une transcription, stable pour un même client et un même contenu."""
+    return str(uuid.uuid5(SYNC_NAMESPACE, f"{client_id}\x1f{digest}"))
+
+
+def _child_key(parent: str, kind: str) -> str:
+    return str(uuid.uuid5(SYNC_NAMESPACE, f"{parent}\x1f{kind}"))
+
+
+def _date_value(value):
+    """Date sérialisable (None pour NaT / NaN)."""
+    if value is None or value != value:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _get_first(lst):
+    return lst[0] if isinstance(lst, list) and lst else None
+
+# ============================================================================
+# 1. CLIENT POSTGREST
+# ============================================================================
+
+class SupabaseSync:
+    """
+    Écrivain en lot vers l'API REST de Supabase.
+
+    Usage:
+        sync = SupabaseSync.from_env()
+        stats = sync.sync_scan_results(results, source_file="notes.csv")
+    """
+
+    def __init__(self, url: str, key: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY, max_retries: int = MAX_RETRIES,
+                 backoff_s: float = BACKOFF_BASE_S, timeout: float = 30.0):
+        self.base_url = url.rstrip("/") + "/rest/v1"
+        self.key = key
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.timeout = timeout
+        self.counters = {"requests": 0, "retries": 0, "rows_sent": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **overrides) -> "SupabaseSync":
+        """Configuration depuis .env (SUPABASE_URL / SUPABASE_KEY, réglages SUPABASE_SYNC_*)."""
+        options = {
+            "batch_size": int(os.getenv("SUPABASE_SYNC_BATCH", DEFAULT_BATCH_SIZE)),
+            "concurrency": int(os.getenv("SUPABASE_SYNC_CONCURRENCY", DEFAULT_CONCURRENCY)),
+        }
+        options.update(overrides)
+        return cls(os.getenv("SUPABASE_URL", ""), os.getenv("SUPABASE_KEY", ""), **options)
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def _request(self, method: str, table: str, params: Optional[Dict[str, str]] = None,
+                 body: Optional[list] = None, prefer: Optional[str] = None) -> Any:
+        """Une requête PostgREST, rejouée avec backoff sur erreur transitoire."""
+        url = f"{self.base_url}/{table}"
+        if params:
+            url += "?" + urllib.parse.urlencode(params, safe=",().")
+        headers = {"apikey": self.key, "Authorization": f"Bearer {self.key}", "Accept": "application/json"}
+        data = None
+        if body is not None:
+            data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if prefer:
+            headers["Prefer"] = prefer
+
+        for attempt in range(self.max_retries + 1):
+            self._count("requests")
+            retry_after = None
+            try:
+                request = urllib.request.Request(url, data=data, headers=headers, method=method)
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    payload = response.read()
+                return json.loads(payload) if payload else None
+            except urllib.error.HTTPError as e:
+                message = e.read().decode("utf-8", "replace")
+                if e.code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise PostgrestError(e.code, message) from None
+                retry_after = e.headers.get("Retry-After")
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                if attempt == self.max_retries:
+                    raise PostgrestError(0, str(e)) from None
+            self._count("retries")
+            delay = min(BACKOFF_MAX_S, self.backoff_s * (2 ** attempt)) * (0.5 + random.random() / 2)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # Écritures groupées
+    # ------------------------------------------------------------------
+
+    def _write_batch(self, table: str, rows: List[dict], on_conflict: Optional[str], resolution: Optional[str]):
+        params = {"on_conflict": on_conflict} if on_conflict else None
+        prefer = "return=minimal" + (f",resolution={resolution}" if resolution else "")
+        self._request("POST", table, params=params, body=rows, prefer=prefer)
+        self._count("rows_sent", len(rows))
+
+    def write_many(self, jobs: Iterable[Tuple[str, List[dict], Optional[str], Optional[str]]]) -> List[Tuple[str, List[dict], Exception]]:
+        """
+        Écrit des lignes par lots, `concurrency` requêtes à la fois.
+        jobs: (table, lignes, colonne de conflit, résolution) ; une résolution
+        "merge-duplicates" fait un upsert, "ignore-duplicates" un insert idempotent.
+        Renvoie les lots en échec: (table, lignes, erreur).
+        """
+        batches = []
+        for table, rows, on_conflict, resolution in jobs:
+            for i in range(0, len(rows), self.batch_size):
+                batches.append((table, rows[i:i + self.batch_size], on_conflict, resolution))
+        if not batches:
+            return []
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+            futures = [(batch, pool.submit(self._write_batch, *batch)) for batch in batches]
+            for (table, rows, _, _), future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"[Supabase] Lot {table} en échec ({len(rows)} lignes): {e}")
+                    failed.append((table, rows, e))
+        return failed
+
+    def known_contents(self, digests: Iterable[str]) -> Set[Tuple[str, str]]:
+        """(client_id, empreinte) déjà présents dans transcriptions, lus en parallèle."""
+        digests = sorted(set(digests))
+        chunks = [digests[i:i + LOOKUP_CHUNK] for i in range(0, len(digests), LOOKUP_CHUNK)]
+        if not chunks:
+            return set()
+
+        def fetch(chunk):
+            return self._request("GET", "transcriptions", params={
+                "select": "client_id,content_hash", "content_hash": f"in.({','.join(chunk)})"})
+
+        known = set()
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(chunks))) as pool:
+            for rows in pool.map(fetch, chunks):
+                known.update((str(row["client_id"]), row["content_hash"]) for row in rows or [])
+        return known
+
+    def existing_ids(self, table: str, ids: Iterable[str]) -> Set[str]:
+        """Ids de `table` déjà présents parmi `ids`, lus en parallèle."""
+        ids = sorted(set(ids))
+        chunks = [ids[i:i + LOOKUP_CHUNK] for i in range(0, len(ids), LOOKUP_CHUNK)]
+        if not chunks:
+            return set()
+
+        def fetch(chunk):
+            return self._request("GET", table, params={"select": "id", "id": f"in.({','.join(chunk)})"})
+
+        existing = set()
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(chunks))) as pool:
+            for rows in pool.map(fetch, chunks):
+                existing.update(str(row["id"]) for row in rows or [])
+        return existing
+
+    def _stored_results(self, results: list, digests: List[str]) -> Set[Tuple[str, str]]:
+        """
+        (client_id, empreinte) des résultats déjà entièrement écrits: transcription,
+        tags et, s'il y en a une, analyse IA. Un résultat écrit en partie (lot
+        enfant en échec) est renvoyé en entier ; les doublons sont ignorés.
+        """
+        try:
+            known = self.known_contents(digests)
+            expected: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+            for r, digest in zip(results, digests):
+                key = (str(r.get("client_id", "")), digest)
+                if key not in known:
+                    continue
+                transcription_id = transcription_key(r.get("client_id", ""), digest)
+                children = expected.setdefault(key, [("tags_extraits", _child_key(transcription_id, "tags"))])
+                if _has_analysis(r):
+                    children.append(("ai_analyses", _child_key(transcription_id, "ai")))
+            present = set()
+            for table in ("tags_extraits", "ai_analyses"):
+                present |= self.existing_ids(table, [key for children in expected.values()
+                                                     for t, key in children if t == table])
+        except PostgrestError as e:
+            print(f"[Supabase] Erreur lecture des empreintes: {e}")
+            return set()
+        return {key for key, children in expected.items() if all(child in present for _, child in children)}
+
+    # ------------------------------------------------------------------
+    # Résultats du scan / de l'IA
+    # ------------------------------------------------------------------
+
+    def sync_scan_results(self, results: list, source_file: str = None) -> Dict[str, int]:
+        """
+        Équivalent groupé de database.save_scan_results (mode Supabase):
+        clients (upsert), puis transcriptions, puis tags et analyses IA.
+        Un résultat déjà stocké (même client, même contenu) est ignoré.
+        stats["failed"]: indices (dans `results`) des résultats non écrits (lots en
+        échec après reprises), à rejouer: les écritures sont idempotentes.
+        """
+        stats = {"inserted": 0, "updated": 0, "skipped": 0, "errors": 0, "failed": []}
+        digests = [r.get("content_hash") or content_hash(r.get("transcription_originale", "")) for r in results]
+        seen = self._stored_results(results, digests)
+
+        now = datetime.now().isoformat()
+        clients: Dict[str, dict] = {}
+        transcriptions, tags_rows, analyses = [], [], []
+        positions: Dict[str, int] = {}  # id de transcription -> indice dans results
+        for i, (r, digest) in enumerate(zip(results, digests)):
+            client_id = r.get("client_id", "")
+            if (str(client_id), digest) in seen:
+                stats["skipped"] += 1
+                continue
+            seen.add((str(client_id), digest))
+            tags = r.get("tags_extracted", {})
+            if not isinstance(tags, dict):
+                stats["errors"] += 1
+                stats["failed"].append(i)
+                continue
+            client = {
+                "id": client_id,
+                "genre": tags.get("genre"),
+                "segment": r.get("segment_client", "Inconnu"),
+                "canal_prefere": _get_first(tags.get("canaux_contact", [])),
+                "ville": tags.get("ville"),
+                "age_range": tags.get("age"),
+                "updated_at": now,
+            }
+            # Un client présent plusieurs fois dans le lot: une seule ligne (une requête
+            # d'upsert ne peut pas modifier deux fois la même ligne)
+            previous = clients.get(client_id)
+            clients[client_id] = client if previous is None else {
+                k: (v if v is not None else previous[k]) for k, v in client.items()}
+
+            transcription_id = transcription_key(client_id, digest)
+            positions[transcription_id] = i
+            transcriptions.append({
+                "id": transcription_id,
+                "client_id": client_id,
+                "texte_original": r.get("transcription_originale", ""),
+                "texte_nettoye": r.get("cleaned_text", ""),
+                "source_date": _date_value(r.get("source_date")),
+                "source_file": source_file,
+                "content_hash": digest,
+            })
+            tags_rows.append({
+                "id": _child_key(transcription_id, "tags"),
+                "transcription_id": transcription_id,
+                "client_id": client_id,
+                "tags_json": json.dumps(tags, ensure_ascii=False, default=str),
+                "completeness": 0,
+                "extraction_mode": "advanced",
+            })
+            if _has_analysis(r):
+                analyses.append((transcription_id, dict(_analysis_row(r, ensure_ascii=False),
+                                                        id=_child_key(transcription_id, "ai"))))
+
+        # Ordre imposé par les clés étrangères: clients -> transcriptions -> tags / analyses
+        failed = self.write_many([("clients", list(clients.values()), "id", "merge-duplicates")])
+        failed_clients = {row["id"] for _, rows, _ in failed for row in rows}
+        written = [t for t in transcriptions if t["client_id"] not in failed_clients]
+        failed = self.write_many([("transcriptions", written, "id", "ignore-duplicates")])
+        failed_ids = {row["id"] for _, rows, _ in failed for row in rows}
+        stored = {t["id"] for t in written} - failed_ids
+
+        parent_of = {row["id"]: parent for parent, row in analyses}
+        failed = self.write_many([
+            ("tags_extraits", [t for t in tags_rows if t["transcription_id"] in stored], "id", "ignore-duplicates"),
+            ("ai_analyses", [row for parent, row in analyses if parent in stored], "id", "ignore-duplicates"),
+        ])
+        failed_tags = {row["transcription_id"] for table, rows, _ in failed if table == "tags_extraits" for row in rows}
+        stats["inserted"] = len(stored - failed_tags)
+        stats["errors"] += len(transcriptions) - stats["inserted"]
+        # Analyse en échec aussi: le résultat entier est rejoué (le reste est ignoré comme doublon)
+        failed_analyses = {parent_of[row["id"]] for table, rows, _ in failed if table == "ai_analyses" for row in rows}
+        stats["failed"].extend(positions[t["id"]] for t in transcriptions
+                               if t["id"] not in stored - failed_tags - failed_analyses)
+        stats["failed"].sort()
+        return stats
+
+    def sync_ai_results(self, results: list) -> Dict[str, int]:
+        """
+        Équivalent groupé de database.save_ai_results: segments (upsert partiel) puis analyses.
+        "failed": indices (dans `results`) des résultats non écrits, à rejouer.
+        """
+        now = datetime.now().isoformat()
+        segments = {r.get("client_id", ""): {"id": r.get("client_id", ""), "segment": r.get("segment_client"),
+                                              "updated_at": now} for r in results}
+        failed = self.write_many([("clients", list(segments.values()), "id", "merge-duplicates")])
+        failed_clients = {row["id"] for _, rows, _ in failed for row in rows}
+        # Id dérivé du contenu: une requête rejouée n'ajoute pas l'analyse deux fois
+        analyses = [(i, _with_content_key(_analysis_row(r))) for i, r in enumerate(results)
+                    if r.get("client_id", "") not in failed_clients]
+        failed = self.write_many([("ai_analyses", [row for _, row in analyses], "id", "ignore-duplicates")])
+        failed_ids = {row["id"] for _, rows, _ in failed for row in rows}
+        written = {i for i, row in analyses if row["id"] not in failed_ids}
+        failed_positions = [i for i in range(len(results)) if i not in written]
+        return {"inserted": len(written), "errors": len(failed_positions), "failed": failed_positions}
+
+
+def _has_analysis(r: dict) -> bool:
+    return bool(r.get("resume_complet")) and r.get("resume_complet") != "Analyse IA en attente..."
+
+
+def _analysis_row(r: dict, ensure_ascii: bool = True) -> dict:
+    return {
+        "client_id": r.get("client_id", ""),
+        "resume_complet": r.get("resume_complet"),
+        "segment_client": r.get("segment_client"),
+        "ice_breaker": r.get("ice_breaker"),
+        "urgency_score_final": r.get("urgency_score_final"),
+        "insights_json": json.dumps(r.get("insights_marketing", {}), ensure_ascii=ensure_ascii),
+        "analyse_json": json.dumps(r.get("analyse_intelligente", {}), ensure_ascii=ensure_ascii),
+        "objections_json": json.dumps(r.get("objections_freins", []), ensure_ascii=ensure_ascii),
+    }
+
+
+def _with_content_key(row: dict) -> dict:
+    key = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return dict(row, id=str(uuid.uuid5(SYNC_NAMESPACE, key)))
@@ -3,15 +3,20 @@ Module d'extraction de tags - Version Python pure "Turbo"
 Extrait les tags de la taxonomie LVMH 100% via Algorithme (0% IA)
 Optimisé pour la vitesse et la précision des détails.
 """
+import hashlib
+import json
+import os
 import re
-from typing import Dict, List, Optional, Any
+import time
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any
 from datetime import datetime
 try:
     from src.mappings.identity import GENRE_MAPPING, LANGUE_MAPPING, STATUT_MAPPING, PROFESSIONS_ADVANCED
     from src.mappings.location import CITIES_ADVANCED
     from src.mappings.lifestyle import SPORT_MAPPING, MUSIQUE_MAPPING, ANIMAUX_MAPPING, VOYAGE_MAPPING, ART_CULTURE_MAPPING, GASTRONOMIE_MAPPING
     from src.mappings.style import PIECES_MAPPING, COULEURS_ADVANCED, MATIERES_ADVANCED, SENSIBILITE_MODE, TAILLES_MAPPING
-    from src.mappings.purchase import MOTIF_ADVANCED, TIMING_MAPPING, MARQUES_LVMH
+    from src.mappings.purchase import MOTIF_ADVANCED, TIMING_MAPPING, MARQUES_LVMH, FREQUENCE_ACHAT
     from src.mappings.preferences import REGIME_MAPPING, ALLERGIES_MAPPING, VALEURS_MAPPING
     from src.mappings.tracking import ACTIONS_MAPPING, ECHEANCES_MAPPING, CANAUX_MAPPING
     ADVANCED_TAXONOMY_AVAILABLE = True
@@ -22,18 +27,35 @@ except Exception:
         from mappings.location import CITIES_ADVANCED
         from mappings.lifestyle import SPORT_MAPPING, MUSIQUE_MAPPING, ANIMAUX_MAPPING, VOYAGE_MAPPING, ART_CULTURE_MAPPING, GASTRONOMIE_MAPPING
         from mappings.style import PIECES_MAPPING, COULEURS_ADVANCED, MATIERES_ADVANCED, SENSIBILITE_MODE, TAILLES_MAPPING
-        from mappings.purchase import MOTIF_ADVANCED, TIMING_MAPPING, MARQUES_LVMH
+        from mappings.purchase import MOTIF_ADVANCED, TIMING_MAPPING, MARQUES_LVMH, FREQUENCE_ACHAT
         from mappings.preferences import REGIME_MAPPING, ALLERGIES_MAPPING, VALEURS_MAPPING
         from mappings.tracking import ACTIONS_MAPPING, ECHEANCES_MAPPING, CANAUX_MAPPING
         ADVANCED_TAXONOMY_AVAILABLE = True
     except Exception:
         ADVANCED_TAXONOMY_AVAILABLE = False
 
+try:
+    from src.document import Document, as_document
+    from src.language_detector import keyword_language, resolve_language
+    from src.numeric_entities import AGE, AMOUNT, BIRTH_YEAR, DURATION, NUMBER, OPEN_BUDGET, URGENCY, NumericEntity, numeric_entities
+    from src.taxonomy_matcher import CompiledTaxonomy
+    from src.extraction_cache import ExtractionCache, fingerprint_mappings
+    from src.extraction_stats import ExtractionStats, active_stats, using_stats
+    from src.activations.extractors import analysis_context
+except Exception:
+    from document import Document, as_document
+    from language_detector import keyword_language, resolve_language
+    from numeric_entities import AGE, AMOUNT, BIRTH_YEAR, DURATION, NUMBER, OPEN_BUDGET, URGENCY, NumericEntity, numeric_entities
+    from taxonomy_matcher import CompiledTaxonomy
+    from extraction_cache import ExtractionCache, fingerprint_mappings
+    from extraction_stats import ExtractionStats, active_stats, using_stats
+    from activations.extractors import analysis_context
+
 # ============================================================================
 # 0. NETTOYAGE TURBO (REGEX)
 # ============================================================================
 
-def clean_text_turbo(text: str) -> str:
+def clean_text_turbo(text: str) -> Document:
     """
     Nettoie le texte instantanément sans IA.
     Supprime: 
@@ -46,8 +68,11 @@ def clean_text_turbo(text: str) -> str:
     - Chiffres (pour âge et budget)
     - Majuscules (pour villes et noms propres)
     - Symboles monétaires (€, $)
+
+    Renvoie un `Document` (un `str`) qui porte les vues minuscules / sans
+    accents, calculées une seule fois pour tous les extracteurs.
     """
-    if not isinstance(text, str): return ""
+    if not isinstance(text, str): return Document("")
     
     # 1. Supprimer HTML / balises (protection XSS côté extraction)
     text = re.sub(r'(?is)<script.*?>.*?</script>', ' ', text)
@@ -63,7 +88,7 @@ def clean_text_turbo(text: str) -> str:
     # 3. Nettoyer espaces et sauts de ligne (mais garder le reste)
     text = re.sub(r'\s+', ' ', text).strip()
     
-    return text
+    return Document(text)
 
 # ============================================================================
 # 1. DICTIONNAIRES DE DÉTECTION (LE "CERVEAU" DES MOTS-CLÉS)
@@ -150,6 +175,36 @@ PROFESSIONS_MAPPING = {
     "Étudiant": ["étudiant", "école", "université", "stage", "stagiaire", "student", "intern", "graduate", "phd"]
 }
 
+# Pays (utile quand aucune ville n'est donnée)
+COUNTRY_ALIASES = {
+    # "usa" seul crée des faux positifs (ex: verbe italien "usa")
+    "États-Unis": ["états-unis", "etats-unis", "etats unis", "u.s.a", "united states"],
+    "France": ["france"],
+    "Italie": ["italie", "italy"],
+    "Espagne": ["espagne", "spain"],
+    "Allemagne": ["allemagne", "germany"],
+    "Royaume-Uni": ["royaume-uni", "uk", "united kingdom", "angleterre", "england"],
+    "Suisse": ["suisse", "switzerland"],
+    "Belgique": ["belgique", "belgium"],
+    "Portugal": ["portugal", "portugais"],
+    "Canada": ["canada"],
+    "Maroc": ["maroc", "morocco"],
+}
+
+# Marques (mentions explicites uniquement)
+BRAND_TERMS = {
+    "Louis_Vuitton": ["louis vuitton", " vuitton", " lv "],
+    "Dior": ["dior", "christian dior"],
+    "Gucci": ["gucci"],
+    "Loro_Piana": ["loro piana"],
+    "Bulgari": ["bulgari", "bvlgari"],
+    "Givenchy": ["givenchy"],
+    "Tiffany": ["tiffany", "tiffany & co", "tiffany co"],
+    "Celine": ["celine", "céline"],
+    "Fendi": ["fendi"],
+    "Sephora": ["sephora"],
+}
+
 # ============================================================================
 # 2. MOTEUR D'EXTRACTION (LE "MUSCLE")
 # ============================================================================
@@ -159,6 +214,11 @@ def scan_text_for_keywords(text: str, mapping: Dict[str, List[str]]) -> List[str
     if not text:
         return []
     
+    # Mapping compilé: lecture des hits de l'automate (un seul passage sur le texte)
+    name = TAXONOMY_MATCHER.name_of(mapping)
+    if name is not None:
+        return TAXONOMY_MATCHER.categories(text, name)
+
     found = []
     
     for category, keywords in mapping.items():
@@ -178,6 +238,10 @@ def scan_text_for_keywords_advanced(text: str, mapping: Dict[str, Any]) -> List[
     if not text:
         return []
 
+    name = TAXONOMY_MATCHER.name_of(mapping)
+    if name is not None:
+        return TAXONOMY_MATCHER.categories(text, name)
+
     found = []
 
     for key, value in mapping.items():
@@ -236,7 +300,159 @@ def _keyword_in_text(text: str, keyword: str) -> bool:
 
     escaped = re.escape(kw)
     pattern = rf"(?<!\w){escaped}(?!\w)"
-    return re.search(pattern, text.lower()) is not None
+    return re.search(pattern, as_document(text).lowered) is not None
+
+def _is_matchable_keyword(kw: str) -> bool:
+    """Mêmes garde-fous que `_keyword_in_text`, appliqués une fois à la compilation."""
+    return len(kw) > 2 and not _is_ambiguous_keyword(kw)
+
+# Mots-clés accentués qui matchent aussi écrits sans accents ("ingenieur").
+# Liste explicite: la forme sans accent doit rester le même mot, dans toutes
+# les langues du corpus ("réunion" -> "family reunion", "cuivré" -> "cuivre",
+# "végane" -> "Vegane Ernährung", "retraité" -> "retraite" en sont exclus).
+FOLDABLE_KEYWORDS = frozenset({
+    # Métiers
+    "ingénieur", "médecin", "développeur", "rédacteur", "créateur", "créateur de mode",
+    "spécialiste", "généraliste", "athlète", "étudiant", "célibataire",
+    # Régimes et allergies
+    "pescétarien", "végétarien", "cacahuète", "intolérance lait", "intolérant gluten",
+    "intolérant lactose",
+    # Loisirs et culture
+    "méditation", "cinéma", "théâtre", "littérature", "chorégraphie", "dégustation",
+    "croisière", "randonnée", "équitation", "équestre",
+    # Lieux
+    "genève", "zürich", "münchen", "montréal", "québec", "shanghaï", "bavière",
+    "égypte", "algérie", "états-unis", "émirats", "île-de-france", "aéroport",
+    # Style, fréquence et canaux
+    "élégant", "indémodable", "imperméable", "fréquent", "régulier", "immédiatement",
+    "téléphone", "numéro de téléphone", "réseaux sociaux", "université", "diplôme",
+    "español", "português", "vicuña", "mérinos", "émeraude", "écarlate", "écharpe",
+    "minaudière",
+})
+
+def _is_foldable_keyword(kw: str) -> bool:
+    """
+    Un mot-clé accentué ne matche écrit sans accents que s'il figure dans
+    FOLDABLE_KEYWORDS (les autres restent exacts: "rosé" n'est pas "rose").
+    """
+    return kw.strip().lower() in FOLDABLE_KEYWORDS
+
+# Artefact compilé (automate sérialisé), rechargé en quelques millisecondes au démarrage
+TAXONOMY_ARTIFACT_PATH = os.getenv("TAXONOMY_ARTIFACT_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "taxonomy_compiled.pkl"
+)
+
+def _taxonomy_mappings() -> Dict[str, Any]:
+    """Tous les mappings compilés dans l'automate, par nom (src/mappings/* + dictionnaires locaux)."""
+    mappings = {
+        "CITIES": CITIES,
+        "COLORS_MAPPING": COLORS_MAPPING,
+        "MATERIALS_MAPPING": MATERIALS_MAPPING,
+        "LIFESTYLE_MAPPING": LIFESTYLE_MAPPING,
+        "STYLE_MAPPING": STYLE_MAPPING,
+        "MOTIF_MAPPING": MOTIF_MAPPING,
+        "FAMILLE_MAPPING": FAMILLE_MAPPING,
+        "PROFESSIONS_MAPPING": PROFESSIONS_MAPPING,
+        "COUNTRY_ALIASES": COUNTRY_ALIASES,
+        "BRAND_TERMS": BRAND_TERMS,
+    }
+    if ADVANCED_TAXONOMY_AVAILABLE:
+        mappings.update({
+            "GENRE_MAPPING": GENRE_MAPPING,
+            "LANGUE_MAPPING": LANGUE_MAPPING,
+            "STATUT_MAPPING": STATUT_MAPPING,
+            "PROFESSIONS_ADVANCED": PROFESSIONS_ADVANCED,
+            "CITIES_ADVANCED": CITIES_ADVANCED,
+            "SPORT_MAPPING": SPORT_MAPPING,
+            "MUSIQUE_MAPPING": MUSIQUE_MAPPING,
+            "ANIMAUX_MAPPING": ANIMAUX_MAPPING,
+            "VOYAGE_MAPPING": VOYAGE_MAPPING,
+            "ART_CULTURE_MAPPING": ART_CULTURE_MAPPING,
+            "GASTRONOMIE_MAPPING": GASTRONOMIE_MAPPING,
+            "PIECES_MAPPING": PIECES_MAPPING,
+            "COULEURS_ADVANCED": COULEURS_ADVANCED,
+            "MATIERES_ADVANCED": MATIERES_ADVANCED,
+            "SENSIBILITE_MODE": SENSIBILITE_MODE,
+            "TAILLES_MAPPING": TAILLES_MAPPING,
+            "MOTIF_ADVANCED": MOTIF_ADVANCED,
+            "TIMING_MAPPING": TIMING_MAPPING,
+            "MARQUES_LVMH": MARQUES_LVMH,
+            "FREQUENCE_ACHAT": FREQUENCE_ACHAT,
+            "REGIME_MAPPING": REGIME_MAPPING,
+            "ALLERGIES_MAPPING": ALLERGIES_MAPPING,
+            "VALEURS_MAPPING": VALEURS_MAPPING,
+            "ACTIONS_MAPPING": ACTIONS_MAPPING,
+            "ECHEANCES_MAPPING": ECHEANCES_MAPPING,
+            "CANAUX_MAPPING": CANAUX_MAPPING,
+        })
+    return mappings
+
+def _build_taxonomy_matcher(mappings: Optional[Dict[str, Any]] = None) -> CompiledTaxonomy:
+    """
+    Compile tous les mappings dans un seul automate Aho-Corasick.
+    Sert aussi les vues "sous-chaîne" de advanced_extractor et app.py.
+    """
+    matcher = CompiledTaxonomy(keyword_filter=_is_matchable_keyword, fold_filter=_is_foldable_keyword,
+                               language_of=keyword_language)
+    for name, mapping in (mappings or _taxonomy_mappings()).items():
+        matcher.register(name, mapping)
+    matcher.automaton.build()
+    return matcher
+
+# Modules dont dépend le matching de tous les champs (automate, vues du texte, langue, nombres)
+_MATCHING_SOURCES = tuple(os.path.join(os.path.dirname(os.path.abspath(__file__)), name) for name in
+                          ("taxonomy_matcher.py", "document.py", "language_detector.py", "numeric_entities.py"))
+
+def _sources_hash(paths) -> str:
+    """Hash du contenu des fichiers sources (fichier absent: ignoré)."""
+    h = hashlib.sha256()
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+def _taxonomy_fingerprint(mappings: Dict[str, Any]) -> str:
+    """
+    Empreinte des mappings chargés + du code d'extraction et de compilation
+    (invalide le cache d'extraction et l'artefact compilé à chaque édition).
+    """
+    return fingerprint_mappings(mappings, extra=_sources_hash((__file__,) + _MATCHING_SOURCES))
+
+def _load_taxonomy_matcher(mappings: Dict[str, Any], fingerprint: str) -> CompiledTaxonomy:
+    """
+    Recharge l'artefact compilé s'il est à jour, sinon recompile la taxonomie
+    et rafraîchit l'artefact (TAXONOMY_ARTIFACT=0 pour tout compiler en mémoire).
+    """
+    if os.getenv("TAXONOMY_ARTIFACT", "1") == "0":
+        return _build_taxonomy_matcher(mappings)
+
+    matcher = CompiledTaxonomy.load(TAXONOMY_ARTIFACT_PATH, fingerprint, mappings,
+                                    keyword_filter=_is_matchable_keyword, fold_filter=_is_foldable_keyword,
+                                    language_of=keyword_language)
+    if matcher is not None:
+        return matcher
+
+    matcher = _build_taxonomy_matcher(mappings)
+    try:
+        matcher.save(TAXONOMY_ARTIFACT_PATH, fingerprint)
+    except OSError:
+        pass  # Répertoire en lecture seule: on garde la version compilée en mémoire
+    return matcher
+
+def build_taxonomy_artifact(path: Optional[str] = None) -> str:
+    """Compile la taxonomie et écrit l'artefact (étape de build). Renvoie son chemin."""
+    path = path or TAXONOMY_ARTIFACT_PATH
+    mappings = _taxonomy_mappings()
+    _build_taxonomy_matcher(mappings).save(path, _taxonomy_fingerprint(mappings))
+    return path
+
+_TAXONOMY_MAPPINGS = _taxonomy_mappings()
+TAXONOMY_FINGERPRINT = _taxonomy_fingerprint(_TAXONOMY_MAPPINGS)
+TAXONOMY_MATCHER = _load_taxonomy_matcher(_TAXONOMY_MAPPINGS, TAXONOMY_FINGERPRINT)
+EXTRACTION_CACHE = ExtractionCache(TAXONOMY_FINGERPRINT)
 
 def extract_genre_precise(text: str) -> List[str]:
     """
@@ -246,7 +462,7 @@ def extract_genre_precise(text: str) -> List[str]:
     if not text:
         return []
 
-    t = text.lower()
+    t = as_document(text).lowered
     # 1) Formulations explicites en "je/moi"
     male_patterns = [
         r"\bje\s+suis\s+un\s+homme\b",
@@ -277,109 +493,100 @@ def extract_genre_precise(text: str) -> List[str]:
     # 3) Pas de fallback pronoms seuls ("il/elle") pour rester strictement explicite.
     return []
 
-def extract_age_turbo(text: str) -> Optional[str]:
-    """Extraction d'âge avancée (tolérante, évite les faux négatifs)."""
-    if not text:
+def _age_bucket(val: int) -> str:
+    """Catégorisation taxonomie d'un âge."""
+    if val <= 25: return "18-25"
+    if val <= 35: return "26-35"
+    if val <= 45: return "36-45"
+    if val <= 55: return "46-55"
+    return "56+"
+
+# Âges en lettres FR (ex: "quarante-cinq ans")
+AGE_WORDS = {
+    "dix-huit": 18, "dix huit": 18, "dix-neuf": 19, "dix neuf": 19,
+    "vingt": 20, "vingt-et-un": 21, "vingt et un": 21, "vingt-deux": 22, "vingt deux": 22,
+    "vingt-trois": 23, "vingt trois": 23, "vingt-quatre": 24, "vingt quatre": 24,
+    "vingt-cinq": 25, "vingt cinq": 25, "trente": 30, "quarante": 40, "cinquante": 50,
+    "soixante": 60,
+}
+AGE_UNITS = {
+    "zero": 0, "zéro": 0, "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4,
+    "cinq": 5, "six": 6, "sept": 7, "huit": 8, "neuf": 9
+}
+AGE_TENS = {
+    "dix": 10, "vingt": 20, "trente": 30, "quarante": 40, "cinquante": 50, "soixante": 60
+}
+# Préfixes de contexte fréquents: "il a", "elle a", "j ai", etc.
+AGE_STOPWORDS = {"il", "elle", "a", "j", "je", "ai", "ans", "age", "âge", "de"}
+
+_AGE_WORDS_RE = re.compile(r"\b([a-zàâçéèêëîïôûùüÿœæ' -]{3,25})\s+ans\b")
+_ANS_RE = re.compile(r"\s+ans\b")
+
+def _parse_simple_french_age_words(raw_age: str) -> Optional[int]:
+    s = raw_age.strip().lower().replace("’", "'")
+    if s in AGE_WORDS:
+        return AGE_WORDS[s]
+
+    # Normalise séparateurs: "quarante-cinq", "quarante cinq", "quarante et cinq"
+    tokens = [t for t in re.split(r"[\s\-']+", s) if t and t != "et"]
+    tokens = [t for t in tokens if t not in AGE_STOPWORDS]
+    if not tokens:
         return None
-    text_lower = text.lower()
-    
-    # Regex précises (chiffres)
-    patterns = [
-        r"\bj[' ]?ai\s*(\d{1,2})\s*ans\b",
-        r"\bj[' ]?ai\s*(\d{1,2})\b",
-        r"\b(\d{1,2})\s*(?:ans|an|year|yo|jahre)\b",
-        r"\b(\d{1,2})\s*years?\s*old\b",
-        r"\bage\s*(?:de)?\s*(\d{1,2})\b",
-        r'\bné[e]?\s*(?:en)?\s*(19\d{2}|20\d{2})\b', # Année naissance
-        r"\bage\s*[:]?\s*(\d{1,2})\b"
-    ]
-    
-    for p in patterns:
-        m = re.search(p, text_lower)
-        if m:
-            val = int(m.group(1))
-            if val > 1900: # C'est une année
-                val = datetime.now().year - val
-            
-            # Garde-fou simple sur les âges plausibles
-            if val < 15 or val > 99:
-                continue
 
-            # Catégorisation taxonomie
-            if val <= 25: return "18-25"
-            if val <= 35: return "26-35"
-            if val <= 45: return "36-45"
-            if val <= 55: return "46-55"
-            return "56+"
-
-    # Âges en lettres FR (ex: "quarante-cinq ans")
-    word_to_num = {
-        "dix-huit": 18, "dix huit": 18, "dix-neuf": 19, "dix neuf": 19,
-        "vingt": 20, "vingt-et-un": 21, "vingt et un": 21, "vingt-deux": 22, "vingt deux": 22,
-        "vingt-trois": 23, "vingt trois": 23, "vingt-quatre": 24, "vingt quatre": 24,
-        "vingt-cinq": 25, "vingt cinq": 25, "trente": 30, "quarante": 40, "cinquante": 50,
-        "soixante": 60,
-    }
+    # Cas direct unitaire (ex: "quarante")
+    if len(tokens) == 1:
+        if tokens[0] in AGE_TENS:
+            return AGE_TENS[tokens[0]]
+        if tokens[0] in AGE_UNITS:
+            return AGE_UNITS[tokens[0]]
+        return None
 
-    units = {
-        "zero": 0, "zéro": 0, "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4,
-        "cinq": 5, "six": 6, "sept": 7, "huit": 8, "neuf": 9
-    }
-    tens = {
-        "dix": 10, "vingt": 20, "trente": 30, "quarante": 40, "cinquante": 50, "soixante": 60
-    }
+    # Cas dizaine + unité (ex: "quarante cinq")
+    if len(tokens) == 2 and tokens[0] in AGE_TENS and tokens[1] in AGE_UNITS:
+        return AGE_TENS[tokens[0]] + AGE_UNITS[tokens[1]]
 
-    def _parse_simple_french_age_words(raw_age: str) -> Optional[int]:
-        s = raw_age.strip().lower().replace("’", "'")
-        if s in word_to_num:
-            return word_to_num[s]
-
-        # Normalise séparateurs: "quarante-cinq", "quarante cinq", "quarante et cinq"
-        tokens = [t for t in re.split(r"[\s\-']+", s) if t and t != "et"]
-        if not tokens:
-            return None
-
-        # Ignore préfixes de contexte fréquents: "il a", "elle a", "j ai", etc.
-        stopwords = {"il", "elle", "a", "j", "je", "ai", "ans", "age", "âge", "de"}
-        tokens = [t for t in tokens if t not in stopwords]
-        if not tokens:
-            return None
-
-        # Cas direct unitaire (ex: "quarante")
-        if len(tokens) == 1:
-            if tokens[0] in tens:
-                return tens[tokens[0]]
-            if tokens[0] in units:
-                return units[tokens[0]]
-            return None
-
-        # Cas dizaine + unité (ex: "quarante cinq")
-        if len(tokens) == 2 and tokens[0] in tens and tokens[1] in units:
-            return tens[tokens[0]] + units[tokens[1]]
-
-        # Cas avec contexte résiduel: on tente les 2 derniers puis le dernier token
-        if len(tokens) >= 3:
-            last_two = tokens[-2:]
-            if last_two[0] in tens and last_two[1] in units:
-                return tens[last_two[0]] + units[last_two[1]]
-            if tokens[-1] in tens:
-                return tens[tokens[-1]]
-            if tokens[-1] in units:
-                return units[tokens[-1]]
+    # Cas avec contexte résiduel: on tente les 2 derniers puis le dernier token
+    if len(tokens) >= 3:
+        last_two = tokens[-2:]
+        if last_two[0] in AGE_TENS and last_two[1] in AGE_UNITS:
+            return AGE_TENS[last_two[0]] + AGE_UNITS[last_two[1]]
+        if tokens[-1] in AGE_TENS:
+            return AGE_TENS[tokens[-1]]
+        if tokens[-1] in AGE_UNITS:
+            return AGE_UNITS[tokens[-1]]
 
+    return None
+
+def extract_age_turbo(text: str) -> Optional[str]:
+    """Extraction d'âge avancée (tolérante, évite les faux négatifs)."""
+    if not text:
         return None
-    age_words = re.search(r"\b([a-zàâçéèêëîïôûùüÿœæ' -]{3,25})\s+ans\b", text_lower)
-    if age_words:
-        raw = " ".join(age_words.group(1).strip().split())
-        raw = raw.replace("’", "'")
-        parsed_age = _parse_simple_french_age_words(raw)
-        if parsed_age is not None and 15 <= parsed_age <= 99:
-            val = parsed_age
-            if val <= 25: return "18-25"
-            if val <= 35: return "26-35"
-            if val <= 45: return "36-45"
-            if val <= 55: return "46-55"
-            return "56+"
+    entities = numeric_entities(text)
+
+    # Motifs chiffrés par priorité ("j'ai 45 ans" > "45 ans" > "née en 1980"...):
+    # seule la première occurrence de chaque motif est considérée
+    first_by_rank: Dict[int, NumericEntity] = {}
+    for entity in entities:
+        if entity.kind in (AGE, BIRTH_YEAR) and entity.rank not in first_by_rank:
+            first_by_rank[entity.rank] = entity
+    for rank in sorted(first_by_rank):
+        val = int(first_by_rank[rank].value)
+        if val > 1900: # C'est une année
+            val = datetime.now().year - val
+        # Garde-fou simple sur les âges plausibles
+        if 15 <= val <= 99:
+            return _age_bucket(val)
+
+    # Âges en lettres: la recherche démarre juste avant le premier " ans"
+    text_lower = as_document(text).lowered
+    first_ans = _ANS_RE.search(text_lower)
+    if first_ans:
+        age_words = _AGE_WORDS_RE.search(text_lower, max(0, first_ans.start() - 25))
+        if age_words:
+            raw = " ".join(age_words.group(1).strip().split())
+            parsed_age = _parse_simple_french_age_words(raw)
+            if parsed_age is not None and 15 <= parsed_age <= 99:
+                return _age_bucket(parsed_age)
 
     # IMPORTANT: pas d'inférence implicite (ex: "étudiant" => tranche d'âge).
     # On n'affiche l'âge que s'il est explicitement mentionné.
@@ -388,35 +595,14 @@ def extract_age_turbo(text: str) -> Optional[str]:
 def extract_budget_turbo(text: str) -> Optional[str]:
     """Extraction budget normalisée"""
     if not text: return None
-    text_lower = text.lower()
-    
-    # 1. Extraction numérique (prioritaire sur "flexible")
-    # Cherche 5000€, 5k, 5000 euros...
-    matches = re.findall(r'(\d+[.,]?\d*)\s*(?:k|m|€|\$|euros?|dollars?|francs?)', text_lower)
-    
-    amount = 0
-    if matches:
-        # Prendre le plus grand nombre trouvé (souvent le budget max)
-        vals = []
-        for m in matches:
-            val_str = m.replace(',', '.')
-            try:
-                val = float(val_str)
-                # Gestion du "k" (ex: 5k)
-                if "k" in text_lower[text_lower.find(m):text_lower.find(m)+5]: 
-                    val *= 1000
-                elif val < 100: # Probablement k non détecté ou abréviation
-                    val *= 1000
-                vals.append(val)
-            except: pass
-        
-        if vals: amount = max(vals)
+    entities = numeric_entities(text)
 
-    # Si pas de symbole, essai regex simple nombre > 1000
+    # 1. Montants explicites (prioritaires sur "flexible"): le plus grand est souvent le budget max
+    amount = max((e.value for e in entities if e.kind == AMOUNT), default=0)
+
+    # Si pas de devise ni de suffixe, nombre nu > 1000
     if amount == 0:
-        nums = re.findall(r'\b(\d{4,6})\b', text)
-        if nums:
-            amount = max([int(n) for n in nums])
+        amount = max((e.value for e in entities if e.kind == NUMBER), default=0)
 
     # 2. Mapping Taxonomie si montant explicite trouvé
     if amount > 0:
@@ -427,7 +613,7 @@ def extract_budget_turbo(text: str) -> Optional[str]:
         return "25k+"
 
     # 3. Sinon seulement: détection "illimité/flexible/pas de budget"
-    if any(x in text_lower for x in ["illimité", "no limit", "flexible", "pas de budget", "gros budget"]):
+    if any(e.kind == OPEN_BUDGET for e in entities):
         return "25k+"
 
     return None
@@ -436,26 +622,22 @@ def extract_urgency_turbo(text: str) -> Optional[int]:
     """Score d'urgence 1-5 UNIQUEMENT si urgence explicitement mentionnée."""
     if not text:
         return None
-    text_lower = text.lower()
-    
-    # Mention explicite de non-urgence: on n'affiche pas d'urgence.
-    if any(x in text_lower for x in ["pas urgent", "aucune urgence", "sans urgence", "quand vous voulez", "plus tard"]):
-        return None
-
-    # Niveau 5 (très urgent explicite)
-    if any(x in text_lower for x in ["urgent", "urgence", "tout de suite", "immédiat", "immediat", "asap", "au plus vite"]):
-        return 5
-        
-    # Niveau 4 (contrainte temporelle explicite)
-    if any(x in text_lower for x in ["demain", "aujourd'hui", "ce soir", "cette semaine", "avant le", "d'ici", "pour ce week-end", "pour weekend"]):
-        return 4
-
-    # Niveau 3 (urgence modérée explicitée)
-    if any(x in text_lower for x in ["rapidement", "vite", "dans les prochains jours", "mois prochain"]):
-        return 3
+    level = 0
+    for entity in numeric_entities(text):
+        if entity.kind == URGENCY:
+            # Mention explicite de non-urgence: on n'affiche pas d'urgence.
+            if entity.value == 0:
+                return None
+            level = max(level, entity.value)
+        elif entity.kind == DURATION:
+            # Échéance chiffrée: "dans 3 jours" (4), "d'ici 3 semaines" (3)
+            if entity.value <= 7:
+                level = max(level, 4)
+            elif entity.value <= 31:
+                level = max(level, 3)
 
     # Sinon: aucune urgence explicite détectée.
-    return None
+    return level or None
 
 def extract_motif_precise(text: str) -> List[str]:
     """
@@ -464,7 +646,7 @@ def extract_motif_precise(text: str) -> List[str]:
     if not text:
         return []
 
-    t = text.lower()
+    t = as_document(text).lowered
     motifs = []
 
     # Cadeau / achat pour quelqu'un
@@ -497,34 +679,15 @@ def extract_country_precise(text: str) -> Optional[str]:
     if not text:
         return None
 
-    t = text.lower()
-    country_aliases = {
-        # "usa" seul crée des faux positifs (ex: verbe italien "usa")
-        "États-Unis": ["états-unis", "etats-unis", "etats unis", "u.s.a", "united states"],
-        "France": ["france"],
-        "Italie": ["italie", "italy"],
-        "Espagne": ["espagne", "spain"],
-        "Allemagne": ["allemagne", "germany"],
-        "Royaume-Uni": ["royaume-uni", "uk", "united kingdom", "angleterre", "england"],
-        "Suisse": ["suisse", "switzerland"],
-        "Belgique": ["belgique", "belgium"],
-        "Portugal": ["portugal", "portugais"],
-        "Canada": ["canada"],
-        "Maroc": ["maroc", "morocco"],
-    }
-
-    for country, aliases in country_aliases.items():
-        for alias in aliases:
-            if _keyword_in_text(t, alias):
-                return country
-    return None
+    countries = scan_text_for_keywords(text, COUNTRY_ALIASES)
+    return countries[0] if countries else None
 
 def extract_statut_precis(text: str) -> List[str]:
     """Statut client avec garde-fous (évite faux positif 'vip' dans email)."""
     if not text:
         return []
-    t = text.lower()
-    statuts = scan_text_for_keywords_advanced(t, STATUT_MAPPING)
+    t = as_document(text).lowered
+    statuts = scan_text_for_keywords_advanced(text, STATUT_MAPPING)
 
     # Formes genrées et formulations fréquentes non couvertes mot-à-mot.
     if re.search(r"\bclient[e]?\s+occasionnel(?:le)?\b|\boccasionnel(?:le)?\b", t):
@@ -554,8 +717,8 @@ def extract_couleurs_precises(text: str) -> List[str]:
     """Couleurs explicites avec gestion des négations (ex: 'pas fan noir')."""
     if not text:
         return []
-    t = text.lower()
-    colors = scan_text_for_keywords_advanced(t, COULEURS_ADVANCED)
+    t = as_document(text).lowered
+    colors = scan_text_for_keywords_advanced(text, COULEURS_ADVANCED)
     if not colors:
         return []
 
@@ -578,8 +741,8 @@ def extract_allergies_precises(text: str) -> List[str]:
     """Allergies explicites + cas 'intolérant(e) aux produits chimiques'."""
     if not text:
         return []
-    t = text.lower()
-    out = scan_text_for_keywords_advanced(t, ALLERGIES_MAPPING)
+    t = as_document(text).lowered
+    out = scan_text_for_keywords_advanced(text, ALLERGIES_MAPPING)
 
     if re.search(r"\b(intol[ée]rant(?:e)?|allergi(?:e|que))\b.{0,40}\b(produits?|substances?)\s+chimiques?\b", t):
         out.append("Synthetiques")
@@ -592,8 +755,8 @@ def extract_voyage_precis(text: str) -> List[str]:
     """Voyage avec signaux implicites forts de fréquence et de destinations loisir."""
     if not text:
         return []
-    t = text.lower()
-    out = scan_text_for_keywords_advanced(t, VOYAGE_MAPPING)
+    t = as_document(text).lowered
+    out = scan_text_for_keywords_advanced(text, VOYAGE_MAPPING)
 
     if re.search(r"\b(partent|partir|voyage(?:nt)?|voyagent)\b.{0,20}\b(souvent|fr[ée]quemment)\b", t):
         out.append("Voyageur_frequent")
@@ -612,8 +775,8 @@ def extract_profession_precise(text: str) -> List[str]:
     """Profession explicite avec variantes genrées usuelles (ex: avocate)."""
     if not text:
         return []
-    t = text.lower()
-    out = scan_text_for_keywords_advanced(t, PROFESSIONS_ADVANCED)
+    t = as_document(text).lowered
+    out = scan_text_for_keywords_advanced(text, PROFESSIONS_ADVANCED)
 
     hard_rules = [
         (r"\bavocat(?:e)?\b", "Avocat"),
@@ -637,7 +800,7 @@ def extract_frequence_achat_precise(text: str, statut_client: Optional[List[str]
     """
     if not text:
         return []
-    t = text.lower()
+    t = as_document(text).lowered
     out: List[str] = []
 
     # Formulations explicites les plus fiables.
@@ -675,8 +838,8 @@ def extract_echeances_precises(text: str) -> List[str]:
     """Échéances avec interprétation de dates naturelles (semaine prochaine, fin mars...)."""
     if not text:
         return []
-    t = text.lower()
-    out = scan_text_for_keywords_advanced(t, ECHEANCES_MAPPING)
+    t = as_document(text).lowered
+    out = scan_text_for_keywords_advanced(text, ECHEANCES_MAPPING)
 
     if re.search(r"\b(semaine prochaine|next week)\b", t):
         out.append("M_1")
@@ -704,7 +867,7 @@ def extract_famille_precise(text: str) -> List[str]:
     """Détection famille sans faux positif sur le mot générique 'famille'."""
     if not text:
         return []
-    t = text.lower()
+    t = as_document(text).lowered
     out = []
     if re.search(r"\b(couple|en couple|partenaire|copain|copine|conjoint)\b", t):
         out.append("Couple")
@@ -720,30 +883,13 @@ def extract_marques_precises(text: str) -> List[str]:
     """Marques: seulement mentions explicites de marque, sans inférence matière."""
     if not text:
         return []
-    t = text.lower()
-    brand_terms = {
-        "Louis_Vuitton": ["louis vuitton", " vuitton", " lv "],
-        "Dior": ["dior", "christian dior"],
-        "Gucci": ["gucci"],
-        "Loro_Piana": ["loro piana"],
-        "Bulgari": ["bulgari", "bvlgari"],
-        "Givenchy": ["givenchy"],
-        "Tiffany": ["tiffany", "tiffany & co", "tiffany co"],
-        "Celine": ["celine", "céline"],
-        "Fendi": ["fendi"],
-        "Sephora": ["sephora"],
-    }
-    out = []
-    for brand, terms in brand_terms.items():
-        if any(_keyword_in_text(t, term) for term in terms):
-            out.append(brand)
-    return out
+    return scan_text_for_keywords(text, BRAND_TERMS)
 
 def extract_gastronomie_precise(text: str) -> List[str]:
     """Gastronomie uniquement si contexte alimentaire/boisson explicite."""
     if not text:
         return []
-    t = text.lower()
+    t = as_document(text).lowered
     out = []
     if re.search(r"\b(vin|wine|dégustation|degustation|sommelier)\b", t):
         out.append("Vins")
@@ -762,7 +908,7 @@ def extract_tailles_precise(text: str) -> List[str]:
     """Tailles explicites (XS/S/M/L) + pointure explicite."""
     if not text:
         return []
-    t = text.lower()
+    t = as_document(text).lowered
     out = []
 
     # XS/S/M/L explicites
@@ -830,7 +976,7 @@ def _extract_piece_by_context(text: str, context_patterns: List[str]) -> List[st
     if not text:
         return []
 
-    t = text.lower()
+    t = as_document(text).lowered
     found = []
 
     for piece, keywords in PIECES_MAPPING.items():
@@ -868,12 +1014,17 @@ def extract_sensibilite_mode_precise(text: str) -> List[str]:
     if not text:
         return []
 
-    t = text.lower()
+    t = as_document(text).lowered
     out = []
     # Termes de contexte mode/look/vestimentaire autour du mot-clé
     context = r"(style|look|mode|vestimentaire|tenue|porter|habill[eé]|garde-robe|silhouette)"
 
+    # Pré-filtre: seules les catégories présentes en mot entier peuvent matcher en contexte
+    present = set(scan_text_for_keywords_advanced(text, SENSIBILITE_MODE))
+
     for category, keywords in SENSIBILITE_MODE.items():
+        if category not in present:
+            continue
         matched = False
         for kw in keywords:
             kw_clean = kw.strip().lower()
@@ -897,7 +1048,7 @@ def extract_canaux_contact_precis(text: str) -> List[str]:
     if not text:
         return []
 
-    t = text.lower()
+    t = as_document(text).lowered
     out = []
 
     # Exclusions explicites (donnée RGPD ou mention descriptive sans préférence)
@@ -940,51 +1091,78 @@ def extract_canaux_contact_precis(text: str) -> List[str]:
 
     return list(dict.fromkeys(out))
 
-def extract_pieces_favorites_precise(text: str) -> List[str]:
-    """Pièces favorites = préférences (pas achat ponctuel)."""
-    favorite_context = [
-        r"\bj[' ]?aime\b", r"\bil aime\b", r"\belle aime\b",
-        r"\bj[' ]?adore\b", r"\bil adore\b", r"\belle adore\b",
-        r"\bpr[eé]f[eè]re\b", r"\bpr[eé]f[eè]rent\b",
-        r"\bpr[eé]f[eé]r[ée]e?s?\b", r"\bfavori(?:te)?s?\b",
-        r"\bpi[eè]ce[s]?\s+(?:pr[eé]f[eé]r[ée]e?s?|favori(?:te)?s?)\b",
-        r"\bfan de\b", r"\bporte\b", r"\bstyle\b", r"\bprivil[eé]gie\b",
-        r"\bcollectionne\b", r"\bcollectionneur\b"
-    ]
-    if not text:
-        return []
-
-    t = text.lower()
-    found = []
-    max_window = 80
-
-    # Ajouter des pièces génériques pour mieux capter la phrase naturelle
+def _piece_catalog() -> Dict[str, List[str]]:
+    """Catalogue des pièces pour les extracteurs favoris / recherchés."""
     piece_catalog = dict(PIECES_MAPPING)
     # Évite le faux positif "Sac_main" sur le mot générique "sac".
     piece_catalog["Sac_main"] = ["sac à main", "sac a main", "handbag"]
     piece_catalog["Chaussures"] = ["chaussure", "chaussures", "souliers", "shoes", "footwear"]
     piece_catalog["Portefeuille"] = ["portefeuille", "wallet", "porte-feuille"]
     piece_catalog["Sac_voyage"] = piece_catalog.get("Sac_voyage", []) + ["weekend bag", "sac weekend", "sac week-end"]
+    return piece_catalog
 
-    purchase_context = [
-        r"\bcherche\b", r"\brecherche\b", r"\bvoudrai[st]?\b", r"\bveut\b",
-        r"\bbesoin de\b", r"\bvenir acheter\b", r"\bvenu acheter\b",
-        r"\bacheter\b", r"\bachat\b", r"\boffrir\b", r"\bcadeau\b", r"\blooking for\b"
-    ]
-
-    for piece, keywords in piece_catalog.items():
-        piece_is_favorite = False
+def _compile_piece_patterns(catalog: Dict[str, List[str]]) -> List[Tuple[str, List[Tuple[str, "re.Pattern"]]]]:
+    """(mot-clé, motif mot entier) des mots-clés retenus, compilés une fois au chargement du module."""
+    compiled = []
+    for piece, keywords in catalog.items():
+        patterns = []
         for kw in keywords:
             kw_clean = kw.strip().lower()
             if len(kw_clean) <= 2 or _is_ambiguous_keyword(kw_clean):
                 continue
+            patterns.append((kw_clean, re.compile(rf"(?<!\w){re.escape(kw_clean)}(?!\w)")))
+        compiled.append((piece, patterns))
+    return compiled
+
+def _compile_any(patterns: List[str]) -> "re.Pattern":
+    """Une seule alternation: `any(re.search(p, s) for p in patterns)` en un passage."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+_PIECE_PATTERNS = _compile_piece_patterns(_piece_catalog())
+
+_FAVORITE_CONTEXT = _compile_any([
+    r"\bj[' ]?aime\b", r"\bil aime\b", r"\belle aime\b",
+    r"\bj[' ]?adore\b", r"\bil adore\b", r"\belle adore\b",
+    r"\bpr[eé]f[eè]re\b", r"\bpr[eé]f[eè]rent\b",
+    r"\bpr[eé]f[eé]r[ée]e?s?\b", r"\bfavori(?:te)?s?\b",
+    r"\bpi[eè]ce[s]?\s+(?:pr[eé]f[eé]r[ée]e?s?|favori(?:te)?s?)\b",
+    r"\bfan de\b", r"\bporte\b", r"\bstyle\b", r"\bprivil[eé]gie\b",
+    r"\bcollectionne\b", r"\bcollectionneur\b"
+])
+
+_FAVORITE_PURCHASE_CONTEXT = _compile_any([
+    r"\bcherche\b", r"\brecherche\b", r"\bvoudrai[st]?\b", r"\bveut\b",
+    r"\bbesoin de\b", r"\bvenir acheter\b", r"\bvenu acheter\b",
+    r"\bacheter\b", r"\bachat\b", r"\boffrir\b", r"\bcadeau\b", r"\blooking for\b"
+])
+
+_SEARCH_PURCHASE_CONTEXT = _compile_any([
+    r"\bcherche\b", r"\brecherche\b", r"\bvoudrai[st]?\b", r"\bveut\b",
+    r"\bbesoin de\b", r"\bvenir acheter\b", r"\bvenu acheter\b",
+    r"\bacheter\b", r"\bachat\b", r"\blooking for\b", r"\bh[eé]site entre\b", r"\bentre\b"
+])
 
-            for m in re.finditer(rf"(?<!\w){re.escape(kw_clean)}(?!\w)", t):
+def extract_pieces_favorites_precise(text: str) -> List[str]:
+    """Pièces favorites = préférences (pas achat ponctuel)."""
+    if not text:
+        return []
+
+    t = as_document(text).lowered
+    found = []
+    max_window = 80
+
+    for piece, patterns in _PIECE_PATTERNS:
+        piece_is_favorite = False
+        for kw_clean, pattern in patterns:
+            # Test de sous-chaîne (rapide) avant le motif à lookbehind
+            if kw_clean not in t:
+                continue
+            for m in pattern.finditer(t):
                 left_ctx = t[max(0, m.start() - max_window):m.start()]
 
                 # Contexte de préférence et d'achat
-                has_favorite_ctx = any(re.search(ctx, left_ctx) for ctx in favorite_context)
-                has_purchase_ctx = any(re.search(ctx, left_ctx) for ctx in purchase_context)
+                has_favorite_ctx = _FAVORITE_CONTEXT.search(left_ctx) is not None
+                has_purchase_ctx = _FAVORITE_PURCHASE_CONTEXT.search(left_ctx) is not None
 
                 # Si achat explicite sans préférence explicite, ne pas classer en favori
                 if has_purchase_ctx and not has_favorite_ctx:
@@ -1003,36 +1181,22 @@ def extract_pieces_favorites_precise(text: str) -> List[str]:
 
 def extract_pieces_recherchees_precise(text: str) -> List[str]:
     """Pièces recherchées = objectif d'achat actuel."""
-    purchase_context = [
-        r"\bcherche\b", r"\brecherche\b", r"\bvoudrai[st]?\b", r"\bveut\b",
-        r"\bbesoin de\b", r"\bvenir acheter\b", r"\bvenu acheter\b",
-        r"\bacheter\b", r"\bachat\b", r"\blooking for\b", r"\bh[eé]site entre\b", r"\bentre\b"
-    ]
     if not text:
         return []
 
-    t = text.lower()
+    t = as_document(text).lowered
     found = []
     max_window = 100
 
-    piece_catalog = dict(PIECES_MAPPING)
-    # Évite le faux positif "Sac_main" sur le mot générique "sac".
-    piece_catalog["Sac_main"] = ["sac à main", "sac a main", "handbag"]
-    piece_catalog["Chaussures"] = ["chaussure", "chaussures", "souliers", "shoes", "footwear"]
-    piece_catalog["Portefeuille"] = ["portefeuille", "wallet", "porte-feuille"]
-    piece_catalog["Sac_voyage"] = piece_catalog.get("Sac_voyage", []) + ["weekend bag", "sac weekend", "sac week-end"]
-
-    for piece, keywords in piece_catalog.items():
+    for piece, patterns in _PIECE_PATTERNS:
         matched = False
-        for kw in keywords:
-            kw_clean = kw.strip().lower()
-            if len(kw_clean) <= 2 or _is_ambiguous_keyword(kw_clean):
+        for kw_clean, pattern in patterns:
+            if kw_clean not in t:
                 continue
-
             # Contexte d'achat AVANT le mot-clé
-            for m in re.finditer(rf"(?<!\w){re.escape(kw_clean)}(?!\w)", t):
+            for m in pattern.finditer(t):
                 left_ctx = t[max(0, m.start() - max_window):m.start()]
-                if any(re.search(ctx, left_ctx) for ctx in purchase_context):
+                if _SEARCH_PURCHASE_CONTEXT.search(left_ctx):
                     matched = True
                     break
             if matched:
@@ -1042,126 +1206,605 @@ def extract_pieces_recherchees_precise(text: str) -> List[str]:
 
     return list(dict.fromkeys(found))
 
-def extract_all_tags(text: str) -> Dict[str, Any]:
+def extract_all_tags(text: str, fields: Optional[Iterable[str]] = None, language: Optional[str] = None) -> Dict[str, Any]:
     """
     FONCTION MAÎTRESSE : Extrait tout en une fraction de seconde.
+    Les transcriptions déjà vues (même texte nettoyé, même taxonomie) sont
+    servies par EXTRACTION_CACHE sans ré-extraction.
+
+    Args:
+        text: Transcription brute
+        fields: Champs souhaités (ex: ["budget", "ville"]). Par défaut tous.
+            Seuls ces champs et leurs dépendances sont calculés ; le résultat
+            contient toujours "cleaned_text".
+        language: Langue de la transcription (colonne Language: "FR", "en"...).
+            Seuls les mots-clés partagés et ceux de cette langue sont cherchés.
+            "auto" (ou valeur vide) -> langue détectée ; None -> toute la taxonomie.
     """
     cleaned_text = clean_text_turbo(text)
-    
-    # Base minimale toujours disponible
-    result = {
-        "cleaned_text": cleaned_text,
-        "age": extract_age_turbo(cleaned_text),
-        "budget": extract_budget_turbo(cleaned_text),
-        "urgence_score": extract_urgency_turbo(cleaned_text),
-    }
+    cleaned_text = as_document(cleaned_text, resolve_language(language, cleaned_text))
 
-    # Taxonomie simple (fallback)
-    if not ADVANCED_TAXONOMY_AVAILABLE:
-        result.update({
-            "profession": scan_text_for_keywords(cleaned_text, PROFESSIONS_MAPPING),
-            "ville": scan_text_for_keywords(cleaned_text, CITIES).pop(0) if scan_text_for_keywords(cleaned_text, CITIES) else None,
-            "famille": scan_text_for_keywords(cleaned_text, FAMILLE_MAPPING),
-        "motif_achat": scan_text_for_keywords(cleaned_text, MOTIF_MAPPING),
-        "couleurs": scan_text_for_keywords(cleaned_text, COLORS_MAPPING),
-        "matieres": scan_text_for_keywords(cleaned_text, MATERIALS_MAPPING),
-        "style": scan_text_for_keywords(cleaned_text, STYLE_MAPPING),
-            "centres_interet": scan_text_for_keywords(cleaned_text, LIFESTYLE_MAPPING),
-        })
-        return result
+    cached = EXTRACTION_CACHE.get(cleaned_text, cleaned_text.language)
+    stats = active_stats()
+    if stats is not None:
+        stats.record_document(cache_hit=cached is not None)
+    if cached is not None:
+        return cached if fields is None else _select_fields(cached, fields)
 
-    # Taxonomie avancée complète
-    sport = scan_text_for_keywords_advanced(cleaned_text, SPORT_MAPPING)
-    musique = scan_text_for_keywords_advanced(cleaned_text, MUSIQUE_MAPPING)
-    animaux = scan_text_for_keywords_advanced(cleaned_text, ANIMAUX_MAPPING)
-    voyage = extract_voyage_precis(cleaned_text)
-    art_culture = scan_text_for_keywords_advanced(cleaned_text, ART_CULTURE_MAPPING)
-    gastronomie = extract_gastronomie_precise(cleaned_text)
+    if fields is not None:
+        # Extraction partielle: non mise en cache (le cache ne contient que des résultats complets)
+        return extract_tags_from_cleaned(cleaned_text, fields)
 
-    centres_interet = []
-    for group in [sport, musique, voyage, art_culture, gastronomie]:
-        centres_interet.extend(group)
-    centres_interet = list(dict.fromkeys(centres_interet))
+    result = extract_tags_from_cleaned(cleaned_text)
+    EXTRACTION_CACHE.put(cleaned_text, result, cleaned_text.language)
+    return result
+
+# ----------------------------------------------------------------------------
+# Registre des champs: nom -> (extracteur(texte, champs_déjà_calculés), dépendances)
+# L'ordre du registre est l'ordre de sortie ; une dépendance est toujours
+# déclarée avant le champ qui l'utilise.
+# ----------------------------------------------------------------------------
+
+# Repli ville -> pays quand aucun pays n'est cité explicitement
+CITY_COUNTRY_MAP = {
+    "Paris": "France", "Lyon": "France", "Milan": "Italie", "Rome": "Italie",
+    "Madrid": "Espagne", "Barcelona": "Espagne", "London": "Royaume-Uni",
+    "Berlin": "Allemagne", "Munich": "Allemagne", "Genève": "Suisse",
+    "Zurich": "Suisse", "Bruxelles": "Belgique", "New York": "États-Unis",
+    "Los Angeles": "États-Unis", "Miami": "États-Unis", "Chicago": "États-Unis",
+    "San Francisco": "États-Unis", "Boston": "États-Unis", "Toronto": "Canada",
+    "Montreal": "Canada",
+}
+
+def _first_or_none(values: List[str]) -> Optional[str]:
+    return values[0] if values else None
 
-    villes_detectees = scan_text_for_keywords_advanced(cleaned_text, CITIES_ADVANCED)
+def _field_pays(text: str, tags: Dict[str, Any]) -> Optional[str]:
+    return extract_country_precise(text) or CITY_COUNTRY_MAP.get(tags["ville"])
 
-    matieres_detectees = scan_text_for_keywords_advanced(cleaned_text, MATIERES_ADVANCED)
+def _field_centres_interet(text: str, tags: Dict[str, Any]) -> List[str]:
+    centres_interet = []
+    for name in ("sport", "musique", "voyage", "art_culture", "gastronomie"):
+        centres_interet.extend(tags[name])
+    return list(dict.fromkeys(centres_interet))
+
+def _field_matieres(text: str, tags: Dict[str, Any]) -> List[str]:
+    matieres_detectees = scan_text_for_keywords_advanced(text, MATIERES_ADVANCED)
     # Évite le faux positif Denim sur le prénom "Jean"
-    if "Denim" in matieres_detectees and not re.search(r"\b(denim|jeans?)\b", cleaned_text.lower()):
+    if "Denim" in matieres_detectees and not re.search(r"\b(denim|jeans?)\b", as_document(text).lowered):
         matieres_detectees = [m for m in matieres_detectees if m != "Denim"]
+    return matieres_detectees
+
+def _field_motif_achat(text: str, tags: Dict[str, Any]) -> List[str]:
+    motifs_precis = extract_motif_precise(text)
+    return motifs_precis if motifs_precis else scan_text_for_keywords_advanced(text, MOTIF_ADVANCED)
 
-    motifs_precis = extract_motif_precise(cleaned_text)
-
-    pieces_favorites_precise = extract_pieces_favorites_precise(cleaned_text)
-    pieces_recherchees_precise = extract_pieces_recherchees_precise(cleaned_text)
-    pays_detecte = extract_country_precise(cleaned_text)
-    famille_precise = extract_famille_precise(cleaned_text)
-    marques_precises = extract_marques_precises(cleaned_text)
-    tailles_precises = extract_tailles_precise(cleaned_text)
-    if not pays_detecte and villes_detectees:
-        city_country_map = {
-            "Paris": "France", "Lyon": "France", "Milan": "Italie", "Rome": "Italie",
-            "Madrid": "Espagne", "Barcelona": "Espagne", "London": "Royaume-Uni",
-            "Berlin": "Allemagne", "Munich": "Allemagne", "Genève": "Suisse",
-            "Zurich": "Suisse", "Bruxelles": "Belgique", "New York": "États-Unis",
-            "Los Angeles": "États-Unis", "Miami": "États-Unis", "Chicago": "États-Unis",
-            "San Francisco": "États-Unis", "Boston": "États-Unis", "Toronto": "Canada",
-            "Montreal": "Canada",
-        }
-        pays_detecte = city_country_map.get(villes_detectees[0])
-
-    statut_client = extract_statut_precis(cleaned_text)
-    profession = extract_profession_precise(cleaned_text)
-
-    result.update({
+_BASE_TAG_FIELDS = {
+    "age": (lambda t, r: extract_age_turbo(t), ()),
+    "budget": (lambda t, r: extract_budget_turbo(t), ()),
+    "urgence_score": (lambda t, r: extract_urgency_turbo(t), ()),
+}
+
+if ADVANCED_TAXONOMY_AVAILABLE:
+    TAG_FIELDS = {
+        **_BASE_TAG_FIELDS,
         # Identité
-        "genre": extract_genre_precise(cleaned_text),
-        "langue": scan_text_for_keywords_advanced(cleaned_text, LANGUE_MAPPING),
-        "statut_client": statut_client,
+        "genre": (lambda t, r: extract_genre_precise(t), ()),
+        "langue": (lambda t, r: scan_text_for_keywords_advanced(t, LANGUE_MAPPING), ()),
+        "statut_client": (lambda t, r: extract_statut_precis(t), ()),
 
         # Démographiques
-        "profession": profession,
-        "ville": villes_detectees[0] if villes_detectees else None,
-        "pays": pays_detecte,
-        "famille": famille_precise,
-        
+        "profession": (lambda t, r: extract_profession_precise(t), ()),
+        "ville": (lambda t, r: _first_or_none(scan_text_for_keywords_advanced(t, CITIES_ADVANCED)), ()),
+        "pays": (_field_pays, ("ville",)),
+        "famille": (lambda t, r: extract_famille_precise(t), ()),
+
         # Lifestyle
-        "sport": sport,
-        "musique": musique,
-        "animaux": animaux,
-        "voyage": voyage,
-        "art_culture": art_culture,
-        "gastronomie": gastronomie,
-        "centres_interet": centres_interet,
+        "sport": (lambda t, r: scan_text_for_keywords_advanced(t, SPORT_MAPPING), ()),
+        "musique": (lambda t, r: scan_text_for_keywords_advanced(t, MUSIQUE_MAPPING), ()),
+        "animaux": (lambda t, r: scan_text_for_keywords_advanced(t, ANIMAUX_MAPPING), ()),
+        "voyage": (lambda t, r: extract_voyage_precis(t), ()),
+        "art_culture": (lambda t, r: scan_text_for_keywords_advanced(t, ART_CULTURE_MAPPING), ()),
+        "gastronomie": (lambda t, r: extract_gastronomie_precise(t), ()),
+        "centres_interet": (_field_centres_interet, ("sport", "musique", "voyage", "art_culture", "gastronomie")),
 
         # Style
-        "pieces_favorites": pieces_favorites_precise,
-        "pieces_recherchees": pieces_recherchees_precise,
-        "couleurs": extract_couleurs_precises(cleaned_text),
-        "matieres": matieres_detectees,
-        "sensibilite_mode": extract_sensibilite_mode_precise(cleaned_text),
-        "tailles": tailles_precises,
-        "style": scan_text_for_keywords(cleaned_text, STYLE_MAPPING),
+        "pieces_favorites": (lambda t, r: extract_pieces_favorites_precise(t), ()),
+        "pieces_recherchees": (lambda t, r: extract_pieces_recherchees_precise(t), ()),
+        "couleurs": (lambda t, r: extract_couleurs_precises(t), ()),
+        "matieres": (_field_matieres, ()),
+        "sensibilite_mode": (lambda t, r: extract_sensibilite_mode_precise(t), ()),
+        "tailles": (lambda t, r: extract_tailles_precise(t), ()),
+        "style": (lambda t, r: scan_text_for_keywords(t, STYLE_MAPPING), ()),
 
         # Achat
-        "motif_achat": motifs_precis if motifs_precis else scan_text_for_keywords_advanced(cleaned_text, MOTIF_ADVANCED),
-        "timing": scan_text_for_keywords_advanced(cleaned_text, TIMING_MAPPING),
-        "marques_preferees": marques_precises,
-        "frequence_achat": extract_frequence_achat_precise(cleaned_text, statut_client),
+        "motif_achat": (_field_motif_achat, ()),
+        "timing": (lambda t, r: scan_text_for_keywords_advanced(t, TIMING_MAPPING), ()),
+        "marques_preferees": (lambda t, r: extract_marques_precises(t), ()),
+        "frequence_achat": (lambda t, r: extract_frequence_achat_precise(t, r["statut_client"]), ("statut_client",)),
 
         # Préférences
-        "regime": scan_text_for_keywords_advanced(cleaned_text, REGIME_MAPPING),
-        "allergies": extract_allergies_precises(cleaned_text),
-        "valeurs": scan_text_for_keywords_advanced(cleaned_text, VALEURS_MAPPING),
+        "regime": (lambda t, r: scan_text_for_keywords_advanced(t, REGIME_MAPPING), ()),
+        "allergies": (lambda t, r: extract_allergies_precises(t), ()),
+        "valeurs": (lambda t, r: scan_text_for_keywords_advanced(t, VALEURS_MAPPING), ()),
 
         # CRM
-        "actions_crm": scan_text_for_keywords_advanced(cleaned_text, ACTIONS_MAPPING),
-        "echeances": extract_echeances_precises(cleaned_text),
-        "canaux_contact": extract_canaux_contact_precis(cleaned_text),
-    })
+        "actions_crm": (lambda t, r: scan_text_for_keywords_advanced(t, ACTIONS_MAPPING), ()),
+        "echeances": (lambda t, r: extract_echeances_precises(t), ()),
+        "canaux_contact": (lambda t, r: extract_canaux_contact_precis(t), ()),
+    }
+else:
+    # Taxonomie simple (fallback)
+    TAG_FIELDS = {
+        **_BASE_TAG_FIELDS,
+        "profession": (lambda t, r: scan_text_for_keywords(t, PROFESSIONS_MAPPING), ()),
+        "ville": (lambda t, r: _first_or_none(scan_text_for_keywords(t, CITIES)), ()),
+        "famille": (lambda t, r: scan_text_for_keywords(t, FAMILLE_MAPPING), ()),
+        "motif_achat": (lambda t, r: scan_text_for_keywords(t, MOTIF_MAPPING), ()),
+        "couleurs": (lambda t, r: scan_text_for_keywords(t, COLORS_MAPPING), ()),
+        "matieres": (lambda t, r: scan_text_for_keywords(t, MATERIALS_MAPPING), ()),
+        "style": (lambda t, r: scan_text_for_keywords(t, STYLE_MAPPING), ()),
+        "centres_interet": (lambda t, r: scan_text_for_keywords(t, LIFESTYLE_MAPPING), ()),
+    }
+
+def _resolve_fields(fields: Iterable[str]) -> List[str]:
+    """Champs demandés + dépendances (transitives), dans l'ordre du registre."""
+    fields = [f for f in fields if f != "cleaned_text"]
+    unknown = [f for f in fields if f not in TAG_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+
+    needed = set()
+    stack = list(fields)
+    while stack:
+        name = stack.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        stack.extend(TAG_FIELDS[name][1])
+    return [name for name in TAG_FIELDS if name in needed]
+
+def _select_fields(tags: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Restreint un résultat complet aux champs demandés."""
+    wanted = set(fields)
+    _resolve_fields(wanted)  # validation des noms
+    result = {"cleaned_text": tags["cleaned_text"]}
+    result.update({name: tags[name] for name in TAG_FIELDS if name in wanted})
+    return result
+
+def extract_tags_from_cleaned(cleaned_text: str, fields: Optional[Iterable[str]] = None,
+                              language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extraction (complète ou partielle) sur un texte déjà passé par `clean_text_turbo`.
+    `language` comme pour `extract_all_tags` (un Document garde sinon sa propre langue).
+    """
+    if fields is None:
+        plan = list(TAG_FIELDS)
+        wanted = None
+    else:
+        wanted = set(fields)
+        plan = _resolve_fields(wanted)
+
+    # Un seul Document partagé: minuscules / repliement calculés une fois pour tous les champs
+    doc = as_document(cleaned_text, resolve_language(language, cleaned_text))
+    computed: Dict[str, Any] = {}
+    stats = active_stats()
+    if stats is None:
+        for name in plan:
+            extractor, _ = TAG_FIELDS[name]
+            computed[name] = extractor(doc, computed)
+    else:
+        for name in plan:
+            extractor, _ = TAG_FIELDS[name]
+            start = time.perf_counter()
+            computed[name] = extractor(doc, computed)
+            stats.record_field(name, time.perf_counter() - start, computed[name])
+
+    result = {"cleaned_text": str(doc)}
+    result.update({name: value for name, value in computed.items() if wanted is None or name in wanted})
+    return result
+
+# ============================================================================
+# 3. VUES SOUS-CHAÎNE (ADVANCED_EXTRACTOR / APP) SUR LE SCAN FUSIONNÉ
+# ============================================================================
+
+def scan_text_substring(text: str, mapping: Dict[str, List[str]]) -> List[str]:
+    """
+    Matching historique de advanced_extractor et app.py (`kw.lower() in text`),
+    lu sur le même passage d'automate que `extract_all_tags`.
+    """
+    if not text:
+        return []
+
+    name = TAXONOMY_MATCHER.name_of(mapping)
+    if name is not None:
+        return TAXONOMY_MATCHER.categories(text, name, substring=True)
+
+    text_lower = as_document(text).lowered
+    found = []
+    for category, keywords in mapping.items():
+        for kw in keywords:
+            if kw.lower() in text_lower:
+                found.append(category)
+                break
+    return found
+
+def scan_nested_substring(text: str, nested_mapping: Dict[str, Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """Vue sous-chaîne d'un mapping imbriqué (ex: CITIES_ADVANCED) -> {Region: [Villes]}."""
+    if not text:
+        return {}
+
+    name = TAXONOMY_MATCHER.name_of(nested_mapping)
+    if name is not None:
+        return TAXONOMY_MATCHER.nested_categories(text, name, substring=True)
+
+    text_lower = as_document(text).lowered
+    results = {}
+    for region, cities in nested_mapping.items():
+        found = []
+        for city, keywords in cities.items():
+            for kw in keywords:
+                if kw.lower() in text_lower:
+                    found.append(city)
+                    break
+        if found:
+            results[region] = found
+    return results
+
+# Vue avancée (mode ADVANCED de app.py): champ -> (mapping lu en sous-chaîne, forme)
+# - "first": première catégorie trouvée ou None (valeur unique)
+# - "list": toutes les catégories trouvées
+# - "or_base": catégories trouvées, sinon la valeur de l'extraction de base
+# - "nested": mapping imbriqué -> {Région: [Villes]}
+ADVANCED_VIEW_FIELDS: Dict[str, Tuple[Dict[str, Any], str]] = {
+    "genre": (GENRE_MAPPING, "first"),
+    "langue": (LANGUE_MAPPING, "list"),
+    "statut_client": (STATUT_MAPPING, "first"),
+    "profession": (PROFESSIONS_ADVANCED, "or_base"),
+    "localisation_detail": (CITIES_ADVANCED, "nested"),
+    "sport": (SPORT_MAPPING, "list"),
+    "musique": (MUSIQUE_MAPPING, "list"),
+    "animaux": (ANIMAUX_MAPPING, "first"),
+    "voyage": (VOYAGE_MAPPING, "list"),
+    "art_culture": (ART_CULTURE_MAPPING, "list"),
+    "gastronomie": (GASTRONOMIE_MAPPING, "list"),
+    "pieces_favorites": (PIECES_MAPPING, "list"),
+    "couleurs": (COULEURS_ADVANCED, "or_base"),
+    "matieres": (MATIERES_ADVANCED, "or_base"),
+    "sensibilite_mode": (SENSIBILITE_MODE, "first"),
+    "tailles": (TAILLES_MAPPING, "list"),
+    "motif_achat": (MOTIF_ADVANCED, "or_base"),
+    "timing": (TIMING_MAPPING, "first"),
+    "marques_preferees": (MARQUES_LVMH, "list"),
+    "frequence_achat": (FREQUENCE_ACHAT, "first"),
+    "regime": (REGIME_MAPPING, "list"),
+    "allergies": (ALLERGIES_MAPPING, "list"),
+    "valeurs": (VALEURS_MAPPING, "list"),
+    "actions_crm": (ACTIONS_MAPPING, "list"),
+    "echeances": (ECHEANCES_MAPPING, "list"),
+    "canaux_contact": (CANAUX_MAPPING, "list"),
+} if ADVANCED_TAXONOMY_AVAILABLE else {}
+
+# Champs de la vue avancée ajoutés aux centres_interet de base
+ADVANCED_INTEREST_FIELDS = ("sport", "musique", "art_culture", "gastronomie")
+
+def apply_advanced_view(tags: Dict[str, Any], language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Enrichit un résultat `extract_all_tags` avec la taxonomie avancée au format
+    du mode ADVANCED de app.py (valeurs uniques pour genre, statut, timing...).
+    Le texte nettoyé vient d'être scanné: aucune nouvelle passe sur le texte
+    (à condition de passer la même `language` qu'à `extract_all_tags`).
+    """
+    if not ADVANCED_TAXONOMY_AVAILABLE:
+        return tags
+
+    cleaned = tags.get("cleaned_text", "")
+    cleaned = as_document(cleaned, resolve_language(language, cleaned))
+
+    for field, (mapping, form) in ADVANCED_VIEW_FIELDS.items():
+        if form == "nested":
+            tags[field] = scan_nested_substring(cleaned, mapping)
+            continue
+        found = scan_text_substring(cleaned, mapping)
+        if form == "first":
+            tags[field] = found[0] if found else None
+        elif form == "or_base":
+            tags[field] = found if found else tags.get(field, [])
+        else:
+            tags[field] = found
+
+    # Fusionner centres_interet avec les nouveaux
+    centres = list(tags.get("centres_interet", []))
+    for field in ADVANCED_INTEREST_FIELDS:
+        centres.extend(tags[field])
+    tags["centres_interet"] = list(dict.fromkeys(centres))
+
+    return tags
+
+# ============================================================================
+# 4. EXTRACTION PAR LOT (MULTI-PROCESSUS)
+# ============================================================================
+
+# En dessous de ce volume, le coût de démarrage du pool dépasse le gain.
+BATCH_MIN_PARALLEL_SIZE = 64
+
+def _init_batch_worker():
+    """Initialise un worker: l'automate est compilé une seule fois par processus."""
+    if not TAXONOMY_MATCHER.automaton.built:
+        TAXONOMY_MATCHER.automaton.build()
+
+def _extract_for_batch(text: str, language: Optional[str] = None, fields: Optional[Tuple[str, ...]] = None,
+                       advanced: bool = False, context: bool = False):
+    """
+    Unité de travail d'un worker: extraction + vue avancée sur le même scan.
+    Avec `context`, renvoie aussi le contexte d'analyse des activations (forme JSON).
+    """
+    tags = extract_all_tags(text, fields=fields, language=language)
+    if advanced:
+        tags = apply_advanced_view(tags, language=language)
+    if context:
+        return tags, analysis_context(tags["cleaned_text"]).to_dict()
+    return tags
+
+def _extract_for_batch_with_stats(text: str, language: Optional[str] = None, **kwargs) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Comme `_extract_for_batch`, avec les compteurs du worker (fusionnés par le parent)."""
+    stats = ExtractionStats()
+    with using_stats(stats):
+        tags = _extract_for_batch(text, language, **kwargs)
+    return tags, stats.to_dict()
+
+def iter_extract_all_tags(texts: Iterable[str], workers: Optional[int] = None, chunksize: Optional[int] = None,
+                          fields: Optional[Iterable[str]] = None, advanced: bool = False,
+                          languages: Optional[Iterable[Optional[str]]] = None,
+                          with_context: bool = False) -> Iterator[Any]:
+    """
+    Version itérative de `extract_all_tags_batch`: les résultats sont produits
+    dans l'ordre d'entrée au fil de l'eau (utile pour une barre de progression).
+    Avec `with_context`, chaque élément est un couple (tags, contexte d'analyse)
+    à stocker avec le résultat: les activations ne re-parcourent pas le texte.
+    """
+    texts = list(texts)
+    languages = list(languages) if languages is not None else [None] * len(texts)
+    if len(languages) != len(texts):
+        raise ValueError("languages doit contenir une langue par texte")
+    extract = partial(_extract_for_batch, fields=tuple(fields) if fields is not None else None, advanced=advanced,
+                      context=with_context)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(texts))
+
+    if workers <= 1 or len(texts) < BATCH_MIN_PARALLEL_SIZE:
+        for text, language in zip(texts, languages):
+            yield extract(text, language)
+        return
+
+    if not chunksize:
+        # ~4 paquets par worker: équilibre la charge sans multiplier les échanges IPC
+        chunksize = max(1, len(texts) // (workers * 4))
+
+    # Import différé: inutile (et coûteux au démarrage) pour les appels unitaires
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    stats = active_stats()
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as pool:
+            if stats is None:
+                for tags in pool.map(extract, texts, languages, chunksize=chunksize):
+                    done += 1
+                    yield tags
+            else:
+                # Instrumentation active: chaque worker renvoie aussi ses compteurs
+                extract_with_stats = partial(_extract_for_batch_with_stats, **extract.keywords)
+                for tags, worker_stats in pool.map(extract_with_stats, texts, languages, chunksize=chunksize):
+                    stats.merge(worker_stats)
+                    done += 1
+                    yield tags
+    except (OSError, BrokenProcessPool):
+        # Pool impossible à démarrer ou worker tué (sandbox, fork refusé): repli séquentiel
+        # sur les textes restants. Une erreur d'un extracteur n'est pas interceptée.
+        for text, language in zip(texts[done:], languages[done:]):
+            yield extract(text, language)
+
+def extract_all_tags_batch(texts: Iterable[str], workers: Optional[int] = None, chunksize: Optional[int] = None,
+                           fields: Optional[Iterable[str]] = None, advanced: bool = False,
+                           languages: Optional[Iterable[Optional[str]]] = None,
+                           with_context: bool = False) -> List[Any]:
+    """
+    Extrait les tags d'un lot de transcriptions sur un pool de processus.
+
+    Args:
+        texts: Transcriptions brutes
+        workers: Nombre de processus (défaut: nombre de coeurs)
+        chunksize: Taille des paquets envoyés à chaque worker (défaut: automatique)
+        fields: Champs à extraire (voir `extract_all_tags`), par défaut tous
+        advanced: Applique aussi `apply_advanced_view` (mode ADVANCED de app.py)
+        languages: Langue de chaque texte (colonne Language), voir `extract_all_tags`
+        with_context: Renvoie des couples (tags, contexte d'analyse des activations)
+
+    Returns:
+        list[dict]: Un résultat `extract_all_tags` par texte, dans l'ordre d'entrée
+    """
+    return list(iter_extract_all_tags(texts, workers=workers, chunksize=chunksize, fields=fields,
+                                      advanced=advanced, languages=languages, with_context=with_context))
+
+# ============================================================================
+# 5. EXTRACTION COLONNAIRE (PANDAS)
+# ============================================================================
 
+def extract_tags_frame(texts, fields: Optional[Iterable[str]] = None, languages=None,
+                       workers: Optional[int] = None, advanced: bool = False) -> "pd.DataFrame":
+    """
+    Extraction sur une colonne de transcriptions -> DataFrame de tags aligné
+    sur l'index d'entrée (une colonne par champ: listes, chaînes ou scores).
+
+    Les textes identiques (même langue) ne sont extraits qu'une fois, sur le
+    pool de `iter_extract_all_tags`, puis redistribués par index: les fichiers
+    en masse (exports CRM, relances) contiennent beaucoup de doublons. Les
+    listes d'une ligne dupliquée sont partagées: copier avant de les modifier.
+
+    Args:
+        texts: pd.Series (ou itérable) de transcriptions brutes ; NaN -> ""
+        fields: Champs à extraire (voir `extract_all_tags`), par défaut tous
+        languages: Langue commune (str), ou une langue par texte (Series alignée
+            sur `texts` ou liste de même longueur), voir `extract_all_tags`
+        workers: Nombre de processus (défaut: nombre de coeurs)
+        advanced: Colonnes de `apply_advanced_view` (mode ADVANCED de app.py)
+    """
+    import numpy as np
+    import pandas as pd
+
+    if not isinstance(texts, pd.Series):
+        texts = pd.Series(list(texts))
+    values = texts.where(texts.notna(), "").astype(str)
+
+    if languages is None or isinstance(languages, str):
+        langs = pd.Series([languages] * len(values), index=values.index, dtype=object)
+    else:
+        if isinstance(languages, pd.Series):
+            langs = languages.reindex(values.index).astype(object)
+        else:
+            langs = pd.Series(list(languages), dtype=object)
+            if len(langs) != len(values):
+                raise ValueError("languages doit contenir une langue par texte")
+            langs.index = values.index
+        # Cellule vide de la colonne Language (NaN) -> langue détectée, comme dans app.py
+        langs = langs.where(langs.map(type) == str, "auto")
+
+    # Une extraction par couple (texte, langue) distinct
+    keys = values + "\x00" + langs.fillna("").astype(str)
+    codes, uniques = pd.factorize(keys, sort=False)
+    first_rows = np.unique(codes, return_index=True)[1]
+    records = list(iter_extract_all_tags(
+        values.iloc[first_rows].tolist(), workers=workers, fields=fields, advanced=advanced,
+        languages=langs.iloc[first_rows].tolist(),
+    ))
+
+    columns = ["cleaned_text"] + (list(TAG_FIELDS) if fields is None else [f for f in TAG_FIELDS if f in set(fields)])
+    # dtype objet: None reste None (pas de NaN) et les scores restent des entiers
+    unique_frame = pd.DataFrame(records, columns=None if records else columns, dtype=object)
+    frame = unique_frame.iloc[codes] if len(codes) else unique_frame
+    frame.index = values.index
+    return frame
+
+def one_hot_tags(frame: "pd.DataFrame", fields: Optional[Iterable[str]] = None, sep: str = "=") -> "pd.DataFrame":
+    """
+    Colonnes booléennes "champ=valeur" (une par catégorie rencontrée) à partir
+    de `extract_tags_frame`, prêtes pour les agrégations (`.sum()`, `groupby`).
+    Les colonnes numériques (urgence_score) et les vues imbriquées sont ignorées.
+    """
+    import pandas as pd
+
+    positions = pd.RangeIndex(len(frame))
+    parts = []
+    for col in (fields or frame.columns):
+        if col == "cleaned_text" or col not in frame.columns:
+            continue
+        exploded = frame[col].reset_index(drop=True).explode().dropna()
+        exploded = exploded[exploded.map(type) == str]
+        if exploded.empty:
+            continue
+        dummies = pd.get_dummies(exploded, prefix=col, prefix_sep=sep, dtype=bool)
+        parts.append(dummies.groupby(level=0).max().reindex(positions, fill_value=False))
+    if not parts:
+        return pd.DataFrame(index=frame.index)
+    result = pd.concat(parts, axis=1)
+    result.index = frame.index
     return result
 
+# ============================================================================
+# 6. EMPREINTES PAR CHAMP (RE-TAGGING SÉLECTIF)
+# ============================================================================
+
+_FIELD_FINGERPRINTS: Optional[Dict[str, str]] = None
+_ADVANCED_FIELD_FINGERPRINTS: Optional[Dict[str, str]] = None
+
+def _code_fingerprint(code, seen: set, h) -> None:
+    """Ajoute au hash le code d'un extracteur et tout ce qu'il référence dans ce module."""
+    import inspect
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            _code_fingerprint(const, seen, h)
+    module_globals = globals()
+    for name in code.co_names:
+        if name in seen or name not in module_globals:
+            continue
+        seen.add(name)
+        obj = module_globals[name]
+        if inspect.isfunction(obj) and obj.__module__ == __name__:
+            h.update(inspect.getsource(obj).encode("utf-8"))
+            _code_fingerprint(obj.__code__, seen, h)
+        elif isinstance(obj, re.Pattern):
+            h.update(f"{name}={obj.pattern}".encode("utf-8"))
+        elif isinstance(obj, (dict, list, tuple, set, frozenset, str, int, float, bool)):
+            # Mappings de la taxonomie, listes de mots-clés, constantes
+            payload = json.dumps(obj, ensure_ascii=False,
+                                 default=lambda o: sorted(o, key=str) if isinstance(o, (set, frozenset)) else str(o))
+            h.update(f"{name}={payload}".encode("utf-8"))
+
+def get_field_fingerprints() -> Dict[str, str]:
+    """
+    Empreinte de chaque champ de TAG_FIELDS: code de l'extracteur, fonctions et
+    mappings qu'il utilise, et empreintes de ses dépendances. Modifier un mapping
+    (ex: COULEURS_ADVANCED dans src/mappings/style.py) ne change que l'empreinte
+    des champs qui l'utilisent ; modifier un module de _MATCHING_SOURCES
+    (ex: l'automate) change celle de tous les champs.
+    """
+    global _FIELD_FINGERPRINTS
+    if _FIELD_FINGERPRINTS is not None:
+        return _FIELD_FINGERPRINTS
+    import inspect
+
+    matching = _sources_hash(_MATCHING_SOURCES)
+    fingerprints: Dict[str, str] = {}
+    for name, (extractor, deps) in TAG_FIELDS.items():
+        h = hashlib.sha256(name.encode("utf-8"))
+        h.update(matching.encode("utf-8"))
+        try:
+            h.update(inspect.getsource(extractor).encode("utf-8"))
+        except (OSError, TypeError):
+            h.update(extractor.__code__.co_code)
+        _code_fingerprint(extractor.__code__, set(), h)
+        for dep in deps:
+            h.update(fingerprints[dep].encode("utf-8"))
+        fingerprints[name] = h.hexdigest()[:16]
+
+    _FIELD_FINGERPRINTS = fingerprints
+    return fingerprints
+
+def get_advanced_field_fingerprints() -> Dict[str, str]:
+    """
+    Empreintes des champs tels que stockés par le mode ADVANCED (extraction de
+    base + `apply_advanced_view`): un champ de la vue avancée dépend aussi du
+    mapping qu'elle lit (ex: GENRE_MAPPING pour genre) et de sa forme.
+    """
+    global _ADVANCED_FIELD_FINGERPRINTS
+    if _ADVANCED_FIELD_FINGERPRINTS is not None:
+        return _ADVANCED_FIELD_FINGERPRINTS
+    import inspect
+
+    base = get_field_fingerprints()
+    # La vue avancée lit aussi l'automate (vues sous-chaîne)
+    matching = _sources_hash(_MATCHING_SOURCES)
+    view_source = "".join(inspect.getsource(f) for f in (apply_advanced_view, scan_text_substring, scan_nested_substring))
+    view_fields = dict(ADVANCED_VIEW_FIELDS)
+    if view_fields:
+        view_fields["centres_interet"] = tuple(ADVANCED_VIEW_FIELDS[f] for f in ADVANCED_INTEREST_FIELDS)
+
+    fingerprints: Dict[str, str] = {}
+    for name in list(base) + [f for f in view_fields if f not in base]:
+        if name not in view_fields:
+            fingerprints[name] = base[name]
+            continue
+        h = hashlib.sha256(f"advanced|{name}|{base.get(name, '')}".encode("utf-8"))
+        h.update(matching.encode("utf-8"))
+        h.update(view_source.encode("utf-8"))
+        h.update(json.dumps(view_fields[name], ensure_ascii=False, default=str).encode("utf-8"))
+        fingerprints[name] = h.hexdigest()[:16]
+
+    _ADVANCED_FIELD_FINGERPRINTS = fingerprints
+    return fingerprints
+
 # Test rapide quand exécuté directement
 if __name__ == "__main__":
     test = "Je suis avocat à Paris, je cherche un cadeau pour les 30 ans de ma femme. Budget environ 8000€. Elle aime le style chic et le cuir noir. C'est assez urgent pour la semaine prochaine."
@@ -0,0 +1,404 @@
+"""
+Module Taxonomy Matcher - Automate multi-mots-clés (Aho-Corasick)
+Compile une seule fois tous les mappings de la taxonomie et trouve toutes les
+catégories présentes dans un texte en un seul passage.
+L'automate compilé peut être sérialisé (artefact versionné) pour un démarrage
+à froid rapide des scripts lancés par server/index.js.
+Le texte est parcouru dans sa vue repliée (minuscules, sans accents) du Document.
+Les mots-clés propres à une langue forment des shards: un Document dont la
+langue est connue ne restitue que les mots-clés partagés + ceux de sa langue.
+"""
+import os
+import pickle
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    from src.document import as_document, fold_text
+    from src.extraction_stats import active_stats
+except Exception:
+    from document import as_document, fold_text
+    from extraction_stats import active_stats
+
+# ============================================================================
+# 1. AUTOMATE AHO-CORASICK
+# ============================================================================
+
+def _is_word_char(ch: str) -> bool:
+    """Équivalent de `\\w` (regex Unicode de Python)."""
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordAutomaton:
+    """
+    Automate Aho-Corasick sur des mots-clés déjà normalisés (minuscules).
+    Chaque mot-clé porte une liste de "payloads" restitués lors d'un match.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        self._built = False
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def add(self, keyword: str, payload: Any):
+        """Ajoute un mot-clé (longueur conservée pour calculer le début du match)."""
+        if not keyword:
+            return
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(keyword), payload))
+        self._built = False
+
+    def build(self):
+        """Calcule les liens d'échec (parcours en largeur) et fusionne les sorties."""
+        queue = list(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str, out: Optional[List[List[Tuple[int, Any]]]] = None) -> Iterator[Tuple[int, int, Any]]:
+        """
+        Renvoie toutes les occurrences (chevauchantes incluses): (début, fin, payload).
+        `out` remplace les sorties de l'automate par une table filtrée (même
+        transitions, sous-ensemble des mots-clés: voir `CompiledTaxonomy.shard`).
+        """
+        if not self._built:
+            self.build()
+        goto = self._goto
+        fail = self._fail
+        out = self._out if out is None else out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                end = i + 1
+                for length, payload in out[node]:
+                    yield end - length, end, payload
+
+    def iter_word_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """Comme `iter_matches`, mais uniquement les mots entiers (`(?<!\\w)kw(?!\\w)`)."""
+        n = len(text)
+        for start, end, payload in self.iter_matches(text):
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < n and _is_word_char(text[end]):
+                continue
+            yield start, end, payload
+
+
+# ============================================================================
+# 2. TAXONOMIE COMPILÉE (SCAN FUSIONNÉ)
+# ============================================================================
+
+# Version du format de l'artefact sérialisé (à incrémenter si la structure change)
+ARTIFACT_FORMAT_VERSION = 3
+
+# Sémantiques de matching portées par chaque mot-clé de l'automate
+MATCH_WORD = 1        # mot entier, mots-clés filtrés (tag_extractor)
+MATCH_SUBSTRING = 2   # sous-chaîne brute `kw.lower() in text` (advanced_extractor, app)
+MATCH_UNACCENTED = 4  # mot entier accentué, accepté aussi écrit sans accents ("ingenieur")
+
+HitSet = Dict[str, Set[Tuple[Optional[str], str]]]
+
+
+def _view_name(name: str, substring: bool) -> str:
+    """Nom d'un mapping dans les statistiques (la vue sous-chaîne est comptée à part)."""
+    return f"{name}[substring]" if substring else name
+
+
+class CompiledTaxonomy:
+    """
+    Regroupe tous les mappings dans un seul automate.
+    Supporte les deux formes de mappings de la taxonomie:
+    - {Categorie: [keywords]}
+    - {Region: {Categorie: [keywords]}}
+
+    Un seul passage sur le texte produit à la fois les hits "mot entier" et
+    les hits "sous-chaîne": chaque extracteur lit sa vue du même ensemble.
+
+    Les mots-clés sont compilés sous forme repliée (sans accents): "écru" et
+    "ecru" ne forment qu'une entrée. Un mot-clé accentué accepté par `fold_filter`
+    matche aussi quand le texte omet ses accents ("ingenieur" -> "ingénieur"),
+    jamais quand le texte en ajoute ("pressé" ne matche pas "presse"). Les autres
+    (et toute la vue sous-chaîne) sont vérifiés sur le texte d'origine.
+
+    `language_of` rattache chaque mot-clé à une langue (ou None: shard partagé).
+    Un shard partage les transitions de l'automate complet et n'en garde que
+    les sorties "partagé + langue": un seul automate en mémoire et en cache
+    CPU, quel que soit l'ordre des langues dans le lot.
+    """
+
+    def __init__(self, keyword_filter: Optional[Callable[[str], bool]] = None,
+                 fold_filter: Optional[Callable[[str], bool]] = None,
+                 language_of: Optional[Callable[[str], Optional[str]]] = None):
+        self.keyword_filter = keyword_filter
+        self.fold_filter = fold_filter
+        self.language_of = language_of
+        self.automaton = KeywordAutomaton()
+        self._shards: Dict[str, List[List[Tuple[int, Any]]]] = {}
+        self.mappings: Dict[str, Any] = {}
+        self._order: Dict[str, List[Tuple[Optional[str], str]]] = {}
+        self._by_id: Dict[int, str] = {}
+        self._aliases: Dict[int, Tuple[str, Any]] = {}
+        self._always: Dict[str, Set[Tuple[Optional[str], str]]] = {}
+        self._last: Tuple[Optional[str], Optional[str], HitSet, HitSet] = (None, None, {}, {})
+
+    def register(self, name: str, mapping: Dict[str, Any]):
+        """Ajoute un mapping à l'automate (les mots-clés filtrés ne matchent jamais en mot entier)."""
+        order = []
+        for key, value in mapping.items():
+            if isinstance(value, dict):
+                for sub_key, sub_keywords in value.items():
+                    order.append((key, sub_key))
+                    self._add_keywords(name, (key, sub_key), sub_keywords)
+            elif isinstance(value, list):
+                order.append((None, key))
+                self._add_keywords(name, (None, key), value)
+        self.mappings[name] = mapping
+        self._order[name] = list(dict.fromkeys(order))
+        self._by_id[id(mapping)] = name
+        self._shards = {}
+        self._last = (None, None, {}, {})
+
+    def _add_keywords(self, name: str, hit: Tuple[Optional[str], str], keywords: List[str]):
+        # (clé repliée, forme exacte à vérifier) -> sémantiques
+        entries: Dict[Tuple[str, str], int] = {}
+        for kw in keywords:
+            raw = kw.lower()
+            stripped = raw.strip()
+            if not raw:
+                # `"" in text` est toujours vrai en sous-chaîne
+                self._always.setdefault(name, set()).add(hit)
+                continue
+            # Sous-chaîne: sémantique historique exacte (accents compris)
+            entries[(fold_text(raw), raw)] = entries.get((fold_text(raw), raw), 0) | MATCH_SUBSTRING
+            if stripped and (not self.keyword_filter or self.keyword_filter(stripped)):
+                folded = fold_text(stripped)
+                flags = MATCH_WORD
+                if folded != stripped and self.fold_filter and self.fold_filter(stripped):
+                    flags |= MATCH_UNACCENTED
+                entries[(folded, stripped)] = entries.get((folded, stripped), 0) | flags
+        for (key, exact), flags in entries.items():
+            # Forme sans accent (ou accents facultatifs): inutile de vérifier sur un texte sans accent
+            skip_if_plain = bool(flags & MATCH_UNACCENTED) or fold_text(exact) == exact
+            language = self.language_of(exact.strip()) if self.language_of else None
+            self.automaton.add(key, (name, hit, flags, exact, skip_if_plain, language))
+
+    @property
+    def languages(self) -> List[str]:
+        """Langues ayant des mots-clés propres (un shard chacune)."""
+        return sorted({payload[5] for outputs in self.automaton._out for _, payload in outputs if payload[5]})
+
+    def shard(self, language: Optional[str]) -> Optional[List[List[Tuple[int, Any]]]]:
+        """Sorties du shard "partagé + langue" (None: automate complet, langue inconnue)."""
+        if not language:
+            return None
+        out = self._shards.get(language)
+        if out is None:
+            if not self.automaton.built:
+                self.automaton.build()
+            out = [[o for o in outputs if o[1][5] is None or o[1][5] == language]
+                   for outputs in self.automaton._out]
+            self._shards[language] = out
+        return out
+
+    def name_of(self, mapping: Any) -> Optional[str]:
+        """
+        Retrouve le nom d'un mapping enregistré. Accepte aussi une copie
+        identique (même mapping importé via `src.mappings` et `mappings`).
+        """
+        key = id(mapping)
+        name = self._by_id.get(key)
+        if name is not None and self.mappings.get(name) is mapping:
+            return name
+        alias = self._aliases.get(key)
+        if alias is not None and alias[1] is mapping:
+            return alias[0]
+        for name, registered in self.mappings.items():
+            if registered == mapping:
+                # Référence conservée: l'id ne peut pas être réutilisé
+                self._aliases[key] = (name, mapping)
+                return name
+        return None
+
+    def _scan_all(self, text: str) -> Tuple[HitSet, HitSet]:
+        """
+        Un seul passage sur le texte -> (hits mot entier, hits sous-chaîne).
+        Le dernier texte scanné est mémorisé: les extracteurs successifs d'un même
+        document réutilisent les hits sans re-parcourir le texte.
+        """
+        doc = as_document(text)
+        low = doc.lowered
+        language = doc.language
+        last_text, last_language, last_word, last_sub = self._last
+        if last_text == low and last_language == language:
+            return last_word, last_sub
+
+        folded = doc.folded
+        # Texte sans accent: un mot-clé sans accent matche forcément à l'identique
+        plain = folded == low
+        word: HitSet = {}
+        substring: HitSet = {name: set(hits) for name, hits in self._always.items()}
+        stats = active_stats()
+        matched: Optional[Set[Tuple[str, str]]] = set() if stats is not None else None
+        n = len(folded)
+        for start, end, (name, hit, flags, exact, skip_if_plain, _) in self.automaton.iter_matches(folded, self.shard(language)):
+            if plain and skip_if_plain:
+                if flags & MATCH_UNACCENTED:
+                    # Mot-clé accentué sur un texte sans accent: seule la tolérance mot entier s'applique
+                    flags = MATCH_WORD
+            else:
+                found = doc.lowered_slice(start, end)
+                if found != exact:
+                    # Seule tolérance: mot-clé accentué écrit entièrement sans accents
+                    if not (flags & MATCH_UNACCENTED and fold_text(found) == found):
+                        continue
+                    flags = MATCH_WORD
+            if flags & MATCH_SUBSTRING:
+                substring.setdefault(name, set()).add(hit)
+                if matched is not None:
+                    matched.add((name, exact.strip()))
+            if flags & MATCH_WORD:
+                if start > 0 and _is_word_char(folded[start - 1]):
+                    continue
+                if end < n and _is_word_char(folded[end]):
+                    continue
+                word.setdefault(name, set()).add(hit)
+                if matched is not None:
+                    matched.add((name, exact.strip()))
+        if matched:
+            stats.record_keywords(sorted(matched))
+        self._last = (low, language, word, substring)
+        return word, substring
+
+    def _hits(self, text: str, name: str, substring: bool) -> Set[Tuple[Optional[str], str]]:
+        if not text:
+            return set()
+        word_hits, substring_hits = self._scan_all(text)
+        return (substring_hits if substring else word_hits).get(name, set())
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """Vue mot entier: {nom_mapping: {catégories trouvées}}."""
+        if not text:
+            return {}
+        word_hits, _ = self._scan_all(text)
+        return {name: {cat for _, cat in hits} for name, hits in word_hits.items()}
+
+    def categories(self, text: str, name: str, substring: bool = False) -> List[str]:
+        """Catégories d'un mapping présentes dans le texte, dans l'ordre du mapping."""
+        found = self._hits(text, name, substring)
+        if not found:
+            result = []
+        else:
+            result = list(dict.fromkeys(hit[1] for hit in self._order[name] if hit in found))
+        stats = active_stats()
+        if stats is not None:
+            stats.record_mapping(_view_name(name, substring), result)
+        return result
+
+    def nested_categories(self, text: str, name: str, substring: bool = False) -> Dict[str, List[str]]:
+        """Vue imbriquée {Region: [Categories]} d'un mapping à deux niveaux."""
+        found = self._hits(text, name, substring)
+        results: Dict[str, List[str]] = {}
+        for hit in self._order[name]:
+            if hit in found:
+                region, category = hit
+                results.setdefault(region, []).append(category)
+        stats = active_stats()
+        if stats is not None:
+            stats.record_mapping(_view_name(name, substring), [c for cats in results.values() for c in cats])
+        return results
+
+    # ------------------------------------------------------------------
+    # Artefact sérialisé
+    # ------------------------------------------------------------------
+
+    def save(self, path: str, fingerprint: str):
+        """
+        Sérialise l'automate compilé. L'écriture passe par un fichier temporaire:
+        un processus concurrent ne lit jamais un artefact partiel.
+        """
+        automaton = self.automaton
+        if not automaton.built:
+            automaton.build()
+        payload = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "python": list(sys.version_info[:2]),
+            "fingerprint": fingerprint,
+            "built_at": datetime.now().isoformat(),
+            "names": list(self.mappings),
+            "goto": automaton._goto,
+            "fail": automaton._fail,
+            "out": automaton._out,
+            "order": self._order,
+            "always": self._always,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str, mappings: Dict[str, Any],
+             keyword_filter: Optional[Callable[[str], bool]] = None,
+             fold_filter: Optional[Callable[[str], bool]] = None,
+             language_of: Optional[Callable[[str], Optional[str]]] = None) -> Optional["CompiledTaxonomy"]:
+        """
+        Recharge un artefact produit par `save`. Renvoie None s'il est absent,
+        illisible ou périmé (version, Python, taxonomie ou code différents):
+        l'appelant recompile alors la taxonomie.
+        """
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+            return None
+        if not isinstance(payload, dict):
+            return None
+        if (payload.get("format_version") != ARTIFACT_FORMAT_VERSION
+                or payload.get("python") != list(sys.version_info[:2])
+                or payload.get("fingerprint") != fingerprint
+                or payload.get("names") != list(mappings)):
+            return None
+
+        matcher = cls(keyword_filter=keyword_filter, fold_filter=fold_filter, language_of=language_of)
+        matcher.automaton._goto = payload["goto"]
+        matcher.automaton._fail = payload["fail"]
+        matcher.automaton._out = payload["out"]
+        matcher.automaton._built = True
+        matcher._order = payload["order"]
+        matcher._always = payload["always"]
+        # Les mappings restent les objets importés: `name_of` fonctionne par identité
+        for name, mapping in mappings.items():
+            matcher.mappings[name] = mapping
+            matcher._by_id[id(mapping)] = name
+        return matcher
@@ -589,7 +589,7 @@ TEXTE NETTOYÉ ET ANONYMISÉ :"""
         # Sécurité supplémentaire: si l'âge n'est pas trouvé après nettoyage,
         # retenter sur la transcription brute.
         if not tags.get("age"):
-            raw_tags = extract_all_tags(raw_text)
+            raw_tags = extract_all_tags(raw_text, fields=["age"])
             if raw_tags.get("age"):
                 tags["age"] = raw_tags.get("age")
 
@@ -0,0 +1,362 @@
+"""
+Module Write Queue - Écriture différée (write-behind) des résultats en base
+- Les résultats du Scan Turbo et de l'enrichissement IA sont déposés dans une
+  file durable (SQLite, data/write_queue.db) : l'interface n'attend plus la base.
+- Un seul écrivain (thread du processus) vide la file pour toutes les sessions:
+  plus de "database is locked" entre sessions concurrentes.
+- Les dépôts consécutifs de même nature sont regroupés en un seul appel à
+  save_scan_results / save_ai_results (écriture en lot).
+- Échec d'écriture (exception, ou résultats signalés non écrits par l'écrivain):
+  nouvel essai avec délai croissant des seuls résultats non écrits, puis le
+  dépôt est marqué "failed" (conservé pour diagnostic) ; l'ordre des dépôts est respecté.
+- Redémarrage de l'application: les dépôts non écrits sont repris.
+Un seul écrivain par fichier de file (un processus Streamlit).
+
+Usage:
+    queue = get_write_queue()                    # démarré au premier appel
+    queue.enqueue_scan_results(results, source_file="notes.csv")
+    queue.status()                               # {"pending_jobs", "pending_results", ...}
+    queue.flush(timeout=30)                      # attend que tout soit écrit
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from src.database import save_ai_results, save_scan_results
+except Exception:
+    from database import save_ai_results, save_scan_results
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "write_queue.db")
+# Résultats max regroupés dans un même appel d'écriture
+MAX_BATCH_RESULTS = 2000
+MAX_ATTEMPTS = 5
+RETRY_DELAY_S = 2.0
+POLL_INTERVAL_S = 1.0
+
+
+def _json_default(value):
+    """Valeurs des résultats non sérialisables en JSON (dates pandas, types numpy)."""
+    try:
+        if value != value:  # NaT / NaN
+            return None
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, datetime):
+        return value.isoformat(" ")  # même format que l'adaptateur sqlite3
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "tolist"):  # scalaires et tableaux numpy
+        return value.tolist()
+    return str(value)
+
+
+def _write_scan(results: list, source_file: Optional[str], db_path: Optional[str]) -> Dict[str, Any]:
+    return save_scan_results(results, source_file=source_file, db_path=db_path)
+
+
+def _write_ai(results: list, source_file: Optional[str], db_path: Optional[str]) -> Dict[str, Any]:
+    return save_ai_results(results, db_path=db_path)
+
+
+# Écrivains: (résultats, fichier source, base) -> compteurs. Sans exception, le dépôt
+# est écrit, sauf les résultats dont l'indice figure dans "failed" (rejoués seuls:
+# les écritures ignorent les doublons).
+WRITERS: Dict[str, Callable[[list, Optional[str], Optional[str]], Optional[Dict[str, Any]]]] = {
+    "scan": _write_scan,
+    "ai": _write_ai,
+}
+
+# ============================================================================
+# 1. FILE DURABLE
+# ============================================================================
+
+class WriteQueue:
+    """
+    File d'écriture durable + écrivain unique en arrière-plan.
+
+    Usage:
+        queue = WriteQueue().start()
+        queue.enqueue_ai_results(enriched_results)
+        queue.flush()
+    """
+
+    def __init__(self, queue_path: str = None, writers: Optional[Dict[str, Callable]] = None,
+                 max_batch_results: int = MAX_BATCH_RESULTS, max_attempts: int = MAX_ATTEMPTS,
+                 retry_delay_s: float = RETRY_DELAY_S):
+        self.queue_path = queue_path or DEFAULT_QUEUE_PATH
+        self.writers = writers or WRITERS
+        self.max_batch_results = max_batch_results
+        self.max_attempts = max_attempts
+        self.retry_delay_s = retry_delay_s
+        self.stats: Dict[str, Any] = {
+            "written_jobs": 0, "written_results": 0, "inserted": 0, "skipped": 0, "errors": 0,
+            "last_write_at": None, "last_error": None,
+        }
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._idle = threading.Condition()
+        self._drain_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        directory = os.path.dirname(self.queue_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS write_queue (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        kind TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        n_results INTEGER NOT NULL,
+                        source_file TEXT,
+                        db_path TEXT,
+                        state TEXT NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        next_attempt_at REAL NOT NULL DEFAULT 0,
+                        last_error TEXT,
+                        enqueued_at TEXT NOT NULL
+                    )
+                ''')
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.queue_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ------------------------------------------------------------------
+    # Dépôt
+    # ------------------------------------------------------------------
+
+    def enqueue(self, kind: str, results: list, source_file: str = None, db_path: str = None) -> Optional[int]:
+        """Dépose des résultats (écrits sur disque avant de rendre la main) ; renvoie l'id du dépôt."""
+        if kind not in self.writers:
+            raise ValueError(f"Type d'écriture inconnu: {kind}")
+        if not results:
+            return None
+        payload = json.dumps(results, ensure_ascii=False, default=_json_default)
+        conn = self._connect()
+        try:
+            with conn:
+                job_id = conn.execute(
+                    "INSERT INTO write_queue (kind, payload, n_results, source_file, db_path, enqueued_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, payload, len(results), source_file, db_path, datetime.now().isoformat()),
+                ).lastrowid
+        finally:
+            conn.close()
+        self._wake.set()
+        return job_id
+
+    def enqueue_scan_results(self, results: list, source_file: str = None, db_path: str = None) -> Optional[int]:
+        return self.enqueue("scan", results, source_file=source_file, db_path=db_path)
+
+    def enqueue_ai_results(self, results: list, db_path: str = None) -> Optional[int]:
+        return self.enqueue("ai", results, db_path=db_path)
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def _next_group(self, conn: sqlite3.Connection):
+        """
+        Dépôts consécutifs de même nature (et même destination) en tête de file.
+        None si la file est vide ou si le dépôt de tête attend son prochain essai.
+        """
+        rows = conn.execute(
+            "SELECT id, kind, payload, n_results, source_file, db_path, next_attempt_at FROM write_queue "
+            "WHERE state = 'pending' ORDER BY id LIMIT 100"
+        ).fetchall()
+        if not rows or rows[0][6] > time.time():
+            return None
+        head = rows[0]
+        ids, results = [], []
+        for job_id, kind, payload, n_results, source_file, db_path, _ in rows:
+            if (kind, source_file, db_path) != head[1:2] + head[4:6]:
+                break
+            if ids and len(results) + n_results > self.max_batch_results:
+                break
+            ids.append(job_id)
+            results.extend(json.loads(payload))
+        return ids, head[1], head[4], head[5], results
+
+    def _write_group(self, conn: sqlite3.Connection, group) -> bool:
+        ids, kind, source_file, db_path, results = group
+        placeholders = ",".join("?" for _ in ids)
+        try:
+            written = self.writers[kind](results, source_file, db_path) or {}
+        except Exception as e:
+            self.stats["last_error"] = f"{kind}: {e}"
+            print(f"[WriteQueue] Échec écriture {kind} ({len(results)} résultats): {e}")
+            with conn:
+                self._retry_later(conn, ids, str(e))
+            return False
+
+        failed = [results[i] for i in written.get("failed") or ()]
+        with conn:
+            if failed:
+                # Seuls les résultats non écrits restent en file, à la place du premier dépôt du groupe
+                error = f"{len(failed)} résultat(s) non écrit(s) sur {len(results)}"
+                conn.execute(
+                    "UPDATE write_queue SET payload = ?, n_results = ? WHERE id = ?",
+                    (json.dumps(failed, ensure_ascii=False, default=_json_default), len(failed), ids[0]),
+                )
+                conn.execute(f"DELETE FROM write_queue WHERE id IN ({placeholders}) AND id != ?", ids + [ids[0]])
+                self._retry_later(conn, ids[:1], error)
+            else:
+                conn.execute(f"DELETE FROM write_queue WHERE id IN ({placeholders})", ids)
+        self.stats["written_jobs"] += len(ids) - bool(failed)
+        self.stats["written_results"] += len(results) - len(failed)
+        for key in ("inserted", "skipped", "errors"):
+            self.stats[key] += written.get(key, 0)
+        self.stats["last_write_at"] = datetime.now().isoformat()
+        if failed:
+            self.stats["last_error"] = f"{kind}: {error}"
+            print(f"[WriteQueue] Écriture {kind} partielle: {error}")
+        return not failed
+
+    def _retry_later(self, conn: sqlite3.Connection, ids: list, error: str):
+        """Nouvel essai avec délai croissant ; "failed" après `max_attempts` essais."""
+        placeholders = ",".join("?" for _ in ids)
+        conn.execute(
+            f"UPDATE write_queue SET attempts = attempts + 1, last_error = ?, "
+            f"state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+            f"next_attempt_at = ? * (1 << attempts) + ? WHERE id IN ({placeholders})",
+            [error, self.max_attempts, self.retry_delay_s, time.time()] + ids,
+        )
+
+    def drain(self) -> int:
+        """Écrit tout ce qui est dû maintenant (dans le thread appelant) ; renvoie le nb de dépôts écrits."""
+        written = 0
+        with self._drain_lock:
+            conn = self._connect()
+            try:
+                while not self._stopping.is_set():
+                    group = self._next_group(conn)
+                    if group is None or not self._write_group(conn, group):
+                        break
+                    written += len(group[0])
+            finally:
+                conn.close()
+        with self._idle:
+            self._idle.notify_all()
+        return written
+
+    # ------------------------------------------------------------------
+    # Écrivain en arrière-plan
+    # ------------------------------------------------------------------
+
+    def start(self) -> "WriteQueue":
+        """Lance l'écrivain (reprend aussitôt les dépôts laissés par un arrêt précédent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Arrête l'écrivain après l'écriture en cours (les dépôts restants sont gardés sur disque)."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception as e:  # file illisible, disque plein...: on réessaie plus tard
+                self.stats["last_error"] = str(e)
+            self._wake.wait(POLL_INTERVAL_S)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend que tous les dépôts en attente soient écrits (True) ; False si le
+        délai expire, si un dépôt attend un nouvel essai ou a été abandonné.
+        Sans écrivain démarré, écrit dans le thread appelant.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self.running:
+            self.drain()
+            pending = self.status()
+            return pending["pending_jobs"] == pending["failed_jobs"] == 0
+        while True:
+            pending = self.status()
+            if pending["failed_jobs"]:
+                return False
+            if pending["pending_jobs"] == 0:
+                return True
+            if pending["retrying_jobs"] or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            self._wake.set()
+            with self._idle:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                self._idle.wait(min(POLL_INTERVAL_S, remaining) if remaining is not None else POLL_INTERVAL_S)
+
+    def status(self) -> Dict[str, Any]:
+        """État de la file (lu sur disque) et compteurs de l'écrivain."""
+        conn = self._connect()
+        try:
+            counts = dict(((state, retrying), (jobs, results)) for state, retrying, jobs, results in conn.execute(
+                "SELECT state, attempts > 0, COUNT(*), COALESCE(SUM(n_results), 0) FROM write_queue "
+                "GROUP BY state, attempts > 0"
+            ))
+            last_failure = conn.execute(
+                "SELECT last_error FROM write_queue WHERE last_error IS NOT NULL ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        finally:
+            conn.close()
+        pending = [counts.get(("pending", 0), (0, 0)), counts.get(("pending", 1), (0, 0))]
+        failed = [counts.get(("failed", 0), (0, 0)), counts.get(("failed", 1), (0, 0))]
+        return dict(
+            self.stats,
+            running=self.running,
+            pending_jobs=pending[0][0] + pending[1][0],
+            pending_results=pending[0][1] + pending[1][1],
+            retrying_jobs=pending[1][0],
+            failed_jobs=failed[0][0] + failed[1][0],
+            last_error=self.stats["last_error"] or (last_failure[0] if last_failure else None),
+        )
+
+    def retry_failed(self) -> int:
+        """Remet en file les dépôts abandonnés (après correction de la cause)."""
+        conn = self._connect()
+        try:
+            with conn:
+                count = conn.execute(
+                    "UPDATE write_queue SET state = 'pending', attempts = 0, next_attempt_at = 0 "
+                    "WHERE state = 'failed'"
+                ).rowcount
+        finally:
+            conn.close()
+        self._wake.set()
+        return count
+
+# ============================================================================
+# 2. INSTANCE PARTAGÉE (toutes les sessions Streamlit du processus)
+# ============================================================================
+
+_QUEUE: Optional[WriteQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_write_queue(queue_path: str = None) -> WriteQueue:
+    """File partagée du processus, démarrée au premier appel."""
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = WriteQueue(queue_path or os.getenv("WRITE_QUEUE_PATH")).start()
+        return _QUEUE
@@ -0,0 +1,146 @@
+"""
+Test du contexte d'analyse partagé entre le scan et les activations
+"""
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import database
+from activations import extractors
+from activations.engine import ActivationEngine
+from tag_extractor import iter_extract_all_tags
+
+REF = datetime(2026, 1, 15)
+TEXTS = [
+    "Mon anniversaire de mariage est le 12 mai. Je pars à Tokyo le mois prochain. J'ai un sac Louis Vuitton noir en cuir.",
+    "Vous n'avez plus la Speedy en 35 ? Je suis passionné de champagne et de golf, cadeau pour l'anniversaire de ma femme.",
+]
+
+
+def _scan(texts):
+    results = []
+    for i, (tags, context) in enumerate(iter_extract_all_tags(texts, workers=1, with_context=True)):
+        results.append({
+            "client_id": f"CA{i:03d}",
+            "transcription_originale": texts[i],
+            "cleaned_text": tags["cleaned_text"],
+            "tags_extracted": tags,
+            "analysis_context": context,
+        })
+    return results
+
+
+def test_context_matches_direct_extraction():
+    for result in _scan(TEXTS):
+        # Le contexte du scan est du JSON pur (stockable avec le résultat)
+        context = json.loads(json.dumps(result["analysis_context"]))
+        expected = extractors.extract_all_actionable(result["cleaned_text"], result["tags_extracted"], REF)
+        assert extractors.extract_all_actionable("", result["tags_extracted"], REF, context=context) == expected
+        assert expected["produits"] and expected["dates_cles"]
+
+
+def test_activations_read_the_stored_context():
+    results = _scan(TEXTS)
+    without_context = ActivationEngine([dict(r, analysis_context=None) for r in results], REF)
+    expected = without_context.run_all_activations()
+
+    def no_second_pass(text):
+        raise AssertionError("transcription re-parcourue")
+
+    build = extractors.build_analysis_context
+    extractors.build_analysis_context = no_second_pass
+    try:
+        assert ActivationEngine(results, REF).run_all_activations() == expected
+    finally:
+        extractors.build_analysis_context = build
+
+
+def test_context_is_memoised_and_versioned():
+    doc = extractors.as_document(TEXTS[0])
+    extractors.extract_all_actionable(doc, None, REF)
+    cached = doc.__dict__["analysis_context"]
+    extractors.extract_produits_possedes(doc)
+    assert doc.__dict__["analysis_context"] is cached
+
+    stale = dict(cached.to_dict(), version=0)
+    assert extractors.AnalysisContext.from_dict(stale, TEXTS[0]) is None
+    # Format périmé: recalcul à partir du texte
+    assert extractors.extract_all_actionable(TEXTS[0], None, REF, context=stale)["produits"]
+
+
+def test_date_triggers_are_joined_to_dates_by_offset():
+    text = "Pour l'anniversaire de ma femme le 12 mai, et noël en famille."
+    dates = {d["type"]: d["date_str"] for d in extractors.extract_dates_cles(text, REF)}
+    # Deux types déclenchés à la même position, une seule date proche
+    assert dates == {"anniversaire_epouse": "12/05", "anniversaire_general": "12/05", "noel": "12/05"}
+
+    # Date coupée par la fin de la fenêtre de ±100 caractères: ignorée, comme avant
+    padding = "x" * (extractors.DATE_WINDOW - len(" le 3 déc"))
+    clipped = extractors.extract_dates_cles("notre mariage " + padding + " le 3 décembre", REF)
+    assert clipped[0]["type"] == "mariage" and clipped[0]["date_str"] is None
+
+    # Sans ancre vue par l'automate, aucun motif du type n'est testé
+    assert extractors.DATE_TRIGGER_ANCHORS["noel"] == {"noël", "christmas"}
+    assert extractors._find_date_triggers("joyeux noël", candidates=set()) == {}
+
+
+def test_declared_anchors_cover_every_trigger_match():
+    import pandas as pd
+    notes = pd.read_csv(os.path.join(os.path.dirname(__file__), "LVMH_Notes_CA101-400.csv"))
+    samples = [
+        "pour l'anniversaire de ma femme", "birthday of my husband", "anniversaire de mon fils",
+        "our wedding anniversary", "pour un anniversaire", "naissance de notre fils", "baby shower",
+        "elle est enceinte", "getting married", "se fiancer", "pour noël", "christmas", "saint-valentin",
+        "fête des mères", "mothers day", "father's day", "fin d'études", "sa graduation", "un degree",
+    ]
+    texts = samples + [str(t) for column in notes.columns if "ranscri" in column for t in notes[column]]
+    assert set(extractors.DATE_TRIGGER_ANCHORS) == set(extractors.DATE_PATTERNS)
+    for text in texts:
+        text_lower = extractors.as_document(text).lowered
+        # Le préfiltre par ancres ne perd aucun déclencheur
+        candidates = {t for t, anchors in extractors.DATE_TRIGGER_ANCHORS.items()
+                      if anchors and any(a in text_lower for a in anchors)}
+        assert extractors._find_date_triggers(text_lower, candidates) == extractors._find_date_triggers(text_lower)
+        for date_type, patterns in extractors._DATE_TRIGGER_PATTERNS.items():
+            for pattern in patterns:
+                for match in pattern.finditer(text_lower):
+                    assert any(a in match.group(0) for a in extractors.DATE_TRIGGER_ANCHORS[date_type]), (date_type, match)
+
+
+def test_context_is_persisted_with_scan_results():
+    db_path = os.path.join(tempfile.mkdtemp(), "clients.db")
+    database.init_database(db_path)
+    results = _scan(TEXTS[:1])
+    # Forme stockée par app.py (genre unique)
+    tags = results[0]["tags_extracted"]
+    tags["genre"] = tags["genre"][0] if tags["genre"] else None
+    database.save_scan_results(results, db_path=db_path)
+    stored = database.get_all_clients_with_data(db_path)
+    assert stored[0]["analysis_context"] == results[0]["analysis_context"]
+
+
+def test_stored_context_omits_the_text():
+    result = _scan(TEXTS[:1])[0]
+    context = result["analysis_context"]
+    # Le texte (déjà dans texte_nettoye) et les spans de mots ne sont pas stockés
+    assert set(context) == {"version", "length", "hits", "date_triggers", "date_expressions",
+                            "timing", "rupture", "taille"}
+    rebuilt = extractors.AnalysisContext.from_dict(context, result["cleaned_text"])
+    assert rebuilt.text == extractors.as_document(result["cleaned_text"]).lowered
+    # Autre texte que celui analysé: positions inutilisables, contexte à recalculer
+    assert extractors.AnalysisContext.from_dict(context, result["cleaned_text"] + " merci") is None
+
+
+if __name__ == "__main__":
+    test_context_matches_direct_extraction()
+    test_activations_read_the_stored_context()
+    test_context_is_memoised_and_versioned()
+    test_date_triggers_are_joined_to_dates_by_offset()
+    test_declared_anchors_cover_every_trigger_match()
+    test_context_is_persisted_with_scan_results()
+    test_stored_context_omits_the_text()
+    print("✅ Tests AnalysisContext OK")
@@ -0,0 +1,39 @@
+"""
+Test du benchmark d'extraction (corpus synthétique déterministe, détection de régression)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+
+from benchmark_extraction import compare, run_one, synthetic_corpus
+
+
+def test_synthetic_corpus_is_deterministic():
+    first = list(synthetic_corpus(50))
+    assert first == list(synthetic_corpus(50))
+    assert len(first) == 50 and all(text for text, _ in first)
+    # Une graine différente donne un autre corpus
+    assert first != list(synthetic_corpus(50, seed=7))
+
+
+def test_run_one_reports_throughput_latency_and_rss():
+    result = run_one("extract_all_actionable", "notes", limit=20)
+    assert result["documents"] == 20
+    assert result["docs_per_sec"] > 0 and result["p99_ms"] >= result["p50_ms"] > 0
+
+
+def test_compare_flags_regressions_only_on_same_corpus_size():
+    baseline = {"documents": 100, "docs_per_sec": 100.0, "p99_ms": 10.0, "peak_rss_mb": 80.0}
+    assert compare(dict(baseline), baseline) == []
+    slower = dict(baseline, docs_per_sec=80.0, p99_ms=15.0)
+    assert len(compare(slower, baseline)) == 2
+    # Corpus tronqué (--limit): pas de comparaison possible
+    assert compare(dict(slower, documents=10), baseline) == []
+
+
+if __name__ == "__main__":
+    test_synthetic_corpus_is_deterministic()
+    test_run_one_reports_throughput_latency_and_rss()
+    test_compare_flags_regressions_only_on_same_corpus_size()
+    print("✅ Tests benchmark OK")
@@ -0,0 +1,106 @@
+"""
+Test de l'écriture en lot (save_scan_results / save_ai_results, SQLite)
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import database
+
+
+def _db():
+    db_path = os.path.join(tempfile.mkdtemp(), "clients.db")
+    database.init_database(db_path)
+    return db_path
+
+
+def _result(client_id, text, **extra):
+    return dict({
+        "client_id": client_id,
+        "transcription_originale": text,
+        "cleaned_text": text.lower(),
+        "tags_extracted": {"genre": "Femme", "ville": text},
+        "resume_complet": "Analyse IA en attente...",
+    }, **extra)
+
+
+def _rows(db_path, sql):
+    with database.sqlite_connection(db_path) as conn:
+        return [tuple(row) for row in conn.execute(sql)]
+
+
+def test_bulk_write_links_tags_to_their_transcription():
+    db_path = _db()
+    database.save_scan_results([_result("CA001", "Paris")], db_path=db_path)
+    # AUTOINCREMENT: un id supprimé n'est jamais réattribué
+    with database.sqlite_connection(db_path) as conn:
+        conn.execute("DELETE FROM tags_extraits")
+        conn.execute("DELETE FROM transcriptions")
+
+    results = [_result(f"CA{i:03d}", f"Ville {i}") for i in range(5)]
+    results.append(_result("CA001", "ville 1"))  # doublon dans le lot (même contenu normalisé)
+    results.append(_result("CA009", "Lyon", resume_complet="Cliente fidèle", segment_client="VIP"))
+    stats = database.save_scan_results(results, source_file="lot.csv", db_path=db_path)
+    assert (stats["inserted"], stats["skipped"], stats["errors"]) == (6, 1, 0)
+
+    rows = _rows(db_path, "SELECT t.id, t.texte_original, g.tags_json FROM transcriptions t "
+                          "JOIN tags_extraits g ON g.transcription_id = t.id ORDER BY t.id")
+    assert [row[0] for row in rows] == list(range(2, 8))
+    assert all(json.loads(tags_json)["ville"] == text for _, text, tags_json in rows)
+    assert _rows(db_path, "SELECT client_id, segment_client FROM ai_analyses") == [("CA009", "VIP")]
+    assert _rows(db_path, "SELECT segment FROM clients WHERE id = 'CA009'") == [("VIP",)]
+
+
+def test_failed_batch_falls_back_to_row_by_row():
+    db_path = _db()
+    broken = _result("CA002", "Nice", tags_extracted=["pas", "un", "dictionnaire"])
+    stats = database.save_scan_results([_result("CA001", "Paris"), broken, _result("CA003", "Lyon")],
+                                       db_path=db_path)
+    assert (stats["inserted"], stats["errors"]) == (2, 1)
+    assert _rows(db_path, "SELECT client_id FROM transcriptions ORDER BY id") == [("CA001",), ("CA003",)]
+    assert database.get_database_stats(db_path)["tags_extraits"] == 2
+
+
+def test_failed_row_leaves_nothing_behind():
+    db_path = _db()
+    # La transcription s'insère, puis les tags échouent (contexte non sérialisable)
+    half = _result("CA002", "Nice", analysis_context={"doc": object()})
+    stats = database.save_scan_results([_result("CA001", "Paris"), half], db_path=db_path)
+    assert (stats["inserted"], stats["failed"]) == (1, [1])
+    assert _rows(db_path, "SELECT client_id FROM transcriptions") == [("CA001",)]
+
+    # Rejeu: la ligne n'est pas prise pour déjà stockée
+    stats = database.save_scan_results([_result("CA002", "Nice")], db_path=db_path)
+    assert (stats["inserted"], stats["skipped"]) == (1, 0)
+    assert database.get_database_stats(db_path)["tags_extraits"] == 2
+
+    # IA: segment mis à jour puis analyse en échec (valeur non liable) -> segment inchangé
+    stats = database.save_ai_results([{"client_id": "CA001", "resume_complet": "A", "segment_client": "VIP"},
+                                      {"client_id": "CA002", "resume_complet": "B", "segment_client": "VIP",
+                                       "urgency_score_final": {"score": 5}}], db_path=db_path)
+    assert (stats["inserted"], stats["failed"]) == (1, [1])
+    assert _rows(db_path, "SELECT id, segment FROM clients ORDER BY id") == [("CA001", "VIP"), ("CA002", None)]
+
+
+def test_ai_results_are_written_in_bulk():
+    db_path = _db()
+    database.save_scan_results([_result("CA001", "Paris"), _result("CA002", "Lyon")], db_path=db_path)
+    database.save_ai_results([
+        {"client_id": "CA001", "resume_complet": "A", "segment_client": "VIP", "insights_marketing": {"k": 1}},
+        {"client_id": "CA002", "resume_complet": "B", "segment_client": "Occasionnel"},
+    ], db_path=db_path)
+    assert _rows(db_path, "SELECT id, segment FROM clients ORDER BY id") == [("CA001", "VIP"), ("CA002", "Occasionnel")]
+    assert _rows(db_path, "SELECT client_id, resume_complet, insights_json FROM ai_analyses ORDER BY id") == [
+        ("CA001", "A", '{"k": 1}'), ("CA002", "B", "{}")]
+
+
+if __name__ == "__main__":
+    test_bulk_write_links_tags_to_their_transcription()
+    test_failed_batch_falls_back_to_row_by_row()
+    test_failed_row_leaves_nothing_behind()
+    test_ai_results_are_written_in_bulk()
+    print("✅ Tests écriture en lot OK")
@@ -0,0 +1,76 @@
+"""
+Test de la lecture en flux de CSVProcessor (iter_conversations)
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from csv_processor import CSVProcessor
+
+
+def _write(suffix, content):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_semicolon_csv_is_sniffed_and_chunked():
+    rows = ["client_id;Date;Transcription;Langue"]
+    rows += [f'{i};2024-01-{i % 28 + 1:02d};"Cliente {i}; budget {i}k, sac noir";FR' for i in range(1, 24)]
+    path = _write(".csv", "\n".join(rows) + "\n")
+    try:
+        processor = CSVProcessor(path)
+        assert processor._sniff_delimiter() == ";"
+        streamed = list(processor.iter_conversations(chunksize=5))
+        assert processor.data is None
+        assert streamed == CSVProcessor(path).get_conversations()
+        assert len(streamed) == 23
+        assert streamed[22]["transcription"] == "Cliente 23; budget 23k, sac noir"
+        assert streamed[0]["language"] == "FR"
+    finally:
+        os.remove(path)
+
+
+def test_default_ids_continue_across_chunks():
+    # Sans colonne d'ID: "ROW-n" global, comme en lecture complète
+    path = _write(".csv", "notes,length\n" + "\n".join(f"texte numero {i},short" for i in range(12)) + "\n")
+    try:
+        streamed = list(CSVProcessor(path).iter_conversations(chunksize=4))
+        assert [c["client_id"] for c in streamed] == [f"ROW-{i}" for i in range(1, 13)]
+        assert streamed == CSVProcessor(path).get_conversations()
+        assert {c["date"] for c in streamed} == {""}
+    finally:
+        os.remove(path)
+
+
+def test_json_lines_and_text_are_read_line_by_line():
+    records = [{"id": f"CA{i:03d}", "text": f"Client {i} cherche un cadeau", "language": "FR"} for i in range(7)]
+    path = _write(".json", "\n".join(json.dumps(r) for r in records) + "\n")
+    try:
+        processor = CSVProcessor(path)
+        assert processor._is_json_lines()
+        streamed = list(processor.iter_conversations(chunksize=3))
+        assert [c["client_id"] for c in streamed] == [r["id"] for r in records]
+        assert streamed[6]["transcription"] == "Client 6 cherche un cadeau"
+        assert streamed[6]["length"] == "medium"
+    finally:
+        os.remove(path)
+
+    path = _write(".txt", "premiere note\n\n  deuxieme note  \ntroisieme note\n")
+    try:
+        streamed = list(CSVProcessor(path).iter_conversations(chunksize=2))
+        assert [c["transcription"] for c in streamed] == ["premiere note", "deuxieme note", "troisieme note"]
+        assert streamed == CSVProcessor(path).get_conversations()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    test_semicolon_csv_is_sniffed_and_chunked()
+    test_default_ids_continue_across_chunks()
+    test_json_lines_and_text_are_read_line_by_line()
+    print("✅ Tests CSVProcessor (lecture en flux) OK")
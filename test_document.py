@@ -0,0 +1,75 @@
+"""
+Test du Document (vues minuscules / sans accents calculées une fois)
+et du matching tolérant aux accents omis de l'automate compilé
+"""
+import sys
+import os
+import pickle
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from document import Document, as_document, fold_text
+from taxonomy_matcher import CompiledTaxonomy
+from tag_extractor import extract_all_tags
+
+
+def test_views_and_offsets():
+    doc = Document("Cœur ÉCRU, Straße")
+    assert doc.lowered == "cœur écru, straße"
+    assert doc.folded == "coeur ecru, strasse"
+    # Les index de `folded` se ramènent au texte d'origine malgré les ligatures
+    start = doc.folded.index("ecru")
+    assert doc.lowered_slice(start, start + 4) == "écru"
+    start = doc.folded.index("strasse")
+    assert doc.lowered_slice(start, start + 7) == "straße"
+    assert Document("sans accent").offsets is None
+
+    # Pickle (workers du pool): le texte seul, vues recalculées
+    clone = pickle.loads(pickle.dumps(doc))
+    assert isinstance(clone, Document) and clone == doc and clone.folded == doc.folded
+    assert as_document(None) == "" and as_document(doc) is doc
+
+
+def test_unaccented_text_matches_accented_keyword():
+    matcher = CompiledTaxonomy(fold_filter=lambda kw: len(kw) > 5)
+    matcher.register("PROFESSIONS", {"Ingenieur": ["ingénieur"], "Presse": ["presse"], "Rose": ["rosé"]})
+
+    # Le texte peut omettre les accents d'un mot-clé assez long...
+    assert matcher.categories("un ingenieur a lyon", "PROFESSIONS") == ["Ingenieur"]
+    assert matcher.categories("un ingénieur à lyon", "PROFESSIONS") == ["Ingenieur"]
+    # ...mais pas en ajouter, ni les mélanger
+    assert matcher.categories("il est pressé", "PROFESSIONS") == []
+    assert matcher.categories("un ingènieur", "PROFESSIONS") == []
+    # Mot-clé court: accents exacts ("rose" n'est pas "rosé")
+    assert matcher.categories("un sac rose", "PROFESSIONS") == []
+
+    # La vue sous-chaîne reste exacte, accents compris
+    assert matcher.categories("un ingenieur", "PROFESSIONS", substring=True) == []
+    assert matcher.categories("un ingénieur", "PROFESSIONS", substring=True) == ["Ingenieur"]
+    assert fold_text("Ingénieur") == "ingenieur"
+
+
+def test_unaccented_homographs_do_not_match_bundled_notes():
+    root = os.path.dirname(os.path.abspath(__file__))
+    notes = pd.concat([pd.read_csv(os.path.join(root, "LVMH_Realistic_Merged_CA001-100.csv")),
+                       pd.read_csv(os.path.join(root, "LVMH_Notes_CA101-400.csv"))]).set_index("ID")["Transcription"]
+
+    # "family reunion" n'est pas une "réunion" de travail
+    assert "family reunion" in notes["CA_100"].lower()
+    assert "Business" not in extract_all_tags(notes["CA_100"], fields=["style"])["style"]
+    # "cuivre" (le métal) n'est pas "cuivré"
+    for client_id in ("CA_181", "CA_381"):
+        assert "Bronze" not in extract_all_tags(notes[client_id], fields=["couleurs"])["couleurs"]
+    # Allemand "Vegane Ernährung" (régime) n'est pas une matière "végane"
+    assert "Vegan" not in extract_all_tags(notes["CA_029"], fields=["matieres"])["matieres"]
+    # Les mots-clés de la liste explicite tolèrent toujours les accents omis
+    assert extract_all_tags("Fille végétarienne, père pescetarien", fields=["regime"])["regime"] == ["Pescetarien"]
+
+
+if __name__ == "__main__":
+    test_views_and_offsets()
+    test_unaccented_text_matches_accented_keyword()
+    test_unaccented_homographs_do_not_match_bundled_notes()
+    print("✅ Document / repliement des accents OK")
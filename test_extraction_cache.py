@@ -0,0 +1,65 @@
+"""
+Test du cache d'extraction (LRU mémoire + SQLite persistant)
+"""
+import sys
+import os
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from extraction_cache import ExtractionCache, fingerprint_mappings
+
+
+def test_cache_roundtrip_and_invalidation():
+    db_path = os.path.join(tempfile.mkdtemp(), "cache.db")
+    mapping = {"Noir": ["noir", "black"]}
+    fp_v1 = fingerprint_mappings({"COLORS": mapping})
+
+    cache = ExtractionCache(fp_v1, db_path=db_path)
+    cache.put("un sac noir", {"couleurs": ["Noir"]})
+
+    # Copie indépendante à chaque lecture
+    first = cache.get("un sac noir")
+    first["couleurs"].append("Muté")
+    assert cache.get("un sac noir") == {"couleurs": ["Noir"]}
+
+    # Nouveau processus (LRU vide): servi par SQLite une fois les écritures groupées validées
+    cache.flush()
+    assert ExtractionCache(fp_v1, db_path=db_path).get("un sac noir") == {"couleurs": ["Noir"]}
+
+    # Édition de la taxonomie -> nouvelle empreinte -> entrée invalidée
+    mapping["Noir"].append("nero")
+    fp_v2 = fingerprint_mappings({"COLORS": mapping})
+    assert fp_v2 != fp_v1
+    assert ExtractionCache(fp_v2, db_path=db_path).get("un sac noir") is None
+
+
+def test_cache_batches_writes_and_caps_entries():
+    db_path = os.path.join(tempfile.mkdtemp(), "cache.db")
+    cache = ExtractionCache("fp", db_path=db_path, commit_every=10, max_entries=25)
+
+    def stored():
+        return sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+
+    for i in range(9):
+        cache.put(f"note {i}", {"i": i})
+    # Pas encore de transaction: servi par la mémoire uniquement
+    assert stored() == 0
+    assert cache.get("note 3") == {"i": 3}
+    cache.put("note 9", {"i": 9})
+    assert stored() == 10
+
+    for i in range(10, 40):
+        cache.put(f"note {i}", {"i": i})
+    cache.flush()
+    # Réouverture: le plafond est appliqué, les entrées les plus anciennes sont purgées
+    reopened = ExtractionCache("fp", db_path=db_path, max_entries=25)
+    assert reopened.get("note 39") == {"i": 39}
+    assert stored() == 25
+
+
+if __name__ == "__main__":
+    test_cache_roundtrip_and_invalidation()
+    test_cache_batches_writes_and_caps_entries()
+    print("✅ Cache d'extraction OK")
@@ -0,0 +1,55 @@
+"""
+Test de l'extraction colonnaire (extract_tags_frame / one_hot_tags)
+"""
+import sys
+import os
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from tag_extractor import extract_all_tags, extract_tags_frame, one_hot_tags
+
+TEXTS = [
+    "Cliente fidèle, 45 ans, budget 5000 euros, aime le cuir noir.",
+    "Client looking for a black leather bag for his wife, budget around 3000.",
+    "Cliente fidèle, 45 ans, budget 5000 euros, aime le cuir noir.",
+    None,
+]
+
+
+def test_frame_matches_row_by_row_extraction():
+    series = pd.Series(TEXTS, index=[10, 20, 30, 40])
+    frame = extract_tags_frame(series, workers=1)
+    assert list(frame.index) == [10, 20, 30, 40]
+    for idx, text in series.items():
+        expected = extract_all_tags(text if isinstance(text, str) else "")
+        assert frame.loc[idx].to_dict() == expected
+    # Les doublons produisent des lignes égales
+    assert frame.loc[10].to_dict() == frame.loc[30].to_dict()
+
+
+def test_fields_languages_and_empty_input():
+    series = pd.Series(TEXTS[:2])
+    frame = extract_tags_frame(series, fields=["budget"], languages=pd.Series(["fr", "en"]), workers=1)
+    assert list(frame.columns) == ["cleaned_text", "budget"]
+    assert list(frame["budget"]) == ["5-10k", "<5k"]
+
+    empty = extract_tags_frame(pd.Series([], dtype=object), workers=1)
+    assert len(empty) == 0 and "budget" in empty.columns
+
+
+def test_one_hot_tags():
+    frame = extract_tags_frame(pd.Series(TEXTS[:2], index=["a", "b"]), workers=1)
+    dummies = one_hot_tags(frame, fields=["budget", "couleurs"])
+    assert list(dummies.index) == ["a", "b"]
+    assert dummies.dtypes.eq(bool).all()
+    assert bool(dummies.loc["a", "budget=5-10k"]) and not bool(dummies.loc["b", "budget=5-10k"])
+    assert any(col.startswith("couleurs=") for col in dummies.columns)
+
+
+if __name__ == "__main__":
+    test_frame_matches_row_by_row_extraction()
+    test_fields_languages_and_empty_input()
+    test_one_hot_tags()
+    print("✅ Tests extraction colonnaire OK")
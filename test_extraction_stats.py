@@ -0,0 +1,71 @@
+"""
+Test de l'instrumentation opt-in de extract_all_tags
+(temps / taux de succès par extracteur et par mapping, rapport JSON)
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+# Collecteur importé via tag_extractor: même module que celui lu par les extracteurs
+from tag_extractor import ExtractionStats, TAXONOMY_MATCHER, extract_tags_from_cleaned, clean_text_turbo, using_stats
+
+TEXTS = [
+    "Cliente fidèle, ingénieur à Lyon, budget 5000 euros, aime le cuir noir.",
+    "Client looking for a black leather bag for his wife, budget around 3000.",
+]
+
+
+def test_collects_fields_mappings_and_keywords():
+    stats = ExtractionStats()
+    with using_stats(stats):
+        for text in TEXTS:
+            extract_tags_from_cleaned(clean_text_turbo(text))
+
+    fields = stats.to_dict()["fields"]
+    assert fields["budget"]["calls"] == 2 and fields["budget"]["hits"] == 2
+    assert all(entry["total_s"] >= entry["max_s"] >= 0 for entry in fields.values())
+    assert stats.mappings["COULEURS_ADVANCED"]["hits"] >= 1
+    assert stats.categories["COULEURS_ADVANCED"]["Noir"] >= 1
+    assert stats.keywords["PROFESSIONS_ADVANCED"]["ingénieur"] == 1
+
+    report = stats.report(TAXONOMY_MATCHER.mappings)
+    assert report["fields"][0]["share"] > 0
+    assert "ingénieur" not in report["unmatched_keywords"].get("PROFESSIONS_ADVANCED", [])
+
+
+def test_inactive_by_default_and_merge():
+    stats = ExtractionStats()
+    with using_stats(stats):
+        extract_tags_from_cleaned(clean_text_turbo(TEXTS[0]))
+    # Hors du bloc: plus rien n'est compté
+    extract_tags_from_cleaned(clean_text_turbo(TEXTS[1]))
+    assert stats.fields["budget"]["calls"] == 1
+
+    # Fusion des compteurs d'un worker
+    total = ExtractionStats()
+    total.merge(stats.to_dict())
+    total.merge(stats.to_dict())
+    assert total.fields["budget"]["calls"] == 2
+    assert total.keywords["PROFESSIONS_ADVANCED"]["ingénieur"] == 2
+
+
+def test_dump_writes_json_and_text_report():
+    stats = ExtractionStats()
+    with using_stats(stats):
+        extract_tags_from_cleaned(clean_text_turbo(TEXTS[0]))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = stats.dump(tmp, TAXONOMY_MATCHER.mappings)
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        assert report["fields"] and report["mappings"]
+        assert os.path.exists(path[:-len(".json")] + ".txt")
+
+
+if __name__ == "__main__":
+    test_collects_fields_mappings_and_keywords()
+    test_inactive_by_default_and_merge()
+    test_dump_writes_json_and_text_report()
+    print("✅ Tests ExtractionStats OK")
@@ -0,0 +1,135 @@
+"""
+Test de l'ingestion incrémentale (empreinte de contenu des transcriptions)
+"""
+import sys
+import os
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import database
+from document import content_hash
+from profile_generator import ProfileGenerator
+import profile_pipeline
+from profile_pipeline import run_parallel, run_serial
+from text_analyzer import TextAnalyzer
+from tag_engine import TagEngine
+
+
+def _scan_result(client_id, text):
+    return {
+        "client_id": client_id,
+        "transcription_originale": text,
+        "cleaned_text": text.lower(),
+        "tags_extracted": {"genre": "Femme", "ville": "Paris"},
+        "resume_complet": "Analyse IA en attente...",
+    }
+
+
+def _count(db_path, table):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_content_hash_ignores_case_and_spacing():
+    assert content_hash("Budget  5k,\nsac NOIR") == content_hash("budget 5k, sac noir ")
+    assert content_hash("budget 5k") != content_hash("budget 6k")
+    assert content_hash(None) == content_hash("")
+
+
+def test_scan_results_are_stored_once_per_client_and_content():
+    db_path = os.path.join(tempfile.mkdtemp(), "clients.db")
+    database.init_database(db_path)
+    results = [_scan_result("CA001", "Cliente VIP, budget 10k"), _scan_result("CA002", "Cherche une montre")]
+
+    assert database.save_scan_results(results, db_path=db_path)["inserted"] == 2
+    # Même fichier ré-importé (espaces / casse près): rien n'est réécrit
+    again = [_scan_result("CA001", "cliente vip,  budget 10k"), _scan_result("CA002", "Cherche une montre")]
+    stats = database.save_scan_results(again, db_path=db_path)
+    assert (stats["inserted"], stats["skipped"]) == (0, 2)
+    assert _count(db_path, "transcriptions") == _count(db_path, "tags_extraits") == 2
+
+    # Conversation modifiée, ou même texte pour un autre client: écrits
+    changed = [_scan_result("CA001", "Cliente VIP, budget 15k"), _scan_result("CA003", "Cherche une montre")]
+    assert database.save_scan_results(changed, db_path=db_path)["inserted"] == 2
+
+    keys = [("CA001", content_hash("Cliente VIP, budget 15k")), ("CA004", content_hash("Cherche une montre")),
+            ("CA003", content_hash("cherche une montre"))]
+    assert database.get_known_content_hashes(keys, db_path) == {keys[0], keys[2]}
+
+
+def test_known_profiles_are_neither_analyzed_nor_rewritten():
+    root = tempfile.mkdtemp()
+    generator = ProfileGenerator(os.path.join(root, "profiles.db"), os.path.join(root, "json"))
+    analyzer, engine = TextAnalyzer(), TagEngine()
+    conversations = [
+        {"client_id": f"CA{i:03d}", "date": "", "duration": "", "language": "FR", "length": "medium",
+         "transcription": f"Cliente de {30 + i} ans, budget {i}k"}
+        for i in range(6)
+    ]
+
+    assert run_serial([dict(c) for c in conversations], generator, analyzer, engine) == 6
+    assert run_serial([dict(c) for c in conversations], generator, analyzer, engine) == 0
+
+    # Une conversation modifiée: seul son snapshot est remplacé
+    conversations[2]["transcription"] = "Cliente de 32 ans, budget 20k, urgent"
+    assert run_serial([dict(c) for c in conversations], generator, analyzer, engine) == 1
+    assert _count(generator.db_path, "client_profiles") == 6
+    assert generator.get_profile("CA002")["transcription"] == "Cliente de 32 ans, budget 20k, urgent"
+
+    profile = generator.get_profile("CA003")
+    assert generator.save_profile(profile) is False
+    assert generator.save_profiles([profile, profile]) == 0
+
+
+def test_each_conversation_is_cleaned_once():
+    root = tempfile.mkdtemp()
+    generator = ProfileGenerator(os.path.join(root, "profiles.db"), os.path.join(root, "json"))
+    conversations = [{"client_id": f"CA{i:03d}", "date": "", "duration": "", "language": "FR", "length": "medium",
+                      "transcription": f"<b>Cliente</b> de {30 + i} ans, budget {i}k"}
+                     for i in range(8)]
+
+    class CountingAnalyzer(TextAnalyzer):
+        """Compte les nettoyages du pipeline (hors nettoyage interne de analyze_full_text)."""
+        cleaned = 0
+        analyzing = False
+
+        def clean_text(self, text):
+            if not self.analyzing:
+                CountingAnalyzer.cleaned += 1
+            return super().clean_text(text)
+
+        def analyze_full_text(self, text):
+            self.analyzing = True
+            try:
+                return super().analyze_full_text(text)
+            finally:
+                self.analyzing = False
+
+    # Empreinte calculée sur le texte nettoyé une seule fois, réutilisé pour l'analyse
+    assert run_serial([dict(c) for c in conversations], generator, CountingAnalyzer(), TagEngine()) == 8
+    assert CountingAnalyzer.cleaned == 8
+
+    # --workers: nettoyage et test d'empreinte dans les processus du pool, rien dans le parent
+    CountingAnalyzer.cleaned = 0
+    original, profile_pipeline.TextAnalyzer = profile_pipeline.TextAnalyzer, CountingAnalyzer
+    try:
+        assert run_parallel([dict(c) for c in conversations], generator, workers=2, task_size=3) == 0
+        conversations.append(dict(conversations[0], client_id="CA100", transcription="Nouvelle cliente, budget 3k"))
+        assert run_parallel([dict(c) for c in conversations], generator, workers=2, task_size=3) == 1
+    finally:
+        profile_pipeline.TextAnalyzer = original
+    assert CountingAnalyzer.cleaned == 0
+    assert _count(generator.db_path, "client_profiles") == 9
+
+if __name__ == "__main__":
+    test_content_hash_ignores_case_and_spacing()
+    test_scan_results_are_stored_once_per_client_and_content()
+    test_known_profiles_are_neither_analyzed_nor_rewritten()
+    test_each_conversation_is_cleaned_once()
+    print("✅ Tests ingestion incrémentale OK")
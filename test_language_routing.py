@@ -0,0 +1,68 @@
+"""
+Test du routage par langue: détecteur n-grammes + shards de la taxonomie
+"""
+import csv
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from document import Document
+from language_detector import detect_language, keyword_language, normalize_language, resolve_language
+from taxonomy_matcher import CompiledTaxonomy
+import tag_extractor
+
+
+def test_detector_matches_declared_language():
+    path = os.path.join(os.path.dirname(__file__), "LVMH_Notes_CA101-400.csv")
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    correct = sum(detect_language(row["Transcription"]) == row["Language"] for row in rows)
+    assert correct / len(rows) >= 0.95
+
+    assert normalize_language(" fr-FR ") == "FR" and normalize_language("Deutsch") == "DE"
+    assert normalize_language("PT") is None
+    # Déclarée -> conservée ; vide / NaN / "auto" -> détectée ; None -> pas de routage
+    assert resolve_language("en", "Bonjour, je cherche un sac") == "EN"
+    assert resolve_language("", "Bonjour, je cherche un sac pour ma femme") == "FR"
+    assert resolve_language(float("nan"), "Hello, I am looking for a bag for my wife") == "EN"
+    assert resolve_language(None, "Hello") is None
+
+
+def test_keyword_language_is_conservative():
+    assert keyword_language("dans un mois") == "FR"
+    assert keyword_language("next month") == "EN"
+    # Noms communs, noms propres, emprunts: shard partagé
+    for kw in ("sneakers", "cuir", "los angeles", "moët", "made in france", "week-end", "plus size"):
+        assert keyword_language(kw) is None, kw
+
+
+def test_shards_route_language_specific_keywords():
+    matcher = CompiledTaxonomy(language_of=keyword_language)
+    matcher.register("TIMING", {"Court_terme": ["dans un mois", "next month", "asap"]})
+    assert matcher.languages == ["EN", "FR"]
+
+    text = "she wants it dans un mois, asap"
+    assert matcher.categories(Document(text), "TIMING") == ["Court_terme"]
+    # Note anglaise: le mot-clé français n'est plus cherché, le partagé ("asap") oui
+    assert matcher.categories(Document("see you dans un mois", "EN"), "TIMING") == []
+    assert matcher.categories(Document("see you dans un mois", "FR"), "TIMING") == ["Court_terme"]
+    assert matcher.categories(Document("asap please", "EN"), "TIMING") == ["Court_terme"]
+
+
+def test_extract_all_tags_accepts_language():
+    text = "Cliente fidèle, 34 ans, cherche un sac noir en cuir pour dans un mois."
+    full = tag_extractor.extract_all_tags(text)
+    routed = tag_extractor.extract_all_tags(text, language="fr")
+    detected = tag_extractor.extract_all_tags(text, language="auto")
+    assert full == routed == detected
+    batch = tag_extractor.extract_all_tags_batch([text, text], workers=1, languages=["FR", None])
+    assert batch == [routed, full]
+
+
+if __name__ == "__main__":
+    test_detector_matches_declared_language()
+    test_keyword_language_is_conservative()
+    test_shards_route_language_specific_keywords()
+    test_extract_all_tags_accepts_language()
+    print("✅ Routage par langue OK")
@@ -0,0 +1,66 @@
+"""
+Test du parseur d'entités numériques (âge, budget, urgence en un seul passage)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from numeric_entities import AGE, AMOUNT, BIRTH_YEAR, DURATION, parse_numeric_entities
+from tag_extractor import as_document, extract_age_turbo, extract_budget_turbo, extract_urgency_turbo
+
+
+def test_entities_are_typed_with_spans():
+    text = "j'ai 45 ans, budget 5k€ ou 40 000 euros, née en 1980, à livrer dans 3 jours"
+    entities = parse_numeric_entities(text)
+    amounts = [e for e in entities if e.kind == AMOUNT]
+    assert [e.value for e in amounts] == [5000, 40000]
+    assert text[amounts[1].start:amounts[1].end] == "40 000 euros"
+    assert {e.rank for e in entities if e.kind == AGE} == {0, 1, 2}
+    assert [e.value for e in entities if e.kind == BIRTH_YEAR] == [1980]
+    assert [(e.value, e.unit) for e in entities if e.kind == DURATION] == [(3, "jours")]
+    # Ordre du texte
+    assert [e.start for e in entities] == sorted(e.start for e in entities)
+
+
+def test_repeated_number_uses_its_own_suffix():
+    # L'ancien `text_lower.find(m)` relisait le contexte de la première occurrence de "300"
+    assert extract_budget_turbo("300 invités au mariage, budget 300k") == "25k+"
+    assert extract_budget_turbo("Table pour 150 personnes, 150 € par couvert") == "<5k"
+
+
+def test_follower_counts_and_stray_letters_are_not_amounts():
+    assert extract_budget_turbo("Influenceuse 2M abonnés, budget 8k") == "5-10k"
+    assert extract_budget_turbo("Cliente 53, museum curator, budget 6k") == "5-10k"
+    assert extract_budget_turbo("Projet à 1,5 million d'euros") == "25k+"
+
+
+def test_age_budget_urgency_classification():
+    assert extract_age_turbo("Mme Fontaine, 39 ans, dentiste") == "36-45"
+    assert extract_age_turbo("Age: 62") == "56+"
+    assert extract_age_turbo("quarante-cinq ans, avocate") == "36-45"
+    assert extract_age_turbo("j'ai 12 ans de fidélité") is None
+    assert extract_budget_turbo("budget flexible") == "25k+"
+    assert extract_budget_turbo("budget 3.500€") == "<5k"
+    assert extract_urgency_turbo("c'est urgent, pour demain") == 5
+    assert extract_urgency_turbo("pas urgent, livrer demain") is None
+    assert extract_urgency_turbo("shooting dans 10 jours") == 3
+    assert extract_urgency_turbo("aucune contrainte") is None
+
+
+def test_entities_are_shared_per_document():
+    doc = as_document("Budget 5000€, 40 ans, urgent")
+    extract_age_turbo(doc)
+    cached = doc.__dict__["numeric_entities"]
+    extract_budget_turbo(doc)
+    extract_urgency_turbo(doc)
+    assert doc.__dict__["numeric_entities"] is cached
+
+
+if __name__ == "__main__":
+    test_entities_are_typed_with_spans()
+    test_repeated_number_uses_its_own_suffix()
+    test_follower_counts_and_stray_letters_are_not_amounts()
+    test_age_budget_urgency_classification()
+    test_entities_are_shared_per_document()
+    print("✅ Tests NumericEntities OK")
@@ -0,0 +1,100 @@
+"""
+Test du profilage par étape (main.py --profile, scan de app.py)
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import profile_pipeline
+from profile_generator import ProfileGenerator
+from profile_pipeline import run_parallel, run_serial
+from text_analyzer import TextAnalyzer
+from tag_engine import TagEngine
+
+# Même module que celui qu'instrumente profile_pipeline
+perf = sys.modules[profile_pipeline.profile_stage.__module__]
+
+
+def _conversations(n, offset=0):
+    return [
+        {"client_id": f"CA{offset + i:03d}", "date": "", "duration": "", "language": "FR", "length": "medium",
+         "transcription": f"Cliente de {30 + i} ans, cherche un sac noir, budget {offset + i}k"}
+        for i in range(n)
+    ]
+
+
+def test_profile_stage_is_noop_without_profiler():
+    assert perf.active_profiler() is None
+    with perf.profile_stage("cleaning"):
+        pass
+    assert perf.active_profiler() is None
+
+
+def test_concurrent_sessions_keep_their_own_profiler():
+    import threading
+    started, release = threading.Barrier(2), threading.Event()
+    profilers = {}
+
+    def session(name):
+        with perf.collect_stage_profile(name, dump=False) as profiler:
+            profilers[name] = profiler
+            started.wait()
+            with perf.profile_stage(f"stage_{name}"):
+                release.wait(5)
+        # Runs qui se chevauchent: aucun collecteur ne reste installé
+        assert perf.active_profiler() is None
+
+    threads = [threading.Thread(target=session, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert set(profilers["a"].to_dict()["stages"]) == {"stage_a"}
+    assert set(profilers["b"].to_dict()["stages"]) == {"stage_b"}
+    assert perf.active_profiler() is None
+
+
+def test_serial_run_reports_every_stage():
+    with tempfile.TemporaryDirectory() as root:
+        generator = ProfileGenerator(os.path.join(root, "profiles.db"), os.path.join(root, "json"))
+        with perf.collect_stage_profile("test", cprofile=True, tracemalloc_enabled=True,
+                                        directory=os.path.join(root, "perf")) as profiler:
+            run_serial(_conversations(4), generator, TextAnalyzer(), TagEngine())
+
+        stages = profiler.to_dict()["stages"]
+        for name in ("cleaning", "extraction", "profile_building", "db_write", "json_write"):
+            assert name in stages, name
+        assert stages["cleaning"]["calls"] >= 4
+
+        with open(profiler.path, encoding="utf-8") as f:
+            report = json.load(f)
+        assert [row["stage"] for row in report["stages"]][:3] == ["cleaning", "extraction", "profile_building"]
+        assert report["cprofile_top"] and report["tracemalloc_top"]
+        assert os.path.exists(profiler.path.replace(".json", ".txt"))
+        assert os.path.exists(report["cprofile_path"])
+    assert perf.active_profiler() is None
+
+
+def test_parallel_run_merges_worker_stages():
+    with tempfile.TemporaryDirectory() as root:
+        generator = ProfileGenerator(os.path.join(root, "profiles.db"), os.path.join(root, "json"))
+        with perf.collect_stage_profile("test", dump=False) as profiler:
+            processed = run_parallel(_conversations(6, offset=100), generator, workers=2, task_size=2)
+        assert processed == 6
+        stages = profiler.to_dict()["stages"]
+        assert stages["cleaning"]["calls"] == stages["profile_building"]["calls"] == 6
+        assert "db_write" in stages and "json_write" in stages
+        assert profiler.path is None
+
+
+if __name__ == "__main__":
+    test_profile_stage_is_noop_without_profiler()
+    test_concurrent_sessions_keep_their_own_profiler()
+    test_serial_run_reports_every_stage()
+    test_parallel_run_merges_worker_stages()
+    print("✅ Tests profilage par étape OK")
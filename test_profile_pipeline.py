@@ -0,0 +1,88 @@
+"""
+Test du pipeline parallèle de main.py (--workers N): mêmes profils, même base
+que la boucle séquentielle
+"""
+import sys
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from csv_processor import CSVProcessor
+from profile_generator import ProfileGenerator
+from profile_pipeline import build_profile, run_parallel
+from text_analyzer import TextAnalyzer
+from tag_engine import TagEngine
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "LVMH_Realistic_Merged_CA001-100.csv")
+
+
+def _snapshot(generator):
+    """Contenu de la base hors horodatages, et fichiers JSON."""
+    conn = sqlite3.connect(generator.db_path)
+    rows = {
+        "clients": conn.execute("SELECT client_id FROM clients ORDER BY rowid").fetchall(),
+        "profiles": conn.execute(
+            "SELECT profile_id, client_id, profile_version, profile_json FROM client_profiles ORDER BY profile_id"
+        ).fetchall(),
+        "sources": conn.execute("SELECT source_id, source_hash FROM sources ORDER BY source_id").fetchall(),
+        "tags": conn.execute(
+            "SELECT tag_id, category, subcategory, tag_value FROM tags ORDER BY tag_id"
+        ).fetchall(),
+        "taggings": conn.execute(
+            "SELECT tagging_id, client_id, tag_id, rule_id, source_id FROM taggings ORDER BY tagging_id"
+        ).fetchall(),
+    }
+    conn.close()
+    files = {p.name: p.read_text(encoding="utf-8") for p in Path(generator.json_dir).glob("*.json")}
+    return rows, files
+
+
+def _generator(root, name):
+    return ProfileGenerator(os.path.join(root, name, "profiles.db"), os.path.join(root, name, "json"))
+
+
+def test_parallel_run_matches_serial_run():
+    conversations = list(CSVProcessor(SAMPLE).iter_conversations())[:60]
+    with tempfile.TemporaryDirectory() as root:
+        serial = _generator(root, "serial")
+        analyzer, engine = TextAnalyzer(), TagEngine()
+        for conversation in conversations:
+            serial.save_profile(build_profile(dict(conversation), analyzer, engine))
+
+        parallel = _generator(root, "parallel")
+
+        class Progress:
+            total = 0
+
+            def update(self, n):
+                self.total += n
+
+        progress = Progress()
+        processed = run_parallel(iter(conversations), parallel, workers=3, progress=progress,
+                                 task_size=7, write_batch=20)
+        assert processed == progress.total == len(conversations)
+        assert _snapshot(parallel) == _snapshot(serial)
+
+
+def test_save_profiles_is_one_batch_of_save_profile():
+    analyzer, engine = TextAnalyzer(), TagEngine()
+    conversations = list(CSVProcessor(SAMPLE).iter_conversations())[:10]
+    profiles = [build_profile(dict(c), analyzer, engine) for c in conversations]
+    with tempfile.TemporaryDirectory() as root:
+        one_by_one = _generator(root, "single")
+        for profile in profiles:
+            one_by_one.save_profile(profile)
+        batched = _generator(root, "batch")
+        batched.save_profiles(profiles)
+        batched.save_profiles([])
+        assert _snapshot(batched) == _snapshot(one_by_one)
+
+
+if __name__ == "__main__":
+    test_parallel_run_matches_serial_run()
+    test_save_profiles_is_one_batch_of_save_profile()
+    print("✅ Tests pipeline parallèle OK")
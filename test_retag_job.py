@@ -0,0 +1,138 @@
+"""
+Test du re-tagging sélectif (empreintes par champ dans tags_extraits)
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import database
+import tag_extractor
+from retag_job import run_retag_job
+
+TEXT = "Cliente fidèle, vit à Genève, adore le yoga. Elle cherche un sac en cuir noir, budget 5000€."
+
+
+def _save_advanced_scan(db_path):
+    """Enregistre TEXT comme app.py en mode ADVANCED (extraction + vue avancée)."""
+    database.init_database(db_path)
+    tags = tag_extractor.apply_advanced_view(tag_extractor.extract_all_tags(TEXT))
+    database.save_scan_results([{
+        "client_id": "CA001",
+        "transcription_originale": TEXT,
+        "cleaned_text": tags["cleaned_text"],
+        "tags_extracted": tags,
+    }], db_path=db_path)
+    return tags
+
+
+def _mark_stale(conn, tags, **stale_values):
+    fingerprints = json.loads(conn.execute("SELECT field_fingerprints FROM tags_extraits").fetchone()[0])
+    fingerprints.update({name: "ancienne" for name in stale_values})
+    conn.execute("UPDATE tags_extraits SET tags_json = ?, field_fingerprints = ?",
+                 (json.dumps(dict(tags, **stale_values), ensure_ascii=False), json.dumps(fingerprints)))
+    conn.commit()
+
+
+def test_only_stale_fields_are_retagged():
+    db_path = os.path.join(tempfile.mkdtemp(), "clients.db")
+    tags = _save_advanced_scan(db_path)
+
+    # Tous les champs sont à jour juste après le scan
+    assert run_retag_job(db_path, workers=1)["updated"] == 0
+
+    # Simule une taxonomie "couleurs" modifiée depuis le scan
+    conn = database.get_sqlite_connection(db_path)
+    _mark_stale(conn, dict(tags, budget="Obsolète (hors taxonomie)"), couleurs=["Obsolète"])
+
+    status = run_retag_job(db_path, workers=1)
+    assert status["updated"] == 1
+    assert status["fields"] == {"couleurs": 1}
+
+    retagged = json.loads(conn.execute("SELECT tags_json FROM tags_extraits").fetchone()[0])
+    conn.close()
+    assert retagged["couleurs"] == tags["couleurs"]
+    # Champ non périmé: conservé tel quel
+    assert retagged["budget"] == "Obsolète (hors taxonomie)"
+
+
+
+def test_advanced_rows_keep_the_advanced_view():
+    db_path = os.path.join(tempfile.mkdtemp(), "clients.db")
+    tags = _save_advanced_scan(db_path)
+    assert tags["genre"] == "Femme" and tags["statut_client"] == "Fidèle"
+
+    conn = database.get_sqlite_connection(db_path)
+    _mark_stale(conn, tags, genre="Homme", statut_client=None, localisation_detail={})
+    status = run_retag_job(db_path, workers=1)
+    retagged = json.loads(conn.execute("SELECT tags_json FROM tags_extraits").fetchone()[0])
+    conn.close()
+
+    assert status["fields"] == {"genre": 1, "statut_client": 1, "localisation_detail": 1}
+    # Valeurs uniques de la vue avancée (pas les listes de l'extraction de base)
+    assert retagged["genre"] == "Femme"
+    assert retagged["statut_client"] == "Fidèle"
+    assert retagged["localisation_detail"] == tags["localisation_detail"]
+    assert run_retag_job(db_path, workers=1)["updated"] == 0
+
+
+def test_rows_are_retagged_with_their_scan_language():
+    db_path = os.path.join(tempfile.mkdtemp(), "clients.db")
+    database.init_database(db_path)
+    text = "Frau Weber sucht eine Tasche, Geburtstag next month, Budget 3000 Euro."
+    # Scan de app.py: colonne Language = DE -> "next month" (anglais) n'est pas cherché
+    tags = tag_extractor.apply_advanced_view(tag_extractor.extract_all_tags(text, language="DE"), language="DE")
+    assert tags["echeances"] == [] and tags["timing"] is None
+    database.save_scan_results([{"client_id": "CA001", "transcription_originale": text,
+                                 "cleaned_text": tags["cleaned_text"], "tags_extracted": tags, "language": "DE"}],
+                               db_path=db_path)
+
+    conn = database.get_sqlite_connection(db_path)
+    _mark_stale(conn, tags, echeances=["Obsolète"], timing="Obsolète")
+    assert run_retag_job(db_path, workers=1)["updated"] == 1
+    retagged = json.loads(conn.execute("SELECT tags_json FROM tags_extraits").fetchone()[0])
+    conn.close()
+    assert (retagged["echeances"], retagged["timing"]) == ([], None)
+
+
+def test_advanced_mapping_change_marks_field_stale():
+    before = tag_extractor.get_advanced_field_fingerprints()
+    tag_extractor.GENRE_MAPPING.setdefault("Femme", []).append("madame la cliente")
+    tag_extractor._ADVANCED_FIELD_FINGERPRINTS = None
+    try:
+        after = tag_extractor.get_advanced_field_fingerprints()
+    finally:
+        tag_extractor.GENRE_MAPPING["Femme"].remove("madame la cliente")
+        tag_extractor._ADVANCED_FIELD_FINGERPRINTS = None
+    assert [name for name in before if before[name] != after[name]] == ["genre"]
+
+
+def test_matcher_change_marks_every_field_stale():
+    before = tag_extractor.get_advanced_field_fingerprints()
+    matcher_source = next(path for path in tag_extractor._MATCHING_SOURCES if path.endswith("taxonomy_matcher.py"))
+    edited = os.path.join(tempfile.mkdtemp(), "taxonomy_matcher.py")
+    with open(matcher_source, encoding="utf-8") as src, open(edited, "w", encoding="utf-8") as dst:
+        dst.write(src.read() + "\n# matching modifié\n")
+
+    sources = tag_extractor._MATCHING_SOURCES
+    tag_extractor._MATCHING_SOURCES = tuple(edited if path == matcher_source else path for path in sources)
+    tag_extractor._FIELD_FINGERPRINTS = tag_extractor._ADVANCED_FIELD_FINGERPRINTS = None
+    try:
+        base_after = tag_extractor.get_field_fingerprints()
+        after = tag_extractor.get_advanced_field_fingerprints()
+    finally:
+        tag_extractor._MATCHING_SOURCES = sources
+        tag_extractor._FIELD_FINGERPRINTS = tag_extractor._ADVANCED_FIELD_FINGERPRINTS = None
+    assert all(before[name] != after[name] for name in before)
+    assert set(base_after) == set(tag_extractor.TAG_FIELDS)
+
+
+if __name__ == "__main__":
+    test_only_stale_fields_are_retagged()
+    test_advanced_rows_keep_the_advanced_view()
+    test_rows_are_retagged_with_their_scan_language()
+    test_advanced_mapping_change_marks_field_stale()
+    test_matcher_change_marks_every_field_stale()
+    print("✅ Re-tagging sélectif OK")
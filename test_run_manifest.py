@@ -0,0 +1,106 @@
+"""
+Test du manifeste de reprise (main.py --resume)
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import profile_pipeline
+from csv_processor import CSVProcessor
+from profile_generator import ProfileGenerator
+from profile_pipeline import run_parallel, run_serial
+from run_manifest import RunManifest
+from text_analyzer import TextAnalyzer
+from tag_engine import TagEngine
+
+HEADER = "ID,Date,Transcription\n"
+
+
+def _write_rows(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER + "".join(f'CA{i:03d},2024-03-01,"{text}"\n' for i, text in enumerate(rows)))
+
+
+def _crash_after(rows, n):
+    for i, row in enumerate(rows):
+        if i == n:
+            raise KeyboardInterrupt
+        yield row
+
+
+def test_interrupted_run_resumes_where_it_stopped():
+    analyzer, engine = TextAnalyzer(), TagEngine()
+    texts = [f"Cliente {i} ans, cherche un sac noir, budget {i}k" for i in range(20, 50)]
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, "input.csv")
+        _write_rows(source, texts)
+        generator = ProfileGenerator(os.path.join(root, "profiles.db"), os.path.join(root, "json"))
+
+        previous = profile_pipeline.CHECKPOINT_EVERY, profile_pipeline.KNOWN_LOOKUP_BATCH
+        profile_pipeline.CHECKPOINT_EVERY, profile_pipeline.KNOWN_LOOKUP_BATCH = 5, 1
+        try:
+            manifest = RunManifest.start(generator.db_path, "profiles", source)
+            try:
+                run_serial(_crash_after(CSVProcessor(source).iter_conversations(), 12),
+                           generator, analyzer, engine, manifest=manifest)
+            except KeyboardInterrupt:
+                pass
+            assert len(manifest.completed_rows()) == 10
+
+            # Reprise: seules les lignes non enregistrées sont retraitées
+            manifest = RunManifest.start(generator.db_path, "profiles", source, resume=True)
+            assert not manifest.is_complete
+            processed = run_serial(CSVProcessor(source).iter_conversations(), generator, analyzer, engine,
+                                   manifest=manifest)
+            # Les 2 lignes sauvegardées mais non marquées sont reconnues à leur empreinte
+            assert (processed, manifest.skipped) == (18, 10)
+            manifest.finish()
+        finally:
+            profile_pipeline.CHECKPOINT_EVERY, profile_pipeline.KNOWN_LOOKUP_BATCH = previous
+
+        # Fichier inchangé: rien à relire
+        assert RunManifest.start(generator.db_path, "profiles", source, resume=True).is_complete
+        assert len(generator.get_all_profiles()) == 30
+
+        # Fichier modifié (une ligne corrigée, deux ajoutées): seules ces lignes sont traitées
+        texts[3] = "Cliente corrigée, budget 9k"
+        _write_rows(source, texts + ["Nouveau client, montre", "Nouvelle cliente, parfum"])
+        manifest = RunManifest.start(generator.db_path, "profiles", source, resume=True)
+        processed = run_parallel(CSVProcessor(source).iter_conversations(), generator, workers=2,
+                                 task_size=3, manifest=manifest)
+        manifest.finish()
+        assert (processed, manifest.skipped) == (3, 29), (processed, manifest.skipped)
+        assert generator.get_profile("CA003")["transcription"] == "Cliente corrigée, budget 9k"
+        assert RunManifest.start(generator.db_path, "profiles", source, resume=True).is_complete
+
+        # Sans --resume: nouveau départ
+        manifest = RunManifest.start(generator.db_path, "profiles", source)
+        assert not manifest.is_complete and manifest.completed_rows() == {}
+
+
+def test_results_are_kept_for_restoration():
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, "input.csv")
+        _write_rows(source, ["a", "b", "c"])
+        db_path = os.path.join(root, "runs.db")
+        manifest = RunManifest.start(db_path, "cleaning", source)
+        todo = list(manifest.pending(["texte a", "texte b", "texte c"]))
+        manifest.record([todo[0][0], todo[2][0]], ["A", "C"])
+
+        manifest = RunManifest.start(db_path, "cleaning", source, resume=True)
+        remaining = list(manifest.pending(["texte a", "texte b", "texte c"]))
+        assert [offset for (offset, _), _ in remaining] == [1]
+        assert manifest.results() == {0: "A", 2: "C"}
+
+        # Lignes disparues du fichier oubliées en fin de traitement
+        manifest.finish(total_rows=1)
+        assert manifest.results() == {0: "A"}
+
+
+if __name__ == "__main__":
+    test_interrupted_run_resumes_where_it_stopped()
+    test_results_are_kept_for_restoration()
+    print("✅ Tests manifeste de reprise OK")
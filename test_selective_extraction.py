@@ -0,0 +1,44 @@
+"""
+Test de l'extraction sélective: extract_all_tags(text, fields=...)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import tag_extractor
+
+TEXT = (
+    "Cliente fidèle, je viens chaque mois. Je vis à Genève, j'adore le yoga et le jazz. "
+    "Budget environ 5000€ pour un sac en cuir noir."
+)
+
+
+def test_partial_matches_full_extraction():
+    full = tag_extractor.extract_tags_from_cleaned(tag_extractor.clean_text_turbo(TEXT))
+    partial = tag_extractor.extract_tags_from_cleaned(full["cleaned_text"], ["budget", "pays", "frequence_achat"])
+
+    # Seuls les champs demandés sont renvoyés, calculés comme en extraction complète
+    assert list(partial) == ["cleaned_text", "budget", "pays", "frequence_achat"]
+    for name in ["budget", "pays", "frequence_achat"]:
+        assert partial[name] == full[name], name
+
+
+def test_dependencies_resolved_in_order():
+    assert tag_extractor._resolve_fields(["pays"]) == ["ville", "pays"]
+    assert tag_extractor._resolve_fields(["frequence_achat"]) == ["statut_client", "frequence_achat"]
+
+
+def test_unknown_field_rejected():
+    try:
+        tag_extractor.extract_all_tags(TEXT, fields=["inexistant"])
+    except ValueError:
+        return
+    raise AssertionError("ValueError attendue")
+
+
+if __name__ == "__main__":
+    test_partial_matches_full_extraction()
+    test_dependencies_resolved_in_order()
+    test_unknown_field_rejected()
+    print("✅ Extraction sélective OK")
@@ -0,0 +1,108 @@
+"""
+Test du pool de connexions SQLite (src/database.py)
+"""
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import database
+
+
+def _db():
+    db_path = os.path.join(tempfile.mkdtemp(), "clients.db")
+    database.init_database(db_path)
+    return db_path
+
+
+def test_connection_is_reused_with_pragmas_applied_once():
+    db_path = _db()
+    with database.sqlite_connection(db_path) as first:
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert first.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert first.execute("PRAGMA busy_timeout").fetchone()[0] == database.SQLITE_PRAGMAS["busy_timeout"]
+    with database.sqlite_connection(db_path) as second:
+        assert second is first
+
+    # Un autre thread a sa propre connexion
+    other = []
+    thread = threading.Thread(target=lambda: other.append(database.get_database_stats(db_path)))
+    thread.start()
+    thread.join()
+    assert other == [database.get_database_stats(db_path)]
+
+    database.close_sqlite_connections()
+    with database.sqlite_connection(db_path) as third:
+        assert third is not first
+
+
+def test_outer_block_commits_or_rolls_back():
+    db_path = _db()
+    insert = "INSERT INTO clients (id) VALUES (?)"
+    try:
+        with database.sqlite_connection(db_path) as conn:
+            conn.execute(insert, ("CA001",))
+            with database.sqlite_connection(db_path) as inner:
+                inner.execute(insert, ("CA002",))
+            assert conn.in_transaction  # le bloc interne ne valide pas
+            raise RuntimeError("échec")
+    except RuntimeError:
+        pass
+    assert database.get_database_stats(db_path)["clients"] == 0
+
+    with database.sqlite_connection(db_path) as conn:
+        conn.execute(insert, ("CA003",))
+    assert [c["id"] for c in database.get_all_clients(db_path)] == ["CA003"]
+
+
+def test_failed_commit_releases_the_transaction():
+    import sqlite3
+    db_path = _db()
+    try:
+        with database.sqlite_connection(db_path) as conn:
+            conn.execute("PRAGMA defer_foreign_keys = ON")
+            # Violation différée: détectée seulement au commit
+            conn.execute("INSERT INTO transcriptions (client_id, texte_original) VALUES ('INCONNU', 'x')")
+    except sqlite3.IntegrityError:
+        pass
+    else:
+        raise AssertionError("commit attendu en échec")
+    assert not conn.in_transaction
+
+    # Connexion du pool réutilisable, et base non verrouillée pour les autres connexions
+    with database.sqlite_connection(db_path) as conn:
+        conn.execute("INSERT INTO clients (id) VALUES ('CA001')")
+    other = database.get_sqlite_connection(db_path)
+    try:
+        other.execute("PRAGMA busy_timeout = 0")
+        with other:
+            other.execute("INSERT INTO clients (id) VALUES ('CA002')")
+    finally:
+        other.close()
+    assert database.get_database_stats(db_path)["clients"] == 2
+    assert database.get_database_stats(db_path)["transcriptions"] == 0
+
+
+def test_configure_sqlite_reopens_pooled_connections():
+    db_path = _db()
+    previous = database.SQLITE_PRAGMAS["cache_size"]
+    with database.sqlite_connection(db_path) as before:
+        pass
+    try:
+        database.configure_sqlite(cache_size=-1000)
+        with database.sqlite_connection(db_path) as after:
+            assert after is not before
+            assert after.execute("PRAGMA cache_size").fetchone()[0] == -1000
+    finally:
+        database.configure_sqlite(cache_size=previous)
+
+
+if __name__ == "__main__":
+    test_connection_is_reused_with_pragmas_applied_once()
+    test_outer_block_commits_or_rolls_back()
+    test_failed_commit_releases_the_transaction()
+    test_configure_sqlite_reopens_pooled_connections()
+    print("✅ Tests pool SQLite OK")
@@ -0,0 +1,107 @@
+"""
+Test de la synchro Supabase groupée (contre le PostgREST de substitution)
+"""
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+
+import database
+from postgrest_standin import PostgrestStandIn, synthetic_results
+from supabase_sync import SupabaseSync, transcription_key
+
+
+def _sync(server, **options):
+    options = dict({"batch_size": 8, "concurrency": 4, "backoff_s": 0.001}, **options)
+    return SupabaseSync(server.url, "test-key", **options)
+
+
+def test_batched_sync_links_rows_and_survives_transient_failures():
+    results = synthetic_results(40)
+    results.append(dict(results[3], transcription_originale="Autre note", segment_client=None))
+    with PostgrestStandIn(fail_every=3) as server:
+        sync = _sync(server)
+        stats = sync.sync_scan_results(results, source_file="notes.csv")
+        assert (stats["inserted"], stats["skipped"], stats["errors"]) == (41, 0, 0)
+        assert sync.counters["retries"] > 0
+        # 40 clients / 41 transcriptions / 41 tags / 21 analyses, par lots de 8
+        assert sync.counters["requests"] - sync.counters["retries"] < 25
+
+        tables = server.tables
+        assert len(tables["clients"]) == 40 and len(tables["transcriptions"]) == 41
+        assert len(tables["ai_analyses"]) == 21
+        for tags in tables["tags_extraits"].values():
+            transcription = tables["transcriptions"][tags["transcription_id"]]
+            assert transcription["client_id"] == tags["client_id"]
+            assert transcription["id"] == transcription_key(tags["client_id"], transcription["content_hash"])
+        # Client présent deux fois dans le lot: les valeurs non nulles sont gardées
+        assert tables["clients"]["CA00003"]["segment"] == "VIP"
+
+        # Ré-import: tout est reconnu, rien n'est renvoyé
+        again = _sync(server).sync_scan_results(results)
+        assert (again["inserted"], again["skipped"]) == (0, 41)
+
+
+def test_failed_batches_are_reported_not_raised():
+    results = synthetic_results(10)
+    results[4]["tags_extracted"] = ["pas", "un", "dictionnaire"]
+    with PostgrestStandIn() as server:
+        sync = _sync(server, max_retries=1)
+        server.tables.pop("ai_analyses")  # table absente: 404, non rejoué
+        stats = sync.sync_scan_results(results)
+        assert (stats["inserted"], stats["errors"]) == (9, 1)
+        # Invalide + résultats dont l'analyse n'a pas pu être écrite: à rejouer
+        assert stats["failed"] == [1, 3, 4, 5, 7, 9]
+        assert sync.counters["retries"] == 0
+
+
+def test_partially_written_results_are_completed_on_replay():
+    results = synthetic_results(4)
+    with PostgrestStandIn() as server:
+        sync = _sync(server, max_retries=0)
+        tags_table = server.tables.pop("tags_extraits")  # lot de tags en échec
+        first = sync.sync_scan_results(results)
+        assert first["failed"] == [0, 1, 2, 3] and len(server.tables["transcriptions"]) == 4
+
+        # Rejeu (file d'écriture): transcriptions présentes mais incomplètes -> renvoyées
+        server.tables["tags_extraits"] = tags_table
+        again = sync.sync_scan_results([results[i] for i in first["failed"]])
+        assert (again["inserted"], again["skipped"], again["failed"]) == (4, 0, [])
+        assert len(tags_table) == 4 and len(server.tables["transcriptions"]) == 4
+        assert sync.sync_scan_results(results)["skipped"] == 4
+
+
+def test_database_delegates_to_the_sync_in_supabase_mode():
+    previous = database.USE_SUPABASE, os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_KEY")
+    with PostgrestStandIn() as server:
+        database.USE_SUPABASE = True
+        os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"] = server.url, "test-key"
+        try:
+            results = synthetic_results(5)
+            assert database.save_scan_results(results, source_file="a.csv")["inserted"] == 5
+            digest = server.tables["transcriptions"][next(iter(server.tables["transcriptions"]))]["content_hash"]
+            assert len(database.get_known_content_hashes([("CA00000", digest), ("CA00001", digest)])) == 1
+
+            database.save_ai_results([{"client_id": "CA00001", "resume_complet": "Fidèle", "segment_client": "VIP",
+                                       "insights_marketing": {"k": 1}}] * 2)
+            assert server.tables["clients"]["CA00001"]["segment"] == "VIP"
+            analyses = [a for a in server.tables["ai_analyses"].values() if a["resume_complet"] == "Fidèle"]
+            assert len(analyses) == 1 and json.loads(analyses[0]["insights_json"]) == {"k": 1}
+        finally:
+            database.USE_SUPABASE = previous[0]
+            for name, value in zip(("SUPABASE_URL", "SUPABASE_KEY"), previous[1:]):
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+if __name__ == "__main__":
+    test_batched_sync_links_rows_and_survives_transient_failures()
+    test_failed_batches_are_reported_not_raised()
+    test_partially_written_results_are_completed_on_replay()
+    test_database_delegates_to_the_sync_in_supabase_mode()
+    print("✅ Tests synchro Supabase OK")
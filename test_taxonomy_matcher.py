@@ -0,0 +1,146 @@
+"""
+Test de l'automate compilé (Aho-Corasick) de tag_extractor
+Vérifie l'équivalence avec le matching regex mot-à-mot historique
+"""
+import re
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import tag_extractor
+from taxonomy_matcher import CompiledTaxonomy, KeywordAutomaton
+
+
+TEXTS = [
+    "Je suis avocat à Paris, je cherche un cadeau pour les 30 ans de ma femme. Budget environ 8000€. "
+    "Elle aime le style chic et le cuir noir. C'est assez urgent pour la semaine prochaine.",
+    "Cliente fidèle, vit à Genève, adore le yoga, le jazz et la gastronomie. Préfère le contact par WhatsApp.",
+    "Hello, I live in New York, looking for a black leather bag for my wife, travel a lot to Tokyo.",
+    "Jean cherche un pantalon; pas fan du noir, plutôt beige et écru. Parisienne dans l'âme.",
+    "",
+]
+
+
+def _reference_scan(text, mapping):
+    """Ancienne implémentation: une regex par mot-clé."""
+    found = []
+    for key, value in mapping.items():
+        groups = value.items() if isinstance(value, dict) else [(key, value)]
+        for category, keywords in groups:
+            if not isinstance(keywords, list):
+                continue
+            for kw in keywords:
+                kw_clean = kw.strip().lower()
+                if not tag_extractor._is_matchable_keyword(kw_clean):
+                    continue
+                if re.search(rf"(?<!\w){re.escape(kw_clean)}(?!\w)", text.lower()):
+                    found.append(category)
+                    break
+    return list(dict.fromkeys(found))
+
+
+def _reference_substring_scan(text, mapping):
+    """Ancien matching de advanced_extractor / app.py (sous-chaîne brute)."""
+    return [cat for cat, keywords in mapping.items() if any(kw.lower() in text.lower() for kw in keywords)]
+
+
+def test_automaton_word_boundaries():
+    automaton = KeywordAutomaton()
+    for kw in ["sac", "sac à main", "main", "ac"]:
+        automaton.add(kw, kw)
+    found = [p for _, _, p in automaton.iter_word_matches("un sac à main, sacoche")]
+    assert sorted(found) == ["main", "sac", "sac à main"]
+
+
+def test_compiled_matches_reference():
+    matcher = tag_extractor.TAXONOMY_MATCHER
+    for name, mapping in matcher.mappings.items():
+        for text in TEXTS:
+            assert tag_extractor.scan_text_for_keywords_advanced(text, mapping) == _reference_scan(text, mapping), name
+
+
+def test_substring_view_matches_reference():
+    matcher = tag_extractor.TAXONOMY_MATCHER
+    for name, mapping in matcher.mappings.items():
+        if not all(isinstance(v, list) for v in mapping.values()):
+            continue
+        for text in TEXTS:
+            assert tag_extractor.scan_text_substring(text, mapping) == _reference_substring_scan(text, mapping), name
+
+
+def test_unregistered_mapping_fallback():
+    mapping = {"Test": ["sac à main"], "Autre": ["inexistant"]}
+    assert tag_extractor.scan_text_for_keywords("Un SAC À MAIN noir", mapping) == ["Test"]
+
+
+def test_artifact_roundtrip_and_stale_fallback():
+    path = os.path.join(tempfile.mkdtemp(), "taxonomy.pkl")
+    mappings = tag_extractor._taxonomy_mappings()
+    compiled = tag_extractor._build_taxonomy_matcher(mappings)
+    compiled.save(path, "fp-v1")
+
+    loaded = CompiledTaxonomy.load(path, "fp-v1", mappings)
+    assert loaded is not None
+    for text in TEXTS:
+        for name in mappings:
+            assert loaded.categories(text, name) == compiled.categories(text, name)
+            assert loaded.categories(text, name, substring=True) == compiled.categories(text, name, substring=True)
+
+    # Taxonomie modifiée (autre empreinte) ou fichier corrompu: recompilation
+    assert CompiledTaxonomy.load(path, "fp-v2", mappings) is None
+    with open(path, "wb") as f:
+        f.write(b"corrompu")
+    assert CompiledTaxonomy.load(path, "fp-v1", mappings) is None
+
+
+def test_batch_preserves_order():
+    texts = [t for t in TEXTS if t] * 20
+    expected = [tag_extractor.extract_all_tags(t) for t in texts]
+    assert tag_extractor.extract_all_tags_batch(texts, workers=2) == expected
+
+
+def test_batch_falls_back_only_when_the_pool_cannot_start():
+    import concurrent.futures
+    texts = [f"{t} ({i})" for i, t in enumerate(TEXTS * 20) if t]
+    expected = [tag_extractor.extract_all_tags(t) for t in texts]
+
+    def no_pool(*args, **kwargs):
+        raise OSError("fork refusé")
+
+    executor = concurrent.futures.ProcessPoolExecutor
+    concurrent.futures.ProcessPoolExecutor = no_pool
+    try:
+        assert tag_extractor.extract_all_tags_batch(texts, workers=2) == expected
+    finally:
+        concurrent.futures.ProcessPoolExecutor = executor
+
+    # Une erreur d'extraction des workers remonte telle quelle: pas de reprise séquentielle
+    parent_calls = []
+
+    def broken(cleaned_text, fields=None, language=None):
+        parent_calls.append(cleaned_text)  # liste du parent: les workers n'écrivent que dans leur copie
+        raise RuntimeError("extracteur en panne")
+
+    extract = tag_extractor.extract_tags_from_cleaned
+    tag_extractor.extract_tags_from_cleaned = broken
+    try:
+        tag_extractor.extract_all_tags_batch([f"{t} (neuf)" for t in texts], workers=2)
+    except RuntimeError as e:
+        assert "extracteur en panne" in str(e) and parent_calls == []
+    else:
+        raise AssertionError("l'erreur d'extraction a été masquée")
+    finally:
+        tag_extractor.extract_tags_from_cleaned = extract
+
+
+if __name__ == "__main__":
+    test_automaton_word_boundaries()
+    test_compiled_matches_reference()
+    test_substring_view_matches_reference()
+    test_unregistered_mapping_fallback()
+    test_artifact_roundtrip_and_stale_fallback()
+    test_batch_preserves_order()
+    test_batch_falls_back_only_when_the_pool_cannot_start()
+    print("✅ Automate compilé conforme au matching historique")
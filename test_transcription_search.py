@@ -0,0 +1,89 @@
+"""
+Test de la recherche plein texte des transcriptions (FTS5)
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import database
+
+NOTES = [
+    ("CA001", "Cliente pour une réunion à Zürich, cherche un sac noir", {"ville": "Zurich", "couleurs": ["Noir"]}),
+    ("CA002", "Regalo per la madre, viaggio a Milano, borsa nera", {"ville": "Milan", "couleurs": ["Noir", "Rouge"]}),
+    ("CA003", "Sac noir, sac noir encore: elle adore les sacs noirs", {"ville": "Paris", "couleurs": ["Noir"]}),
+    ("CA004", "Necesita un regalo de cumpleaños, señora muy fiel", {"ville": "Madrid", "couleurs": ["Bleu"]}),
+]
+
+
+def _db():
+    db_path = os.path.join(tempfile.mkdtemp(), "clients.db")
+    database.init_database(db_path)
+    database.save_scan_results([
+        {"client_id": cid, "transcription_originale": text, "cleaned_text": text.lower(), "tags_extracted": tags}
+        for cid, text, tags in NOTES
+    ], db_path=db_path)
+    return db_path
+
+
+def _ids(rows):
+    return [row["client_id"] for row in rows]
+
+
+def test_search_folds_accents_ranks_and_highlights():
+    db_path = _db()
+    assert _ids(database.search_transcriptions("reunion zurich", db_path)) == ["CA001"]
+    assert _ids(database.search_transcriptions("cumpleanos senora", db_path)) == ["CA004"]
+    # Les occurrences répétées passent en tête ; un mot sert de préfixe ("sac" -> "sacs")
+    rows = database.search_transcriptions("sac noir", db_path)
+    assert _ids(rows) == ["CA003", "CA001"]
+    assert "**Sac**" in rows[0]["snippet"] and rows[0]["rank"] <= rows[1]["rank"]
+    assert _ids(database.search_transcriptions('"un sac noir"', db_path)) == ["CA001"]
+    # Segment / ville du client joints au résultat, saisie sans mot sans erreur
+    assert rows[0]["client_id"] == "CA003" and "genre" in rows[0]
+    assert database.search_transcriptions('"*(', db_path) == []
+
+
+def test_index_follows_updates_and_deletes():
+    db_path = _db()
+    with database.sqlite_connection(db_path) as conn:
+        conn.execute("UPDATE transcriptions SET texte_original = 'Montre de plongée', texte_nettoye = 'montre plongée' "
+                     "WHERE client_id = 'CA001'")
+        conn.execute("DELETE FROM tags_extraits WHERE client_id = 'CA004'")
+        conn.execute("DELETE FROM transcriptions WHERE client_id = 'CA004'")
+    assert _ids(database.search_transcriptions("plongee", db_path)) == ["CA001"]
+    assert _ids(database.search_transcriptions("zurich", db_path)) == []
+    assert database.search_transcriptions("regalo", db_path)[0]["client_id"] == "CA002"
+    assert len(database.search_transcriptions("regalo", db_path)) == 1
+
+
+def test_full_text_and_tag_filters_in_one_query():
+    db_path = _db()
+    assert _ids(database.search_transcriptions("noir", db_path, tags={"ville": "Paris"})) == ["CA003"]
+    assert _ids(database.search_transcriptions("regalo", db_path, tags={"couleurs": "Rouge"})) == ["CA002"]
+    assert database.search_transcriptions("regalo", db_path, tags={"couleurs": "Vert"}) == []
+    # Sans texte: filtre sur les tags seul (valeurs alternatives en liste)
+    assert sorted(_ids(database.search_transcriptions("", db_path, tags={"ville": ["Madrid", "Milan"]}))) == ["CA002", "CA004"]
+
+
+def test_existing_database_is_indexed_on_init():
+    db_path = _db()
+    with database.sqlite_connection(db_path) as conn:
+        conn.executescript("""
+            DROP TRIGGER transcriptions_fts_ai; DROP TRIGGER transcriptions_fts_ad; DROP TRIGGER transcriptions_fts_au;
+            DROP TABLE transcriptions_fts;
+        """)
+    # Sans index: recherche par sous-chaîne
+    assert _ids(database.search_transcriptions("Zürich", db_path)) == ["CA001"]
+    database.init_database(db_path)
+    assert _ids(database.search_transcriptions("zurich", db_path)) == ["CA001"]
+
+
+if __name__ == "__main__":
+    test_search_folds_accents_ranks_and_highlights()
+    test_index_follows_updates_and_deletes()
+    test_full_text_and_tag_filters_in_one_query()
+    test_existing_database_is_indexed_on_init()
+    print("✅ Tests recherche plein texte OK")
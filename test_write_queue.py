@@ -0,0 +1,177 @@
+"""
+Test de la file d'écriture différée (write-behind) de app.py
+"""
+import sys
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+
+import database
+from write_queue import WriteQueue
+
+
+def _result(client_id, text, **extra):
+    return dict({
+        "client_id": client_id,
+        "transcription_originale": text,
+        "cleaned_text": text.lower(),
+        "tags_extracted": {"genre": "Femme"},
+        "resume_complet": "Analyse IA en attente...",
+    }, **extra)
+
+
+def test_queued_results_survive_a_restart_and_are_coalesced():
+    root = tempfile.mkdtemp()
+    db_path = os.path.join(root, "clients.db")
+    database.init_database(db_path)
+    queue_path = os.path.join(root, "queue.db")
+
+    # Dépôts de deux sessions, application arrêtée avant écriture
+    first = WriteQueue(queue_path)
+    first.enqueue_scan_results([_result("CA001", "Paris", source_date=pd.Timestamp("2024-03-01"))],
+                               source_file="a.csv", db_path=db_path)
+    first.enqueue_scan_results([_result("CA002", "Lyon", source_date=pd.NaT)], source_file="a.csv", db_path=db_path)
+    first.enqueue_ai_results([{"client_id": "CA001", "resume_complet": "Fidèle", "segment_client": "VIP"}],
+                             db_path=db_path)
+    assert first.status()["pending_results"] == 3
+    assert database.get_database_stats(db_path)["transcriptions"] == 0
+
+    calls = []
+    writers = {kind: (lambda kind, write: lambda *args: calls.append(kind) or write(*args))(kind, write)
+               for kind, write in WriteQueue(queue_path).writers.items()}
+    restarted = WriteQueue(queue_path, writers=writers).start()
+    try:
+        assert restarted.flush(timeout=10)
+    finally:
+        restarted.stop(timeout=5)
+    # Les deux dépôts "scan" consécutifs: un seul appel ; l'ordre scan -> IA est gardé
+    assert calls == ["scan", "ai"]
+    status = restarted.status()
+    assert (status["pending_jobs"], status["written_results"], status["inserted"]) == (0, 3, 3)
+    assert database.get_client_history("CA001", db_path)["client"]["segment"] == "VIP"
+    history = {c: database.get_client_history(c, db_path)["transcriptions"][0] for c in ("CA001", "CA002")}
+    assert history["CA001"]["source_date"].startswith("2024-03-01") and history["CA002"]["source_date"] is None
+
+
+def test_failed_writes_are_retried_then_kept_for_diagnosis():
+    attempts = []
+
+    def flaky(results, source_file, db_path):
+        attempts.append(len(results))
+        raise RuntimeError("database is locked")
+
+    queue = WriteQueue(os.path.join(tempfile.mkdtemp(), "queue.db"), writers={"scan": flaky},
+                       max_attempts=2, retry_delay_s=0)
+    queue.enqueue("scan", [_result("CA001", "Paris")])
+    assert not queue.flush()  # 1er échec: nouvel essai prévu
+    assert queue.status()["retrying_jobs"] == 1
+    assert not queue.flush()
+    assert queue.status()["failed_jobs"] == 1 and attempts == [1, 1]
+    assert "locked" in queue.status()["last_error"]
+
+    queue.writers = {"scan": lambda results, source_file, db_path: {"inserted": len(results)}}
+    assert queue.retry_failed() == 1
+    assert queue.flush() and queue.status()["failed_jobs"] == 0
+
+
+def test_only_unwritten_results_are_retried():
+    calls = []
+
+    def partial(results, source_file, db_path):
+        calls.append([r["client_id"] for r in results])
+        # 1er appel: le 2e résultat n'est pas écrit (lot en échec côté base)
+        return {"inserted": len(results) - 1, "failed": [1]} if len(calls) == 1 else {"inserted": len(results)}
+
+    queue = WriteQueue(os.path.join(tempfile.mkdtemp(), "queue.db"), writers={"scan": partial}, retry_delay_s=0)
+    queue.enqueue("scan", [_result("CA001", "Paris"), _result("CA002", "Lyon")])
+    queue.enqueue("scan", [_result("CA003", "Nice")])
+    assert not queue.flush()
+    status = queue.status()
+    assert (status["pending_jobs"], status["pending_results"], status["retrying_jobs"]) == (1, 1, 1)
+    assert queue.flush()
+    assert calls == [["CA001", "CA002", "CA003"], ["CA002"]]
+    assert queue.status()["written_results"] == 3
+
+
+def test_row_failing_halfway_is_completed_on_replay():
+    root = tempfile.mkdtemp()
+    db_path = os.path.join(root, "clients.db")
+    database.init_database(db_path)
+    # Les tags de CA002 sont refusés après l'insertion de sa transcription
+    with database.sqlite_connection(db_path) as conn:
+        conn.execute("CREATE TRIGGER refuse_tags BEFORE INSERT ON tags_extraits WHEN NEW.client_id = 'CA002' "
+                     "BEGIN SELECT RAISE(ABORT, 'tags refusés'); END")
+
+    queue = WriteQueue(os.path.join(root, "queue.db"), retry_delay_s=0)
+    queue.enqueue_scan_results([_result("CA001", "Paris"), _result("CA002", "Lyon")], db_path=db_path)
+    assert not queue.flush()
+    assert queue.status()["pending_results"] == 1
+    assert database.get_database_stats(db_path)["transcriptions"] == 1
+
+    with database.sqlite_connection(db_path) as conn:
+        conn.execute("DROP TRIGGER refuse_tags")
+    assert queue.flush()
+    history = database.get_client_history("CA002", db_path)
+    assert len(history["transcriptions"]) == 1
+    assert database.get_database_stats(db_path)["tags_extraits"] == 2
+
+
+def test_supabase_outage_keeps_results_queued():
+    from postgrest_standin import PostgrestStandIn, synthetic_results
+    from supabase_sync import SupabaseSync
+
+    down = PostgrestStandIn().start()
+    target = {"url": down.url}
+    down.stop()  # serveur injoignable (port fermé)
+
+    def write_scan(results, source_file, db_path):
+        sync = SupabaseSync(target["url"], "test-key", max_retries=0, timeout=2)
+        return sync.sync_scan_results(results, source_file=source_file)
+
+    queue = WriteQueue(os.path.join(tempfile.mkdtemp(), "queue.db"), writers={"scan": write_scan}, retry_delay_s=0)
+    queue.enqueue("scan", synthetic_results(3))
+    assert not queue.flush()
+    assert queue.status()["pending_results"] == 3
+
+    with PostgrestStandIn() as server:
+        target["url"] = server.url
+        assert queue.flush()
+        assert len(server.tables["transcriptions"]) == len(server.tables["tags_extraits"]) == 3
+    assert queue.status()["pending_jobs"] == 0
+
+
+def test_concurrent_sessions_share_a_single_writer():
+    root = tempfile.mkdtemp()
+    db_path = os.path.join(root, "clients.db")
+    database.init_database(db_path)
+    queue = WriteQueue(os.path.join(root, "queue.db")).start()
+    try:
+        sessions = [threading.Thread(target=queue.enqueue_scan_results,
+                                     args=([_result(f"CA{s}{i:02d}", f"Note {s}-{i}") for i in range(20)],),
+                                     kwargs={"db_path": db_path})
+                    for s in range(4)]
+        for thread in sessions:
+            thread.start()
+        for thread in sessions:
+            thread.join()
+        assert queue.flush(timeout=10)
+    finally:
+        queue.stop(timeout=5)
+    assert database.get_database_stats(db_path)["transcriptions"] == 80
+    assert queue.status()["errors"] == 0
+
+
+if __name__ == "__main__":
+    test_queued_results_survive_a_restart_and_are_coalesced()
+    test_failed_writes_are_retried_then_kept_for_diagnosis()
+    test_only_unwritten_results_are_retried()
+    test_row_failing_halfway_is_completed_on_replay()
+    test_supabase_outage_keeps_results_queued()
+    test_concurrent_sessions_share_a_single_writer()
+    print("✅ Tests file d'écriture OK")